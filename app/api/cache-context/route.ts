@@ -63,7 +63,7 @@ import { DashboardContext } from "@/types/dashboard-context";
  * Cache dashboard context for a session
  * 
  * @param request - HTTP request with DashboardContext body
- * @returns Success response with sessionId and data quality indicator
+ * @returns Success response with sessionId, whether the context was cached and data quality indicator
  */
 export async function POST(request: Request) {
     try {
@@ -77,13 +77,14 @@ export async function POST(request: Request) {
             );
         }
 
-        // Cache the context with sessionId as key
-        setCachedContext(body.sessionId, body);
+        // Cache the context with sessionId as key (refused when its data predates an ingest)
+        const cached = setCachedContext(body.sessionId, body);
 
         console.log(`[Cache API] ${getContextSummary(body)}`);
 
         return NextResponse.json({
             success: true,
+            cached,
             sessionId: body.sessionId,
             timestamp: body.timestamp,
             dataQuality: body.metadata.dataQuality,
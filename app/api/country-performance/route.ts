@@ -63,6 +63,7 @@
  */
 
 import { NextRequest, NextResponse } from "next/server";
+import { dataGenerationHeaders } from "@/database/db";
 import { getCountryPerformanceSimplified } from "@/database/queries/country-performance";
 
 /**
@@ -83,6 +84,7 @@ import { getCountryPerformanceSimplified } from "@/database/queries/country-perf
  */
 export async function GET(request: NextRequest) {
   try {
+    const headers = dataGenerationHeaders();
     const searchParams = request.nextUrl.searchParams;
 
     // Extract filter parameters
@@ -118,7 +120,7 @@ export async function GET(request: NextRequest) {
         siteId: siteId || "ALL",
         subjectId: subjectId || "ALL",
       },
-    });
+    }, { headers });
   } catch (error) {
     console.error("Error in country performance API:", error);
     return NextResponse.json(
@@ -21,6 +21,7 @@
  */
 
 import { NextRequest, NextResponse } from "next/server";
+import { dataGenerationHeaders } from "@/database/db";
 import { getDQIMetrics } from "@/database/queries/dqi-metrics";
 
 /**
@@ -43,6 +44,7 @@ import { getDQIMetrics } from "@/database/queries/dqi-metrics";
  */
 export async function GET(request: NextRequest) {
   try {
+    const headers = dataGenerationHeaders();
     const searchParams = request.nextUrl.searchParams;
     const study = searchParams.get("study") || undefined;
     const region = searchParams.get("region") || undefined;
@@ -52,7 +54,7 @@ export async function GET(request: NextRequest) {
 
     const metrics = getDQIMetrics(study, region, country, siteId, subjectId);
 
-    return NextResponse.json(metrics);
+    return NextResponse.json(metrics, { headers });
   } catch (error) {
     console.error("Error in dqi-metrics API:", error);
     return NextResponse.json(
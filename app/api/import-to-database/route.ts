@@ -75,8 +75,13 @@
  * - Cache should be cleared (/api/refresh-cache?clearAll=true)
  * - Temp files can be deleted (not automatic, implement cleanup)
  * 
+ * BATCHING:
+ * - Several renamed folders can be sent at once (folderPaths)
+ * - Uploads arriving while another import runs wait and are imported together
+ *   afterwards, so DQI / clean status run once per batch instead of once per study
+ *
  * DATA SOURCE:
- * - Delegates to importExcelToDatabase from @/database/importToDatabase
+ * - Delegates to queueStudyImports from @/database/importToDatabase
  * - Uses SQLite better-sqlite3 driver for database operations
  * - Excel parsing via exceljs or xlsx library
  * 
@@ -87,7 +92,7 @@
 
 import { NextRequest, NextResponse } from "next/server";
 import { validateUploadedFiles } from "@/database/validateUpload";
-import { importExcelToDatabase } from "@/database/importToDatabase";
+import { queueStudyImports } from "@/database/importToDatabase";
 import * as fs from "fs";
 
 /**
@@ -96,7 +101,8 @@ import * as fs from "fs";
  * Imports validated Excel files into SQLite database.
  * 
  * @param request - HTTP request with body:
- *   - folderPath: Path to folder containing validated Excel files
+ *   - folderPath: Path to folder containing validated Excel files, or
+ *   - folderPaths: Paths of several such folders, imported in one batch
  * 
  * @returns JSON response:
  *   - success: boolean
@@ -106,19 +112,27 @@ import * as fs from "fs";
 export async function POST(request: NextRequest) {
   try {
     const body = await request.json();
-    const { folderPath } = body;
+    const folderPaths: string[] = Array.isArray(body.folderPaths)
+      ? body.folderPaths
+      : body.folderPath
+        ? [body.folderPath]
+        : [];
 
     // Validate required parameter
-    if (!folderPath) {
+    if (folderPaths.length === 0) {
       return NextResponse.json(
         { error: "Folder path is required" },
         { status: 400 },
       );
     }
 
-    // Validate that the folder exists
-    if (!fs.existsSync(folderPath)) {
-      return NextResponse.json({ error: "Folder not found" }, { status: 404 });
+    // Validate that the folders exist
+    const missing = folderPaths.filter((folderPath) => !fs.existsSync(folderPath));
+    if (missing.length > 0) {
+      return NextResponse.json(
+        { error: `Folder not found: ${missing.join(", ")}` },
+        { status: 404 },
+      );
     }
 
     /**
@@ -128,7 +142,10 @@ export async function POST(request: NextRequest) {
      * Regex: Split by path separators, take last segment
      * Fallback: "Study 1" if extraction fails
      */
-    const folderName = folderPath.split(/[/\\]/).pop() || "Study 1";
+    const uploads = folderPaths.map((folderPath) => ({
+      folderPath,
+      studyName: folderPath.split(/[/\\]/).pop() || "Study 1",
+    }));
 
     /**
      * DATABASE IMPORT:
@@ -138,7 +155,7 @@ export async function POST(request: NextRequest) {
      * - Creates indexes for query performance
      * - Returns database path on success
      */
-    const importResult = await importExcelToDatabase(folderPath, folderName);
+    const importResult = await queueStudyImports(uploads);
 
     if (importResult.success) {
       return NextResponse.json({
@@ -69,6 +69,7 @@
  */
 
 import { NextResponse } from "next/server";
+import { dataGenerationHeaders } from "@/database/db";
 import { getKPISummaryWithTrends } from "@/database/queries/kpi-summary";
 
 /**
@@ -87,6 +88,7 @@ import { getKPISummaryWithTrends } from "@/database/queries/kpi-summary";
  */
 export async function GET(request: Request) {
   try {
+    const headers = dataGenerationHeaders();
     // Extract all filter parameters from query string
     // All parameters are optional - omitting a filter means "ALL" for that dimension
     const { searchParams } = new URL(request.url);
@@ -113,7 +115,7 @@ export async function GET(request: Request) {
       subjectId,
     );
 
-    return NextResponse.json(data);
+    return NextResponse.json(data, { headers });
   } catch (error) {
     console.error("Error in /api/kpi:", error);
     return NextResponse.json(
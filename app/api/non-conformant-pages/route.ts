@@ -1,4 +1,5 @@
 import { NextResponse } from "next/server";
+import { dataGenerationHeaders } from "@/database/db";
 import {
   getNonConformantPagesMetrics,
   getNonConformantPagesByStudy,
@@ -27,6 +28,7 @@ import {
  */
 export async function GET(request: Request) {
   try {
+    const headers = dataGenerationHeaders();
     const { searchParams } = new URL(request.url);
     const study = searchParams.get("study") || undefined;
     const region = searchParams.get("region") || undefined;
@@ -60,7 +62,7 @@ export async function GET(request: Request) {
       summary,
       byStudy,
       bySite,
-    });
+    }, { headers });
   } catch (error) {
     console.error("Error fetching non-conformant pages:", error);
     return NextResponse.json(
@@ -66,6 +66,7 @@
  */
 
 import { NextRequest, NextResponse } from "next/server";
+import { dataGenerationHeaders } from "@/database/db";
 import { getPatient360Data } from "@/database/queries/patient-360";
 
 /**
@@ -85,6 +86,7 @@ import { getPatient360Data } from "@/database/queries/patient-360";
  */
 export async function GET(request: NextRequest) {
   try {
+    const headers = dataGenerationHeaders();
     const searchParams = request.nextUrl.searchParams;
     const subjectId = searchParams.get("subjectId");
     const study = searchParams.get("study") || undefined;
@@ -105,7 +107,7 @@ export async function GET(request: NextRequest) {
       return NextResponse.json({ error: "Subject not found" }, { status: 404 });
     }
 
-    return NextResponse.json(data);
+    return NextResponse.json(data, { headers });
   } catch (error) {
     console.error("Error in patient-360 API:", error);
     return NextResponse.json(
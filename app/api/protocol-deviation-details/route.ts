@@ -58,7 +58,7 @@
  */
 
 import { NextResponse } from "next/server";
-import { getDatabase } from "@/database/db";
+import { getDatabase, dataGenerationHeaders } from "@/database/db";
 import {
   getProtocolDeviationMetrics,
   getProtocolDeviationByStudy,
@@ -84,6 +84,7 @@ import {
  */
 export async function GET(request: Request) {
     try {
+        const headers = dataGenerationHeaders();
         // Extract filter parameters from query string
         // Protocol deviations can be analyzed at multiple levels: study, region, country, site
         const { searchParams } = new URL(request.url);
@@ -192,7 +193,7 @@ export async function GET(request: Request) {
                 proposed: getProtocolDeviationMetrics(study || undefined, region || undefined, country || undefined, siteId || undefined, searchParams.get("subjectId") || undefined).proposedCount,
                 total: getProtocolDeviationMetrics(study || undefined, region || undefined, country || undefined, siteId || undefined, searchParams.get("subjectId") || undefined).totalProtocolDeviations,
             },
-        });
+        }, { headers });
     } catch (error) {
         console.error("Error fetching protocol deviation details:", error);
         return NextResponse.json(
@@ -18,7 +18,12 @@
  *    - Clears only their cached context
  *    - Dashboard will auto-cache fresh data on next load
  * 
- * 2. **Global Cache Clear** (clearAll=true):
+ * 2. **Study Invalidation** (studies provided):
+ *    - Clears every session whose context covers one of the studies (or ALL studies)
+ *    - Imports do this automatically; cached contexts are also dropped on read once
+ *      an ingest publishes a new data generation for their study (data_generation table)
+ * 
+ * 3. **Global Cache Clear** (clearAll=true):
  *    - Admin/maintenance operation
  *    - Clears ALL cached sessions
  *    - Use after database updates affecting all users
@@ -51,7 +56,11 @@
  */
 
 import { NextResponse } from "next/server";
-import { deleteCachedContext, clearCache } from "@/lib/cache-service";
+import {
+    deleteCachedContext,
+    clearCache,
+    invalidateStudies,
+} from "@/lib/cache-service";
 
 /**
  * POST /api/refresh-cache
@@ -59,6 +68,7 @@ import { deleteCachedContext, clearCache } from "@/lib/cache-service";
  * 
  * @param request - HTTP request with body:
  *   - sessionId: (optional) Clear specific session cache
+ *   - studies: (optional) Clear sessions covering these studies
  *   - clearAll: (optional) If true, clear ALL cache entries
  * 
  * @returns Success message indicating what was cleared
@@ -66,7 +76,7 @@ import { deleteCachedContext, clearCache } from "@/lib/cache-service";
 export async function POST(request: Request) {
     try {
         const body = await request.json();
-        const { sessionId, clearAll } = body;
+        const { sessionId, studies, clearAll } = body;
 
         // Global cache clear (admin function)
         if (clearAll === true) {
@@ -77,6 +87,17 @@ export async function POST(request: Request) {
             });
         }
 
+        // Study-scoped invalidation
+        if (Array.isArray(studies) && studies.length > 0) {
+            const invalidated = invalidateStudies(studies);
+            return NextResponse.json({
+                success: true,
+                studies,
+                invalidated,
+                message: `Cache cleared for ${invalidated} sessions`,
+            });
+        }
+
         // Single session cache clear
         if (!sessionId) {
             return NextResponse.json(
@@ -113,6 +134,7 @@ export async function GET() {
         message: "Use POST to refresh cache",
         body: {
             sessionId: "string (required to clear specific session)",
+            studies: "string[] (clear sessions covering these studies)",
             clearAll: "boolean (true to clear all sessions - use with caution)",
         },
     });
@@ -66,6 +66,7 @@
  */
 
 import { NextRequest, NextResponse } from "next/server";
+import { dataGenerationHeaders } from "@/database/db";
 import {
   getRegionalDataEntryProgress,
   getCountryDataEntryProgress,
@@ -93,6 +94,7 @@ import {
  */
 export async function GET(request: NextRequest) {
   try {
+    const headers = dataGenerationHeaders();
     const searchParams = request.nextUrl.searchParams;
 
     // Extract filter parameters
@@ -160,7 +162,7 @@ export async function GET(request: NextRequest) {
         siteId: siteId || "ALL",
         subjectId: subjectId || "ALL",
       },
-    });
+    }, { headers });
   } catch (error) {
     console.error("Error in regional data entry API:", error);
     return NextResponse.json(
@@ -76,6 +76,7 @@
  */
 
 import { NextRequest, NextResponse } from "next/server";
+import { dataGenerationHeaders } from "@/database/db";
 import {
   getSAEChartData,
   getSAEByReviewStatus,
@@ -99,6 +100,7 @@ import {
  */
 export async function GET(request: NextRequest) {
   try {
+    const headers = dataGenerationHeaders();
     const searchParams = request.nextUrl.searchParams;
 
     // Extract all filter parameters
@@ -120,13 +122,13 @@ export async function GET(request: NextRequest) {
     // OPTION 1: Review Status Breakdown - Who needs to review?
     if (breakdown === "review") {
       const data = getSAEByReviewStatus(study, country, siteId, subjectId);
-      return NextResponse.json({ data, breakdown: "review_status" });
+      return NextResponse.json({ data, breakdown: "review_status" }, { headers });
     }
 
     // OPTION 2: Action Status Breakdown - What actions are needed?
     if (breakdown === "action") {
       const data = getSAEByActionStatus(study, country, siteId, subjectId);
-      return NextResponse.json({ data, breakdown: "action_status" });
+      return NextResponse.json({ data, breakdown: "action_status" }, { headers });
     }
 
     // OPTION 3: Responsible Function Breakdown - Which team owns it?
@@ -137,7 +139,7 @@ export async function GET(request: NextRequest) {
         siteId,
         subjectId,
       );
-      return NextResponse.json({ data, breakdown: "responsible_lf" });
+      return NextResponse.json({ data, breakdown: "responsible_lf" }, { headers });
     }
 
     /**
@@ -167,7 +169,7 @@ export async function GET(request: NextRequest) {
         reviewStatus: reviewStatus || "ALL",
         actionStatus: actionStatus || "ALL",
       },
-    });
+    }, { headers });
   } catch (error) {
     console.error("Error in SAE chart API:", error);
     return NextResponse.json(
@@ -84,6 +84,7 @@
  */
 
 import { NextRequest, NextResponse } from "next/server";
+import { dataGenerationHeaders } from "@/database/db";
 import {
   getSignatureComplianceData,
   getSignatureComplianceSummary,
@@ -103,6 +104,7 @@ import {
  */
 export async function GET(request: NextRequest) {
   try {
+    const headers = dataGenerationHeaders();
     // Extract all filter parameters from query string including summary mode flag
     const searchParams = request.nextUrl.searchParams;
 
@@ -147,7 +149,7 @@ export async function GET(request: NextRequest) {
           siteId: siteId || "ALL",
           subjectId: subjectId || "ALL",
         },
-      });
+      }, { headers });
     }
 
     /**
@@ -173,7 +175,7 @@ export async function GET(request: NextRequest) {
         siteId: siteId || "ALL",
         subjectId: subjectId || "ALL",
       },
-    });
+    }, { headers });
   } catch (error) {
     console.error("Error in signature compliance API:", error);
     return NextResponse.json(
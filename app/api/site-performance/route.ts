@@ -72,6 +72,7 @@
  */
 
 import { NextRequest, NextResponse } from "next/server";
+import { dataGenerationHeaders } from "@/database/db";
 import { getSitePerformanceData } from "@/database/queries/site-performance";
 
 /**
@@ -91,6 +92,7 @@ import { getSitePerformanceData } from "@/database/queries/site-performance";
  */
 export async function GET(request: NextRequest) {
   try {
+    const headers = dataGenerationHeaders();
     const searchParams = request.nextUrl.searchParams;
 
     // Extract filter parameters
@@ -111,7 +113,7 @@ export async function GET(request: NextRequest) {
      */
     const data = getSitePerformanceData(study, region, country);
 
-    return NextResponse.json(data);
+    return NextResponse.json(data, { headers });
   } catch (error) {
     console.error("Error in site-performance API:", error);
     return NextResponse.json(
@@ -70,6 +70,7 @@
  */
 
 import { NextRequest, NextResponse } from "next/server";
+import { dataGenerationHeaders } from "@/database/db";
 import { getStudyPulseMetrics } from "@/database/queries/study-pulse";
 
 /**
@@ -93,6 +94,7 @@ import { getStudyPulseMetrics } from "@/database/queries/study-pulse";
  */
 export async function GET(request: NextRequest) {
   try {
+    const headers = dataGenerationHeaders();
     const searchParams = request.nextUrl.searchParams;
 
     // Extract all hierarchical filter parameters
@@ -128,7 +130,7 @@ export async function GET(request: NextRequest) {
         siteId: siteId || "ALL",
         subjectId: subjectId || "ALL",
       },
-    });
+    }, { headers });
   } catch (error) {
     console.error("Error in study pulse API:", error);
     // Return safe defaults on error to prevent dashboard breakage
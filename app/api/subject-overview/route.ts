@@ -38,6 +38,7 @@
  */
 
 import { NextRequest, NextResponse } from "next/server";
+import { dataGenerationHeaders } from "@/database/db";
 import { getSubjectOverviewData } from "@/database/queries/subject-overview";
 
 /**
@@ -56,6 +57,7 @@ import { getSubjectOverviewData } from "@/database/queries/subject-overview";
  */
 export async function GET(request: NextRequest) {
   try {
+    const headers = dataGenerationHeaders();
     const searchParams = request.nextUrl.searchParams;
     const study = searchParams.get("study") || undefined;
     const region = searchParams.get("region") || undefined;
@@ -72,7 +74,7 @@ export async function GET(request: NextRequest) {
       subjectId,
     );
 
-    return NextResponse.json({ data });
+    return NextResponse.json({ data }, { headers });
   } catch (error) {
     console.error("Error in subject-overview API:", error);
     return NextResponse.json(
@@ -59,6 +59,7 @@
  */
 
 import { NextRequest, NextResponse } from "next/server";
+import { dataGenerationHeaders } from "@/database/db";
 import { getSubjectPerformance } from "@/database/queries/subject-performance";
 
 /**
@@ -81,6 +82,7 @@ import { getSubjectPerformance } from "@/database/queries/subject-performance";
  */
 export async function GET(request: NextRequest) {
   try {
+    const headers = dataGenerationHeaders();
     const searchParams = request.nextUrl.searchParams;
 
     // Extract filter parameters
@@ -108,7 +110,7 @@ export async function GET(request: NextRequest) {
         siteId: siteId || "ALL",
         subjectId: subjectId || "ALL",
       },
-    });
+    }, { headers });
   } catch (error) {
     console.error("Error in subject performance API:", error);
     return NextResponse.json(
@@ -37,6 +37,11 @@
  *    - Are all required files present?
  *    - Missing files flagged for user attention
  * 
+ * 5. **Preflight Check** (preflight_check.py):
+ *    - Streams sheet names and header rows from each workbook's xlsx zip
+ *    - All nine workbooks, their sheets and required columns (resolved through the
+ *      extraction column mappings) must be present, else 422 with the problems found
+ * 
  * VALIDATION RESULT:
  * ```json
  * {
@@ -79,6 +84,7 @@
 
 import { NextRequest, NextResponse } from "next/server";
 import { validateUploadedFiles } from "@/database/validateUpload";
+import { runPreflightCheck } from "@/database/importToDatabase";
 import * as path from "path";
 import * as fs from "fs";
 
@@ -129,9 +135,42 @@ export async function POST(request: NextRequest) {
     });
 
     if (result.success) {
+      /**
+       * PREFLIGHT CHECK:
+       * - Reads only sheet names and header rows of the nine workbooks (milliseconds)
+       * - Rejects missing files, sheets or required columns now, instead of after
+       *   the full extraction during import
+       * - Skipped (with a warning) when Python is not available
+       * - Already done when the files were mapped without Gemini
+       */
+      let preflight = result.validation?.preflight ?? null;
+      if (!preflight) {
+        try {
+          preflight = await runPreflightCheck(
+            folderPath,
+            result.validation?.renamedFiles,
+          );
+        } catch (error) {
+          console.warn("Preflight check skipped:", error);
+        }
+      }
+
+      if (preflight && !preflight.ok) {
+        return NextResponse.json(
+          {
+            success: false,
+            error: `Workbook check failed: ${preflight.issues.join("; ")}`,
+            validation: result.validation,
+            preflight,
+          },
+          { status: 422 },
+        );
+      }
+
       return NextResponse.json({
         success: true,
         validation: result.validation,
+        preflight,
         message: result.message,
       });
     } else {
@@ -27,6 +27,19 @@ import ConformantPagesChart from "@/components/dashboard/ConformantPagesChart";
 import ProtocolDeviationChart from "@/components/dashboard/ProtocolDeviationChart";
 import NonConformantPagesChart from "@/components/dashboard/NonConformantPagesChart";
 
+// Data generation an API response was read at (X-Data-Generation header), null when unknown
+function responseGeneration(response: Response): number | null {
+  const value = response.headers.get("X-Data-Generation");
+  return value === null ? null : Number(value);
+}
+
+// Oldest of several data generations, null when there are none or any of them is unknown
+function oldestGeneration(generations: (number | null)[]): number | null {
+  return generations.length === 0 || generations.some((generation) => generation === null)
+    ? null
+    : Math.min(...(generations as number[]));
+}
+
 export default function DashboardPage() {
   const [filters, setFilters] = useState<FilterState>({
     studyId: "ALL",
@@ -49,6 +62,9 @@ export default function DashboardPage() {
   // Session ID for cache management
   const [sessionId, setSessionId] = useState<string>("");
   const cacheUpdateTimeout = useRef<NodeJS.Timeout | null>(null);
+  // Data generation each cached data source was read at, so the cached context is stamped
+  // with its oldest data and dropped once an ingest publishes newer data
+  const dataGenerations = useRef<Record<string, number | null>>({});
 
   // Get role-based component visibility
   const componentVisibility = useMemo(
@@ -291,6 +307,7 @@ export default function DashboardPage() {
             loadingSitePerformance,
             loadingSubjectOverview,
           },
+          oldestGeneration(Object.values(dataGenerations.current)),
         );
 
         // Log data summary for verification
@@ -386,6 +403,9 @@ export default function DashboardPage() {
           fetch(ncpUrl),
         ]);
         
+        dataGenerations.current.kpi = oldestGeneration(
+          [kpiResponse, dqiResponse, pdResponse, ncpResponse].map(responseGeneration),
+        );
         const kpiData = await kpiResponse.json();
         const dqiData = await dqiResponse.json();
         const pdData = await pdResponse.json();
@@ -440,6 +460,7 @@ export default function DashboardPage() {
 
         const url = `/api/regional-data-entry${params.toString() ? `?${params.toString()}` : ""}`;
         const response = await fetch(url);
+        dataGenerations.current.regional = responseGeneration(response);
         const result = await response.json();
 
         if (result && result.data) {
@@ -480,6 +501,7 @@ export default function DashboardPage() {
 
         const url = `/api/study-pulse${params.toString() ? `?${params.toString()}` : ""}`;
         const response = await fetch(url);
+        dataGenerations.current.studyPulse = responseGeneration(response);
         const result = await response.json();
 
         if (result && result.metrics) {
@@ -521,6 +543,7 @@ export default function DashboardPage() {
 
         const url = `/api/country-performance${params.toString() ? `?${params.toString()}` : ""}`;
         const response = await fetch(url);
+        dataGenerations.current.countryPerformance = responseGeneration(response);
         const result = await response.json();
 
         if (result && result.data) {
@@ -561,6 +584,7 @@ export default function DashboardPage() {
 
         const url = `/api/subject-performance${params.toString() ? `?${params.toString()}` : ""}`;
         const response = await fetch(url);
+        dataGenerations.current.subjectPerformance = responseGeneration(response);
         const result = await response.json();
 
         if (result && result.data) {
@@ -603,6 +627,7 @@ export default function DashboardPage() {
 
         const url = `/api/sae-chart${params.toString() ? `?${params.toString()}` : ""}`;
         const response = await fetch(url);
+        dataGenerations.current.saeChart = responseGeneration(response);
         const result = await response.json();
 
         if (result && result.data) {
@@ -645,6 +670,7 @@ export default function DashboardPage() {
 
         const url = `/api/signature-compliance${params.toString() ? `?${params.toString()}` : ""}`;
         const response = await fetch(url);
+        dataGenerations.current.signatureCompliance = responseGeneration(response);
         const result = await response.json();
 
         if (result && result.data) {
@@ -683,6 +709,7 @@ export default function DashboardPage() {
         if (!response.ok) {
           throw new Error("Failed to fetch site performance data");
         }
+        dataGenerations.current.sitePerformance = responseGeneration(response);
         const data = await response.json();
         setSitePerformanceData(data);
       } catch (error) {
@@ -723,6 +750,7 @@ export default function DashboardPage() {
         if (!response.ok) {
           throw new Error("Failed to fetch subject overview data");
         }
+        dataGenerations.current.subjectOverview = responseGeneration(response);
         const result = await response.json();
         setSubjectOverviewData(result.data || []);
       } catch (error) {
@@ -741,6 +769,7 @@ export default function DashboardPage() {
     const fetchPatient360 = async () => {
       if (!selectedSubjectId) {
         setPatient360Data(null);
+        delete dataGenerations.current.patient360;
         return;
       }
 
@@ -759,6 +788,7 @@ export default function DashboardPage() {
         if (!response.ok) {
           throw new Error("Failed to fetch patient 360 data");
         }
+        dataGenerations.current.patient360 = responseGeneration(response);
         const data = await response.json();
         setPatient360Data(data);
       } catch (error) {
@@ -799,6 +829,7 @@ export default function DashboardPage() {
         if (!response.ok) {
           throw new Error("Failed to fetch subject overview data");
         }
+        dataGenerations.current.subjectOverview = responseGeneration(response);
         const result = await response.json();
         setSubjectOverviewData(result.data || []);
       } catch (error) {
@@ -817,6 +848,7 @@ export default function DashboardPage() {
     const fetchPatient360 = async () => {
       if (!selectedSubjectId) {
         setPatient360Data(null);
+        delete dataGenerations.current.patient360;
         return;
       }
 
@@ -835,6 +867,7 @@ export default function DashboardPage() {
         if (!response.ok) {
           throw new Error("Failed to fetch patient 360 data");
         }
+        dataGenerations.current.patient360 = responseGeneration(response);
         const data = await response.json();
         setPatient360Data(data);
       } catch (error) {
@@ -0,0 +1,259 @@
+import sqlite3
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+from datetime import datetime
+from statistics import median
+from dotenv import load_dotenv
+from create_database import TABLE_SCHEMAS, get_storage_mode
+from dashboard_queries import DASHBOARD_QUERIES, FILTER_LEVELS, build_query, sample_filter_sets, find_full_scans
+
+load_dotenv()
+
+# Database file path
+DB_PATH = os.getcwd() + os.getenv("DB_PATH", "/database/edc_metrics.db")
+
+# SQLite VM instructions between progress callbacks when counting work per statement
+VM_STEP_GRANULARITY = 100
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def count_vm_steps(conn, sql, params):
+    """
+    Approximate number of SQLite VM instructions a statement executes. Python's sqlite3 does
+    not expose per-statement scan counters, so this stands in for rows scanned (it grows with
+    every row a scan or search visits) and is stable across runs on the same data.
+    """
+    steps = [0]
+
+    def tick():
+        steps[0] += VM_STEP_GRANULARITY
+        return 0
+
+    conn.set_progress_handler(tick, VM_STEP_GRANULARITY)
+    try:
+        conn.execute(sql, params).fetchall()
+    finally:
+        conn.set_progress_handler(None, 0)
+    return steps[0]
+
+def describe_database(conn, db_path):
+    """Data volume and environment recorded with every run, so results can be compared"""
+    return {
+        'database': db_path,
+        'storage_mode': get_storage_mode(conn),
+        'page_size': conn.execute("PRAGMA page_size").fetchone()[0],
+        'size_mb': round(os.path.getsize(db_path) / (1024 * 1024), 2),
+        'row_counts': {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in TABLE_SCHEMAS
+        },
+        'indexes': sorted(
+            name for (name,) in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND name NOT LIKE 'sqlite_%'"
+            )
+        ),
+        'sqlite_version': sqlite3.sqlite_version,
+        'python_version': platform.python_version(),
+        'platform': platform.platform(),
+    }
+
+def run_benchmark(db_path, per_level, repeat, seed):
+    """Replay every catalog query over the filter sweep and summarise latency per query and level"""
+    # Read-only, like the dashboard's connection
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    filter_sets = sample_filter_sets(conn, per_level, seed)
+    full_scan_rows = {
+        table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in TABLE_SCHEMAS
+    }
+
+    results = []
+    errors = []
+    for query in DASHBOARD_QUERIES:
+        for level in FILTER_LEVELS:
+            timings = []
+            rows_returned = []
+            vm_steps = []
+            scans = set()
+            scan_rows = []
+            for filter_level, filters in filter_sets:
+                if filter_level != level:
+                    continue
+                built = build_query(query, filters)
+                if built is None:
+                    continue
+                sql, params = built
+                try:
+                    # Warm-up run, also the row count
+                    rows_returned.append(len(conn.execute(sql, params).fetchall()))
+                except sqlite3.Error as e:
+                    errors.append({'query': query['name'], 'level': level, 'error': str(e)})
+                    break
+
+                for _ in range(repeat):
+                    start_time = time.perf_counter()
+                    conn.execute(sql, params).fetchall()
+                    timings.append((time.perf_counter() - start_time) * 1000)
+
+                vm_steps.append(count_vm_steps(conn, sql, params))
+                tables = [table for table, _ in find_full_scans(conn, sql, params)]
+                scans.update(tables)
+                scan_rows.append(sum(full_scan_rows[table] for table in tables))
+
+            if not timings:
+                continue
+            results.append({
+                'query': query['name'],
+                'source': query['source'],
+                'level': level,
+                'filter_sets': len(rows_returned),
+                'runs': len(timings),
+                'p50_ms': round(percentile(timings, 50), 4),
+                'p95_ms': round(percentile(timings, 95), 4),
+                'p99_ms': round(percentile(timings, 99), 4),
+                'max_ms': round(max(timings), 4),
+                'rows_returned': round(median(rows_returned), 1),
+                'full_scans': sorted(scans),
+                'full_scan_rows': round(median(scan_rows)),
+                'vm_steps': round(median(vm_steps)),
+            })
+
+    environment = describe_database(conn, db_path)
+    conn.close()
+
+    return {
+        'benchmark': 'dashboard_workload',
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'settings': {'per_level': per_level, 'repeat': repeat, 'seed': seed},
+        'filter_sets': [{'level': level, 'filters': filters} for level, filters in filter_sets],
+        'environment': environment,
+        'results': results,
+        'errors': errors,
+    }
+
+def summarise_levels(results):
+    """Total p50/p95 latency per filter level"""
+    levels = {}
+    for result in results:
+        totals = levels.setdefault(result['level'], {'queries': 0, 'p50_ms': 0.0, 'p95_ms': 0.0})
+        totals['queries'] += 1
+        totals['p50_ms'] += result['p50_ms']
+        totals['p95_ms'] += result['p95_ms']
+    return levels
+
+def print_report(report, top):
+    """Print level totals and the slowest queries"""
+    results = report['results']
+
+    print("\n" + "="*70)
+    print("DASHBOARD WORKLOAD BENCHMARK")
+    print("="*70)
+    environment = report['environment']
+    print(f"Database: {environment['database']} ({environment['storage_mode']}, {environment['size_mb']} MB)")
+    print(f"Runs: {report['settings']['repeat']} per filter set, {len(report['filter_sets'])} filter sets")
+
+    print(f"\n  {'level':<10}{'queries':>9}{'sum p50 ms':>14}{'sum p95 ms':>14}")
+    levels = summarise_levels(results)
+    for level in FILTER_LEVELS:
+        if level in levels:
+            totals = levels[level]
+            print(f"  {level:<10}{totals['queries']:>9}{totals['p50_ms']:>14.3f}{totals['p95_ms']:>14.3f}")
+
+    print(f"\nSlowest {top} (by p95):")
+    print(f"  {'query':<42}{'level':<9}{'p50':>9}{'p95':>9}{'p99':>9}{'vm steps':>12}  full scans")
+    for result in sorted(results, key=lambda r: r['p95_ms'], reverse=True)[:top]:
+        print(f"  {result['query']:<42}{result['level']:<9}{result['p50_ms']:>9.3f}{result['p95_ms']:>9.3f}"
+              f"{result['p99_ms']:>9.3f}{result['vm_steps']:>12}  {', '.join(result['full_scans']) or '-'}")
+
+    for error in report['errors']:
+        print(f"  ⚠ {error['query']} ({error['level']}): {error['error']}")
+
+def compare_reports(report, baseline, threshold, min_delta_ms):
+    """
+    Print changes against a previous run and return the regressions. VM steps are
+    deterministic for the same data and plan; latency only counts when the new p50 is
+    past the old p95, as tail percentiles of millisecond queries are mostly scheduler noise.
+    """
+    previous = {(r['query'], r['level']): r for r in baseline['results']}
+
+    print("\n" + "="*70)
+    print(f"COMPARISON WITH {baseline['timestamp']}")
+    print("="*70)
+    if baseline['environment']['row_counts'] != report['environment']['row_counts']:
+        print("  ⚠ Row counts differ between the runs, results are not directly comparable")
+    if baseline['settings'] != report['settings']:
+        print(f"  ⚠ Settings differ: {baseline['settings']} vs {report['settings']}")
+
+    regressions = []
+    improvements = 0
+    for result in report['results']:
+        before = previous.get((result['query'], result['level']))
+        if before is None:
+            continue
+        steps_ratio = result['vm_steps'] / max(before['vm_steps'], 1)
+        p50_ratio = result['p50_ms'] / max(before['p50_ms'], 1e-9)
+        p50_delta = result['p50_ms'] - before['p50_ms']
+        if steps_ratio >= threshold:
+            regressions.append((result['query'], result['level'], 'vm_steps', before['vm_steps'], result['vm_steps']))
+        elif p50_ratio >= threshold and p50_delta >= min_delta_ms and result['p50_ms'] > before['p95_ms']:
+            regressions.append((result['query'], result['level'], 'p50_ms', before['p50_ms'], result['p50_ms']))
+        elif steps_ratio <= 1 / threshold or (p50_ratio <= 1 / threshold and -p50_delta >= min_delta_ms):
+            improvements += 1
+
+    for metric in ('p50_ms', 'p95_ms', 'vm_steps'):
+        before_total = sum(r[metric] for r in baseline['results'])
+        after_total = sum(r[metric] for r in report['results'])
+        print(f"  Sum of {metric}: {before_total:.3f} → {after_total:.3f}")
+    print(f"  {improvements} query/level pairs faster, {len(regressions)} regressions")
+    for query, level, metric, before, after in regressions:
+        print(f"  ✗ {query} ({level}) {metric}: {before:.3f} → {after:.3f} ({after / max(before, 1e-9):.2f}x)")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Replay the dashboard SQL over a filter sweep and report latency percentiles"
+    )
+    parser.add_argument("--db", default=DB_PATH, help="Database to benchmark (defaults to DB_PATH)")
+    parser.add_argument("--per-level", type=int, default=3,
+                        help="Filter values sampled per level (study, region, country, site, subject)")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per statement and filter set")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for filter sampling")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest queries to print")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="Previous JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Slowdown ratio reported as a regression (default: 1.25)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="Ignore p50 changes smaller than this many milliseconds (default: 1.0)")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Exit with status 1 when the comparison finds regressions")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"Error: database not found: {args.db}")
+        sys.exit(1)
+
+    start_time = time.time()
+    report = run_benchmark(args.db, args.per_level, args.repeat, args.seed)
+    print_report(report, args.top)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare_reports(report, json.load(f), args.threshold, args.min_delta_ms)
+
+    print(f"\nTotal benchmark time: {time.time() - start_time:.2f} seconds")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
@@ -0,0 +1,289 @@
+import os
+import sys
+import io
+import gc
+import json
+import math
+import time
+import platform
+import sqlite3
+import shutil
+import argparse
+import tempfile
+import threading
+import contextlib
+from datetime import datetime
+import psutil
+import pandas as pd
+import create_database
+import data_insertion
+import dqi_clean_status_cal
+from extract_data import extract_all_data
+from fill_missing_values import fill_all_missing_data, populate_site_id_in_esae
+from generate_study import generate_study, scaled_profile
+
+# Pipeline stages in execution order
+STAGES = ('extract', 'populate_site_id', 'fill_missing', 'insert', 'dqi')
+
+# Interval of the background RSS sampler
+RSS_SAMPLE_SECONDS = 0.01
+
+# A stage is flagged when time grows faster than rows^MAX_EXPONENT across the scales, unless its
+# largest run is under MIN_FLAG_SECONDS (timer noise dominates the slope there)
+MAX_EXPONENT = 1.15
+MIN_FLAG_SECONDS = 0.5
+
+@contextlib.contextmanager
+def use_database(db_path):
+    """Point every pipeline module at db_path for the duration of the block"""
+    modules = (create_database, data_insertion, dqi_clean_status_cal)
+    original = [module.DB_PATH for module in modules]
+    for module in modules:
+        module.DB_PATH = db_path
+    try:
+        yield
+    finally:
+        for module, path in zip(modules, original):
+            module.DB_PATH = path
+
+@contextlib.contextmanager
+def measure(stage_results, stage):
+    """Record wall time, process CPU time and peak RSS of the block"""
+    process = psutil.Process()
+    gc.collect()
+    start_rss = process.memory_info().rss
+    peak = [start_rss]
+    stop = threading.Event()
+
+    def sample():
+        while not stop.is_set():
+            peak[0] = max(peak[0], process.memory_info().rss)
+            stop.wait(RSS_SAMPLE_SECONDS)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - start_wall
+        cpu = time.process_time() - start_cpu
+        stop.set()
+        sampler.join()
+        peak[0] = max(peak[0], process.memory_info().rss)
+        stage_results[stage] = {
+            'wall_s': round(wall, 4),
+            'cpu_s': round(cpu, 4),
+            'peak_rss_mb': round(peak[0] / (1024 * 1024), 1),
+            'rss_delta_mb': round((peak[0] - start_rss) / (1024 * 1024), 1),
+        }
+
+def run_pipeline(study_name, db_path, quiet=True, compact=False, bulk=False):
+    """Run every ingest stage for one study into a fresh database and return per-stage measurements"""
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    stages = {}
+    output = io.StringIO() if quiet else sys.stdout
+    with use_database(db_path), contextlib.redirect_stdout(output):
+        create_database.create_database()
+
+        with measure(stages, 'extract'):
+            dataframes = extract_all_data(project_name=study_name, compact=compact)
+        extracted_rows = sum(len(df) for df in dataframes.values())
+        stages['extract']['rows'] = extracted_rows
+        # Streamed sheets (extract_data.StreamedSheet) are spooled to disk, not held in memory
+        frames_mb = sum(df.memory_usage(deep=True).sum() for df in dataframes.values()
+                        if isinstance(df, pd.DataFrame)) / (1024 * 1024)
+
+        with measure(stages, 'populate_site_id'):
+            dataframes['SAE Dashboard_DM'], dataframes['SAE Dashboard_Safety'] = populate_site_id_in_esae(
+                dataframes['Subject_Level_Metrics'],
+                dataframes['SAE Dashboard_DM'],
+                dataframes['SAE Dashboard_Safety']
+            )
+        stages['populate_site_id']['rows'] = len(dataframes['SAE Dashboard_DM']) + len(dataframes['SAE Dashboard_Safety'])
+
+        with measure(stages, 'fill_missing'):
+            filled_subject_metrics = fill_all_missing_data(dataframes)
+        stages['fill_missing']['rows'] = len(filled_subject_metrics)
+
+        with measure(stages, 'insert'):
+            if bulk:
+                # Index builds happen at the end of the load and are part of the stage
+                conn = data_insertion.get_db_connection()
+                with data_insertion.bulk_load(conn):
+                    data_insertion.insert_all_data(dataframes, filled_subject_metrics, conn=conn, sort_rows=True)
+                conn.close()
+            else:
+                data_insertion.insert_all_data(dataframes, filled_subject_metrics)
+        stages['insert']['rows'] = extracted_rows
+
+        with measure(stages, 'dqi'):
+            dqi_clean_status_cal.calculate_all_dqi_and_clean_status()
+        conn = sqlite3.connect(db_path)
+        stages['dqi']['rows'] = conn.execute("SELECT COUNT(*) FROM subject_level_metrics").fetchone()[0]
+        conn.close()
+
+    for result in stages.values():
+        result['rows_per_s'] = round(result['rows'] / result['wall_s']) if result['wall_s'] > 0 else None
+
+    return {
+        'study': study_name,
+        'rows': extracted_rows,
+        'subjects': stages['dqi']['rows'],
+        'frames_mb': round(frames_mb, 2),
+        'total_wall_s': round(sum(r['wall_s'] for r in stages.values()), 4),
+        'stages': stages,
+    }
+
+def scaling_exponent(sizes, timings):
+    """Least-squares slope of log(time) against log(rows); 1.0 is linear scaling"""
+    points = [(math.log(n), math.log(t)) for n, t in zip(sizes, timings) if n > 0 and t > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if variance == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+
+def analyse_scaling(runs, max_exponent):
+    """Scaling exponent of every stage against the study's extracted rows"""
+    sizes = [run['rows'] for run in runs]
+    scaling = {}
+    for stage in STAGES:
+        timings = [run['stages'][stage]['wall_s'] for run in runs]
+        exponent = scaling_exponent(sizes, timings)
+        measurable = max(timings) >= MIN_FLAG_SECONDS
+        scaling[stage] = {
+            'exponent': round(exponent, 3) if exponent is not None else None,
+            'measurable': measurable,
+            'superlinear': measurable and exponent is not None and exponent > max_exponent,
+        }
+    return scaling
+
+def describe_environment():
+    """Versions and machine details recorded with every run"""
+    return {
+        'python_version': platform.python_version(),
+        'pandas_version': pd.__version__,
+        'sqlite_version': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'memory_gb': round(psutil.virtual_memory().total / (1024 ** 3), 1),
+    }
+
+def print_report(report):
+    """Print per-stage measurements of every run and the scaling verdicts"""
+    print("\n" + "="*70)
+    print("INGEST BENCHMARK")
+    print("="*70)
+    for run in report['runs']:
+        print(f"\n{run['study']}: {run['subjects']} subjects, {run['rows']} rows "
+              f"({run['frames_mb']:.1f} MB of dataframes), {run['total_wall_s']:.2f}s")
+        print(f"  {'stage':<18}{'wall s':>10}{'cpu s':>10}{'peak MB':>10}{'+MB':>8}{'rows/s':>12}")
+        for stage in STAGES:
+            result = run['stages'][stage]
+            print(f"  {stage:<18}{result['wall_s']:>10.3f}{result['cpu_s']:>10.3f}{result['peak_rss_mb']:>10.1f}"
+                  f"{result['rss_delta_mb']:>8.1f}{result['rows_per_s'] or 0:>12}")
+
+    if len(report['runs']) < 2:
+        print("\n⚠ At least two study sizes are needed for scaling exponents")
+        return
+    print(f"\nScaling exponent of wall time vs rows (flagged above {report['settings']['max_exponent']}):")
+    for stage, result in report['scaling'].items():
+        marker = "✗" if result['superlinear'] else "✓" if result['measurable'] else "-"
+        note = "" if result['measurable'] else f"  (under {MIN_FLAG_SECONDS}s, not judged)"
+        print(f"  {marker} {stage:<18}{result['exponent']}{note}")
+
+def run_benchmark(scales, studies, workdir, seed, as_of, max_exponent, keep=False, quiet=True, compact=False,
+                  bulk=False):
+    """Generate studies for each scale (or use the named ones) and run the pipeline on each"""
+    # A given workdir is kept, so generated studies are reused by the next run
+    keep = keep or workdir is not None
+    workdir = workdir or tempfile.mkdtemp(prefix="ingest_benchmark_")
+    os.makedirs(os.path.join(workdir, "Study Files"), exist_ok=True)
+
+    # extract_data reads "Study Files" under the working directory
+    original_cwd = os.getcwd()
+    if studies:
+        study_root = original_cwd
+    else:
+        study_root = workdir
+        studies = []
+        for scale in scales:
+            study_name = f"Synthetic x{scale:g}"
+            studies.append(study_name)
+            if not os.path.exists(os.path.join(workdir, "Study Files", study_name)):
+                print(f"→ Generating {study_name}...")
+                generate_study(study_name, os.path.join(workdir, "Study Files"),
+                               scaled_profile(scale, {}), seed, as_of)
+
+    runs = []
+    os.chdir(study_root)
+    try:
+        for study_name in studies:
+            print(f"→ Ingesting {study_name}...")
+            run = run_pipeline(study_name, os.path.join(workdir, "benchmark.db"), quiet, compact, bulk)
+            runs.append(run)
+            print(f"  ✓ {run['rows']} rows in {run['total_wall_s']:.2f}s")
+    finally:
+        os.chdir(original_cwd)
+        if not keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    runs.sort(key=lambda run: run['rows'])
+    return {
+        'benchmark': 'ingest',
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'settings': {'scales': scales, 'seed': seed, 'max_exponent': max_exponent, 'compact': compact,
+                     'bulk_load': bulk},
+        'environment': describe_environment(),
+        'runs': runs,
+        'scaling': analyse_scaling(runs, max_exponent) if len(runs) >= 2 else {},
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time every ingest stage over studies of increasing size and check how each stage scales"
+    )
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 2, 5],
+                        help="Synthetic study sizes as multiples of Study 1 (default: 1 2 5)")
+    parser.add_argument("--studies", nargs="+",
+                        help="Benchmark these folders under 'Study Files' instead of generated studies")
+    parser.add_argument("--workdir", help="Directory for generated studies and the database (kept and reused)")
+    parser.add_argument("--keep", action="store_true", help="Keep the temporary directory when --workdir is not given")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for generated studies")
+    parser.add_argument("--as-of", default="2025-11-14", help="Report date of generated studies (YYYY-MM-DD)")
+    parser.add_argument("--max-exponent", type=float, default=MAX_EXPONENT,
+                        help=f"Scaling exponent above which a stage is flagged (default: {MAX_EXPONENT})")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own output")
+    parser.add_argument("--compact", action="store_true",
+                        help="Extract with compact dtypes (categoricals, downcast integers)")
+    parser.add_argument("--bulk-load", action="store_true",
+                        help="Insert through data_insertion.bulk_load (indexes built after the load)")
+    parser.add_argument("--fail-on-superlinear", action="store_true",
+                        help="Exit with status 1 when a stage scales worse than --max-exponent")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    report = run_benchmark(
+        args.scales, args.studies, args.workdir, args.seed,
+        datetime.strptime(args.as_of, '%Y-%m-%d'), args.max_exponent, args.keep, not args.verbose, args.compact,
+        args.bulk_load
+    )
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    print(f"\nTotal benchmark time: {time.time() - start_time:.2f} seconds")
+
+    if args.fail_on_superlinear and any(result['superlinear'] for result in report['scaling'].values()):
+        sys.exit(1)
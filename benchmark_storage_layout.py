@@ -0,0 +1,289 @@
+import sqlite3
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import contextlib
+import io
+from statistics import median
+import create_database
+from create_database import (TABLE_SCHEMAS, TABLE_INDEXES, DETAIL_TABLES, CLUSTER_KEY, get_table_columns,
+                             load_fact_rows)
+
+# Storage layouts compared: current rowid heaps, integer-keyed facts (load time and size) and
+# detail tables clustered by subject
+LAYOUTS = ('standard', 'normalized', 'clustered')
+
+# Patient-level queries, parameters (project_name, site_id, subject_id)
+PATIENT_QUERIES = {
+    'subject_sdv_rows': """
+        SELECT * FROM sdv
+        WHERE project_name = ? AND site_id = ? AND subject_id = ?
+    """,
+    'subject_query_rows': """
+        SELECT * FROM query_report
+        WHERE project_name = ? AND site_id = ? AND subject_id = ?
+    """,
+    'subject_inactivated_rows': """
+        SELECT * FROM inactivated_forms_folders
+        WHERE project_name = ? AND site_id = ? AND subject_id = ?
+    """,
+    'subject_signature_rows': """
+        SELECT * FROM pi_signature_report
+        WHERE project_name = ? AND site_id = ? AND subject_id = ?
+    """,
+    'patient360_recent_visits': """
+        SELECT visit_name, visit_date FROM completed_visits
+        WHERE project_name = ? AND site_id = ? AND subject_id = ?
+        ORDER BY visit_date DESC LIMIT 5
+    """,
+    'patient360_open_queries': """
+        SELECT form_name, visit_name, marking_group_name, query_status, action_owner, days_since_open
+        FROM query_report
+        WHERE project_name = ? AND site_id = ? AND subject_id = ? AND query_status = 'Open'
+        ORDER BY days_since_open DESC LIMIT 10
+    """,
+}
+
+# Site-level queries, parameters (project_name, site_id)
+SITE_QUERIES = {
+    'site_signature_compliance': """
+        SELECT site_id, COUNT(*),
+            SUM(CASE WHEN no_of_days >= 45 AND no_of_days < 90 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN no_of_days >= 90 THEN 1 ELSE 0 END)
+        FROM pi_signature_report
+        WHERE project_name = ? AND site_id = ?
+        GROUP BY site_id
+    """,
+    'site_sdv_status': """
+        SELECT verification_status, COUNT(*) FROM sdv
+        WHERE project_name = ? AND site_id = ?
+        GROUP BY verification_status
+    """,
+    'site_query_status': """
+        SELECT query_status, COUNT(*) FROM query_report
+        WHERE project_name = ? AND site_id = ?
+        GROUP BY query_status
+    """,
+    'site_completed_visits': """
+        SELECT subject_id, COUNT(*) FROM completed_visits
+        WHERE project_name = ? AND site_id = ?
+        GROUP BY subject_id
+    """,
+}
+
+def baseline_indexes():
+    """
+    Subject indexes the standard layout lacks on detail tables (sdv, pi_signature_report, ...),
+    so the comparison measures clustering, not a missing index: [(index name, table)]
+    """
+    indexed = {
+        table_name for _, table_name, columns in TABLE_INDEXES
+        if tuple(column.strip() for column in columns.split(",")) == CLUSTER_KEY
+    }
+    return [(f"bench_{table_name}_subject", table_name) for table_name in DETAIL_TABLES if table_name not in indexed]
+
+def build_layout(source_path, target_path, storage_mode, page_size):
+    """
+    Create an empty database in the given layout and copy every table from the source, the
+    way data_insertion.py loads it (normalized detail tables through load_fact_rows). The
+    standard layout also gets baseline_indexes(), built before the copy like its own indexes.
+    """
+    if os.path.exists(target_path):
+        os.remove(target_path)
+
+    # create_database() builds the file at its module-level DB_PATH
+    original_path = create_database.DB_PATH
+    create_database.DB_PATH = target_path
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            create_database.create_database(storage_mode, page_size)
+    finally:
+        create_database.DB_PATH = original_path
+
+    conn = sqlite3.connect(target_path)
+    conn.execute("ATTACH DATABASE ? AS source", (source_path,))
+    start_time = time.time()
+    conn.execute("BEGIN TRANSACTION")
+    if storage_mode == 'standard':
+        for index_name, table_name in baseline_indexes():
+            conn.execute(f"CREATE INDEX main.{index_name} ON {table_name}({', '.join(CLUSTER_KEY)})")
+    for table_name in TABLE_SCHEMAS:
+        if storage_mode == 'normalized' and table_name in DETAIL_TABLES:
+            load_fact_rows(conn, table_name, f"source.{table_name}")
+            continue
+        # Source order is kept so the standard layout reproduces the pipeline's heap order
+        column_list = ", ".join(name for name, _, _, _ in get_table_columns(table_name))
+        conn.execute(
+            f"INSERT INTO main.{table_name} ({column_list}) SELECT {column_list} FROM source.{table_name}"
+        )
+    conn.execute("COMMIT")
+    load_seconds = time.time() - start_time
+    conn.execute("DETACH DATABASE source")
+    conn.close()
+
+    return load_seconds
+
+def sample_keys(source_path, subjects, sites, seed):
+    """Pick random (project, site, subject) and (project, site) keys that have detail rows"""
+    conn = sqlite3.connect(source_path)
+    subject_keys = conn.execute(
+        "SELECT DISTINCT project_name, site_id, subject_id FROM sdv ORDER BY 1, 2, 3"
+    ).fetchall()
+    site_keys = conn.execute(
+        "SELECT DISTINCT project_name, site_id FROM sdv ORDER BY 1, 2"
+    ).fetchall()
+    conn.close()
+
+    rng = random.Random(seed)
+    return (
+        rng.sample(subject_keys, min(subjects, len(subject_keys))),
+        rng.sample(site_keys, min(sites, len(site_keys))),
+    )
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def time_queries(db_path, queries, keys, repeat, cold):
+    """
+    Time each query over all keys. Cold runs open a new connection per execution so every
+    data page comes through the (OS-cached) file instead of SQLite's page cache.
+    """
+    results = {}
+    conn = None if cold else sqlite3.connect(db_path)
+    for name, sql in queries.items():
+        timings = []
+        for _ in range(repeat):
+            for key in keys:
+                if cold:
+                    # Parse the schema outside the timed section
+                    run_conn = sqlite3.connect(db_path)
+                    run_conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+                else:
+                    run_conn = conn
+                start_time = time.perf_counter()
+                run_conn.execute(sql, key).fetchall()
+                timings.append((time.perf_counter() - start_time) * 1000)
+                if cold:
+                    run_conn.close()
+        results[name] = {
+            'median_ms': round(median(timings), 4),
+            'p95_ms': round(percentile(timings, 95), 4),
+            'total_ms': round(sum(timings), 2),
+        }
+    if conn is not None:
+        conn.close()
+    return results
+
+def describe_file(db_path):
+    """Page size, page count and file size of a database"""
+    conn = sqlite3.connect(db_path)
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    conn.close()
+    return {
+        'page_size': page_size,
+        'page_count': page_count,
+        'size_mb': round(os.path.getsize(db_path) / (1024 * 1024), 2),
+    }
+
+def print_report(report):
+    """Print the per-query comparison of every built layout"""
+    variants = report['variants']
+    labels = [f"{v['storage_mode']}/{v['page_size']}" for v in variants]
+
+    print("\n" + "="*70)
+    print("STORAGE LAYOUT BENCHMARK")
+    print("="*70)
+    if report.get('baseline_indexes'):
+        print(f"  standard layout indexed on {', '.join(CLUSTER_KEY)} for: {', '.join(report['baseline_indexes'])}")
+    for variant, label in zip(variants, labels):
+        print(f"  {label:<18} {variant['size_mb']:>8.2f} MB  {variant['page_count']:>8} pages"
+              f"  load {variant['load_seconds']:.2f}s")
+
+    for phase in ('warm', 'cold'):
+        print(f"\n{phase.upper()} (median ms / p95 ms)")
+        print(f"  {'query':<28}" + "".join(f"{label:>22}" for label in labels))
+        for query_name in variants[0][phase]:
+            cells = "".join(
+                f"{v[phase][query_name]['median_ms']:>10.3f} /{v[phase][query_name]['p95_ms']:>9.3f}"
+                for v in variants
+            )
+            print(f"  {query_name:<28}{cells}")
+
+def run_benchmark(source_path, page_sizes, subjects, sites, repeat, seed, workdir, keep):
+    """Build each layout/page size from the source database and time the query set on it"""
+    subject_keys, site_keys = sample_keys(source_path, subjects, sites, seed)
+    print(f"Source: {source_path}")
+    print(f"Sampled {len(subject_keys)} subjects and {len(site_keys)} sites")
+
+    workdir = workdir or tempfile.mkdtemp(prefix="layout_benchmark_")
+    os.makedirs(workdir, exist_ok=True)
+
+    variants = []
+    try:
+        for storage_mode in LAYOUTS:
+            for page_size in page_sizes:
+                db_path = os.path.join(workdir, f"{storage_mode}_{page_size}.db")
+                print(f"→ Building {storage_mode} layout with {page_size}-byte pages...")
+                load_seconds = build_layout(source_path, db_path, storage_mode, page_size)
+
+                variant = {'storage_mode': storage_mode, 'load_seconds': round(load_seconds, 2)}
+                variant.update(describe_file(db_path))
+                variant['warm'] = {}
+                variant['cold'] = {}
+                for phase, cold in (('warm', False), ('cold', True)):
+                    variant[phase].update(time_queries(db_path, PATIENT_QUERIES, subject_keys, repeat, cold))
+                    variant[phase].update(time_queries(db_path, SITE_QUERIES, site_keys, repeat, cold))
+                variants.append(variant)
+                print(f"  ✓ {storage_mode}/{page_size}: {variant['size_mb']} MB")
+    finally:
+        if not keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'source': source_path,
+        'subjects': len(subject_keys),
+        'sites': len(site_keys),
+        'repeat': repeat,
+        'baseline_indexes': [table_name for _, table_name in baseline_indexes()],
+        'variants': variants,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare load time, size and query latency of the standard, normalized and clustered layouts"
+    )
+    parser.add_argument("--source", default=create_database.DB_PATH,
+                        help="Populated database to copy from (defaults to DB_PATH)")
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[4096],
+                        help="Page sizes to build each layout with (default: 4096)")
+    parser.add_argument("--subjects", type=int, default=200, help="Number of sampled subjects")
+    parser.add_argument("--sites", type=int, default=50, help="Number of sampled sites")
+    parser.add_argument("--repeat", type=int, default=3, help="Executions per query and key")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for key sampling")
+    parser.add_argument("--workdir", help="Directory for the built databases (defaults to a temp dir)")
+    parser.add_argument("--keep", action="store_true", help="Keep the built databases")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source):
+        print(f"Error: source database not found: {args.source}")
+        sys.exit(1)
+
+    report = run_benchmark(
+        args.source, args.page_sizes, args.subjects, args.sites,
+        args.repeat, args.seed, args.workdir, args.keep
+    )
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
@@ -0,0 +1,214 @@
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import argparse
+import threading
+from difflib import SequenceMatcher
+from dotenv import load_dotenv
+from create_database import METADATA_SCHEMAS
+
+load_dotenv()
+
+# Headers that vary between studies ('Subject Id', 'No. #Days Page Missing ', 'Site  ID', 'Site #',
+# 'Folder') resolved to the names the column mappings know, without a round-trip to an LLM.
+# Resolutions are cached under a fingerprint of the header tuple, in memory and in the
+# column_resolutions table, so a known layout resolves with one lookup in every process.
+
+# Database holding the persistent cache (used only once it exists)
+DB_PATH = os.getcwd() + os.getenv("DB_PATH", "/database/edc_metrics.db")
+
+# Smallest similarity (difflib ratio of the normalized headers, 0-1) accepted as a match, and how
+# far ahead of a match to another column the best one must be
+MIN_SCORE = float(os.getenv("COLUMN_RESOLVER_MIN_SCORE", "0.88"))
+MIN_MARGIN = 0.03
+
+# Score of a match on the short form of a name ('Folder' for 'Folder Name'), below an exact match
+SHORT_FORM_SCORE = 0.99
+
+_PREFIX = re.compile(r"^(?:no\.|#)\s*")
+
+# Abbreviated words spelled out before comparing ('Site No' is 'Site Number')
+ABBREVIATIONS = {
+    'no': 'number', 'num': 'number', 'nbr': 'number',
+    'subj': 'subject', 'fldr': 'folder', 'pg': 'page', 'dt': 'date', 'desc': 'description',
+}
+
+# Trailing words a name can go without ('Site' for 'Site ID', 'Folder' for 'Folder Name'). Not
+# 'number': 'Log #' is not 'Log'
+GENERIC_SUFFIXES = ('id', 'name', 'code')
+
+# fingerprint -> resolved headers, namespace -> (exact index, short form index, aliases digest)
+_resolved = {}
+_indexes = {}
+_lock = threading.Lock()
+
+def normalize_header(header):
+    """
+    Comparable form of a header: lower case, '#'/'No.' prefixes and other punctuation dropped,
+    whitespace collapsed and abbreviations spelled out
+    """
+    text = str(header).strip().lower()
+    previous = None
+    while previous != text:
+        previous, text = text, _PREFIX.sub("", text)
+    # Elsewhere '#' is part of the name ('Log #' is not 'Log')
+    text = re.sub(r"[^\w#]+", " ", text).replace("#", " no ")
+    return " ".join(ABBREVIATIONS.get(word, word) for word in text.split())
+
+def short_form(normalized):
+    """Normalized name without its trailing generic words ('site number' -> 'site'), None when nothing is left"""
+    words = normalized.split()
+    while words and words[-1] in GENERIC_SUFFIXES:
+        words.pop()
+    return " ".join(words) or None
+
+def header_fingerprint(namespace, headers, digest=""):
+    """Fingerprint of a header tuple, within a namespace (the dataframe it is read into) and its aliases"""
+    return hashlib.sha1(json.dumps([namespace, digest, [str(header) for header in headers]]).encode()).hexdigest()
+
+def add_alias(index, key, alias, target):
+    """Index an alias under key, marking the key None when it already names another target"""
+    if key in index and index[key] is not None and index[key][1] != target:
+        index[key] = None
+    else:
+        index.setdefault(key, (alias, target))
+
+def alias_index(namespace, aliases):
+    """
+    Normalized aliases of a namespace: ({normalized: (alias, target)}, {short form: (alias, target)},
+    digest of the aliases and match settings), None where two targets collide
+    """
+    entry = _indexes.get(namespace)
+    if entry is None:
+        exact, short = {}, {}
+        for alias, target in aliases.items():
+            normalized = normalize_header(alias)
+            add_alias(exact, normalized, alias, target)
+            if short_form(normalized):
+                add_alias(short, short_form(normalized), alias, target)
+        settings = [sorted(aliases.items()), MIN_SCORE, MIN_MARGIN, ABBREVIATIONS, GENERIC_SUFFIXES]
+        digest = hashlib.sha1(json.dumps(settings).encode()).hexdigest()
+        entry = _indexes[namespace] = (exact, short, digest)
+    return entry
+
+def best_alias(header, index, short_index=None):
+    """(score, alias, target) of the alias closest to a header; None when no alias is close enough or two targets are"""
+    normalized = normalize_header(header)
+    exact = index.get(normalized)
+    if exact is not None:
+        return (1.0, *exact)
+    if short_index and short_form(normalized):
+        short = short_index.get(short_form(normalized))
+        if short is not None:
+            return (SHORT_FORM_SCORE, *short)
+
+    scores = {}
+    matcher = SequenceMatcher(None, b=normalized)
+    for candidate, entry in index.items():
+        if entry is None:
+            continue
+        matcher.set_seq1(candidate)
+        score = matcher.ratio()
+        target = entry[1]
+        if score > scores.get(target, (0.0,))[0]:
+            scores[target] = (score, entry[0], target)
+    ranked = sorted(scores.values(), reverse=True)
+    if not ranked or ranked[0][0] < MIN_SCORE:
+        return None
+    if len(ranked) > 1 and ranked[0][0] - ranked[1][0] < MIN_MARGIN:
+        return None
+    return ranked[0]
+
+def load_resolution(key):
+    """Resolved headers stored under a fingerprint by any process, None when unknown"""
+    if not os.path.exists(DB_PATH):
+        return None
+    try:
+        conn = sqlite3.connect(DB_PATH, timeout=0.1)
+        try:
+            row = conn.execute("SELECT resolved FROM column_resolutions WHERE fingerprint = ?", (key,)).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        # No table yet, or the database is busy: resolve again
+        return None
+    return json.loads(row[0]) if row else None
+
+def save_resolution(key, namespace, headers, resolved):
+    """Store resolved headers for other processes; skipped while the database is busy or missing"""
+    if not os.path.exists(DB_PATH):
+        return
+    try:
+        conn = sqlite3.connect(DB_PATH, timeout=0.1)
+        try:
+            conn.execute(METADATA_SCHEMAS['column_resolutions'])
+            conn.execute(
+                "INSERT OR REPLACE INTO column_resolutions (fingerprint, namespace, headers, resolved) VALUES (?, ?, ?, ?)",
+                (key, namespace, json.dumps(headers), json.dumps(resolved))
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        pass
+
+def resolve_headers(namespace, headers, aliases):
+    """
+    Headers with each unknown one replaced by the alias (a key of aliases, {header: target name})
+    it matches after normalization, then on its short form, or failing that by fuzzy score. Known
+    headers are kept, and no target is matched twice, so a sheet never gains a duplicate column.
+    Cached per header tuple, in memory and in the database.
+    """
+    headers = list(headers)
+    with _lock:
+        index, short_index, digest = alias_index(namespace, aliases)
+    key = header_fingerprint(namespace, headers, digest)
+    cached = _resolved.get(key)
+    if cached is not None:
+        return list(cached)
+    # Only text headers are stored: numbers and NaN would not survive the JSON round-trip
+    persistent = all(isinstance(header, str) for header in headers)
+    stored = load_resolution(key) if persistent else None
+    if stored is not None:
+        _resolved[key] = tuple(stored)
+        return list(stored)
+
+    taken = {aliases[header] for header in headers if header in aliases}
+    matches = []
+    for position, header in enumerate(headers):
+        if header in aliases or not isinstance(header, str):
+            continue
+        match = best_alias(header, index, short_index)
+        if match is not None:
+            matches.append((position, *match))
+
+    # Closest matches claim their target first, ties in sheet order
+    resolved = list(headers)
+    for position, _, alias, target in sorted(matches, key=lambda match: (-match[1], match[0])):
+        if target not in taken:
+            resolved[position] = alias
+            taken.add(target)
+    _resolved[key] = tuple(resolved)
+    if persistent:
+        save_resolution(key, namespace, headers, resolved)
+    return resolved
+
+if __name__ == "__main__":
+    from extract_data import header_aliases
+
+    parser = argparse.ArgumentParser(description="Resolve sheet headers to the names the column mappings know")
+    parser.add_argument("dataframe", help="Dataframe the headers are read into, e.g. 'Missing_Lab'")
+    parser.add_argument("headers", nargs="+", help="Headers of the sheet, in order")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    args = parser.parse_args()
+
+    resolved = resolve_headers(args.dataframe, args.headers, header_aliases(args.dataframe))
+    renames = {header: alias for header, alias in zip(args.headers, resolved) if header != alias}
+    if args.json:
+        print(json.dumps({"dataframe": args.dataframe, "renames": renames}))
+    else:
+        for header, alias in zip(args.headers, resolved):
+            marker = "→" if header != alias else "✓"
+            print(f"{marker} {header!r}" + (f" -> {alias!r}" if header != alias else ""))
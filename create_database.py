@@ -1,5 +1,7 @@
 import sqlite3
+import sql_profiler
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -7,430 +9,996 @@ load_dotenv()
 # Database file path
 DB_PATH = os.getcwd() + os.getenv("DB_PATH", "/database/edc_metrics.db")
 
-def create_database():
-    """Create SQLite database and all required tables (if they don't exist)"""
+# Storage mode for new databases:
+# - 'standard':   every table stores project/region/country/site/subject as TEXT
+# - 'normalized': study/site/subject/form/visit dimension tables, detail tables stored as
+#                 integer-keyed "<table>_fact" tables behind compatibility views that keep
+#                 the standard table and column names for the dashboard queries
+# - 'clustered':  detail tables stored as STRICT, WITHOUT ROWID "<table>_clustered" tables whose
+#                 primary key (project_name, site_id, subject_id, row_seq) keeps each subject's
+#                 rows physically together, behind compatibility views like normalized mode
+# - 'epoch':      tables with dates stored as "<table>_epoch" tables keeping dates as integer days
+#                 since 1970-01-01 and timestamps as integer seconds, behind compatibility views
+#                 returning the usual ISO text and the integers as "<column>_day"/"_second"
+#                 columns, indexed for the aging and visit timeline dates
+DB_STORAGE_MODE = os.getenv("DB_STORAGE_MODE", "standard")
+STORAGE_MODES = ('standard', 'normalized', 'clustered', 'epoch')
+
+# Page size for new databases (power of two between 512 and 65536), empty keeps SQLite's default
+DB_PAGE_SIZE = os.getenv("DB_PAGE_SIZE", "")
+
+# Table definitions (standard layout), in creation order
+TABLE_SCHEMAS = {
+    # 1) Subject Level Metrics
+    'subject_level_metrics': """
+    CREATE TABLE IF NOT EXISTS subject_level_metrics (
+        project_name TEXT NOT NULL,
+        region TEXT,
+        country TEXT,
+        site_id TEXT NOT NULL,
+        subject_id TEXT NOT NULL,
+        latest_visit TEXT,
+        subject_status TEXT,
+        missing_visits INTEGER DEFAULT 0,
+        missing_page INTEGER DEFAULT 0,
+        coded_terms INTEGER DEFAULT 0,
+        uncoded_terms INTEGER DEFAULT 0,
+        open_issues_in_lnr INTEGER DEFAULT 0,
+        open_issues_edrr INTEGER DEFAULT 0,
+        inactivated_forms_folders INTEGER DEFAULT 0,
+        esae_dashboard_dm INTEGER DEFAULT 0,
+        esae_dashboard_safety INTEGER DEFAULT 0,
+        expected_visits INTEGER DEFAULT 0,
+        pages_entered INTEGER DEFAULT 0,
+        pages_non_conformant INTEGER DEFAULT 0,
+        crfs_with_queries_nc INTEGER DEFAULT 0,
+        crfs_without_queries_nc INTEGER DEFAULT 0,
+        percentage_clean_crf REAL DEFAULT 0.0,
+        dm_queries INTEGER DEFAULT 0,
+        clinical_queries INTEGER DEFAULT 0,
+        medical_queries INTEGER DEFAULT 0,
+        site_queries INTEGER DEFAULT 0,
+        field_monitor_queries INTEGER DEFAULT 0,
+        coding_queries INTEGER DEFAULT 0,
+        safety_queries INTEGER DEFAULT 0,
+        total_queries INTEGER DEFAULT 0,
+        crfs_require_verification INTEGER DEFAULT 0,
+        forms_verified INTEGER DEFAULT 0,
+        crfs_frozen INTEGER DEFAULT 0,
+        crfs_not_frozen INTEGER DEFAULT 0,
+        crfs_locked INTEGER DEFAULT 0,
+        crfs_unlocked INTEGER DEFAULT 0,
+        pds_confirmed INTEGER DEFAULT 0,
+        pds_proposed INTEGER DEFAULT 0,
+        crfs_signed INTEGER DEFAULT 0,
+        crfs_overdue_within_45_days INTEGER DEFAULT 0,
+        crfs_overdue_45_to_90_days INTEGER DEFAULT 0,
+        crfs_overdue_beyond_90_days INTEGER DEFAULT 0,
+        broken_signatures INTEGER DEFAULT 0,
+        crfs_never_signed INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(project_name, site_id, subject_id)
+    )
+    """,
+    # 2) Query Report
+    'query_report': """
+    CREATE TABLE IF NOT EXISTS query_report (
+        project_name TEXT NOT NULL,
+        region TEXT,
+        country TEXT,
+        site_id TEXT NOT NULL,
+        subject_id TEXT NOT NULL,
+        visit_name TEXT,
+        form_name TEXT,
+        field_oid TEXT,
+        logline TEXT,
+        visit_date DATE,
+        query_status TEXT,
+        action_owner TEXT,
+        marking_group_name TEXT,
+        query_open_date DATE,
+        query_response_date DATE,
+        days_since_open INTEGER,
+        days_since_response INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # 3) Non Conformant
+    'non_conformant': """
+    CREATE TABLE IF NOT EXISTS non_conformant (
+        project_name TEXT NOT NULL,
+        region TEXT,
+        country TEXT,
+        site_id TEXT NOT NULL,
+        subject_id TEXT NOT NULL,
+        visit_name TEXT,
+        form_name TEXT,
+        logline TEXT,
+        field_oid TEXT,
+        audit_time TIMESTAMP,
+        visit_date DATE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # 4) PI Signature Report
+    'pi_signature_report': """
+    CREATE TABLE IF NOT EXISTS pi_signature_report (
+        project_name TEXT NOT NULL,
+        region TEXT,
+        country TEXT,
+        site_id TEXT NOT NULL,
+        subject_id TEXT NOT NULL,
+        visit_name TEXT,
+        form_name TEXT,
+        page_require_signature TEXT,
+        audit_action TEXT,
+        visit_date DATE,
+        date_page_entered DATE,
+        no_of_days INTEGER,
+        pending_since TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # 5) SDV
+    'sdv': """
+    CREATE TABLE IF NOT EXISTS sdv (
+        project_name TEXT NOT NULL,
+        region TEXT,
+        country TEXT,
+        site_id TEXT NOT NULL,
+        subject_id TEXT NOT NULL,
+        visit_name TEXT,
+        form_name TEXT,
+        visit_date DATE,
+        verification_status TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # 6) Protocol Deviation
+    'protocol_deviation': """
+    CREATE TABLE IF NOT EXISTS protocol_deviation (
+        project_name TEXT NOT NULL,
+        region TEXT,
+        country TEXT,
+        site_id TEXT NOT NULL,
+        subject_id TEXT NOT NULL,
+        visit_name TEXT,
+        form_name TEXT,
+        logline TEXT,
+        pd_status TEXT,
+        visit_date DATE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # 7) CRF Freeze UnFreeze (combined)
+    'crf_freeze_unfreeze': """
+    CREATE TABLE IF NOT EXISTS crf_freeze_unfreeze (
+        project_name TEXT NOT NULL,
+        region TEXT,
+        country TEXT,
+        site_id TEXT NOT NULL,
+        subject_id TEXT NOT NULL,
+        form_name TEXT,
+        freeze_status TEXT,
+        visit_date DATE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # 8) CRF Lock UnLocked (combined)
+    'crf_lock_unlock': """
+    CREATE TABLE IF NOT EXISTS crf_lock_unlock (
+        project_name TEXT NOT NULL,
+        region TEXT,
+        country TEXT,
+        site_id TEXT NOT NULL,
+        subject_id TEXT NOT NULL,
+        form_name TEXT,
+        lock_status TEXT,
+        audit_user TEXT,
+        visit_date DATE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # 9) Completed Visits (from SV)
+    'completed_visits': """
+    CREATE TABLE IF NOT EXISTS completed_visits (
+        project_name TEXT NOT NULL,
+        region TEXT,
+        country TEXT,
+        site_id TEXT NOT NULL,
+        subject_id TEXT NOT NULL,
+        visit_name TEXT,
+        visit_date DATE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # 10) EDRR Issues
+    'edrr_issues': """
+    CREATE TABLE IF NOT EXISTS edrr_issues (
+        project_name TEXT NOT NULL,
+        subject_id TEXT NOT NULL,
+        total_open_issue_count INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(project_name, subject_id)
+    )
+    """,
+    # 11) SAE Issues (combined DM and Safety with Responsible LF column)
+    'sae_issues': """
+    CREATE TABLE IF NOT EXISTS sae_issues (
+        discrepancy_id TEXT,
+        project_name TEXT NOT NULL,
+        country TEXT,
+        site_id TEXT,
+        subject_id TEXT NOT NULL,
+        form_name TEXT,
+        case_status TEXT,
+        discrepancy_created_timestamp TEXT,
+        review_status TEXT,
+        action_status TEXT,
+        responsible_lf TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # 12) Global Coding Report (combined MedDRA and WHODD with Report Type column)
+    'global_coding_report': """
+    CREATE TABLE IF NOT EXISTS global_coding_report (
+        project_name TEXT NOT NULL,
+        report_type TEXT NOT NULL,
+        dictionary TEXT,
+        dictionary_version TEXT,
+        subject_id TEXT NOT NULL,
+        form_oid TEXT,
+        logline TEXT,
+        field_oid TEXT,
+        coding_status TEXT,
+        require_coding TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # 13) Inactivated Forms Folders
+    'inactivated_forms_folders': """
+    CREATE TABLE IF NOT EXISTS inactivated_forms_folders (
+        project_name TEXT NOT NULL,
+        country TEXT,
+        site_id TEXT NOT NULL,
+        subject_id TEXT NOT NULL,
+        visit_name TEXT,
+        form_name TEXT,
+        data_on_form TEXT,
+        record_position TEXT,
+        audit_action TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # 14) Missing Lab Name and Ranges
+    'missing_lab_name_ranges': """
+    CREATE TABLE IF NOT EXISTS missing_lab_name_ranges (
+        project_name TEXT NOT NULL,
+        country TEXT,
+        site_id TEXT NOT NULL,
+        subject_id TEXT NOT NULL,
+        visit_name TEXT,
+        form_name TEXT,
+        lab_category TEXT,
+        lab_date DATE,
+        test_name TEXT,
+        test_description TEXT,
+        issue TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # 15) Missing Pages (with Page Type column)
+    'missing_pages': """
+    CREATE TABLE IF NOT EXISTS missing_pages (
+        project_name TEXT NOT NULL,
+        page_type TEXT,
+        country TEXT,
+        site_id TEXT NOT NULL,
+        subject_id TEXT NOT NULL,
+        visit_name TEXT,
+        form_name TEXT,
+        visit_date DATE,
+        subject_status TEXT,
+        days_missing INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # 16) Missing Visits
+    'missing_visits': """
+    CREATE TABLE IF NOT EXISTS missing_visits (
+        project_name TEXT NOT NULL,
+        country TEXT,
+        site_id TEXT NOT NULL,
+        subject_id TEXT NOT NULL,
+        visit_name TEXT,
+        projected_date DATE,
+        days_outstanding INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # 17) Subject DQI and Clean Status
+    'subject_dqi_clean_status': """
+    CREATE TABLE IF NOT EXISTS subject_dqi_clean_status (
+        project_name TEXT NOT NULL,
+        site_id TEXT NOT NULL,
+        subject_id TEXT NOT NULL,
+        dqi_score REAL DEFAULT 0.0,
+        dqi_category TEXT,
+        norm_safety_issues REAL DEFAULT 0.0,
+        norm_open_queries REAL DEFAULT 0.0,
+        norm_missing_visits REAL DEFAULT 0.0,
+        norm_missing_pages REAL DEFAULT 0.0,
+        norm_non_conformant REAL DEFAULT 0.0,
+        norm_unsigned_crfs REAL DEFAULT 0.0,
+        norm_unverified_forms REAL DEFAULT 0.0,
+        norm_uncoded_terms REAL DEFAULT 0.0,
+        norm_protocol_deviations REAL DEFAULT 0.0,
+        clean_status TEXT,
+        criteria_met INTEGER DEFAULT 0,
+        criteria_total INTEGER DEFAULT 11,
+        failing_criteria TEXT,
+        calculated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(project_name, site_id, subject_id)
+    )
+    """,
+}
+
+# Ingest bookkeeping, kept out of TABLE_SCHEMAS (no per-subject rows, never replaced with a study)
+METADATA_SCHEMAS = {
+    # Published generation per study: bumped after each finished ingest, so readers can tell
+    # when a study's data (including DQI) changed
+    'data_generation': """
+    CREATE TABLE IF NOT EXISTS data_generation (
+        project_name TEXT PRIMARY KEY,
+        generation INTEGER NOT NULL,
+        published_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # Date the day counts of each study's table were last computed against by
+    # refresh_time_relative.py; deleted with the study's rows when the table is ingested again
+    'time_relative_as_of': """
+    CREATE TABLE IF NOT EXISTS time_relative_as_of (
+        project_name TEXT NOT NULL,
+        table_name TEXT NOT NULL,
+        as_of DATE NOT NULL,
+        refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (project_name, table_name)
+    )
+    """,
+    # Sheet header tuples resolved by column_resolver.py, keyed by a fingerprint of the
+    # dataframe, its aliases and the headers, so every process reuses a resolved layout
+    'column_resolutions': """
+    CREATE TABLE IF NOT EXISTS column_resolutions (
+        fingerprint TEXT PRIMARY KEY,
+        namespace TEXT NOT NULL,
+        headers TEXT NOT NULL,
+        resolved TEXT NOT NULL,
+        resolved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # Fingerprint of each workbook as last ingested by the watcher
+    'workbook_fingerprints': """
+    CREATE TABLE IF NOT EXISTS workbook_fingerprints (
+        project_name TEXT NOT NULL,
+        workbook TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        sha256 TEXT NOT NULL,
+        ingested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (project_name, workbook)
+    )
+    """,
+}
+
+# Secondary indexes: (index name, table, columns)
+TABLE_INDEXES = [
+    # Indexes for subject_level_metrics
+    ('idx_slm_project_site_subject', 'subject_level_metrics', 'project_name, site_id, subject_id'),
     
-    # Check if database exists
-    db_exists = os.path.exists(DB_PATH)
+    # Indexes for query_report
+    ('idx_qr_project_site_subject', 'query_report', 'project_name, site_id, subject_id'),
+    ('idx_qr_query_status', 'query_report', 'query_status'),
     
-    if db_exists:
-        print(f"Database already exists: {DB_PATH}")
-        print("Creating tables if they don't exist (existing data will be preserved)...")
-    else:
-        print(f"Creating new database: {DB_PATH}")
+    # Indexes for non_conformant
+    ('idx_nc_project_site_subject', 'non_conformant', 'project_name, site_id, subject_id'),
     
-    # Create connection
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    # Indexes for completed_visits
+    ('idx_cv_project_site_subject', 'completed_visits', 'project_name, site_id, subject_id'),
     
-    # 1) Subject Level Metrics
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS subject_level_metrics (
-            project_name TEXT NOT NULL,
-            region TEXT,
-            country TEXT,
-            site_id TEXT NOT NULL,
-            subject_id TEXT NOT NULL,
-            latest_visit TEXT,
-            subject_status TEXT,
-            missing_visits INTEGER DEFAULT 0,
-            missing_page INTEGER DEFAULT 0,
-            coded_terms INTEGER DEFAULT 0,
-            uncoded_terms INTEGER DEFAULT 0,
-            open_issues_in_lnr INTEGER DEFAULT 0,
-            open_issues_edrr INTEGER DEFAULT 0,
-            inactivated_forms_folders INTEGER DEFAULT 0,
-            esae_dashboard_dm INTEGER DEFAULT 0,
-            esae_dashboard_safety INTEGER DEFAULT 0,
-            expected_visits INTEGER DEFAULT 0,
-            pages_entered INTEGER DEFAULT 0,
-            pages_non_conformant INTEGER DEFAULT 0,
-            crfs_with_queries_nc INTEGER DEFAULT 0,
-            crfs_without_queries_nc INTEGER DEFAULT 0,
-            percentage_clean_crf REAL DEFAULT 0.0,
-            dm_queries INTEGER DEFAULT 0,
-            clinical_queries INTEGER DEFAULT 0,
-            medical_queries INTEGER DEFAULT 0,
-            site_queries INTEGER DEFAULT 0,
-            field_monitor_queries INTEGER DEFAULT 0,
-            coding_queries INTEGER DEFAULT 0,
-            safety_queries INTEGER DEFAULT 0,
-            total_queries INTEGER DEFAULT 0,
-            crfs_require_verification INTEGER DEFAULT 0,
-            forms_verified INTEGER DEFAULT 0,
-            crfs_frozen INTEGER DEFAULT 0,
-            crfs_not_frozen INTEGER DEFAULT 0,
-            crfs_locked INTEGER DEFAULT 0,
-            crfs_unlocked INTEGER DEFAULT 0,
-            pds_confirmed INTEGER DEFAULT 0,
-            pds_proposed INTEGER DEFAULT 0,
-            crfs_signed INTEGER DEFAULT 0,
-            crfs_overdue_within_45_days INTEGER DEFAULT 0,
-            crfs_overdue_45_to_90_days INTEGER DEFAULT 0,
-            crfs_overdue_beyond_90_days INTEGER DEFAULT 0,
-            broken_signatures INTEGER DEFAULT 0,
-            crfs_never_signed INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            UNIQUE(project_name, site_id, subject_id)
-        )
-    """)
-    print("Created table: subject_level_metrics")
+    # Indexes for sae_issues
+    ('idx_sae_project_subject', 'sae_issues', 'project_name, subject_id'),
+    ('idx_sae_responsible_lf', 'sae_issues', 'responsible_lf'),
     
-    # 2) Query Report
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS query_report (
-            project_name TEXT NOT NULL,
-            region TEXT,
-            country TEXT,
-            site_id TEXT NOT NULL,
-            subject_id TEXT NOT NULL,
-            visit_name TEXT,
-            form_name TEXT,
-            field_oid TEXT,
-            logline TEXT,
-            visit_date DATE,
-            query_status TEXT,
-            action_owner TEXT,
-            marking_group_name TEXT,
-            query_open_date DATE,
-            query_response_date DATE,
-            days_since_open INTEGER,
-            days_since_response INTEGER,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    print("Created table: query_report")
+    # Indexes for global_coding_report
+    ('idx_gcr_project_subject', 'global_coding_report', 'project_name, subject_id'),
+    ('idx_gcr_report_type', 'global_coding_report', 'report_type'),
     
-    # 3) Non Conformant
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS non_conformant (
-            project_name TEXT NOT NULL,
-            region TEXT,
-            country TEXT,
-            site_id TEXT NOT NULL,
-            subject_id TEXT NOT NULL,
-            visit_name TEXT,
-            form_name TEXT,
-            logline TEXT,
-            field_oid TEXT,
-            audit_time TIMESTAMP,
-            visit_date DATE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    print("Created table: non_conformant")
+    # Indexes for missing_pages
+    ('idx_mp_project_site_subject', 'missing_pages', 'project_name, site_id, subject_id'),
+    ('idx_mp_page_type', 'missing_pages', 'page_type'),
     
-    # 4) PI Signature Report
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS pi_signature_report (
-            project_name TEXT NOT NULL,
-            region TEXT,
-            country TEXT,
-            site_id TEXT NOT NULL,
-            subject_id TEXT NOT NULL,
-            visit_name TEXT,
-            form_name TEXT,
-            page_require_signature TEXT,
-            audit_action TEXT,
-            visit_date DATE,
-            date_page_entered DATE,
-            no_of_days INTEGER,
-            pending_since TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    print("Created table: pi_signature_report")
+    # Indexes for missing_visits
+    ('idx_mv_project_site_subject', 'missing_visits', 'project_name, site_id, subject_id'),
     
-    # 5) SDV
+    # Indexes for subject_dqi_clean_status
+    ('idx_dqi_project_site_subject', 'subject_dqi_clean_status', 'project_name, site_id, subject_id'),
+    ('idx_dqi_category', 'subject_dqi_clean_status', 'dqi_category'),
+    ('idx_clean_status', 'subject_dqi_clean_status', 'clean_status'),
+]
+
+# Detail tables stored as integer-keyed facts in normalized mode and clustered by subject in
+# clustered mode. Subject-grain tables (subject_level_metrics, subject_dqi_clean_status,
+# edrr_issues) and tables without a mandatory site (sae_issues, global_coding_report) keep
+# the standard layout.
+DETAIL_TABLES = [
+    'query_report', 'non_conformant', 'pi_signature_report', 'sdv',
+    'protocol_deviation', 'crf_freeze_unfreeze', 'crf_lock_unlock', 'completed_visits',
+    'inactivated_forms_folders', 'missing_lab_name_ranges', 'missing_pages', 'missing_visits'
+]
+
+# Columns resolved through the dimension tables in normalized mode: column -> view expression
+DIMENSION_COLUMNS = {
+    'project_name': 'st.project_name',
+    'region': 'si.region',
+    'country': 'si.country',
+    'site_id': 'si.site_id',
+    'subject_id': 'su.subject_id',
+    'visit_name': 'v.visit_name',
+    'form_name': 'fm.form_name',
+}
+
+# Clustering key of the detail tables in clustered mode (row_seq numbers rows within a subject)
+CLUSTER_KEY = ('project_name', 'site_id', 'subject_id')
+
+# STRICT tables only accept INT/INTEGER/REAL/TEXT/BLOB/ANY; dates are stored as ISO text
+STRICT_TYPES = {'DATE': 'TEXT', 'TIMESTAMP': 'TEXT'}
+
+# Text columns holding timestamps (str(Timestamp)), stored as seconds in epoch mode like TIMESTAMP ones
+TIMESTAMP_TEXT_COLUMNS = {'sae_issues': ['discrepancy_created_timestamp']}
+
+# Suffix of the integer columns epoch mode adds next to each date column ('visit_date_day'),
+# NULL where the stored value is not an ISO date
+EPOCH_SUFFIXES = {'DATE': '_day', 'TIMESTAMP': '_second'}
+
+# Indexes of epoch mode on the integer days that the aging reference dates (refresh_time_relative.py)
+# and the visit timeline are filtered on: (index name, table, columns)
+EPOCH_DATE_INDEXES = [
+    ('idx_qr_query_open_day', 'query_report', 'project_name, query_open_date_day'),
+    ('idx_psr_date_page_entered_day', 'pi_signature_report', 'project_name, date_page_entered_day'),
+    ('idx_cv_visit_day', 'completed_visits', 'project_name, visit_date_day'),
+    ('idx_mp_visit_day', 'missing_pages', 'project_name, visit_date_day'),
+    ('idx_mv_projected_day', 'missing_visits', 'project_name, projected_date_day'),
+]
+
+@lru_cache(maxsize=None)
+def get_table_columns(table_name):
+    """Return the standard (name, type, notnull, default) column layout of a table"""
+    conn = sqlite3.connect(":memory:")
+    conn.execute(TABLE_SCHEMAS[table_name])
+    columns = [
+        (name, col_type, notnull, default)
+        for _, name, col_type, notnull, default, _ in conn.execute(f"PRAGMA table_info({table_name})")
+    ]
+    conn.close()
+    return tuple(columns)
+
+def get_epoch_columns(table_name):
+    """Columns of a table stored as integers in epoch mode: {column: 'DATE' or 'TIMESTAMP'}"""
+    # Bookkeeping timestamps filled by a default (created_at, ...) keep their text
+    columns = {
+        name: col_type for name, col_type, _, default in get_table_columns(table_name)
+        if col_type in ('DATE', 'TIMESTAMP') and default is None
+    }
+    columns.update((name, 'TIMESTAMP') for name in TIMESTAMP_TEXT_COLUMNS.get(table_name, []))
+    return columns
+
+# Tables stored as "<table>_epoch" tables in epoch mode
+EPOCH_TABLES = [name for name in TABLE_SCHEMAS if get_epoch_columns(name)]
+
+def get_storage_mode(conn):
+    """Detect the storage mode of an existing database from its schema"""
+    row = conn.execute("SELECT type FROM sqlite_master WHERE name = 'query_report'").fetchone()
+    if not row or row[0] != 'view':
+        return 'standard'
+    for storage_mode in ('clustered', 'epoch'):
+        physical = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (f"query_report_{storage_mode}",)
+        ).fetchone()
+        if physical:
+            return storage_mode
+    return 'normalized'
+
+def get_physical_table(conn, table_name):
+    """
+    Resolve a table name to the table that physically stores its rows, along with a
+    predicate selecting one project's rows on it (bind the project name as parameter)
+    """
+    if table_name in DETAIL_TABLES or table_name in EPOCH_TABLES:
+        storage_mode = get_storage_mode(conn)
+        if storage_mode == 'epoch' and table_name in EPOCH_TABLES:
+            return f"{table_name}_epoch", "project_name = ?"
+        if storage_mode == 'normalized' and table_name in DETAIL_TABLES:
+            return f"{table_name}_fact", """subject_key IN (
+            SELECT su.subject_key FROM subject su
+            JOIN site si ON si.site_key = su.site_key
+            JOIN study st ON st.study_key = si.study_key
+            WHERE st.project_name = ?)"""
+        if storage_mode == 'clustered' and table_name in DETAIL_TABLES:
+            return f"{table_name}_clustered", "project_name = ?"
+    return table_name, "project_name = ?"
+
+def get_physical_julianday(conn, table_name, column):
+    """SQL julian day of a date column on the physical table of table_name (see get_physical_table)"""
+    if table_name in EPOCH_TABLES and get_storage_mode(conn) == 'epoch':
+        # Epoch days, or the text of a value that was not an ISO date
+        return f"(CASE WHEN typeof({column}) = 'integer' THEN {column} + 2440587.5 ELSE julianday({column}) END)"
+    return f"julianday({column})"
+
+def get_epoch_day(conn, table_name, column):
+    """
+    SQL days since 1970-01-01 of a date column, for range filters: the indexed integer column
+    in epoch mode, computed from the ISO text otherwise
+    """
+    if table_name in EPOCH_TABLES and get_storage_mode(conn) == 'epoch':
+        return f"{column}{EPOCH_SUFFIXES['DATE']}"
+    return f"CAST(julianday({column}) - 2440587.5 AS INTEGER)"
+
+def create_tables(cursor, tables=None):
+    """Create the given standard tables (all by default)"""
+    for table_name in tables or TABLE_SCHEMAS:
+        cursor.execute(TABLE_SCHEMAS[table_name])
+        print(f"Created table: {table_name}")
+
+def create_metadata_tables(cursor):
+    """Create the ingest bookkeeping tables (safe to call on an existing database)"""
+    for schema in METADATA_SCHEMAS.values():
+        cursor.execute(schema)
+
+def create_indexes(cursor, tables=None):
+    """Create the secondary indexes of the given standard tables (all by default)"""
+    for index_name, table_name, columns in TABLE_INDEXES:
+        if tables is None or table_name in tables:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name}({columns})")
+
+def drop_secondary_indexes(conn):
+    """
+    Drop the non-unique indexes of every table (any storage mode) and return them as
+    [(name, sql)] for rebuild_indexes. Unique indexes and constraints stay, they are
+    needed while inserting (INSERT OR REPLACE, dimension lookups).
+    """
+    indexes = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+        "AND sql NOT LIKE 'CREATE UNIQUE%' ORDER BY name"
+    ).fetchall()
+    for name, _ in indexes:
+        conn.execute(f"DROP INDEX {name}")
+    return indexes
+
+def rebuild_indexes(conn, indexes):
+    """Create indexes returned by drop_secondary_indexes again, each in one sorted pass over its table"""
+    for _, sql in indexes:
+        conn.execute(sql)
+
+def create_dimension_tables(cursor):
+    """Create the study/site/subject/form/visit dimension tables used in normalized mode"""
     cursor.execute("""
-        CREATE TABLE IF NOT EXISTS sdv (
-            project_name TEXT NOT NULL,
-            region TEXT,
-            country TEXT,
-            site_id TEXT NOT NULL,
-            subject_id TEXT NOT NULL,
-            visit_name TEXT,
-            form_name TEXT,
-            visit_date DATE,
-            verification_status TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        CREATE TABLE IF NOT EXISTS study (
+            study_key INTEGER PRIMARY KEY,
+            project_name TEXT NOT NULL UNIQUE
         )
     """)
-    print("Created table: sdv")
-    
-    # 6) Protocol Deviation
     cursor.execute("""
-        CREATE TABLE IF NOT EXISTS protocol_deviation (
-            project_name TEXT NOT NULL,
-            region TEXT,
-            country TEXT,
+        CREATE TABLE IF NOT EXISTS site (
+            site_key INTEGER PRIMARY KEY,
+            study_key INTEGER NOT NULL REFERENCES study(study_key),
             site_id TEXT NOT NULL,
-            subject_id TEXT NOT NULL,
-            visit_name TEXT,
-            form_name TEXT,
-            logline TEXT,
-            pd_status TEXT,
-            visit_date DATE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    print("Created table: protocol_deviation")
-    
-    # 7) CRF Freeze UnFreeze (combined)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS crf_freeze_unfreeze (
-            project_name TEXT NOT NULL,
             region TEXT,
             country TEXT,
-            site_id TEXT NOT NULL,
-            subject_id TEXT NOT NULL,
-            form_name TEXT,
-            freeze_status TEXT,
-            visit_date DATE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            UNIQUE(study_key, site_id)
         )
     """)
-    print("Created table: crf_freeze_unfreeze")
-    
-    # 8) CRF Lock UnLocked (combined)
     cursor.execute("""
-        CREATE TABLE IF NOT EXISTS crf_lock_unlock (
-            project_name TEXT NOT NULL,
-            region TEXT,
-            country TEXT,
-            site_id TEXT NOT NULL,
-            subject_id TEXT NOT NULL,
-            form_name TEXT,
-            lock_status TEXT,
-            audit_user TEXT,
-            visit_date DATE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    print("Created table: crf_lock_unlock")
-    
-    # 9) Completed Visits (from SV)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS completed_visits (
-            project_name TEXT NOT NULL,
-            region TEXT,
-            country TEXT,
-            site_id TEXT NOT NULL,
-            subject_id TEXT NOT NULL,
-            visit_name TEXT,
-            visit_date DATE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    print("Created table: completed_visits")
-    
-    # 10) EDRR Issues
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS edrr_issues (
-            project_name TEXT NOT NULL,
+        CREATE TABLE IF NOT EXISTS subject (
+            subject_key INTEGER PRIMARY KEY,
+            site_key INTEGER NOT NULL REFERENCES site(site_key),
             subject_id TEXT NOT NULL,
-            total_open_issue_count INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            UNIQUE(project_name, subject_id)
+            UNIQUE(site_key, subject_id)
         )
     """)
-    print("Created table: edrr_issues")
-    
-    # 11) SAE Issues (combined DM and Safety with Responsible LF column)
     cursor.execute("""
-        CREATE TABLE IF NOT EXISTS sae_issues (
-            discrepancy_id TEXT,
-            project_name TEXT NOT NULL,
-            country TEXT,
-            site_id TEXT,
-            subject_id TEXT NOT NULL,
-            form_name TEXT,
-            case_status TEXT,
-            discrepancy_created_timestamp TEXT,
-            review_status TEXT,
-            action_status TEXT,
-            responsible_lf TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        CREATE TABLE IF NOT EXISTS form (
+            form_key INTEGER PRIMARY KEY,
+            form_name TEXT NOT NULL UNIQUE
         )
     """)
-    print("Created table: sae_issues")
-    
-    # 12) Global Coding Report (combined MedDRA and WHODD with Report Type column)
     cursor.execute("""
-        CREATE TABLE IF NOT EXISTS global_coding_report (
-            project_name TEXT NOT NULL,
-            report_type TEXT NOT NULL,
-            dictionary TEXT,
-            dictionary_version TEXT,
-            subject_id TEXT NOT NULL,
-            form_oid TEXT,
-            logline TEXT,
-            field_oid TEXT,
-            coding_status TEXT,
-            require_coding TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        CREATE TABLE IF NOT EXISTS visit (
+            visit_key INTEGER PRIMARY KEY,
+            visit_name TEXT NOT NULL UNIQUE
         )
     """)
-    print("Created table: global_coding_report")
-    
-    # 13) Inactivated Forms Folders
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS inactivated_forms_folders (
-            project_name TEXT NOT NULL,
-            country TEXT,
-            site_id TEXT NOT NULL,
-            subject_id TEXT NOT NULL,
-            visit_name TEXT,
-            form_name TEXT,
-            data_on_form TEXT,
-            record_position TEXT,
-            audit_action TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
+    for table_name in ('study', 'site', 'subject', 'form', 'visit'):
+        print(f"Created dimension table: {table_name}")
+
+def create_fact_table(cursor, table_name):
+    """
+    Create the integer-keyed fact table for a detail table, the compatibility view exposing
+    the standard columns under the standard name, and the trigger routing inserts on the view
+    """
+    columns = get_table_columns(table_name)
+    column_names = [name for name, _, _, _ in columns]
+    has_visit = 'visit_name' in column_names
+    has_form = 'form_name' in column_names
+    site_columns = [name for name in ('region', 'country') if name in column_names]
+    fact_columns = [column for column in columns if column[0] not in DIMENSION_COLUMNS]
+    fact_table = f"{table_name}_fact"
+
+    # Fact table
+    definitions = ["subject_key INTEGER NOT NULL REFERENCES subject(subject_key)"]
+    if has_visit:
+        definitions.append("visit_key INTEGER REFERENCES visit(visit_key)")
+    if has_form:
+        definitions.append("form_key INTEGER REFERENCES form(form_key)")
+    for name, col_type, notnull, default in fact_columns:
+        definition = f"{name} {col_type}"
+        if notnull:
+            definition += " NOT NULL"
+        if default is not None:
+            definition += f" DEFAULT {default}"
+        definitions.append(definition)
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {fact_table} (\n    "
+        + ",\n    ".join(definitions)
+        + "\n)"
+    )
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{fact_table}_subject ON {fact_table}(subject_key)")
+
+    # Compatibility view with the standard column names and order
+    select_list = ",\n    ".join(
+        f"{DIMENSION_COLUMNS[name]} AS {name}" if name in DIMENSION_COLUMNS else f"f.{name} AS {name}"
+        for name in column_names
+    )
+    joins = [
+        "JOIN subject su ON su.subject_key = f.subject_key",
+        "JOIN site si ON si.site_key = su.site_key",
+        "JOIN study st ON st.study_key = si.study_key",
+    ]
+    if has_visit:
+        joins.append("LEFT JOIN visit v ON v.visit_key = f.visit_key")
+    if has_form:
+        joins.append("LEFT JOIN form fm ON fm.form_key = f.form_key")
+    cursor.execute(
+        f"CREATE VIEW IF NOT EXISTS {table_name} AS SELECT\n    {select_list}\n"
+        f"FROM {fact_table} f\n" + "\n".join(joins)
+    )
+
+    # Insert trigger: register dimension members, then insert the keyed fact row
+    site_lookup = (
+        "(SELECT si.site_key FROM site si JOIN study st ON st.study_key = si.study_key"
+        " WHERE st.project_name = NEW.project_name AND si.site_id = NEW.site_id)"
+    )
+    subject_lookup = (
+        f"(SELECT su.subject_key FROM subject su"
+        f" WHERE su.site_key = {site_lookup} AND su.subject_id = NEW.subject_id)"
+    )
+
+    statements = [
+        "INSERT OR IGNORE INTO study (project_name) VALUES (NEW.project_name)",
+        "INSERT OR IGNORE INTO site (study_key, site_id)"
+        " VALUES ((SELECT study_key FROM study WHERE project_name = NEW.project_name), NEW.site_id)",
+    ]
+    if site_columns:
+        assignments = ", ".join(f"{name} = COALESCE({name}, NEW.{name})" for name in site_columns)
+        missing = " OR ".join(f"{name} IS NULL" for name in site_columns)
+        statements.append(f"UPDATE site SET {assignments} WHERE site_key = {site_lookup} AND ({missing})")
+    statements.append(f"INSERT OR IGNORE INTO subject (site_key, subject_id) VALUES ({site_lookup}, NEW.subject_id)")
+
+    key_names = ["subject_key"]
+    key_values = [subject_lookup]
+    if has_visit:
+        statements.append("INSERT OR IGNORE INTO visit (visit_name) SELECT NEW.visit_name WHERE NEW.visit_name IS NOT NULL")
+        key_names.append("visit_key")
+        key_values.append("(SELECT visit_key FROM visit WHERE visit_name = NEW.visit_name)")
+    if has_form:
+        statements.append("INSERT OR IGNORE INTO form (form_name) SELECT NEW.form_name WHERE NEW.form_name IS NOT NULL")
+        key_names.append("form_key")
+        key_values.append("(SELECT form_key FROM form WHERE form_name = NEW.form_name)")
+
+    # created_at keeps its default unless the caller provided a value
+    value_names = [name for name, _, _, _ in fact_columns if name != 'created_at']
+    statements.append(
+        f"INSERT INTO {fact_table} ({', '.join(key_names + value_names)})"
+        f" VALUES ({', '.join(key_values + [f'NEW.{name}' for name in value_names])})"
+    )
+    cursor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {table_name}_insert INSTEAD OF INSERT ON {table_name}\n"
+        "BEGIN\n    " + ";\n    ".join(statements) + ";\nEND"
+    )
+    print(f"Created fact table: {fact_table} (view: {table_name})")
+
+def load_fact_rows(conn, table_name, source):
+    """
+    Insert the rows of source (a table with the standard columns of table_name) into its fact
+    table with set-based statements: dimension members are registered once per distinct value,
+    then every fact row goes in with one INSERT ... SELECT joined to the dimensions. Same rows
+    and keys as inserting through the view's trigger, without its per-row lookups.
+    """
+    column_names = [name for name, _, _, _ in get_table_columns(table_name)]
+    has_visit = 'visit_name' in column_names
+    has_form = 'form_name' in column_names
+    site_columns = [name for name in ('region', 'country') if name in column_names]
+    value_names = [name for name in column_names if name not in DIMENSION_COLUMNS and name != 'created_at']
+    site_join = (
+        "JOIN study st ON st.project_name = s.project_name "
+        "JOIN site si ON si.study_key = st.study_key AND si.site_id = s.site_id"
+    )
+
+    # Members get their keys in order of first appearance, as with row-by-row inserts
+    conn.execute(f"""
+        INSERT OR IGNORE INTO study (project_name)
+        SELECT project_name FROM {source} GROUP BY project_name ORDER BY MIN(rowid)
     """)
-    print("Created table: inactivated_forms_folders")
-    
-    # 14) Missing Lab Name and Ranges
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS missing_lab_name_ranges (
-            project_name TEXT NOT NULL,
-            country TEXT,
-            site_id TEXT NOT NULL,
-            subject_id TEXT NOT NULL,
-            visit_name TEXT,
-            form_name TEXT,
-            lab_category TEXT,
-            lab_date DATE,
-            test_name TEXT,
-            test_description TEXT,
-            issue TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
+    conn.execute(f"""
+        INSERT OR IGNORE INTO site (study_key, site_id)
+        SELECT st.study_key, s.site_id FROM {source} s JOIN study st ON st.project_name = s.project_name
+        GROUP BY st.study_key, s.site_id ORDER BY MIN(s.rowid)
     """)
-    print("Created table: missing_lab_name_ranges")
-    
-    # 15) Missing Pages (with Page Type column)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS missing_pages (
-            project_name TEXT NOT NULL,
-            page_type TEXT,
-            country TEXT,
-            site_id TEXT NOT NULL,
-            subject_id TEXT NOT NULL,
-            visit_name TEXT,
-            form_name TEXT,
-            visit_date DATE,
-            subject_status TEXT,
-            days_missing INTEGER,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
+    for name in site_columns:
+        # First non-null value per site (bare column of the MIN(rowid) row)
+        conn.execute(f"""
+            UPDATE site SET {name} = first.{name}
+            FROM (
+                SELECT si.site_key, s.{name}, MIN(s.rowid) FROM {source} s {site_join}
+                WHERE s.{name} IS NOT NULL GROUP BY si.site_key
+            ) AS first
+            WHERE site.site_key = first.site_key AND site.{name} IS NULL
+        """)
+    conn.execute(f"""
+        INSERT OR IGNORE INTO subject (site_key, subject_id)
+        SELECT si.site_key, s.subject_id FROM {source} s {site_join}
+        GROUP BY si.site_key, s.subject_id ORDER BY MIN(s.rowid)
     """)
-    print("Created table: missing_pages")
-    
-    # 16) Missing Visits
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS missing_visits (
-            project_name TEXT NOT NULL,
-            country TEXT,
-            site_id TEXT NOT NULL,
-            subject_id TEXT NOT NULL,
-            visit_name TEXT,
-            projected_date DATE,
-            days_outstanding INTEGER,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    print("Created table: missing_visits")
-    
-    # 17) Subject DQI and Clean Status
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS subject_dqi_clean_status (
-            project_name TEXT NOT NULL,
-            site_id TEXT NOT NULL,
-            subject_id TEXT NOT NULL,
-            dqi_score REAL DEFAULT 0.0,
-            dqi_category TEXT,
-            norm_safety_issues REAL DEFAULT 0.0,
-            norm_open_queries REAL DEFAULT 0.0,
-            norm_missing_visits REAL DEFAULT 0.0,
-            norm_missing_pages REAL DEFAULT 0.0,
-            norm_non_conformant REAL DEFAULT 0.0,
-            norm_unsigned_crfs REAL DEFAULT 0.0,
-            norm_unverified_forms REAL DEFAULT 0.0,
-            norm_uncoded_terms REAL DEFAULT 0.0,
-            norm_protocol_deviations REAL DEFAULT 0.0,
-            clean_status TEXT,
-            criteria_met INTEGER DEFAULT 0,
-            criteria_total INTEGER DEFAULT 11,
-            failing_criteria TEXT,
-            calculated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            UNIQUE(project_name, site_id, subject_id)
+
+    key_names = ["subject_key"]
+    key_values = ["su.subject_key"]
+    # Left joins, so a row without a subject fails on NOT NULL instead of being dropped
+    joins = [
+        "LEFT JOIN study st ON st.project_name = s.project_name",
+        "LEFT JOIN site si ON si.study_key = st.study_key AND si.site_id = s.site_id",
+        "LEFT JOIN subject su ON su.site_key = si.site_key AND su.subject_id = s.subject_id",
+    ]
+    for dimension, key, alias, name, present in (
+        ('visit', 'visit_key', 'v', 'visit_name', has_visit),
+        ('form', 'form_key', 'fm', 'form_name', has_form),
+    ):
+        if present:
+            conn.execute(f"""
+                INSERT OR IGNORE INTO {dimension} ({name})
+                SELECT {name} FROM {source} WHERE {name} IS NOT NULL GROUP BY {name} ORDER BY MIN(rowid)
+            """)
+            key_names.append(key)
+            key_values.append(f"{alias}.{key}")
+            joins.append(f"LEFT JOIN {dimension} {alias} ON {alias}.{name} = s.{name}")
+
+    conn.execute(
+        f"INSERT INTO {table_name}_fact ({', '.join(key_names + value_names)})\n"
+        f"SELECT {', '.join(key_values + [f's.{name}' for name in value_names])}\n"
+        f"FROM {source} s\n" + "\n".join(joins) + "\nORDER BY s.rowid"
+    )
+
+def create_clustered_table(cursor, table_name):
+    """
+    Create the STRICT, WITHOUT ROWID table storing a detail table clustered by subject, the
+    compatibility view under the standard name, and the trigger numbering inserted rows
+    """
+    columns = get_table_columns(table_name)
+    column_names = [name for name, _, _, _ in columns]
+    clustered_table = f"{table_name}_clustered"
+
+    # Clustered table: the primary key is the row order on disk
+    definitions = []
+    for name, col_type, notnull, default in columns:
+        definition = f"{name} {STRICT_TYPES.get(col_type, col_type)}"
+        if notnull:
+            definition += " NOT NULL"
+        if default is not None:
+            definition += f" DEFAULT {default}"
+        definitions.append(definition)
+        if name == CLUSTER_KEY[-1]:
+            definitions.append("row_seq INTEGER NOT NULL")
+    definitions.append(f"PRIMARY KEY ({', '.join(CLUSTER_KEY)}, row_seq)")
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {clustered_table} (\n    "
+        + ",\n    ".join(definitions)
+        + "\n) STRICT, WITHOUT ROWID"
+    )
+
+    # The (project_name, site_id, subject_id) index is covered by the primary key
+    for index_name, index_table, index_columns in TABLE_INDEXES:
+        if index_table == table_name and index_columns != ", ".join(CLUSTER_KEY):
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {clustered_table}({index_columns})")
+
+    # Compatibility view with the standard column names and order
+    cursor.execute(
+        f"CREATE VIEW IF NOT EXISTS {table_name} AS SELECT {', '.join(column_names)}\n"
+        f"FROM {clustered_table}"
+    )
+
+    # Insert trigger: number the row after the subject's last row (a primary key seek)
+    key_match = " AND ".join(f"{name} = NEW.{name}" for name in CLUSTER_KEY)
+    value_names = [name for name in column_names if name != 'created_at']
+    cursor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {table_name}_insert INSTEAD OF INSERT ON {table_name}\n"
+        "BEGIN\n"
+        f"    INSERT INTO {clustered_table} ({', '.join(value_names)}, row_seq)"
+        f" VALUES ({', '.join(f'NEW.{name}' for name in value_names)},"
+        f" (SELECT COALESCE(MAX(row_seq), 0) + 1 FROM {clustered_table} WHERE {key_match}));\n"
+        "END"
+    )
+    print(f"Created clustered table: {clustered_table} (view: {table_name})")
+
+def create_epoch_table(cursor, table_name):
+    """
+    Create the table storing a table's dates as integers (epoch days, timestamps as epoch
+    seconds), the compatibility view returning them as ISO text under the standard name, and
+    the trigger converting inserted values. Values that are not ISO dates or timestamps
+    ('02 Dec 2024 12:01:26') are stored as they are, so nothing is lost.
+    """
+    columns = get_table_columns(table_name)
+    column_names = [name for name, _, _, _ in columns]
+    epoch_columns = get_epoch_columns(table_name)
+    epoch_table = f"{table_name}_epoch"
+
+    definitions = []
+    for name, col_type, notnull, default in columns:
+        definition = f"{name} {'INTEGER' if name in epoch_columns else col_type}"
+        if notnull:
+            definition += " NOT NULL"
+        if default is not None:
+            definition += f" DEFAULT {default}"
+        definitions.append(definition)
+    # Integer-only copies of the dates (NULL for text that is not an ISO date), which range
+    # filters on the view can compare and search an index with
+    for name, col_type in epoch_columns.items():
+        definitions.append(
+            f"{name}{EPOCH_SUFFIXES[col_type]} INTEGER GENERATED ALWAYS AS"
+            f" (CASE WHEN typeof({name}) = 'integer' THEN {name} END) VIRTUAL"
         )
-    """)
-    print("Created table: subject_dqi_clean_status")
-    
-    # Create indexes for better query performance
-    print("\nCreating indexes...")
-    
-    # Indexes for subject_level_metrics
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_slm_project_site_subject ON subject_level_metrics(project_name, site_id, subject_id)")
-    
-    # Indexes for query_report
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_qr_project_site_subject ON query_report(project_name, site_id, subject_id)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_qr_query_status ON query_report(query_status)")
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {epoch_table} (\n    "
+        + ",\n    ".join(definitions)
+        + "\n)"
+    )
+
+    for index_name, index_table, index_columns in TABLE_INDEXES + EPOCH_DATE_INDEXES:
+        if index_table == table_name:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {epoch_table}({index_columns})")
+
+    # Compatibility view with the standard column names and order
+    decoders = {
+        'DATE': "CASE WHEN typeof({0}) = 'integer' THEN date({0} * 86400, 'unixepoch') ELSE {0} END",
+        'TIMESTAMP': "CASE WHEN typeof({0}) = 'integer' THEN datetime({0}, 'unixepoch') ELSE {0} END",
+    }
+    select_list = ",\n    ".join(
+        [f"{decoders[epoch_columns[name]].format(name)} AS {name}" if name in epoch_columns else name
+         for name in column_names]
+        + [f"{name}{EPOCH_SUFFIXES[col_type]}" for name, col_type in epoch_columns.items()]
+    )
+    cursor.execute(f"CREATE VIEW IF NOT EXISTS {table_name} AS SELECT\n    {select_list}\nFROM {epoch_table}")
+
+    # Insert trigger: ISO values (the ones date()/datetime() give back unchanged) become integers
+    encoders = {
+        'DATE': "CASE WHEN date(NEW.{0}) IS NEW.{0} THEN CAST(strftime('%s', NEW.{0}) AS INTEGER) / 86400 ELSE NEW.{0} END",
+        'TIMESTAMP': "CASE WHEN datetime(NEW.{0}) IS NEW.{0} THEN CAST(strftime('%s', NEW.{0}) AS INTEGER) ELSE NEW.{0} END",
+    }
+    value_names = [name for name in column_names if name != 'created_at']
+    values = [encoders[epoch_columns[name]].format(name) if name in epoch_columns else f"NEW.{name}" for name in value_names]
+    cursor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {table_name}_insert INSTEAD OF INSERT ON {table_name}\n"
+        "BEGIN\n"
+        f"    INSERT INTO {epoch_table} ({', '.join(value_names)}) VALUES ({', '.join(values)});\n"
+        "END"
+    )
+    print(f"Created epoch table: {epoch_table} (view: {table_name})")
+
+def create_database(storage_mode=None, page_size=None):
+    """Create SQLite database and all required tables (if they don't exist)"""
     
-    # Indexes for non_conformant
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_nc_project_site_subject ON non_conformant(project_name, site_id, subject_id)")
+    storage_mode = storage_mode or DB_STORAGE_MODE
+    if storage_mode not in STORAGE_MODES:
+        raise ValueError(f"Unknown storage mode '{storage_mode}', expected one of {STORAGE_MODES}")
+    if storage_mode == 'clustered' and sqlite3.sqlite_version_info < (3, 37, 0):
+        raise RuntimeError(f"Clustered storage needs STRICT tables (SQLite 3.37+), found {sqlite3.sqlite_version}")
     
-    # Indexes for completed_visits
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_cv_project_site_subject ON completed_visits(project_name, site_id, subject_id)")
+    page_size = int(page_size or DB_PAGE_SIZE or 0)
+    if page_size and (page_size < 512 or page_size > 65536 or page_size & (page_size - 1)):
+        raise ValueError(f"Invalid page size {page_size}, expected a power of two between 512 and 65536")
     
-    # Indexes for sae_issues
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sae_project_subject ON sae_issues(project_name, subject_id)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sae_responsible_lf ON sae_issues(responsible_lf)")
+    # Check if database exists
+    db_exists = os.path.exists(DB_PATH)
     
-    # Indexes for global_coding_report
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_gcr_project_subject ON global_coding_report(project_name, subject_id)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_gcr_report_type ON global_coding_report(report_type)")
+    if db_exists:
+        print(f"Database already exists: {DB_PATH}")
+        print("Creating tables if they don't exist (existing data will be preserved)...")
+    else:
+        print(f"Creating new database: {DB_PATH}")
     
-    # Indexes for missing_pages
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_mp_project_site_subject ON missing_pages(project_name, site_id, subject_id)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_mp_page_type ON missing_pages(page_type)")
+    # Create connection
+    conn = sql_profiler.connect(DB_PATH)
+    cursor = conn.cursor()
     
-    # Indexes for missing_visits
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_mv_project_site_subject ON missing_visits(project_name, site_id, subject_id)")
+    # An existing database keeps the layout it was created with
+    if db_exists and cursor.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0] > 0:
+        existing_mode = get_storage_mode(conn)
+        if existing_mode != storage_mode:
+            print(f"Keeping existing '{existing_mode}' storage mode (requested '{storage_mode}')")
+            storage_mode = existing_mode
+    elif page_size:
+        # Only takes effect before the first table is written
+        cursor.execute(f"PRAGMA page_size = {page_size}")
+    
+    if storage_mode == 'normalized':
+        create_dimension_tables(cursor)
+        standard_tables = [name for name in TABLE_SCHEMAS if name not in DETAIL_TABLES]
+        create_tables(cursor, standard_tables)
+        for table_name in DETAIL_TABLES:
+            create_fact_table(cursor, table_name)
+    elif storage_mode == 'clustered':
+        standard_tables = [name for name in TABLE_SCHEMAS if name not in DETAIL_TABLES]
+        create_tables(cursor, standard_tables)
+        for table_name in DETAIL_TABLES:
+            create_clustered_table(cursor, table_name)
+    elif storage_mode == 'epoch':
+        standard_tables = [name for name in TABLE_SCHEMAS if name not in EPOCH_TABLES]
+        create_tables(cursor, standard_tables)
+        for table_name in EPOCH_TABLES:
+            create_epoch_table(cursor, table_name)
+    else:
+        standard_tables = list(TABLE_SCHEMAS)
+        create_tables(cursor)
     
-    # Indexes for subject_dqi_clean_status
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_dqi_project_site_subject ON subject_dqi_clean_status(project_name, site_id, subject_id)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_dqi_category ON subject_dqi_clean_status(dqi_category)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_clean_status ON subject_dqi_clean_status(clean_status)")
+    create_metadata_tables(cursor)
     
+    # Create indexes for better query performance
+    print("\nCreating indexes...")
+    create_indexes(cursor, standard_tables)
     print("Indexes created successfully")
     
     # Commit and close
     conn.commit()
+    page_size = cursor.execute("PRAGMA page_size").fetchone()[0]
     conn.close()
     
-    print(f"\nDatabase created successfully at: {DB_PATH}")
+    print(f"\nDatabase created successfully at: {DB_PATH} ({storage_mode} storage, {page_size}-byte pages)")
     print("All tables and indexes created.")
 
 def verify_database():
     """Verify database creation by listing all tables"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = sql_profiler.connect(DB_PATH)
     cursor = conn.cursor()
     
     cursor.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
     tables = cursor.fetchall()
     
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='view' ORDER BY name")
+    views = cursor.fetchall()
+    
     print("\n" + "="*60)
     print("DATABASE VERIFICATION")
     print("="*60)
+    print(f"\nStorage mode: {get_storage_mode(conn)}")
+    print(f"Page size: {cursor.execute('PRAGMA page_size').fetchone()[0]} bytes")
     print(f"\nTotal tables created: {len(tables)}")
     print("\nTable names:")
     for i, table in enumerate(tables, 1):
         print(f"{i}. {table[0]}")
     
+    if views:
+        print(f"\nCompatibility views: {len(views)}")
+        for i, view in enumerate(views, 1):
+            print(f"{i}. {view[0]}")
+    
     conn.close()
 
 if __name__ == "__main__":
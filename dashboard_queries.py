@@ -0,0 +1,812 @@
+import re
+import random
+from create_database import TABLE_SCHEMAS
+
+# Catalog of the SQL the dashboard issues (database/queries/*.ts and app/api/*/route.ts).
+#
+# Each entry mirrors one prepared statement:
+# - 'sql':      the statement with {clause} placeholders where the TypeScript appends filters
+# - 'clauses':  clause name -> (base text, [(filter, column expression), ...]); every filter set
+#               (and not 'ALL') appends " AND <column> = ?", in list order, like the TS builders
+# - 'requires': filters the TS function takes as mandatory arguments (entry skipped without them)
+#
+# Filters are the sidebar selections: study, region, country, site, subject.
+
+FILTERS = ('study', 'region', 'country', 'site', 'subject')
+
+FILTER_COLUMNS = {
+    'study': 'project_name',
+    'region': 'region',
+    'country': 'country',
+    'site': 'site_id',
+    'subject': 'subject_id',
+}
+
+def filter_columns(alias=None, filters=FILTERS):
+    """(filter, column) pairs for a standard WHERE builder, optionally qualified by a table alias"""
+    prefix = f"{alias}." if alias else ""
+    return [(name, prefix + FILTER_COLUMNS[name]) for name in filters]
+
+# Filters of tables without a region column (sae_issues, missing_visits)
+NO_REGION = ('study', 'country', 'site', 'subject')
+
+# Patient 360 statements take the subject first, then an optional study
+PATIENT_FILTERS = ('subject', 'study')
+
+SIGNATURE_CATEGORIES = """
+        SUM(CASE WHEN page_require_signature LIKE '%Never%' THEN 1 ELSE 0 END) as never_signed,
+        SUM(CASE WHEN page_require_signature LIKE '%Broken%' THEN 1 ELSE 0 END) as broken_signatures,
+        SUM(CASE WHEN no_of_days >= 90 AND page_require_signature NOT LIKE '%Never%' AND page_require_signature NOT LIKE '%Broken%' THEN 1 ELSE 0 END) as beyond_90_days,
+        SUM(CASE WHEN no_of_days >= 45 AND no_of_days < 90 AND page_require_signature NOT LIKE '%Never%' AND page_require_signature NOT LIKE '%Broken%' THEN 1 ELSE 0 END) as days_45_to_90,
+        SUM(CASE WHEN no_of_days < 45 AND page_require_signature NOT LIKE '%Never%' AND page_require_signature NOT LIKE '%Broken%' THEN 1 ELSE 0 END) as within_45_days"""
+
+SUBJECT_COLUMNS = """
+        slm.subject_id, slm.site_id, slm.country, slm.region, slm.project_name,
+        slm.subject_status, slm.latest_visit, slm.missing_visits, slm.missing_page,
+        slm.coded_terms, slm.uncoded_terms, slm.open_issues_in_lnr, slm.open_issues_edrr,
+        slm.inactivated_forms_folders, slm.esae_dashboard_dm, slm.esae_dashboard_safety,
+        slm.expected_visits, slm.pages_entered, slm.pages_non_conformant,
+        slm.dm_queries, slm.clinical_queries, slm.medical_queries, slm.site_queries,
+        slm.field_monitor_queries, slm.coding_queries, slm.safety_queries, slm.total_queries,
+        slm.crfs_require_verification, slm.forms_verified, slm.crfs_frozen, slm.crfs_not_frozen,
+        slm.crfs_locked, slm.crfs_unlocked, slm.pds_confirmed, slm.crfs_signed,
+        slm.crfs_overdue_within_45_days, slm.crfs_overdue_45_to_90_days,
+        slm.crfs_overdue_beyond_90_days, slm.broken_signatures, slm.crfs_never_signed,
+        CASE WHEN slm.missing_visits > 10 OR slm.total_queries > 50 OR slm.percentage_clean_crf < 75
+            THEN 1 ELSE 0 END as isHighRisk,
+        COALESCE(ROUND(slm.percentage_clean_crf), 0) as dataQualityScore,
+        dqi.dqi_score, dqi.dqi_category,
+        CASE WHEN dqi.clean_status = 'Clean' THEN 1 ELSE 0 END as isClean"""
+
+DQI_JOIN = """
+      LEFT JOIN subject_dqi_clean_status dqi
+        ON slm.project_name = dqi.project_name
+        AND slm.site_id = dqi.site_id
+        AND slm.subject_id = dqi.subject_id"""
+
+REGION_LOOKUP = "(SELECT region FROM region_lookup WHERE region_lookup.project_name = slm.project_name LIMIT 1)"
+
+DASHBOARD_QUERIES = [
+    # database/queries/kpi-summary.ts
+    {
+        'name': 'kpi_summary.subject_metrics',
+        'source': 'database/queries/kpi-summary.ts:getKPISummaryWithTrends',
+        'sql': """
+      SELECT SUM(missing_visits), SUM(total_queries), SUM(uncoded_terms),
+        COUNT(DISTINCT subject_id), SUM(pages_entered), SUM(pages_non_conformant)
+      FROM subject_level_metrics
+      {where}""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns())},
+    },
+    {
+        'name': 'kpi_summary.sae_count',
+        'source': 'database/queries/kpi-summary.ts:getKPISummaryWithTrends',
+        'sql': """
+      SELECT COUNT(*) as saeCount
+      FROM sae_issues
+      {where}
+      AND (action_status = 'Pending' OR review_status = 'Pending for Review')""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns(filters=NO_REGION))},
+    },
+    {
+        'name': 'kpi_summary.pd_confirmed',
+        'source': 'database/queries/kpi-summary.ts:getKPISummaryWithTrends',
+        'sql': """
+      SELECT COUNT(*) as pdCount
+      FROM protocol_deviation
+      {where}""",
+        'clauses': {'where': ("WHERE pd_status = 'PD Confirmed'", filter_columns())},
+    },
+
+    # database/queries/country-performance.ts
+    {
+        'name': 'country_performance.by_country',
+        'source': 'database/queries/country-performance.ts:getCountryPerformance',
+        'sql': """
+      SELECT slm.country, COALESCE(SUM(slm.total_queries), 0) as openQueries,
+        COALESCE(
+          (SELECT AVG(mv.days_outstanding)
+           FROM missing_visits mv
+           WHERE mv.country = slm.country {subquery}), 0
+        ) as avgDaysOutstanding
+      FROM subject_level_metrics slm
+      {where}
+      GROUP BY slm.country
+      ORDER BY openQueries DESC""",
+        'clauses': {
+            'subquery': ("", filter_columns('mv', ('study', 'country', 'site', 'subject'))),
+            'where': ("WHERE 1=1", filter_columns('slm')),
+        },
+    },
+    {
+        'name': 'country_performance.simplified_queries',
+        'source': 'database/queries/country-performance.ts:getCountryPerformanceSimplified',
+        'sql': """
+      SELECT country, COALESCE(SUM(total_queries), 0) as openQueries
+      FROM subject_level_metrics
+      {where}
+      GROUP BY country""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns())},
+    },
+    {
+        'name': 'country_performance.simplified_days',
+        'source': 'database/queries/country-performance.ts:getCountryPerformanceSimplified',
+        'sql': """
+      SELECT country, COALESCE(AVG(days_outstanding), 0) as avgDaysOutstanding
+      FROM missing_visits
+      {where}
+      GROUP BY country""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns(filters=NO_REGION))},
+    },
+
+    # database/queries/dqi-metrics.ts
+    {
+        'name': 'dqi_metrics.summary',
+        'source': 'database/queries/dqi-metrics.ts:getDQIMetrics',
+        'sql': """
+      SELECT ROUND(AVG(dqi.dqi_score), 2) as averageDQI,
+        COUNT(CASE WHEN dqi.clean_status = 'Clean' THEN 1 END) as cleanPatientCount,
+        COUNT(*) as totalPatients
+      FROM subject_level_metrics slm""" + DQI_JOIN + """
+      {where}""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns('slm'))},
+    },
+
+    # database/queries/non-conformant-pages-metrics.ts
+    {
+        'name': 'non_conformant_pages.total',
+        'source': 'database/queries/non-conformant-pages-metrics.ts:getNonConformantPagesMetrics',
+        'sql': """
+      SELECT SUM(pages_non_conformant) as totalNonConformantPages
+      FROM subject_level_metrics
+      {where}""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns())},
+    },
+    {
+        'name': 'non_conformant_pages.by_study',
+        'source': 'database/queries/non-conformant-pages-metrics.ts:getNonConformantPagesByStudy',
+        'sql': """
+      SELECT project_name as studyName, SUM(pages_non_conformant) as nonConformantPages
+      FROM subject_level_metrics
+      {where}
+      GROUP BY project_name
+      ORDER BY nonConformantPages DESC""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns())},
+    },
+    {
+        'name': 'non_conformant_pages.by_site',
+        'source': 'database/queries/non-conformant-pages-metrics.ts:getNonConformantPagesBySite',
+        'sql': """
+      SELECT project_name as studyName, site_id as siteId,
+        SUM(pages_non_conformant) as nonConformantPages
+      FROM subject_level_metrics
+      {where}
+      GROUP BY project_name, site_id
+      ORDER BY nonConformantPages DESC
+      LIMIT 10""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns())},
+    },
+
+    # database/queries/protocol-deviation-metrics.ts
+    {
+        'name': 'protocol_deviation.metrics',
+        'source': 'database/queries/protocol-deviation-metrics.ts:getProtocolDeviationMetrics',
+        'sql': """
+      SELECT COUNT(*) as totalCount,
+        COUNT(CASE WHEN pd_status = 'PD Confirmed' THEN 1 END) as confirmedCount,
+        COUNT(CASE WHEN pd_status = 'PD proposed' THEN 1 END) as proposedCount
+      FROM protocol_deviation
+      {where}""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns())},
+    },
+    {
+        'name': 'protocol_deviation.by_study',
+        'source': 'database/queries/protocol-deviation-metrics.ts:getProtocolDeviationByStudy',
+        'sql': """
+      SELECT project_name as studyName,
+        COUNT(CASE WHEN pd_status = 'PD Confirmed' THEN 1 END) as confirmedCount,
+        COUNT(CASE WHEN pd_status = 'PD proposed' THEN 1 END) as proposedCount,
+        COUNT(*) as totalCount
+      FROM protocol_deviation
+      {where}
+      GROUP BY project_name
+      ORDER BY totalCount DESC""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns())},
+    },
+    {
+        'name': 'protocol_deviation.by_site',
+        'source': 'database/queries/protocol-deviation-metrics.ts:getProtocolDeviationBySite',
+        'sql': """
+      SELECT project_name as studyName, site_id as siteId,
+        COUNT(CASE WHEN pd_status = 'PD Confirmed' THEN 1 END) as confirmedCount,
+        COUNT(CASE WHEN pd_status = 'PD proposed' THEN 1 END) as proposedCount,
+        COUNT(*) as totalCount
+      FROM protocol_deviation
+      {where}
+      GROUP BY project_name, site_id
+      ORDER BY totalCount DESC
+      LIMIT 10""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns())},
+    },
+    {
+        'name': 'protocol_deviation.conformant_pages',
+        'source': 'database/queries/protocol-deviation-metrics.ts:getConformantPagesCount',
+        'sql': """
+      SELECT SUM(pages_entered - pages_non_conformant) as conformantPages
+      FROM subject_level_metrics
+      {where}""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns())},
+    },
+
+    # database/queries/regional-data-entry.ts
+    {
+        'name': 'regional_data_entry.by_region',
+        'source': 'database/queries/regional-data-entry.ts:getRegionalDataEntryProgress',
+        'sql': """
+      WITH region_lookup AS (
+        SELECT DISTINCT project_name, region
+        FROM subject_level_metrics
+        WHERE region IS NOT NULL
+      )
+      SELECT COALESCE(slm.region, """ + REGION_LOOKUP + """, 'Unknown') as name,
+        SUM(pages_entered) / 100.0 as completedPages,
+        SUM(missing_page) as missingPages,
+        SUM(pages_entered + missing_page) as totalExpectedPages
+      FROM subject_level_metrics slm
+      {where}
+      GROUP BY name
+      ORDER BY name""",
+        'clauses': {'where': ("WHERE 1=1", [
+            ('study', 'slm.project_name'),
+            ('region', f"COALESCE(slm.region, {REGION_LOOKUP})"),
+            ('country', 'slm.country'),
+            ('site', 'slm.site_id'),
+            ('subject', 'slm.subject_id'),
+        ])},
+    },
+    {
+        'name': 'regional_data_entry.by_country',
+        'source': 'database/queries/regional-data-entry.ts:getCountryDataEntryProgress',
+        'sql': """
+      SELECT COALESCE(country, 'Unknown') as name,
+        SUM(pages_entered) / 100.0 as completedPages,
+        SUM(missing_page) as missingPages,
+        SUM(pages_entered + missing_page) as totalExpectedPages
+      FROM subject_level_metrics
+      {where}
+      GROUP BY country
+      ORDER BY name""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns())},
+        'requires': ('region',),
+    },
+    {
+        'name': 'regional_data_entry.by_site',
+        'source': 'database/queries/regional-data-entry.ts:getSiteDataEntryProgress',
+        'sql': """
+      SELECT COALESCE(site_id, 'Unknown') as name,
+        SUM(pages_entered) / 100.0 as completedPages,
+        SUM(missing_page) as missingPages,
+        SUM(pages_entered + missing_page) as totalExpectedPages
+      FROM subject_level_metrics
+      {where}
+      GROUP BY site_id
+      ORDER BY name""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns(filters=('study', 'country', 'region', 'site', 'subject')))},
+        'requires': ('country',),
+    },
+
+    # database/queries/sae-chart.ts
+    {
+        'name': 'sae_chart.by_case_status',
+        'source': 'database/queries/sae-chart.ts:getSAEChartData',
+        'sql': """
+      SELECT CASE WHEN case_status IS NULL OR case_status = '' OR case_status = '-' THEN 'Open'
+          ELSE case_status END as case_status,
+        COUNT(*) as count
+      FROM sae_issues
+      {where}
+      GROUP BY CASE WHEN case_status IS NULL OR case_status = '' OR case_status = '-' THEN 'Open'
+          ELSE case_status END
+      ORDER BY CASE WHEN case_status IS NULL OR case_status = '' OR case_status = '-' THEN 1
+          WHEN case_status = 'Locked' THEN 2
+          WHEN case_status = 'Closed' THEN 3
+          ELSE 4 END""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns(filters=NO_REGION))},
+    },
+    {
+        'name': 'sae_chart.by_review_status',
+        'source': 'database/queries/sae-chart.ts:getSAEByReviewStatus',
+        'sql': """
+      SELECT COALESCE(review_status, 'Unknown') as review_status, COUNT(*) as count
+      FROM sae_issues
+      {where}
+      GROUP BY review_status
+      ORDER BY count DESC""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns(filters=NO_REGION))},
+    },
+    {
+        'name': 'sae_chart.by_action_status',
+        'source': 'database/queries/sae-chart.ts:getSAEByActionStatus',
+        'sql': """
+      SELECT COALESCE(action_status, 'Unknown') as action_status, COUNT(*) as count
+      FROM sae_issues
+      {where}
+      GROUP BY action_status
+      ORDER BY count DESC""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns(filters=NO_REGION))},
+    },
+    {
+        'name': 'sae_chart.by_responsible_function',
+        'source': 'database/queries/sae-chart.ts:getSAEByResponsibleFunction',
+        'sql': """
+      SELECT COALESCE(responsible_lf, 'Unknown') as responsible_lf, COUNT(*) as count
+      FROM sae_issues
+      {where}
+      GROUP BY responsible_lf
+      ORDER BY count DESC""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns(filters=NO_REGION))},
+    },
+
+    # database/queries/sidebar-filters.ts
+    {
+        'name': 'sidebar.studies',
+        'source': 'database/queries/sidebar-filters.ts:getUniqueStudies',
+        'sql': """
+      SELECT DISTINCT project_name FROM subject_level_metrics
+      WHERE project_name IS NOT NULL ORDER BY project_name""",
+        'clauses': {},
+    },
+    {
+        'name': 'sidebar.regions',
+        'source': 'database/queries/sidebar-filters.ts:getUniqueRegions',
+        'sql': """
+      SELECT DISTINCT region FROM subject_level_metrics
+      {where} ORDER BY region""",
+        'clauses': {'where': ("WHERE region IS NOT NULL", filter_columns(filters=('study',)))},
+    },
+    {
+        'name': 'sidebar.countries',
+        'source': 'database/queries/sidebar-filters.ts:getUniqueCountries',
+        'sql': """
+      SELECT DISTINCT country FROM subject_level_metrics
+      {where} ORDER BY country""",
+        'clauses': {'where': ("WHERE country IS NOT NULL", filter_columns(filters=('study', 'region')))},
+    },
+    {
+        'name': 'sidebar.sites',
+        'source': 'database/queries/sidebar-filters.ts:getUniqueSites',
+        'sql': """
+      SELECT DISTINCT site_id FROM subject_level_metrics
+      {where} ORDER BY site_id""",
+        'clauses': {'where': ("WHERE site_id IS NOT NULL", filter_columns(filters=('study', 'region', 'country')))},
+    },
+    {
+        'name': 'sidebar.subjects',
+        'source': 'database/queries/sidebar-filters.ts:getUniqueSubjects',
+        'sql': """
+      SELECT DISTINCT subject_id FROM subject_level_metrics
+      {where} ORDER BY subject_id""",
+        'clauses': {'where': ("WHERE subject_id IS NOT NULL", filter_columns(filters=('study', 'site', 'region', 'country')))},
+    },
+
+    # database/queries/signature-compliance.ts
+    {
+        'name': 'signature_compliance.categories',
+        'source': 'database/queries/signature-compliance.ts:getSignatureComplianceData',
+        'sql': """
+      SELECT""" + SIGNATURE_CATEGORIES + """,
+        COUNT(*) as total
+      FROM pi_signature_report
+      {where}""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns())},
+    },
+    {
+        'name': 'signature_compliance.summary',
+        'source': 'database/queries/signature-compliance.ts:getSignatureComplianceSummary',
+        'sql': """
+      SELECT COUNT(*) as total,
+        SUM(CASE WHEN no_of_days < 45 AND page_require_signature NOT LIKE '%Never%' AND page_require_signature NOT LIKE '%Broken%' THEN 1 ELSE 0 END) as compliant,
+        SUM(CASE WHEN no_of_days >= 45 AND no_of_days < 90 THEN 1 ELSE 0 END) as at_risk,
+        SUM(CASE WHEN no_of_days >= 90 OR page_require_signature LIKE '%Never%' OR page_require_signature LIKE '%Broken%' THEN 1 ELSE 0 END) as critical
+      FROM pi_signature_report
+      {where}""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns())},
+    },
+
+    # database/queries/site-performance.ts
+    {
+        'name': 'site_performance.sites',
+        'source': 'database/queries/site-performance.ts:getSitePerformanceData',
+        'sql': """
+      SELECT slm.site_id as siteId, slm.country, slm.region,
+        SUM(slm.total_queries) as openQueries,
+        SUM(slm.crfs_overdue_beyond_90_days) as signatureBacklog,
+        ROUND(CASE
+          WHEN SUM(slm.crfs_overdue_within_45_days + slm.crfs_overdue_45_to_90_days + slm.crfs_overdue_beyond_90_days) > 0 THEN
+            (SUM(slm.crfs_overdue_within_45_days * 22.5) + SUM(slm.crfs_overdue_45_to_90_days * 67.5)
+              + SUM(slm.crfs_overdue_beyond_90_days * 120))
+            / SUM(slm.crfs_overdue_within_45_days + slm.crfs_overdue_45_to_90_days + slm.crfs_overdue_beyond_90_days)
+          ELSE 0 END) as avgDaysOutstanding,
+        COALESCE(ROUND(AVG(dqi.dqi_score)), 0) as dataQualityScore,
+        COUNT(DISTINCT slm.subject_id) as subjectCount
+      FROM subject_level_metrics slm""" + DQI_JOIN + """
+      {where}
+      GROUP BY slm.site_id, slm.country, slm.region
+      HAVING signatureBacklog > 0
+      ORDER BY signatureBacklog DESC, openQueries DESC""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns('slm', ('study', 'region', 'country')))},
+    },
+    {
+        'name': 'site_performance.signature_details',
+        'source': 'database/queries/site-performance.ts:getSiteSignatureDetails',
+        'sql': """
+      SELECT site_id as siteId, COUNT(*) as totalForms,""" + SIGNATURE_CATEGORIES + """
+      FROM pi_signature_report
+      {where}
+      GROUP BY site_id""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns(filters=('site', 'study')))},
+        'requires': ('site',),
+    },
+
+    # database/queries/study-pulse.ts
+    {
+        'name': 'study_pulse.metrics',
+        'source': 'database/queries/study-pulse.ts:getStudyPulseMetrics',
+        'sql': """
+      SELECT COALESCE(SUM(pages_entered), 0) as pagesEntered,
+        COALESCE(SUM(total_queries), 0) as totalQueries,
+        COUNT(*) as activeSubjects,
+        COALESCE(SUM(missing_page), 0) as missingPages,
+        CASE WHEN SUM(pages_entered) > 0 THEN ROUND(AVG(percentage_clean_crf), 2) ELSE 0 END as cleanCRFPercentage
+      FROM subject_level_metrics
+      {where}""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns())},
+    },
+
+    # database/queries/subject-overview.ts
+    {
+        'name': 'subject_overview.subjects',
+        'source': 'database/queries/subject-overview.ts:getSubjectOverviewData',
+        'sql': """
+      SELECT""" + SUBJECT_COLUMNS + """
+      FROM subject_level_metrics slm""" + DQI_JOIN + """
+      {where}
+      ORDER BY CASE WHEN slm.subject_status = 'On Trial' THEN 1 ELSE 2 END,
+        slm.total_queries DESC,
+        slm.missing_visits DESC""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns('slm'))},
+    },
+
+    # database/queries/subject-performance.ts
+    {
+        'name': 'subject_performance.subjects',
+        'source': 'database/queries/subject-performance.ts:getSubjectPerformance',
+        'sql': """
+      SELECT subject_id, COALESCE(latest_visit, 'N/A'), COALESCE(subject_status, 'Unknown'),
+        COALESCE(pages_entered, 0), COALESCE(missing_page, 0), COALESCE(total_queries, 0),
+        COALESCE(percentage_clean_crf, 0), COALESCE(missing_visits, 0), COALESCE(forms_verified, 0)
+      FROM subject_level_metrics
+      {where}
+      ORDER BY subject_id""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns())},
+    },
+
+    # database/queries/patient-360.ts
+    {
+        'name': 'patient360.subject',
+        'source': 'database/queries/patient-360.ts:getPatient360Data',
+        'sql': """
+      SELECT""" + SUBJECT_COLUMNS + """
+      FROM subject_level_metrics slm""" + DQI_JOIN + """
+      {where}
+      LIMIT 1""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns('slm', PATIENT_FILTERS))},
+        'requires': ('subject',),
+    },
+    {
+        'name': 'patient360.recent_visits',
+        'source': 'database/queries/patient-360.ts:getPatient360Data',
+        'sql': """
+      SELECT cv.visit_name as visitName, cv.visit_date as visitDate
+      FROM completed_visits cv
+      {where}
+      ORDER BY cv.visit_date DESC
+      LIMIT 5""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns('cv', PATIENT_FILTERS))},
+        'requires': ('subject',),
+    },
+    {
+        'name': 'patient360.completed_count',
+        'source': 'database/queries/patient-360.ts:getPatient360Data',
+        'sql': """
+      SELECT COUNT(*) as count FROM completed_visits cv
+      {where}""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns('cv', PATIENT_FILTERS))},
+        'requires': ('subject',),
+    },
+    {
+        'name': 'patient360.critical_missing_visits',
+        'source': 'database/queries/patient-360.ts:getPatient360Data',
+        'sql': """
+      SELECT mv.visit_name as visitName, mv.days_outstanding as daysOutstanding,
+        mv.projected_date as projectedDate
+      FROM missing_visits mv
+      {where}
+        AND mv.days_outstanding > 30
+      ORDER BY mv.days_outstanding DESC""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns('mv', PATIENT_FILTERS))},
+        'requires': ('subject',),
+    },
+    {
+        'name': 'patient360.open_queries',
+        'source': 'database/queries/patient-360.ts:getPatient360Data',
+        'sql': """
+      SELECT qr.form_name as formName, qr.visit_name as visitName,
+        qr.marking_group_name as markingGroupName, qr.query_status as queryStatus,
+        qr.action_owner as actionOwner,
+        CAST(julianday('2025-11-14') - julianday(qr.query_open_date) AS INTEGER) as daysOpen
+      FROM query_report qr
+      {where}
+        AND qr.query_status = 'Open'
+      ORDER BY daysOpen DESC
+      LIMIT 10""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns('qr', PATIENT_FILTERS))},
+        'requires': ('subject',),
+    },
+    {
+        'name': 'patient360.recent_saes',
+        'source': 'database/queries/patient-360.ts:getPatient360Data',
+        'sql': """
+      SELECT sae.discrepancy_id, sae.form_name,
+        CASE WHEN sae.case_status IS NULL OR sae.case_status = '' OR sae.case_status = '-'
+          THEN 'Open' ELSE sae.case_status END as caseStatus,
+        sae.review_status, sae.action_status, sae.responsible_lf,
+        sae.discrepancy_created_timestamp as createdTimestamp
+      FROM sae_issues sae
+      {where}
+      ORDER BY sae.discrepancy_created_timestamp DESC
+      LIMIT 10""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns('sae', PATIENT_FILTERS))},
+        'requires': ('subject',),
+    },
+    {
+        'name': 'patient360.sae_counts',
+        'source': 'database/queries/patient-360.ts:getPatient360Data',
+        'sql': """
+      SELECT CASE WHEN sae.case_status IS NULL OR sae.case_status = '' OR sae.case_status = '-'
+          THEN 'Open' ELSE sae.case_status END as status,
+        COUNT(*) as count
+      FROM sae_issues sae
+      {where}
+      GROUP BY status""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns('sae', PATIENT_FILTERS))},
+        'requires': ('subject',),
+    },
+
+    # app/api routes that query the database directly
+    {
+        'name': 'api.subject_enrollment.total',
+        'source': 'app/api/subject-enrollment-status/route.ts',
+        'sql': """
+      SELECT COUNT(DISTINCT subject_id) as totalSubjects
+      FROM subject_level_metrics
+      {where}""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns(filters=('study', 'region', 'country', 'site')))},
+    },
+    {
+        'name': 'api.subject_enrollment.by_status',
+        'source': 'app/api/subject-enrollment-status/route.ts',
+        'sql': """
+      SELECT subject_status, COUNT(DISTINCT subject_id) as count
+      FROM subject_level_metrics
+      {where}
+      GROUP BY subject_status""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns(filters=('study', 'region', 'country', 'site')))},
+    },
+    {
+        'name': 'api.edrr_issues.by_study',
+        'source': 'app/api/edrr-issues-by-study/route.ts',
+        'sql': """
+      SELECT project_name as study, SUM(total_open_issue_count) as total_issues,
+        COUNT(DISTINCT subject_id) as subjects_affected
+      FROM edrr_issues
+      {where} AND total_open_issue_count > 0
+      GROUP BY project_name
+      ORDER BY total_issues DESC""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns(filters=('study',)))},
+    },
+    {
+        'name': 'api.edrr_issues.total',
+        'source': 'app/api/edrr-issues-by-study/route.ts',
+        'sql': """
+      SELECT SUM(total_open_issue_count) as total_issues,
+        COUNT(DISTINCT subject_id) as subjects_affected
+      FROM edrr_issues
+      {where} AND total_open_issue_count > 0""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns(filters=('study',)))},
+    },
+    {
+        'name': 'api.query_distribution',
+        'source': 'app/api/query-distribution/route.ts',
+        'sql': """
+      SELECT SUM(dm_queries), SUM(clinical_queries), SUM(medical_queries), SUM(site_queries),
+        SUM(field_monitor_queries), SUM(coding_queries), SUM(safety_queries), SUM(total_queries)
+      FROM subject_level_metrics
+      {where}""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns(filters=('study', 'region', 'country', 'site')))},
+    },
+    {
+        'name': 'api.conformant_pages.by_study',
+        'source': 'app/api/conformant-pages/route.ts',
+        'sql': """
+      SELECT project_name as study, SUM(pages_entered) as total_pages,
+        SUM(pages_non_conformant) as non_conformant_pages,
+        SUM(pages_entered) - SUM(pages_non_conformant) as conformant_pages,
+        ROUND(AVG(percentage_clean_crf), 2) as avg_clean_percentage
+      FROM subject_level_metrics
+      {where}
+      GROUP BY project_name
+      ORDER BY avg_clean_percentage DESC""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns(filters=('study', 'region', 'country', 'site')))},
+    },
+    {
+        'name': 'api.conformant_pages.total',
+        'source': 'app/api/conformant-pages/route.ts',
+        'sql': """
+      SELECT SUM(pages_entered) as total_pages, SUM(pages_non_conformant) as non_conformant_pages,
+        SUM(pages_entered) - SUM(pages_non_conformant) as conformant_pages
+      FROM subject_level_metrics
+      {where}""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns(filters=('study', 'region', 'country', 'site')))},
+    },
+    {
+        'name': 'api.protocol_deviation_details.by_study',
+        'source': 'app/api/protocol-deviation-details/route.ts',
+        'sql': """
+      SELECT project_name as study,
+        SUM(CASE WHEN pd_status = 'PD Confirmed' THEN 1 ELSE 0 END) as confirmed,
+        SUM(CASE WHEN pd_status = 'PD Proposed' THEN 1 ELSE 0 END) as proposed,
+        COUNT(*) as total
+      FROM protocol_deviation
+      {where}
+      GROUP BY project_name
+      ORDER BY total DESC""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns(filters=('study', 'region', 'country', 'site')))},
+    },
+    {
+        'name': 'api.protocol_deviation_details.total',
+        'source': 'app/api/protocol-deviation-details/route.ts',
+        'sql': """
+      SELECT SUM(CASE WHEN pd_status = 'PD Confirmed' THEN 1 ELSE 0 END) as confirmed,
+        SUM(CASE WHEN pd_status = 'PD Proposed' THEN 1 ELSE 0 END) as proposed,
+        COUNT(*) as total
+      FROM protocol_deviation
+      {where}""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns(filters=('study', 'region', 'country', 'site')))},
+    },
+    {
+        'name': 'api.query_response_time',
+        'source': 'app/api/query-response-time/route.ts',
+        'sql': """
+      SELECT CASE
+          WHEN marking_group_name IN ('DM Review', 'DM from System') THEN 'DM'
+          WHEN marking_group_name = 'Clinical Review' THEN 'Clinical'
+          WHEN marking_group_name = 'Medical Review' THEN 'Medical'
+          WHEN marking_group_name = 'Site Review' OR action_owner = 'Site Action' THEN 'Site'
+          WHEN marking_group_name = 'Field Monitor Review' OR action_owner = 'CRA Action' THEN 'Field Monitor'
+          WHEN marking_group_name = 'Safety Review' THEN 'Safety'
+          ELSE 'Other'
+        END as team,
+        SUM(CASE WHEN days_since_open < 7 THEN 1 ELSE 0 END) as week1,
+        SUM(CASE WHEN days_since_open BETWEEN 7 AND 14 THEN 1 ELSE 0 END) as week2,
+        SUM(CASE WHEN days_since_open BETWEEN 15 AND 30 THEN 1 ELSE 0 END) as month1,
+        SUM(CASE WHEN days_since_open > 30 THEN 1 ELSE 0 END) as over30,
+        COUNT(*) as total
+      FROM query_report
+      {where}
+      GROUP BY team
+      ORDER BY total DESC""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns(filters=('study', 'region', 'country', 'site')))},
+    },
+    {
+        # The route also filters sae_issues on region, which has no region column
+        'name': 'api.sae_distribution',
+        'source': 'app/api/sae-distribution/route.ts',
+        'sql': """
+      SELECT responsible_lf as team,
+        SUM(CASE WHEN (case_status IN ('Locked', 'Closed') AND action_status = 'No action required')
+          THEN 1 ELSE 0 END) as closed,
+        SUM(CASE WHEN NOT (case_status IN ('Locked', 'Closed') AND action_status = 'No action required')
+          THEN 1 ELSE 0 END) as open
+      FROM sae_issues
+      {where}
+      GROUP BY responsible_lf""",
+        'clauses': {'where': ("WHERE 1=1", filter_columns(filters=('study', 'region', 'country', 'site')))},
+    },
+]
+
+# Filter combinations swept by the workload tools, from the whole portfolio down to one subject
+FILTER_LEVELS = ('all', 'study', 'region', 'country', 'site', 'subject')
+
+def build_query(query, filters):
+    """
+    Render a catalog entry for a filter set, returning (sql, params), or None when the
+    entry needs a filter the set does not have
+    """
+    if any(not filters.get(name) or filters[name] == 'ALL' for name in query.get('requires', ())):
+        return None
+
+    params = []
+    rendered = {}
+    # Clauses are rendered in text order so the parameters line up with the placeholders
+    for clause in sorted(query['clauses'], key=lambda name: query['sql'].index("{" + name + "}")):
+        base, columns = query['clauses'][clause]
+        text = base
+        for filter_name, column in columns:
+            value = filters.get(filter_name)
+            if value and value != 'ALL':
+                text += f" AND {column} = ?"
+                params.append(value)
+        rendered[clause] = text
+
+    return query['sql'].format(**rendered), params
+
+def sample_filter_sets(conn, per_level=3, seed=42):
+    """
+    Pick representative filter sets for every level in FILTER_LEVELS. Values are sampled
+    with a fixed seed from the sorted distinct values, so runs against the same data match.
+    """
+    rng = random.Random(seed)
+
+    def pick(sql):
+        rows = conn.execute(sql).fetchall()
+        return rng.sample(rows, min(per_level, len(rows)))
+
+    filter_sets = [('all', {})]
+    for (study,) in pick("SELECT DISTINCT project_name FROM subject_level_metrics ORDER BY 1"):
+        filter_sets.append(('study', {'study': study}))
+    for (region,) in pick(
+        "SELECT DISTINCT region FROM subject_level_metrics WHERE region IS NOT NULL ORDER BY 1"
+    ):
+        filter_sets.append(('region', {'region': region}))
+    for region, country in pick(
+        "SELECT DISTINCT region, country FROM subject_level_metrics"
+        " WHERE region IS NOT NULL AND country IS NOT NULL ORDER BY 1, 2"
+    ):
+        filter_sets.append(('country', {'region': region, 'country': country}))
+    for study, site in pick("SELECT DISTINCT project_name, site_id FROM subject_level_metrics ORDER BY 1, 2"):
+        filter_sets.append(('site', {'study': study, 'site': site}))
+    for study, site, subject in pick(
+        "SELECT project_name, site_id, subject_id FROM subject_level_metrics ORDER BY 1, 2, 3"
+    ):
+        filter_sets.append(('subject', {'study': study, 'site': site, 'subject': subject}))
+
+    return filter_sets
+
+def get_table_aliases(sql):
+    """Map the table names and aliases used in a statement to the table they refer to"""
+    aliases = {}
+    for table, alias in re.findall(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", sql, re.IGNORECASE):
+        if table not in TABLE_SCHEMAS:
+            continue
+        aliases[table] = table
+        if alias and alias.upper() not in ('WHERE', 'ON', 'LEFT', 'JOIN', 'GROUP', 'ORDER', 'LIMIT', 'INNER'):
+            aliases[alias] = table
+    return aliases
+
+def explain_query(conn, sql, params):
+    """EXPLAIN QUERY PLAN detail lines of a statement"""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+def find_full_scans(conn, sql, params):
+    """
+    Tables a statement reads by walking the whole table (SCAN without an index),
+    as (table, plan detail) pairs
+    """
+    aliases = get_table_aliases(sql)
+    scans = []
+    for detail in explain_query(conn, sql, params):
+        match = re.match(r"SCAN (\w+)(.*)", detail)
+        if match and 'INDEX' not in match.group(2) and match.group(1) in aliases:
+            scans.append((aliases[match.group(1)], detail))
+    return scans
@@ -1,16 +1,28 @@
-import sqlite3
+import sql_profiler
 import pandas as pd
 import os
+import time
+import contextlib
 from dotenv import load_dotenv
 from datetime import datetime
+from instrumentation import instrument, set_span_rows
+from extract_data import StreamedSheet, SUBJECT_KEY
+from create_database import (TABLE_SCHEMAS, DETAIL_TABLES, get_physical_table, create_metadata_tables,
+                             drop_secondary_indexes, rebuild_indexes, get_storage_mode,
+                             get_table_columns, load_fact_rows)
 
 load_dotenv()
 # Database file path
 DB_PATH = os.getcwd() + os.getenv("DB_PATH", "/database/edc_metrics.db")
 
+# Full rebuilds (main.py --bulk-load): page cache in KiB and journal mode while loading. The
+# database is rebuilt from the study files anyway, so a crash mid-load costs a rerun, not data
+BULK_LOAD_CACHE_KB = int(os.getenv("BULK_LOAD_CACHE_KB", "262144"))
+BULK_LOAD_JOURNAL_MODE = os.getenv("BULK_LOAD_JOURNAL_MODE", "MEMORY")
+
 def get_db_connection():
     """Create and return a database connection"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = sql_profiler.connect(DB_PATH)
     # Optimize SQLite for bulk inserts
     conn.execute("PRAGMA journal_mode = WAL")
     conn.execute("PRAGMA synchronous = NORMAL")
@@ -18,6 +30,60 @@ def get_db_connection():
     conn.execute("PRAGMA temp_store = MEMORY")
     return conn
 
+@contextlib.contextmanager
+def bulk_load(conn):
+    """
+    Load a full rebuild through conn without index maintenance: secondary indexes are dropped,
+    the page cache enlarged and journaling relaxed for the block, then every index is built
+    once from the loaded rows and the usual settings restored. Needs the only connection.
+    """
+    conn.execute(f"PRAGMA cache_size = -{BULK_LOAD_CACHE_KB}")
+    conn.execute(f"PRAGMA journal_mode = {BULK_LOAD_JOURNAL_MODE}")
+    conn.execute("PRAGMA synchronous = OFF")
+    indexes = drop_secondary_indexes(conn)
+    conn.commit()
+    try:
+        yield conn
+    finally:
+        start_time = time.time()
+        rebuild_indexes(conn, indexes)
+        conn.commit()
+        print(f"✓ {len(indexes)} indexes built ({time.time() - start_time:.2f}s)")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA cache_size = 10000")
+
+@contextlib.contextmanager
+def staged_fact_inserts(conn, tables):
+    """
+    In normalized mode, collect the inserts into the given detail tables in temp tables that
+    shadow their views, then move them to the fact tables with load_fact_rows on exit, instead
+    of the view trigger's per-row dimension lookups. Does nothing in the other modes.
+    """
+    staged = []
+    if get_storage_mode(conn) == 'normalized':
+        staged = [table_name for table_name in tables if table_name in DETAIL_TABLES]
+    for table_name in staged:
+        columns = ", ".join(f"{name} {col_type}" for name, col_type, _, _ in get_table_columns(table_name))
+        conn.execute(f"CREATE TEMP TABLE {table_name} ({columns})")
+    try:
+        yield conn
+        for table_name in staged:
+            load_fact_rows(conn, table_name, f"temp.{table_name}")
+    finally:
+        for table_name in staged:
+            conn.execute(f"DROP TABLE temp.{table_name}")
+
+def sort_by_subject(df):
+    """Rows of a dataframe ordered by the SUBJECT_KEY columns it has (stable, so row order within a subject is kept)"""
+    if not isinstance(df, pd.DataFrame):
+        return df
+    columns = [column for column in SUBJECT_KEY if column in df.columns]
+    if not columns or len(df) < 2:
+        return df
+    # Site and subject IDs mix numbers and text between studies, compare them as text
+    return df.sort_values(columns, kind='stable', key=lambda column: column.astype('string'))
+
 def convert_date_for_db(date_val):
     """Convert date value to string format for database"""
     if pd.isna(date_val) or date_val is None:
@@ -90,6 +156,25 @@ def prepare_subject_level_metrics_data(df):
         ))
     return data
 
+@instrument
+def delete_study_data(conn, project_name, tables=None):
+    """
+    Delete one study's rows from the given tables (all by default), on the physical tables
+    behind the views in normalized, clustered and epoch mode, so the study can be inserted again
+    without duplicates. The tables' refresh as-of dates go with them (fresh day counts).
+    """
+    cursor = conn.cursor()
+    create_metadata_tables(cursor)
+    deleted = 0
+    for table_name in tables or TABLE_SCHEMAS:
+        physical_table, project_filter = get_physical_table(conn, table_name)
+        cursor.execute(f"DELETE FROM {physical_table} WHERE {project_filter}", (project_name,))
+        deleted += cursor.rowcount
+        cursor.execute("DELETE FROM time_relative_as_of WHERE project_name = ? AND table_name = ?",
+                       (project_name, table_name))
+    return deleted
+
+@instrument
 def insert_subject_level_metrics(conn, df):
     """Insert data into subject_level_metrics table - optimized batch insert"""
     cursor = conn.cursor()
@@ -116,6 +201,7 @@ def insert_subject_level_metrics(conn, df):
     cursor.executemany(sql, data)
     # Removed conn.commit() - handled by insert_all_data()
 
+@instrument
 def insert_query_report(conn, df):
     """Insert data into query_report table - optimized batch insert"""
     cursor = conn.cursor()
@@ -129,25 +215,31 @@ def insert_query_report(conn, df):
         ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     """
     
-    data = [
-        (
-            row['Project Name'], row.get('Region'), row.get('Country'),
-            row['Site ID'], row['Subject ID'], row.get('Visit Name'),
-            row.get('Form Name'), row.get('Field OID'), row.get('Logline'),
-            convert_date_for_db(row.get('Visit Date')),
-            row.get('Query Status'), row.get('Action Owner'),
-            row.get('Marking Group Name'),
-            convert_date_for_db(row.get('Query Open Date')),
-            convert_date_for_db(row.get('Query Response Date')),
-            convert_int_for_db(row.get('Days Since Open')),
-            convert_int_for_db(row.get('Days Since Response'))
-        )
-        for _, row in df.iterrows()
-    ]
-    
-    cursor.executemany(sql, data)
+    # A streamed Query Report (extract_data.StreamedSheet) is inserted one spooled chunk at a time
+    streamed = isinstance(df, StreamedSheet)
+    for chunk in (df.chunks() if streamed else [df]):
+        data = [
+            (
+                row['Project Name'], row.get('Region'), row.get('Country'),
+                row['Site ID'], row['Subject ID'], row.get('Visit Name'),
+                row.get('Form Name'), row.get('Field OID'), row.get('Logline'),
+                convert_date_for_db(row.get('Visit Date')),
+                row.get('Query Status'), row.get('Action Owner'),
+                row.get('Marking Group Name'),
+                convert_date_for_db(row.get('Query Open Date')),
+                convert_date_for_db(row.get('Query Response Date')),
+                convert_int_for_db(row.get('Days Since Open')),
+                convert_int_for_db(row.get('Days Since Response'))
+            )
+            for _, row in chunk.iterrows()
+        ]
+        
+        cursor.executemany(sql, data)
+    if streamed:
+        set_span_rows(rows_in=len(df))
     # Removed conn.commit()
 
+@instrument
 def insert_non_conformant(conn, df):
     """Insert data into non_conformant table - optimized batch insert"""
     cursor = conn.cursor()
@@ -172,6 +264,7 @@ def insert_non_conformant(conn, df):
     cursor.executemany(sql, data)
     # Removed conn.commit()
 
+@instrument
 def insert_pi_signature_report(conn, df):
     """Insert data into pi_signature_report table - optimized batch insert"""
     cursor = conn.cursor()
@@ -201,6 +294,7 @@ def insert_pi_signature_report(conn, df):
     cursor.executemany(sql, data)
     # Removed conn.commit()
 
+@instrument
 def insert_sdv(conn, df):
     """Insert data into sdv table - optimized batch insert"""
     cursor = conn.cursor()
@@ -225,6 +319,7 @@ def insert_sdv(conn, df):
     cursor.executemany(sql, data)
     # Removed conn.commit()
 
+@instrument
 def insert_protocol_deviation(conn, df):
     """Insert data into protocol_deviation table - optimized batch insert"""
     cursor = conn.cursor()
@@ -249,6 +344,7 @@ def insert_protocol_deviation(conn, df):
     cursor.executemany(sql, data)
     # Removed conn.commit()
 
+@instrument
 def insert_crf_freeze_unfreeze(conn, df_freeze, df_unfreeze):
     """Insert data into crf_freeze_unfreeze table - optimized batch insert"""
     cursor = conn.cursor()
@@ -284,6 +380,7 @@ def insert_crf_freeze_unfreeze(conn, df_freeze, df_unfreeze):
     cursor.executemany(sql, freeze_data + unfreeze_data)
     # Removed conn.commit()
 
+@instrument
 def insert_crf_lock_unlock(conn, df_locked, df_unlocked):
     """Insert data into crf_lock_unlock table - optimized batch insert"""
     cursor = conn.cursor()
@@ -321,6 +418,7 @@ def insert_crf_lock_unlock(conn, df_locked, df_unlocked):
     cursor.executemany(sql, locked_data + unlocked_data)
     # Removed conn.commit()
 
+@instrument
 def insert_completed_visits(conn, df):
     """Insert data into completed_visits table - optimized batch insert"""
     cursor = conn.cursor()
@@ -344,6 +442,7 @@ def insert_completed_visits(conn, df):
     cursor.executemany(sql, data)
     # Removed conn.commit()
 
+@instrument
 def insert_edrr_issues(conn, df):
     """Insert data into edrr_issues table - optimized batch insert"""
     cursor = conn.cursor()
@@ -365,6 +464,7 @@ def insert_edrr_issues(conn, df):
     cursor.executemany(sql, data)
     # Removed conn.commit()
 
+@instrument
 def insert_sae_issues(conn, df_dm, df_safety):
     """Insert data into sae_issues table - optimized batch insert"""
     cursor = conn.cursor()
@@ -403,6 +503,7 @@ def insert_sae_issues(conn, df_dm, df_safety):
     cursor.executemany(sql, dm_data + safety_data)
     # Removed conn.commit()
 
+@instrument
 def insert_global_coding_report(conn, df_meddra, df_whodd):
     """Insert data into global_coding_report table - optimized batch insert"""
     cursor = conn.cursor()
@@ -440,6 +541,7 @@ def insert_global_coding_report(conn, df_meddra, df_whodd):
     cursor.executemany(sql, meddra_data + whodd_data)
     # Removed conn.commit()
 
+@instrument
 def insert_inactivated_forms_folders(conn, df):
     """Insert data into inactivated_forms_folders table - optimized batch insert"""
     cursor = conn.cursor()
@@ -464,6 +566,7 @@ def insert_inactivated_forms_folders(conn, df):
     cursor.executemany(sql, data)
     # Removed conn.commit()
 
+@instrument
 def insert_missing_lab_name_ranges(conn, df):
     """Insert data into missing_lab_name_ranges table - optimized batch insert"""
     cursor = conn.cursor()
@@ -488,6 +591,7 @@ def insert_missing_lab_name_ranges(conn, df):
     cursor.executemany(sql, data)
     # Removed conn.commit()
 
+@instrument
 def insert_missing_pages(conn, df):
     """Insert data into missing_pages table - optimized batch insert"""
     cursor = conn.cursor()
@@ -512,6 +616,7 @@ def insert_missing_pages(conn, df):
     cursor.executemany(sql, data)
     # Removed conn.commit()
 
+@instrument
 def insert_missing_visits(conn, df):
     """Insert data into missing_visits table - optimized batch insert"""
     cursor = conn.cursor()
@@ -536,30 +641,67 @@ def insert_missing_visits(conn, df):
     cursor.executemany(sql, data)
     # Removed conn.commit()
 
-def insert_all_data(dataframes, filled_subject_metrics):
-    """Main function to insert all data into database - optimized with single transaction"""
+# Dataframes each detail table is inserted from, in insertion order (subject_level_metrics is
+# inserted from the filled metrics, subject_dqi_clean_status by the DQI calculation)
+TABLE_DATAFRAMES = {
+    'query_report': (insert_query_report, ('Query Report - Cumulative',)),
+    'non_conformant': (insert_non_conformant, ('Non conformant',)),
+    'pi_signature_report': (insert_pi_signature_report, ('PI Signature Report',)),
+    'sdv': (insert_sdv, ('SDV',)),
+    'protocol_deviation': (insert_protocol_deviation, ('Protocol Deviation',)),
+    'crf_freeze_unfreeze': (insert_crf_freeze_unfreeze, ('CRF Freeze', 'CRF UnFreeze')),
+    'crf_lock_unlock': (insert_crf_lock_unlock, ('CRF Locked', 'CRF UnLocked')),
+    'completed_visits': (insert_completed_visits, ('SV',)),
+    'edrr_issues': (insert_edrr_issues, ('Compiled_EDRR',)),
+    'sae_issues': (insert_sae_issues, ('SAE Dashboard_DM', 'SAE Dashboard_Safety')),
+    'global_coding_report': (insert_global_coding_report, ('GlobalCoding_MedDRA', 'GlobalCoding_WHODD')),
+    'inactivated_forms_folders': (insert_inactivated_forms_folders, ('Inactivated_Forms',)),
+    'missing_lab_name_ranges': (insert_missing_lab_name_ranges, ('Missing_Lab',)),
+    'missing_pages': (insert_missing_pages, ('All Pages Missing',)),
+    'missing_visits': (insert_missing_visits, ('Visit_Projection_Tracker',)),
+}
+
+def tables_for_dataframes(dataframe_names):
+    """Detail tables inserted from any of the given dataframes"""
+    return [
+        table_name for table_name, (_, sources) in TABLE_DATAFRAMES.items()
+        if any(name in dataframe_names for name in sources)
+    ]
+
+@instrument
+def insert_all_data(dataframes, filled_subject_metrics, conn=None, replace_study=None, tables=None, sort_rows=False):
+    """
+    Main function to insert all data into database - optimized with single transaction.
+    Uses conn when given (left open for the caller), otherwise opens its own connection.
+    With replace_study, that study's existing rows are deleted first in the same transaction.
+    With tables, only those tables are written (and replaced); subject_level_metrics is
+    always written. With sort_rows, rows are inserted ordered by site and subject, so each
+    subject's rows land on adjacent pages (streamed sheets keep their order). In normalized
+    mode detail rows are staged and loaded set-based (staged_fact_inserts).
+    """
+    if sort_rows:
+        dataframes = {name: sort_by_subject(df) for name, df in dataframes.items()}
+        filled_subject_metrics = sort_by_subject(filled_subject_metrics)
     
-    conn = get_db_connection()
+    own_connection = conn is None
+    if own_connection:
+        conn = get_db_connection()
     
+    changes_before = conn.total_changes
     try:
         conn.execute("BEGIN TRANSACTION")
         
+        if tables is not None:
+            tables = ['subject_level_metrics'] + [name for name in tables if name != 'subject_level_metrics']
+        if replace_study is not None:
+            delete_study_data(conn, replace_study, tables)
         insert_subject_level_metrics(conn, filled_subject_metrics)
-        insert_query_report(conn, dataframes['Query Report - Cumulative'])
-        insert_non_conformant(conn, dataframes['Non conformant'])
-        insert_pi_signature_report(conn, dataframes['PI Signature Report'])
-        insert_sdv(conn, dataframes['SDV'])
-        insert_protocol_deviation(conn, dataframes['Protocol Deviation'])
-        insert_crf_freeze_unfreeze(conn, dataframes['CRF Freeze'], dataframes['CRF UnFreeze'])
-        insert_crf_lock_unlock(conn, dataframes['CRF Locked'], dataframes['CRF UnLocked'])
-        insert_completed_visits(conn, dataframes['SV'])
-        insert_edrr_issues(conn, dataframes['Compiled_EDRR'])
-        insert_sae_issues(conn, dataframes['SAE Dashboard_DM'], dataframes['SAE Dashboard_Safety'])
-        insert_global_coding_report(conn, dataframes['GlobalCoding_MedDRA'], dataframes['GlobalCoding_WHODD'])
-        insert_inactivated_forms_folders(conn, dataframes['Inactivated_Forms'])
-        insert_missing_lab_name_ranges(conn, dataframes['Missing_Lab'])
-        insert_missing_pages(conn, dataframes['All Pages Missing'])
-        insert_missing_visits(conn, dataframes['Visit_Projection_Tracker'])
+        inserted = [table_name for table_name in TABLE_DATAFRAMES if tables is None or table_name in tables]
+        with staged_fact_inserts(conn, inserted):
+            for table_name in inserted:
+                insert_table, sources = TABLE_DATAFRAMES[table_name]
+                insert_table(conn, *[dataframes[name] for name in sources])
+        set_span_rows(rows_out=conn.total_changes - changes_before)
         
         conn.execute("COMMIT")
         
@@ -568,7 +710,38 @@ def insert_all_data(dataframes, filled_subject_metrics):
         raise
     
     finally:
-        conn.close()
+        if own_connection:
+            conn.close()
+
+def publish_generation(project_names, conn=None):
+    """
+    Publish finished ingests: give the studies the next data generation (one counter across
+    all studies) and return it. Every ingest path calls this after DQI, once the studies'
+    data is final; readers cache per study on the generation instead of a TTL.
+    """
+    own_connection = conn is None
+    if own_connection:
+        conn = get_db_connection()
+    
+    try:
+        create_metadata_tables(conn.cursor())
+        if conn.in_transaction:
+            conn.commit()
+        # Take the write lock before reading the counter, other processes may publish too
+        conn.execute("BEGIN IMMEDIATE")
+        generation = conn.execute("SELECT COALESCE(MAX(generation), 0) + 1 FROM data_generation").fetchone()[0]
+        conn.executemany(
+            """INSERT INTO data_generation (project_name, generation, published_at)
+               VALUES (?, ?, CURRENT_TIMESTAMP)
+               ON CONFLICT(project_name) DO UPDATE SET
+                   generation = excluded.generation, published_at = excluded.published_at""",
+            [(project_name, generation) for project_name in project_names]
+        )
+        conn.commit()
+    finally:
+        if own_connection:
+            conn.close()
+    return generation
 
 def verify_insertion():
     """Verify data insertion by counting records in all tables"""
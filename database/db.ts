@@ -1,4 +1,5 @@
 import Database from "better-sqlite3";
+import fs from "fs";
 import path from "path";
 
 // Get the database path
@@ -6,8 +7,24 @@ const dbPath = path.join(process.cwd(), "database", "edc_metrics.db");
 
 // Create a singleton database connection
 let db: Database.Database | null = null;
+// Inode of the file the connection was opened on
+let dbInode: number | null = null;
+
+function currentInode(): number | null {
+  try {
+    return fs.statSync(dbPath).ino;
+  } catch {
+    return null;
+  }
+}
 
 export function getDatabase() {
+  // Compaction (db_maintenance.py) moves a new file over the database: reopen on it
+  if (db && db.open && currentInode() !== dbInode) {
+    db.close();
+    db = null;
+  }
+
   // Check if db exists and is open
   if (!db || !db.open) {
     try {
@@ -17,6 +34,7 @@ export function getDatabase() {
       }
 
       db = new Database(dbPath, { readonly: true });
+      dbInode = currentInode();
       console.log("Database connected successfully:", dbPath);
     } catch (error) {
       console.error("Error connecting to database:", error);
@@ -34,3 +52,44 @@ export function closeDatabase() {
     db = null;
   }
 }
+
+// Published data generation per study, bumped by every Python ingest path once a
+// study's data (including DQI) is final. Empty before the first publish.
+export function getDataGenerations(): Map<string, number> {
+  const generations = new Map<string, number>();
+  try {
+    const rows = getDatabase()
+      .prepare("SELECT project_name, generation FROM data_generation")
+      .all() as { project_name: string; generation: number }[];
+    for (const row of rows) {
+      generations.set(row.project_name, row.generation);
+    }
+  } catch (error) {
+    // Databases created before data_generation existed, or not created yet
+    if (!String(error).includes("no such table")) {
+      throw error;
+    }
+  }
+  return generations;
+}
+
+// Newest published data generation of any study. The counter is shared by all studies, so
+// it identifies the state of the whole database; 0 before the first publish.
+export function getLatestDataGeneration(): number {
+  return Math.max(0, ...getDataGenerations().values());
+}
+
+// Response header carrying the data generation an API read its data at. The dashboard stamps
+// the context it caches with the oldest one (lib/cache-service.ts).
+export const DATA_GENERATION_HEADER = "X-Data-Generation";
+
+// Headers for a data API response. Read before the data, so the stamp is never newer than the
+// data; empty when the generation cannot be read.
+export function dataGenerationHeaders(): Record<string, string> {
+  try {
+    return { [DATA_GENERATION_HEADER]: String(getLatestDataGeneration()) };
+  } catch (error) {
+    console.warn("[DB] Could not read the data generation:", error);
+    return {};
+  }
+}
@@ -3,6 +3,7 @@ import * as fs from "fs";
 import * as path from "path";
 import { config } from "dotenv";
 import { GoogleGenerativeAI } from "@google/generative-ai";
+import { runPreflightCheck, type PreflightResult } from "./importToDatabase";
 
 // Load environment variables
 config();
@@ -26,14 +27,22 @@ interface ValidationResult {
   renamedFiles: Array<{ oldName: string; newName: string; reason?: string }>;
   differences: string;
   newFolderName: string;
+  // Set when the files were mapped without Gemini and passed the preflight check
+  preflight?: PreflightResult;
 }
 
-// Initialize Gemini AI
-if (!process.env.GEMINI_API_KEY) {
-  throw new Error("GEMINI_API_KEY is not set in .env file");
-}
+let genAI: GoogleGenerativeAI | null = null;
 
-const genAI = new GoogleGenerativeAI(process.env.GEMINI_API_KEY);
+// Gemini client, created on first use: uploads resolved locally need no API key
+function getGenAI(): GoogleGenerativeAI {
+  if (!genAI) {
+    if (!process.env.GEMINI_API_KEY) {
+      throw new Error("GEMINI_API_KEY is not set in .env file");
+    }
+    genAI = new GoogleGenerativeAI(process.env.GEMINI_API_KEY);
+  }
+  return genAI;
+}
 
 // Extract column names from a worksheet
 function getColumnNames(worksheet: XLSX.WorkSheet): string[] {
@@ -153,13 +162,82 @@ function generateStructuredOutput(fileDetails: ExcelFileDetails[]): string {
   return output;
 }
 
+// Workbook names listed in the expected structure ("📂 File 1: Compiled_EDRR.xlsx")
+function expectedFileNames(expectedData: string): string[] {
+  return Array.from(
+    expectedData.matchAll(/📂 File \d+: (.+\.xlsx)/g),
+    (match) => match[1].trim(),
+  );
+}
+
+// File name without its extension, lower case letters and digits only
+function squashName(fileName: string): string {
+  return path.parse(fileName).name.toLowerCase().replace(/[^a-z0-9]/g, "");
+}
+
+// Study number of a folder or file name ("Study 1", "study_12 upload"), null when absent
+function studyNumber(name: string): string | null {
+  const match = name.match(/study[\s_-]*(\d+)/i);
+  return match ? String(Number(match[1])) : null;
+}
+
+/**
+ * Map the uploaded files to the expected workbooks without Gemini. A file matches the
+ * workbook whose name it contains, ignoring case and punctuation
+ * ("Study 1_Compiled_EDRR_updated.xlsx" -> "Compiled_EDRR.xlsx"). Returns null unless each
+ * workbook matches exactly one file, each file one workbook, and the folder (or every file)
+ * names the study number.
+ */
+function resolveFileNames(
+  fileNames: string[],
+  expectedData: string,
+  folderName: string,
+): ValidationResult | null {
+  const expected = expectedFileNames(expectedData);
+  if (expected.length === 0) return null;
+
+  const renamedFiles: ValidationResult["renamedFiles"] = [];
+  const matched = new Set<string>();
+  for (const fileName of fileNames) {
+    const squashed = squashName(fileName);
+    // The longest contained name wins ("Missing_Pages_Report" over a shorter overlap)
+    const candidates = expected
+      .filter((name) => squashed.includes(squashName(name)))
+      .sort((a, b) => squashName(b).length - squashName(a).length);
+    if (candidates.length === 0 || matched.has(candidates[0])) return null;
+    matched.add(candidates[0]);
+    if (fileName !== candidates[0]) {
+      renamedFiles.push({
+        oldName: fileName,
+        newName: candidates[0],
+        reason: `File name contains ${path.parse(candidates[0]).name}`,
+      });
+    }
+  }
+  if (matched.size !== expected.length) return null;
+
+  const fileNumbers = new Set(fileNames.map(studyNumber));
+  const number =
+    studyNumber(folderName) ??
+    (fileNumbers.size === 1 ? [...fileNumbers][0] : null);
+  if (!number) return null;
+
+  return {
+    isValid: true,
+    missingFiles: [],
+    renamedFiles,
+    differences: "",
+    newFolderName: `Study ${number}`,
+  };
+}
+
 // Compare received files with expected using Gemini AI
 async function compareWithGemini(
   receivedData: string,
   expectedData: string,
   folderName: string,
 ): Promise<ValidationResult> {
-  const model = genAI.getGenerativeModel({
+  const model = getGenAI().getGenerativeModel({
     model: process.env.GEMINI_MODEL || "gemini-1.5-flash",
   });
 
@@ -251,21 +329,52 @@ export async function validateAndRenameExcelFiles(
     throw new Error("No Excel files found in the uploaded folder!");
   }
 
-  const receivedFileDetails = excelFiles.map((filePath) =>
-    processExcelFile(filePath),
-  );
-
-  const receivedData = generateStructuredOutput(receivedFileDetails);
-
   console.log(`📊 Found ${excelFiles.length} Excel file(s)\n`);
 
-  // Compare with Gemini AI
-  console.log("🤖 Analyzing with Gemini AI...\n");
-  const validationResult = await compareWithGemini(
-    receivedData,
+  // Map file names locally and check the sheets and columns with preflight_check.py (its
+  // column resolver handles drifted headers); Gemini only sees uploads this cannot settle
+  let validationResult = resolveFileNames(
+    excelFiles.map((filePath) => path.basename(filePath)),
     expectedData,
     folderName,
   );
+  if (validationResult) {
+    try {
+      const preflight = await runPreflightCheck(
+        uploadedFolderPath,
+        validationResult.renamedFiles,
+      );
+      if (preflight.ok) {
+        console.log("✓ Files and columns resolved locally, Gemini not needed\n");
+        validationResult = {
+          ...validationResult,
+          differences: `File names mapped locally; sheets and columns passed the preflight check (${preflight.elapsedMs} ms)`,
+          preflight,
+        };
+      } else {
+        console.log(`⚠ Local mapping failed the preflight check: ${preflight.issues.join("; ")}\n`);
+        validationResult = null;
+      }
+    } catch (error) {
+      console.warn("Preflight check unavailable, falling back to Gemini:", error);
+      validationResult = null;
+    }
+  }
+
+  if (!validationResult) {
+    const receivedFileDetails = excelFiles.map((filePath) =>
+      processExcelFile(filePath),
+    );
+    const receivedData = generateStructuredOutput(receivedFileDetails);
+
+    // Compare with Gemini AI
+    console.log("🤖 Analyzing with Gemini AI...\n");
+    validationResult = await compareWithGemini(
+      receivedData,
+      expectedData,
+      folderName,
+    );
+  }
 
   // Display results
   console.log("=".repeat(60));
@@ -3,13 +3,22 @@
  * This runs after Excel files are validated and renamed
  */
 
-import { exec } from "child_process";
+import { exec, execFile, spawn, ChildProcess } from "child_process";
 import { promisify } from "util";
 import * as path from "path";
 import * as fs from "fs";
+import * as readline from "readline";
 import { closeDatabase } from "./db";
+import { invalidateStudies } from "../lib/cache-service";
 
 const execAsync = promisify(exec);
+const execFileAsync = promisify(execFile);
+
+// Ingest through a long-lived ingest_worker.py (modules imported once, warm SQLite
+// connection) instead of starting a Python process per upload. INGEST_WORKER=false
+// restores the one-process-per-batch behaviour (ingest_queue.py submit --run). Both
+// go through the ingest queue.
+const USE_INGEST_WORKER = process.env.INGEST_WORKER !== "false";
 
 interface ImportResult {
   success: boolean;
@@ -18,6 +27,55 @@ interface ImportResult {
   error?: string;
 }
 
+export interface PreflightResult {
+  ok: boolean;
+  issues: string[];
+  elapsedMs: number;
+}
+
+export interface StudyUpload {
+  folderPath: string;
+  studyName: string;
+}
+
+interface WorkerEvent {
+  id: string | null;
+  event: "ready" | "progress" | "done";
+  success?: boolean;
+  error?: string;
+  step?: string;
+  message?: string;
+  elapsed_s?: number;
+  [key: string]: unknown;
+}
+
+interface PendingRequest {
+  resolve: (event: WorkerEvent) => void;
+  reject: (error: Error) => void;
+}
+
+interface IngestWorker {
+  process: ChildProcess;
+  pending: Map<string, PendingRequest>;
+}
+
+// Single worker per server process; requests are queued by the worker and run in order
+let ingestWorker: IngestWorker | null = null;
+let ingestWorkerStarting: Promise<IngestWorker> | null = null;
+let nextRequestId = 1;
+
+// Uploads waiting for the next import batch, the batch they will run in, and the
+// import running now (one at a time per server process)
+let pendingUploads: StudyUpload[] = [];
+let pendingBatch: Promise<ImportResult> | null = null;
+let runningImport: Promise<ImportResult> | null = null;
+
+// Worker process alive now (also while it shuts down), and how long a shutdown may take
+// before the worker is killed
+let workerProcess: ChildProcess | null = null;
+let shutdownHooksInstalled = false;
+const WORKER_SHUTDOWN_GRACE_MS = 5000;
+
 /**
  * Check if Python is installed
  */
@@ -123,17 +181,169 @@ async function extractData(
 }
 
 /**
- * Run the main Python script to process and insert data
+ * Start the ingest worker and wait until it has imported the pipeline
  */
-async function runMainPythonScript(
+async function startIngestWorker(
+  pythonCmd: string,
+  workspaceRoot: string,
+): Promise<IngestWorker> {
+  const scriptPath = path.join(workspaceRoot, "ingest_worker.py");
+
+  if (!fs.existsSync(scriptPath)) {
+    throw new Error(`ingest_worker.py not found at ${scriptPath}`);
+  }
+
+  const child = spawn(pythonCmd, [scriptPath], {
+    cwd: workspaceRoot,
+    env: { ...process.env, PYTHONIOENCODING: "utf-8" },
+    stdio: ["pipe", "pipe", "pipe"],
+  });
+  const worker: IngestWorker = { process: child, pending: new Map() };
+  workerProcess = child;
+
+  // Pipeline output arrives on stderr
+  readline.createInterface({ input: child.stderr! }).on("line", (line) => {
+    console.log(`  [ingest worker] ${line}`);
+  });
+
+  const ready = new Promise<void>((resolve, reject) => {
+    readline.createInterface({ input: child.stdout! }).on("line", (line) => {
+      let message: WorkerEvent;
+      try {
+        message = JSON.parse(line);
+      } catch {
+        console.log(`  [ingest worker] ${line}`);
+        return;
+      }
+
+      if (message.event === "ready") {
+        console.log(`✓ Ingest worker ready (pid ${message.pid}, Python ${message.python})`);
+        resolve();
+      } else if (message.event === "progress") {
+        console.log(`  → ${message.message}`);
+      } else if (message.event === "done" && message.id !== null) {
+        const request = worker.pending.get(message.id);
+        worker.pending.delete(message.id);
+        request?.resolve(message);
+      }
+    });
+
+    child.on("error", (error) => {
+      reject(error);
+    });
+
+    child.on("exit", (code) => {
+      const error = new Error(`Ingest worker exited with code ${code}`);
+      reject(error);
+      for (const request of worker.pending.values()) {
+        request.reject(error);
+      }
+      worker.pending.clear();
+      if (ingestWorker === worker) {
+        ingestWorker = null;
+      }
+      if (workerProcess === child) {
+        workerProcess = null;
+      }
+    });
+  });
+
+  await ready;
+  return worker;
+}
+
+/**
+ * Start the ingest worker once, even when several uploads arrive while it is starting
+ */
+async function launchIngestWorker(
   pythonCmd: string,
   workspaceRoot: string,
+): Promise<IngestWorker> {
+  if (!ingestWorkerStarting) {
+    ingestWorkerStarting = startIngestWorker(pythonCmd, workspaceRoot).finally(() => {
+      ingestWorkerStarting = null;
+    });
+  }
+  ingestWorker = await ingestWorkerStarting;
+  installShutdownHooks();
+  return ingestWorker;
+}
+
+/**
+ * Stop the worker cleanly when the server shuts down. The worker also stops at the end of
+ * its stdin, i.e. once the server is gone.
+ */
+function installShutdownHooks(): void {
+  if (shutdownHooksInstalled) {
+    return;
+  }
+  shutdownHooksInstalled = true;
+
+  for (const [signal, code] of [["SIGINT", 130], ["SIGTERM", 143]] as const) {
+    process.once(signal, () => {
+      void stopIngestWorker().finally(() => process.exit(code));
+    });
+  }
+  process.once("beforeExit", () => {
+    void stopIngestWorker();
+  });
+  // "exit" handlers cannot wait for the shutdown command: kill a worker still running
+  process.once("exit", () => {
+    workerProcess?.kill();
+  });
+}
+
+/**
+ * Send a command to the ingest worker and wait for its result
+ */
+async function sendWorkerCommand(
+  worker: IngestWorker,
+  command: string,
+  fields: Record<string, unknown> = {},
+): Promise<WorkerEvent> {
+  const id = String(nextRequestId++);
+  const result = new Promise<WorkerEvent>((resolve, reject) => {
+    worker.pending.set(id, { resolve, reject });
+  });
+  worker.process.stdin!.write(JSON.stringify({ id, command, ...fields }) + "\n");
+
+  const event = await result;
+  if (!event.success) {
+    throw new Error(event.error || `Ingest worker command '${command}' failed`);
+  }
+  return event;
+}
+
+/**
+ * Stop the ingest worker, e.g. when the server shuts down: it finishes the requests it has,
+ * closes its SQLite connection and exits, or is killed after WORKER_SHUTDOWN_GRACE_MS
+ */
+export function stopIngestWorker(): Promise<void> {
+  const worker = ingestWorker;
+  ingestWorker = null;
+  if (!worker || worker.process.exitCode !== null || worker.process.signalCode !== null) {
+    return Promise.resolve();
+  }
+
+  const child = worker.process;
+  return new Promise<void>((resolve) => {
+    const timer = setTimeout(() => child.kill(), WORKER_SHUTDOWN_GRACE_MS);
+    child.once("exit", () => {
+      clearTimeout(timer);
+      resolve();
+    });
+    child.stdin!.end(JSON.stringify({ id: "shutdown", command: "shutdown" }) + "\n");
+  });
+}
+
+/**
+ * Copy uploaded files to the study's folder under Study Files
+ */
+function copyStudyFiles(
+  workspaceRoot: string,
   studyName: string,
   folderPath: string,
-): Promise<void> {
-  console.log(`\n🚀 Processing ${studyName} and inserting into database...`);
-
-  // Copy uploaded files to Study Files directory
+): void {
   const studyFilesDir = path.join(workspaceRoot, "Study Files", studyName);
 
   console.log(`\n📁 Copying files to: ${studyFilesDir}`);
@@ -152,12 +362,56 @@ async function runMainPythonScript(
   }
 
   console.log(`✓ Copied ${files.length} files to Study Files directory`);
+}
 
-  // Use process_single_study.py to process only the newly uploaded study
-  const scriptPath = path.join(workspaceRoot, "process_single_study.py");
+/**
+ * Process and insert studies through the ingest worker, with one DQI pass for the batch
+ */
+async function runIngestWorker(
+  worker: IngestWorker,
+  workspaceRoot: string,
+  uploads: StudyUpload[],
+): Promise<void> {
+  const studyNames = uploads.map((upload) => upload.studyName);
+  console.log(`\n🚀 Processing ${studyNames.join(", ")} and inserting into database...`);
+
+  for (const upload of uploads) {
+    copyStudyFiles(workspaceRoot, upload.studyName, upload.folderPath);
+  }
+
+  try {
+    console.log(`\n📊 Processing ${studyNames.length} studies`);
+    const result = await sendWorkerCommand(worker, "ingest", { studies: studyNames });
+    console.log(
+      `✓ Data processing and insertion completed (${result.subjects} subjects, ${result.elapsed_s}s)`,
+    );
+  } catch (error: any) {
+    throw new Error(`Ingest worker failed to process ${studyNames.join(", ")}: ${error.message}`);
+  }
+}
+
+/**
+ * Run the main Python script to process and insert data
+ */
+async function runMainPythonScript(
+  pythonCmd: string,
+  workspaceRoot: string,
+  uploads: StudyUpload[],
+): Promise<void> {
+  const studyNames = uploads.map((upload) => upload.studyName);
+  console.log(`\n🚀 Processing ${studyNames.join(", ")} and inserting into database...`);
+
+  for (const upload of uploads) {
+    copyStudyFiles(workspaceRoot, upload.studyName, upload.folderPath);
+  }
+
+  // Queue the newly uploaded studies and drain the queue (or wait for the running
+  // runner), so the upload never writes alongside the watcher or another runner;
+  // one DQI pass covers the batch
+  const scriptPath = path.join(workspaceRoot, "ingest_queue.py");
 
   if (!fs.existsSync(scriptPath)) {
-    throw new Error(`process_single_study.py not found at ${scriptPath}`);
+    throw new Error(`ingest_queue.py not found at ${scriptPath}`);
   }
 
   try {
@@ -167,11 +421,12 @@ async function runMainPythonScript(
       PYTHONIOENCODING: 'utf-8'
     };
 
-    console.log(`\n📊 Processing study: ${studyName}`);
+    console.log(`\n📊 Processing ${studyNames.length} studies`);
     
-    // Pass study name as command line argument
+    // Pass study names as command line arguments
+    const studyArgs = studyNames.map((name) => `"${name}"`).join(" ");
     const { stdout, stderr } = await execAsync(
-      `${pythonCmd} "${scriptPath}" "${studyName}"`, 
+      `${pythonCmd} "${scriptPath}" submit --run ${studyArgs}`, 
       {
         cwd: workspaceRoot,
         env: env,
@@ -188,7 +443,7 @@ async function runMainPythonScript(
 
     console.log("✓ Data processing and insertion completed");
   } catch (error: any) {
-    throw new Error(`Failed to run process_single_study.py: ${error.message}`);
+    throw new Error(`Failed to run ingest_queue.py: ${error.message}`);
   }
 }
 
@@ -209,6 +464,47 @@ async function verifyDatabase(workspaceRoot: string): Promise<string> {
   return dbPath;
 }
 
+/**
+ * Check an uploaded study folder with preflight_check.py before anything is imported:
+ * every workbook present with the sheets and columns extraction needs, read from the
+ * workbook metadata and header rows only (milliseconds per study)
+ * @param folderPath - Uploaded study folder
+ * @param renamedFiles - Pending renames from validation (files still under their upload names)
+ */
+export async function runPreflightCheck(
+  folderPath: string,
+  renamedFiles: Array<{ oldName: string; newName: string }> = [],
+): Promise<PreflightResult> {
+  const workspaceRoot = process.cwd();
+  const pythonCmd = await checkPython();
+  const args = [path.join(workspaceRoot, "preflight_check.py"), "--json", folderPath];
+  for (const { oldName, newName } of renamedFiles) {
+    args.push("--file", `${newName}=${oldName}`);
+  }
+
+  let stdout: string;
+  try {
+    ({ stdout } = await execFileAsync(pythonCmd, args, {
+      cwd: workspaceRoot,
+      env: { ...process.env, PYTHONIOENCODING: "utf-8" },
+    }));
+  } catch (error: any) {
+    // Exit code 1 means problems were found, the report is still on stdout
+    if (!error.stdout) {
+      throw new Error(`Preflight check failed to run: ${error.message}`);
+    }
+    stdout = error.stdout;
+  }
+
+  const report = JSON.parse(stdout);
+  const study = report.studies[0];
+  return {
+    ok: report.ok,
+    issues: study ? study.issues : [],
+    elapsedMs: study ? study.elapsed_ms : 0,
+  };
+}
+
 /**
  * Main function to import Excel data into database
  * This runs after files have been renamed
@@ -216,6 +512,51 @@ async function verifyDatabase(workspaceRoot: string): Promise<string> {
 export async function importExcelToDatabase(
   renamedFolderPath: string,
   studyName: string,
+): Promise<ImportResult> {
+  return queueStudyImports([{ folderPath: renamedFolderPath, studyName }]);
+}
+
+/**
+ * Import studies in the next batch: uploads arriving while an import runs are
+ * collected and imported together once it finishes, with one DQI pass for all of
+ * them. A study uploaded twice before its batch starts is imported once, from the
+ * latest upload. Resolves with the result of the batch the uploads ran in.
+ */
+export function queueStudyImports(
+  uploads: StudyUpload[],
+): Promise<ImportResult> {
+  for (const upload of uploads) {
+    pendingUploads = pendingUploads.filter(
+      (pending) => pending.studyName !== upload.studyName,
+    );
+    pendingUploads.push(upload);
+  }
+
+  if (!pendingBatch) {
+    pendingBatch = (async () => {
+      // Always yields first, so pendingBatch is set before this batch takes its uploads
+      await (runningImport ?? Promise.resolve());
+      const batch = pendingUploads;
+      pendingUploads = [];
+      pendingBatch = null;
+
+      runningImport = importExcelStudiesToDatabase(batch);
+      try {
+        return await runningImport;
+      } finally {
+        runningImport = null;
+      }
+    })();
+  }
+  return pendingBatch;
+}
+
+/**
+ * Import several renamed study folders together: each study is inserted in its
+ * own transaction, and DQI / clean status are calculated once for the batch
+ */
+export async function importExcelStudiesToDatabase(
+  uploads: StudyUpload[],
 ): Promise<ImportResult> {
   console.log("╔════════════════════════════════════════════════════════╗");
   console.log("║       Excel to Database Import Process                ║");
@@ -228,36 +569,62 @@ export async function importExcelToDatabase(
     console.log("Step 0: Closing existing database connections...");
     closeDatabase();
 
-    // Step 1: Check Python
-    console.log("Step 1: Checking Python installation...");
-    const pythonCmd = await checkPython();
-
-    // Step 2: Install dependencies
-    console.log("\nStep 2: Installing dependencies...");
-    await installPythonDependencies(pythonCmd);
+    // Steps 1-2 only run until the ingest worker is up: a running worker has
+    // already imported everything it needs
+    let pythonCmd = "";
+    let worker = USE_INGEST_WORKER ? ingestWorker : null;
+    if (worker) {
+      console.log(`Steps 1-2: Using running ingest worker (pid ${worker.process.pid})`);
+    } else {
+      // Step 1: Check Python
+      console.log("Step 1: Checking Python installation...");
+      pythonCmd = await checkPython();
+
+      // Step 2: Install dependencies
+      console.log("\nStep 2: Installing dependencies...");
+      await installPythonDependencies(pythonCmd);
+
+      if (USE_INGEST_WORKER) {
+        try {
+          worker = await launchIngestWorker(pythonCmd, workspaceRoot);
+        } catch (error: any) {
+          console.warn(
+            `Warning: Ingest worker unavailable, running scripts per study: ${error.message}`,
+          );
+        }
+      }
+    }
 
     // Step 3: Create database schema (if not exists)
     console.log("\nStep 3: Creating database schema...");
-    await createDatabase(pythonCmd, workspaceRoot);
+    if (worker) {
+      await sendWorkerCommand(worker, "create_database");
+      console.log("✓ Database schema created successfully");
+    } else {
+      await createDatabase(pythonCmd, workspaceRoot);
+    }
 
-    // Step 4: Run main Python script (extracts, fills, and inserts data)
+    // Step 4: Extract, fill and insert data
     console.log("\nStep 4: Processing Excel files and inserting data...");
-    await runMainPythonScript(
-      pythonCmd,
-      workspaceRoot,
-      studyName,
-      renamedFolderPath,
-    );
+    if (worker) {
+      await runIngestWorker(worker, workspaceRoot, uploads);
+    } else {
+      await runMainPythonScript(pythonCmd, workspaceRoot, uploads);
+    }
 
     // Step 5: Verify database
     console.log("\nStep 5: Verifying database...");
     const dbPath = await verifyDatabase(workspaceRoot);
 
+    // The ingest published a new data generation for these studies; drop their
+    // cached contexts now rather than on the next read
+    invalidateStudies(uploads.map((upload) => upload.studyName));
+
     console.log("\n" + "=".repeat(60));
     console.log("✅ IMPORT COMPLETED SUCCESSFULLY!");
     console.log("=".repeat(60));
     console.log(`Database: ${dbPath}`);
-    console.log(`Study: ${studyName}`);
+    console.log(`Studies: ${uploads.map((upload) => upload.studyName).join(", ")}`);
     console.log("=".repeat(60));
 
     return {
@@ -0,0 +1,197 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Database file path
+DB_PATH = os.getcwd() + os.getenv("DB_PATH", "/database/edc_metrics.db")
+
+# Share of free pages (left behind by replaced studies) above which the database is compacted
+VACUUM_FREE_RATIO = float(os.getenv("MAINTENANCE_VACUUM_FREE_RATIO", "0.2"))
+
+def fragmentation(conn):
+    """
+    Share of b-tree leaf pages not stored right after the previous leaf of the same table or
+    index, i.e. reads that jump around the file during a scan (None without the dbstat table)
+    """
+    previous = {}
+    jumps = pairs = 0
+    try:
+        for name, pageno in conn.execute("SELECT name, pageno FROM dbstat WHERE pagetype = 'leaf'"):
+            if name in previous:
+                pairs += 1
+                jumps += pageno != previous[name] + 1
+            previous[name] = pageno
+    except sqlite3.OperationalError:
+        return None
+    return jumps / pairs if pairs else 0.0
+
+def database_report(conn, db_path, with_fragmentation=False):
+    """
+    File size, WAL size and free pages of a database, plus its fragmentation when asked for
+    (a walk over every page with dbstat)
+    """
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    wal_path = db_path + "-wal"
+    report = {
+        'file_bytes': os.path.getsize(db_path),
+        'wal_bytes': os.path.getsize(wal_path) if os.path.exists(wal_path) else 0,
+        'page_size': conn.execute("PRAGMA page_size").fetchone()[0],
+        'page_count': page_count,
+        'freelist_count': freelist_count,
+        'free_ratio': freelist_count / page_count if page_count else 0.0,
+    }
+    if with_fragmentation:
+        report['fragmentation'] = fragmentation(conn)
+    return report
+
+def optimize_database(conn):
+    """
+    Fold the WAL into the database file and truncate it, then refresh the planner statistics.
+    Safe on a connection that stays open (watcher, worker). Returns True when the whole WAL
+    was checkpointed (False while a reader still needs part of it).
+    """
+    if conn.in_transaction:
+        conn.commit()
+    busy, _, _ = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.execute("PRAGMA optimize")
+    return busy == 0
+
+def compact_database(db_path):
+    """
+    Write a compacted copy with VACUUM INTO, check it and move it over the database. Skipped
+    while any other connection has the database open (dashboard, watcher, worker), since it
+    would keep reading or writing the replaced file. Returns True when the database was replaced.
+    """
+    compacted_path = db_path + ".compact"
+    if os.path.exists(compacted_path):
+        os.remove(compacted_path)
+
+    conn = sqlite3.connect(db_path, timeout=1, isolation_level=None)
+    try:
+        # Leaving WAL mode needs an exclusive lock on the database file, which fails while another
+        # connection holds its shared lock. SQLite checkpoints the WAL and cleans up its files
+        # itself, and the exclusive locking mode keeps the lock until close, i.e. past the swap.
+        conn.execute("PRAGMA locking_mode = EXCLUSIVE")
+        try:
+            exclusive = conn.execute("PRAGMA journal_mode = DELETE").fetchone()[0] == "delete"
+        except sqlite3.OperationalError:
+            exclusive = False
+        if not exclusive:
+            print("⚠ Compaction skipped: other connections have the database open")
+            return False
+
+        replaced = False
+        try:
+            conn.execute("VACUUM INTO ?", (compacted_path,))
+
+            compacted = sqlite3.connect(compacted_path)
+            try:
+                ok = compacted.execute("PRAGMA quick_check").fetchone()[0] == "ok"
+                compacted.execute("PRAGMA journal_mode = WAL")
+            finally:
+                compacted.close()
+
+            if ok:
+                os.replace(compacted_path, db_path)
+                replaced = True
+            else:
+                os.remove(compacted_path)
+                print("⚠ Compacted copy discarded: quick_check failed")
+        finally:
+            if not replaced:
+                conn.execute("PRAGMA journal_mode = WAL")
+        return replaced
+    finally:
+        conn.close()
+
+def run_maintenance(db_path=None, vacuum_ratio=None, force_vacuum=False, with_fragmentation=False, optimize=True):
+    """
+    Post-ingest maintenance: WAL checkpoint, ANALYZE / PRAGMA optimize, and VACUUM INTO a
+    compacted file when the free-page ratio exceeds vacuum_ratio (skipped while
+    other connections are open). Returns the reports before and after, with fragmentation
+    only when with_fragmentation is set. Ingests that already ran optimize_database pass
+    optimize=False ('checkpointed' is then None).
+    """
+    db_path = db_path or DB_PATH
+    vacuum_ratio = VACUUM_FREE_RATIO if vacuum_ratio is None else vacuum_ratio
+
+    conn = sqlite3.connect(db_path)
+    try:
+        before = database_report(conn, db_path, with_fragmentation)
+        checkpointed = optimize_database(conn) if optimize else None
+    finally:
+        conn.close()
+
+    vacuumed = False
+    if force_vacuum or before['free_ratio'] > vacuum_ratio:
+        vacuumed = compact_database(db_path)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        after = database_report(conn, db_path, with_fragmentation)
+    finally:
+        conn.close()
+    return {'before': before, 'after': after, 'checkpointed': checkpointed, 'vacuumed': vacuumed}
+
+def print_report(result):
+    """Print the before/after reports of run_maintenance"""
+    def size(value):
+        return f"{value / (1024 * 1024):.2f} MB"
+
+    def percent(value):
+        return "n/a" if value is None else f"{value:.1%}"
+
+    rows = [
+        ("File size", 'file_bytes', size),
+        ("WAL size", 'wal_bytes', size),
+        ("Pages", 'page_count', str),
+        ("Free pages", 'freelist_count', str),
+        ("Free ratio", 'free_ratio', percent),
+        ("Fragmentation", 'fragmentation', percent),
+    ]
+    print("=" * 70)
+    print("DATABASE MAINTENANCE")
+    print("=" * 70)
+    print(f"{'':<16}{'before':>14}{'after':>14}")
+    for label, key, fmt in rows:
+        if key not in result['before']:
+            continue
+        print(f"{label:<16}{fmt(result['before'][key]):>14}{fmt(result['after'][key]):>14}")
+    print()
+    if result['checkpointed'] is not None:
+        print("✓ WAL checkpointed and truncated" if result['checkpointed']
+              else "⚠ WAL partly checkpointed (a reader is still using it)")
+        print("✓ Planner statistics refreshed (ANALYZE, PRAGMA optimize)")
+    print("✓ Compacted with VACUUM INTO" if result['vacuumed'] else "→ Compaction not needed")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Checkpoint, analyze and (when fragmented) compact the database")
+    parser.add_argument("--db", default=DB_PATH, help="Database file (default: DB_PATH)")
+    parser.add_argument("--vacuum-ratio", type=float, default=VACUUM_FREE_RATIO,
+                        help=f"Compact when free pages exceed this share (default: {VACUUM_FREE_RATIO:g})")
+    parser.add_argument("--vacuum", action="store_true", help="Compact regardless of the free-page ratio")
+    parser.add_argument("--fragmentation", action="store_true",
+                        help="Also measure fragmentation before and after (walks every page with dbstat)")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"✗ Database not found: {args.db}")
+        sys.exit(1)
+
+    start_time = time.time()
+    result = run_maintenance(args.db, args.vacuum_ratio, args.vacuum, args.fragmentation)
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print_report(result)
+        print(f"\nTotal maintenance time: {time.time() - start_time:.2f} seconds")
@@ -1,7 +1,8 @@
-import sqlite3
+import sql_profiler
 import os
 from dotenv import load_dotenv
 from datetime import datetime
+from instrumentation import instrument, set_span_rows
 
 load_dotenv()
 
@@ -37,7 +38,7 @@ MAX_THRESHOLDS = {
 
 def get_db_connection():
     """Create and return a database connection"""
-    return sqlite3.connect(DB_PATH)
+    return sql_profiler.connect(DB_PATH)
 
 def normalize_metric(actual_value, max_threshold):
     """
@@ -74,11 +75,15 @@ def calculate_dqi_category(dqi_score):
     else:
         return 'Critical'
 
-def calculate_dqi_for_all_subjects():
+@instrument
+def calculate_dqi_for_all_subjects(conn=None):
     """
-    Calculate DQI scores for all subjects using SQL queries
+    Calculate DQI scores for all subjects using SQL queries.
+    Uses conn when given (left open for the caller), otherwise opens its own connection.
     """
-    conn = get_db_connection()
+    own_connection = conn is None
+    if own_connection:
+        conn = get_db_connection()
     cursor = conn.cursor()
     
     print("\nCalculating Data Quality Index (DQI) for all subjects...")
@@ -177,6 +182,7 @@ def calculate_dqi_for_all_subjects():
     cursor.executemany(insert_sql, dqi_results)
     conn.commit()
     
+    set_span_rows(rows_in=len(subjects), rows_out=len(dqi_results))
     print(f"✓ Calculated DQI for {len(dqi_results)} subjects")
     
     # Print DQI category distribution
@@ -200,13 +206,18 @@ def calculate_dqi_for_all_subjects():
     for category, count in categories:
         print(f"  {category}: {count} subjects")
     
-    conn.close()
+    if own_connection:
+        conn.close()
 
-def calculate_clean_status_for_all_subjects():
+@instrument
+def calculate_clean_status_for_all_subjects(conn=None):
     """
-    Calculate Clean Patient Status for all subjects using 11-criteria assessment
+    Calculate Clean Patient Status for all subjects using 11-criteria assessment.
+    Uses conn when given (left open for the caller), otherwise opens its own connection.
     """
-    conn = get_db_connection()
+    own_connection = conn is None
+    if own_connection:
+        conn = get_db_connection()
     cursor = conn.cursor()
     
     print("\nCalculating Clean Patient Status for all subjects...")
@@ -289,6 +300,7 @@ def calculate_clean_status_for_all_subjects():
     cursor.executemany(update_sql, clean_status_results)
     conn.commit()
     
+    set_span_rows(rows_in=len(subjects), rows_out=len(clean_status_results))
     print(f"✓ Calculated Clean Status for {len(clean_status_results)} subjects")
     
     # Print clean status distribution
@@ -313,21 +325,24 @@ def calculate_clean_status_for_all_subjects():
     avg_criteria = cursor.fetchone()[0]
     print(f"\nAverage Criteria Met: {avg_criteria:.2f} out of 11")
     
-    conn.close()
+    if own_connection:
+        conn.close()
 
-def calculate_all_dqi_and_clean_status():
+@instrument
+def calculate_all_dqi_and_clean_status(conn=None):
     """
-    Main function to calculate both DQI and Clean Status for all subjects
+    Main function to calculate both DQI and Clean Status for all subjects,
+    through conn when given
     """
     print("="*70)
     print("DQI AND CLEAN STATUS CALCULATION")
     print("="*70)
     
     # Step 1: Calculate DQI
-    calculate_dqi_for_all_subjects()
+    calculate_dqi_for_all_subjects(conn)
     
     # Step 2: Calculate Clean Status
-    calculate_clean_status_for_all_subjects()
+    calculate_clean_status_for_all_subjects(conn)
     
     print("\n" + "="*70)
     print("✓ DQI AND CLEAN STATUS CALCULATION COMPLETED")
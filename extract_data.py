@@ -1,11 +1,69 @@
 import pandas as pd
+import numpy as np
 import os
+import heapq
+import pickle
+import weakref
+import tempfile
+import itertools
+import threading
+import openpyxl
+from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+from pandas.io.parsers import TextParser
 from pathlib import Path
 import warnings
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
 from functools import lru_cache
+from instrumentation import instrument
+from profiling import profiled_task
+from xlsx_metadata import sheet_costs, find_header_row
+from column_resolver import resolve_headers
 warnings.filterwarnings('ignore')
 
+# Workers of the extraction pool shared by every study extracted in this process, see
+# ExtractionPool. EXTRACT_POOL_PROCESSES=true parses the sheets in worker processes, so they
+# run on several cores instead of sharing one interpreter lock. Threads parse one workbook at a
+# time and gain nothing from more than one worker (main.py: 45.4s with 1, 46.7s with 4).
+EXTRACT_POOL_PROCESSES = os.getenv("EXTRACT_POOL_PROCESSES", "false").lower() == "true"
+EXTRACT_POOL_WORKERS = int(os.getenv("EXTRACT_POOL_WORKERS", str(os.cpu_count() or 1) if EXTRACT_POOL_PROCESSES else "1"))
+
+# Compact dtype mode (EXTRACT_COMPACT_DTYPES=true): repeated strings become categoricals sharing one
+# category dictionary per study and integer counts are downcast, see compact_dataframes()
+COMPACT_DTYPES = os.getenv("EXTRACT_COMPACT_DTYPES", "false").lower() == "true"
+
+# A string column is made categorical when its distinct values (across every dataframe of the
+# study with that column) are at most this share of its rows
+COMPACT_MAX_CARDINALITY = 0.5
+
+# Columns filled with values from other sheets after extraction, which a categorical would reject
+COMPACT_EXCLUDED_COLUMNS = ['Latest Visit (SV)']
+
+# Column-pruned reads (EXTRACT_PRUNE_COLUMNS=false reads every column): sheets only parse the
+# columns listed in CONSUMED_COLUMNS, see consumed_columns()
+PRUNE_COLUMNS = os.getenv("EXTRACT_PRUNE_COLUMNS", "true").lower() == "true"
+
+# Column resolution (EXTRACT_RESOLVE_COLUMNS=false turns it off): headers the column mappings do
+# not know are matched to the ones they do by normalized name, short form or fuzzy score, see
+# resolve_columns()
+RESOLVE_COLUMNS = os.getenv("EXTRACT_RESOLVE_COLUMNS", "true").lower() == "true"
+
+# Streamed extraction of the sheets in STREAMED_SHEETS (EXTRACT_STREAM_CHUNK_ROWS=<rows>, 0 reads
+# them whole): rows are read, prepared and spooled to disk that many at a time, see StreamedSheet
+STREAM_CHUNK_ROWS = int(os.getenv("EXTRACT_STREAM_CHUNK_ROWS", "0"))
+STREAMED_SHEETS = ['Query Report - Cumulative']
+
+# Sheets whose header is not on their first row are parsed from the row matching a header signature
+# ({column index: text}) within their first HEADER_SEARCH_ROWS rows, see xlsx_metadata.find_header_row.
+# Subject Level Metrics has a header block (METRICS_HEADER_ROWS rows when its last row is not found)
+# followed by the data and a totals row.
+HEADER_SEARCH_ROWS = 20
+METRICS_HEADER_END = {0: 'Responsible LF for action'}
+METRICS_HEADER_ROWS = 4
+VISIT_PROJECTION_HEADER = {0: 'Country'}
+
+# Columns identifying a subject in per-subject counts
+SUBJECT_KEY = ['Project Name', 'Site ID', 'Subject ID']
+
 # Base directory for study files - will be constructed using project name
 def get_base_dir(project_name):
     """Get base directory for a specific project"""
@@ -46,12 +104,185 @@ COLUMN_MAPPING = {
     'Visit date': 'Visit Date',
     'Visit Date': 'Visit Date',
     
+    # Standardize day counts (Query Report)
+    '# Days Since Open': 'Days Since Open',
+    '# Days Since Response': 'Days Since Response',
+    
     # Other standardizations
     'Log': 'Logline',
     'Country': 'Country',
     'Region': 'Region'
 }
 
+# Column mapping of the Missing Pages Report, whose headers differ between studies
+# (matched after stripping surrounding spaces)
+MISSING_PAGES_COLUMN_MAPPING = {
+    # Study/Project
+    'Study': 'Project Name',
+    'Study Name': 'Project Name',
+    # Country/Site
+    'Country': 'Country',
+    'SiteGroupName(CountryName)': 'Country',
+    'Site Number': 'Site ID',
+    'SiteNumber': 'Site ID',
+    # Subject
+    'Subject Name': 'Subject ID',
+    'SubjectName': 'Subject ID',
+    'Subject': 'Subject ID',
+    # Visit/Folder
+    'Visit': 'Visit Name',
+    'Visit Name': 'Visit Name',
+    'Folder Name': 'Visit Name',
+    'FolderName': 'Visit Name',
+    # Page/Form
+    'Page Name': 'Form Name',
+    'FormName': 'Form Name',
+    'Form': 'Form Name',
+    # Visit Date
+    'Visit date': 'Visit Date',
+    'Visit Date': 'Visit Date',
+    # Status
+    'Subject Status': 'Subject Status',
+    'Overall Subject Status': 'Subject Status',
+    'Visit Level Subject Status': 'Visit Level Subject Status',
+    # Form Details -> Form Type
+    'Form Details': 'Form Type',
+    # Form Type
+    'Form Type (Summary or Visit)': 'Form Type',
+    # Days missing
+    '# of Days Missing': 'Days Missing',
+    'No. #Days Page Missing': 'Days Missing',
+    '#Days Page Missing': 'Days Missing',
+    'No. #Days Page Missing ': 'Days Missing',
+    # Screening Visit Date
+    'Screening Visit Date': 'Screening Visit Date'
+}
+
+# Columns (standardized names) of each dataframe that the fill steps and insert functions read.
+# Sheets read by position (Subject Level Metrics, Visit Projection Tracker) are not pruned.
+_VISIT_COLUMNS = ['Project Name', 'Region', 'Country', 'Site ID', 'Subject ID', 'Visit Name', 'Visit Date', 'Form Name']
+CONSUMED_COLUMNS = {
+    'Query Report - Cumulative': _VISIT_COLUMNS + [
+        'Log #', 'Logline', 'Field OID', 'Marking Group Name', 'Action Owner', 'Query Status',
+        'Query Open Date', 'Query Response Date', 'Days Since Open', 'Days Since Response'
+    ],
+    'Non conformant': _VISIT_COLUMNS + ['Log #', 'Logline', 'Field OID', 'Audit Time'],
+    'PI Signature Report': _VISIT_COLUMNS + [
+        'Audit Action', 'Page Require Signature', 'Date page entered/ Date last PI Sign',
+        'Pending since/ PI signed since', 'No. of days'
+    ],
+    'SDV': _VISIT_COLUMNS + ['Verification Status'],
+    'Protocol Deviation': _VISIT_COLUMNS + ['Logline', 'PD Status'],
+    'CRF Freeze': _VISIT_COLUMNS,
+    'CRF UnFreeze': _VISIT_COLUMNS,
+    'CRF Locked': _VISIT_COLUMNS + ['Audit User'],
+    'CRF UnLocked': _VISIT_COLUMNS + ['Audit User'],
+    'SV': _VISIT_COLUMNS,
+    'Compiled_EDRR': ['Project Name', 'Subject ID', 'Total Open Issue Count'],
+    'SAE Dashboard_DM': [
+        'Project Name', 'Country', 'Site ID', 'Subject ID', 'Form Name', 'Discrepancy ID',
+        'Discrepancy Created Timestamp', 'Case Status', 'Review Status', 'Action Status'
+    ],
+    'SAE Dashboard_Safety': [
+        'Project Name', 'Country', 'Site ID', 'Subject ID', 'Form Name', 'Discrepancy ID',
+        'Discrepancy Created Timestamp', 'Case Status', 'Review Status', 'Action Status'
+    ],
+    'GlobalCoding_MedDRA': [
+        'Project Name', 'Subject ID', 'Dictionary', 'Dictionary Version number', 'Form OID',
+        'Logline', 'Field OID', 'Coding Status', 'Require Coding'
+    ],
+    'GlobalCoding_WHODD': [
+        'Project Name', 'Subject ID', 'Dictionary', 'Dictionary Version number', 'Form OID',
+        'Logline', 'Field OID', 'Coding Status', 'Require Coding'
+    ],
+    'Inactivated_Forms': [
+        'Project Name', 'Country', 'Site ID', 'Subject ID', 'Visit Name', 'Form Name',
+        'Data on Form/Record', 'Record Position', 'Audit Action'
+    ],
+    'Missing_Lab': [
+        'Project Name', 'Country', 'Site ID', 'Subject ID', 'Visit Name', 'Form Name', 'Lab category',
+        'Lab Date', 'Test Name', 'Test description', 'Issue'
+    ],
+    'All Pages Missing': [
+        'Project Name', 'Country', 'Site ID', 'Subject ID', 'Subject Status', 'Visit Name',
+        'Visit Date', 'Form Name', 'Form Type', 'Days Missing'
+    ],
+}
+
+# Renames the extractors apply after COLUMN_MAPPING
+COLUMN_RENAMES = {
+    'Compiled_EDRR': {'Total Open issue Count per subject': 'Total Open Issue Count'},
+    'Inactivated_Forms': {
+        'Folder': 'Visit Name',
+        'Form': 'Form Name',
+        'Data on Form/Record': 'Data on Form/Record',
+        'RecordPosition': 'Record Position'
+    },
+    'Missing_Lab': {
+        'Site number': 'Site ID',
+        'Visit': 'Visit Name'
+    },
+    'Visit_Projection_Tracker': {
+        'Visit': 'Visit Name',
+        '# Days Outstanding': 'Days Outstanding',
+        "# Days Outstanding (TODAY - PROJECTEDDATE)": 'Days Outstanding',
+        "# Days Outstanding (TODAY - PROJECTED\nDATE)": 'Days Outstanding'
+    },
+}
+
+# Columns (standardized names) without which filling or insertion fails; a tuple is a set of
+# alternatives. Project Name is added when absent, and the Site ID of the eSAE, Inactivated Forms
+# and Missing Lab sheets is looked up from Subject Level Metrics.
+REQUIRED_COLUMNS = {
+    'Query Report - Cumulative': ['Site ID', 'Subject ID', ('Form Name', 'Log #')],
+    'Non conformant': ['Site ID', 'Subject ID', ('Form Name', 'Log #')],
+    'PI Signature Report': ['Site ID', 'Subject ID'],
+    'SDV': ['Site ID', 'Subject ID'],
+    'Protocol Deviation': ['Site ID', 'Subject ID'],
+    'CRF Freeze': ['Site ID', 'Subject ID'],
+    'CRF UnFreeze': ['Site ID', 'Subject ID'],
+    'CRF Locked': ['Site ID', 'Subject ID'],
+    'CRF UnLocked': ['Site ID', 'Subject ID'],
+    'SV': ['Site ID', 'Subject ID', 'Visit Name', 'Visit Date'],
+    'Compiled_EDRR': ['Subject ID', 'Total Open Issue Count'],
+    'SAE Dashboard_DM': ['Subject ID'],
+    'SAE Dashboard_Safety': ['Subject ID'],
+    'GlobalCoding_MedDRA': ['Subject ID', 'Coding Status', 'Require Coding'],
+    'GlobalCoding_WHODD': ['Subject ID', 'Coding Status', 'Require Coding'],
+    'Inactivated_Forms': ['Subject ID'],
+    'Missing_Lab': ['Subject ID'],
+    'All Pages Missing': ['Site ID', 'Subject ID'],
+    'Visit_Projection_Tracker': ['Site ID', 'Subject ID'],
+}
+
+# Columns of the Subject Level Metrics sheet, which is read by position
+SUBJECT_LEVEL_METRICS_COLUMNS = [
+    'Project Name', 'Region', 'Country', 'Site ID', 'Subject ID', 
+    'Latest Visit (SV)', 'Subject Status', 'Missing Visits', 'Missing Page', 
+    'Coded terms', 'Uncoded Terms', 'Open issues in LNR', 
+    'Open Issues reported for 3rd party reconciliation in EDRR', 
+    'Inactivated forms and folders', 'eSAE dashboard review for DM', 
+    'eSAE dashboard review for safety', 'Expected Visits', 'Pages Entered', 
+    'Pages with Non-Conformant data', 'Total CRFs with queries & Non-Conformant data', 
+    'Total CRFs without queries & Non-Conformant data', 'Percentage Clean Entered CRF', 
+    'DM Queries', 'Clinical Queries', 'Medical Queries', 'Site Queries', 
+    'Field Monitor Queries', 'Coding Queries', 'Safety Queries', 'Total Queries', 
+    'CRFs Require Verification (SDV)', 'Forms Verified', 'CRFs Frozen', 
+    'CRFs Not Frozen', 'CRFs Locked', 'CRFs Unlocked', 'PDs Confirmed', 
+    'PDs Proposed', 'CRFs Signed', 
+    'CRFs overdue for signs within 45 days of Data entry', 
+    'CRFs overdue for signs between 45 to 90 days of Data entry', 
+    'CRFs overdue for signs beyond 90 days of Data entry', 
+    'Broken Signatures', 'CRFs Never Signed'
+]
+
+# Workbooks opened by the extraction batch running in this thread, see extract_sheet_batch
+_open_workbooks = threading.local()
+
+def open_workbook(file_path):
+    """The workbook as parsed by this thread's extraction batch, or the path for read_excel to open"""
+    return getattr(_open_workbooks, 'books', {}).get(file_path, file_path)
+
 @lru_cache(maxsize=1)
 def get_column_mapping():
     """Cache the column mapping dictionary"""
@@ -95,56 +326,101 @@ def convert_to_date_batch(df, column_names):
     """Convert multiple datetime columns to date only in one pass"""
     for col in column_names:
         if col in df.columns:
-            df[col] = pd.to_datetime(
+            parsed = pd.to_datetime(
                 df[col], 
                 format='%d-%b-%y',  # This matches '28-Mar-25'
                 errors='coerce'
-            ).dt.date
-            # Fallback to default parsing for any remaining NaT values
-            df[col] = pd.to_datetime(
-                df[col], 
+            )
+            # Fallback to flexible parsing of the original values that did not match
+            # (e.g. '29 Sep 2025', '12 JUN 2024' or datetime cells)
+            fallback = pd.to_datetime(
+                df[col].where(parsed.isna()), 
+                format='mixed',
                 errors='coerce'
-            ).dt.date
+            )
+            df[col] = parsed.fillna(fallback).dt.date
     return df
 
-def standardize_columns(df, mapping=None):
-    """Standardize column names across dataframes - optimized"""
+def standardize_columns(df, mapping=None, dataframe_name=None):
+    """Standardize column names across dataframes - optimized (resolving unknown headers of dataframe_name first)"""
+    if dataframe_name is not None:
+        df.columns = resolve_columns(dataframe_name, df.columns)
     if mapping is None:
         mapping = get_column_mapping()
     df.columns = [mapping.get(col, col) for col in df.columns]
     return df
 
+def standard_column_name(dataframe_name, column):
+    """Name a raw sheet header gets in a dataframe, standardized and renamed as its extractor does"""
+    if dataframe_name == 'All Pages Missing':
+        column = str(column).strip()
+        return MISSING_PAGES_COLUMN_MAPPING.get(column, column)
+    column = get_column_mapping().get(column, column)
+    return COLUMN_RENAMES.get(dataframe_name, {}).get(column, column)
+
+@lru_cache(maxsize=None)
+def header_aliases(dataframe_name):
+    """
+    Headers the column mappings turn into a column the dataframe uses (consumed, required or
+    renamed to): {header: standardized name}
+    """
+    targets = set(CONSUMED_COLUMNS.get(dataframe_name, [])) | set(COLUMN_RENAMES.get(dataframe_name, {}).values())
+    for required in REQUIRED_COLUMNS.get(dataframe_name, []):
+        targets.update(required if isinstance(required, tuple) else (required,))
+    headers = [*COLUMN_MAPPING, *COLUMN_RENAMES.get(dataframe_name, {}), *sorted(targets)]
+    if dataframe_name == 'All Pages Missing':
+        headers += list(MISSING_PAGES_COLUMN_MAPPING)
+    aliases = {}
+    for header in headers:
+        name = standard_column_name(dataframe_name, header)
+        if name in targets:
+            aliases.setdefault(header, name)
+    return aliases
+
+def resolve_columns(dataframe_name, headers):
+    """
+    Headers of a sheet read into a dataframe, with those the column mappings do not know replaced
+    by the known header they match (column_resolver.resolve_headers) when RESOLVE_COLUMNS is on
+    """
+    if not RESOLVE_COLUMNS:
+        return list(headers)
+    return resolve_headers(dataframe_name, headers, header_aliases(dataframe_name))
+
+def consumed_columns(dataframe_name, source, sheet_name=0):
+    """
+    usecols callable for read_excel keeping the raw headers whose standardized name is in
+    CONSUMED_COLUMNS, so the other columns are never parsed. With RESOLVE_COLUMNS the header
+    row of the sheet in source (a path or open workbook) is resolved as one tuple, as the
+    extractor resolves it after reading. None (read every column) when PRUNE_COLUMNS is off.
+    """
+    if not PRUNE_COLUMNS:
+        return None
+    consumed = set(CONSUMED_COLUMNS[dataframe_name])
+    if not RESOLVE_COLUMNS:
+        return lambda column: standard_column_name(dataframe_name, column) in consumed
+    headers = list(pd.read_excel(source, sheet_name=sheet_name, header=0, nrows=0).columns)
+    kept = {
+        header for header, resolved in zip(headers, resolve_columns(dataframe_name, headers))
+        if standard_column_name(dataframe_name, resolved) in consumed
+    }
+    return lambda column: column in kept
+
+@instrument
 def extract_cpid_edc_metrics(project_name):
     """Extract CPID_EDC_Metrics.xlsx - Subject Level Metrics sheet"""
     base_dir = get_base_dir(project_name)
     file_path = os.path.join(base_dir, "CPID_EDC_Metrics.xlsx")
     
-    # Read the first sheet (Subject Level Metrics)
-    df = pd.read_excel(file_path, sheet_name=0, header=None, index_col=False)
+    # Read the first sheet (Subject Level Metrics) from the row after its header block
+    header_end = find_header_row(file_path, 0, METRICS_HEADER_END, HEADER_SEARCH_ROWS)
+    data_start = METRICS_HEADER_ROWS if header_end is None else header_end + 1
+    df = pd.read_excel(open_workbook(file_path), sheet_name=0, header=None, index_col=False, skiprows=data_start)
     
-    # Remove header rows and footer
-    df = df[4:-1]
+    # Remove footer
+    df = df[:-1]
     
     # Set standardized column names
-    df.columns = [
-        'Project Name', 'Region', 'Country', 'Site ID', 'Subject ID', 
-        'Latest Visit (SV)', 'Subject Status', 'Missing Visits', 'Missing Page', 
-        'Coded terms', 'Uncoded Terms', 'Open issues in LNR', 
-        'Open Issues reported for 3rd party reconciliation in EDRR', 
-        'Inactivated forms and folders', 'eSAE dashboard review for DM', 
-        'eSAE dashboard review for safety', 'Expected Visits', 'Pages Entered', 
-        'Pages with Non-Conformant data', 'Total CRFs with queries & Non-Conformant data', 
-        'Total CRFs without queries & Non-Conformant data', 'Percentage Clean Entered CRF', 
-        'DM Queries', 'Clinical Queries', 'Medical Queries', 'Site Queries', 
-        'Field Monitor Queries', 'Coding Queries', 'Safety Queries', 'Total Queries', 
-        'CRFs Require Verification (SDV)', 'Forms Verified', 'CRFs Frozen', 
-        'CRFs Not Frozen', 'CRFs Locked', 'CRFs Unlocked', 'PDs Confirmed', 
-        'PDs Proposed', 'CRFs Signed', 
-        'CRFs overdue for signs within 45 days of Data entry', 
-        'CRFs overdue for signs between 45 to 90 days of Data entry', 
-        'CRFs overdue for signs beyond 90 days of Data entry', 
-        'Broken Signatures', 'CRFs Never Signed'
-    ]
+    df.columns = SUBJECT_LEVEL_METRICS_COLUMNS
     
     # Clean up 'Latest Visit (SV)' column to remove trailing numbers in parentheses
     if 'Latest Visit (SV)' in df.columns:
@@ -174,65 +450,184 @@ def extract_cpid_edc_metrics(project_name):
     
     return df
 
-def extract_cpid_other_sheets(project_name):
-    """Extract other sheets from CPID_EDC_Metrics.xlsx - optimized with parallel reading"""
-    base_dir = get_base_dir(project_name)
-    file_path = os.path.join(base_dir, "CPID_EDC_Metrics.xlsx")
+# Other sheets of CPID_EDC_Metrics.xlsx and their date columns
+CPID_SHEET_DATE_COLUMNS = {
+    'Query Report - Cumulative': ['Visit Date', 'Query Open Date', 'Query Response Date'],
+    'Non conformant': ['Visit Date'],
+    'PI Signature Report': ['Visit Date', 'Date page entered/ Date last PI Sign'],
+    'SDV': ['Visit Date'],
+    'Protocol Deviation': ['Visit Date'],
+    'CRF Freeze': ['Visit Date'],
+    'CRF UnFreeze': ['Visit Date'],
+    'CRF Locked': ['Visit Date'],
+    'CRF UnLocked': ['Visit Date'],
+    'SV': ['Visit Date']
+}
+
+def prepare_cpid_sheet(df, project_name, sheet_name):
+    """Standardize the columns, convert the dates and add the Project Name of a CPID sheet (or chunk of one)"""
+    df = standardize_columns(df, dataframe_name=sheet_name)
     
-    dataframes = {}
+    # Batch convert date columns
+    df = convert_to_date_batch(df, CPID_SHEET_DATE_COLUMNS[sheet_name])
     
-    # Sheet configurations with date columns to optimize
-    sheet_configs = {
-        'Query Report - Cumulative': ['Visit Date', 'Query Open Date', 'Query Response Date'],
-        'Non conformant': ['Visit Date'],
-        'PI Signature Report': ['Visit Date', 'Date page entered/ Date last PI Sign'],
-        'SDV': ['Visit Date'],
-        'Protocol Deviation': ['Visit Date'],
-        'CRF Freeze': ['Visit Date'],
-        'CRF UnFreeze': ['Visit Date'],
-        'CRF Locked': ['Visit Date'],
-        'CRF UnLocked': ['Visit Date'],
-        'SV': ['Visit Date']
-    }
+    # Add Project Name column if not present
+    if 'Project Name' not in df.columns:
+        df.insert(0, 'Project Name', project_name)
     
-    # Read all sheets in parallel
-    with ThreadPoolExecutor(max_workers=4) as executor:
-        future_to_sheet = {
-            executor.submit(pd.read_excel, file_path, sheet_name=sheet_name, header=0): 
-            (sheet_name, date_cols)
-            for sheet_name, date_cols in sheet_configs.items()
-        }
-        
-        for future in as_completed(future_to_sheet):
-            sheet_name, date_cols = future_to_sheet[future]
-            try:
-                df = future.result()
-                df = standardize_columns(df)
-                
-                # Batch convert date columns
-                df = convert_to_date_batch(df, date_cols)
-                
-                # Add Project Name column if not present
-                if 'Project Name' not in df.columns:
-                    df.insert(0, 'Project Name', project_name)
-                
-                dataframes[sheet_name] = df
-            except Exception as e:
-                print(f"Error reading {sheet_name}: {e}")
+    return df
+
+@instrument
+def extract_cpid_sheet(project_name, sheet_name):
+    """Extract one of the other sheets of CPID_EDC_Metrics.xlsx (a CPID_SHEET_DATE_COLUMNS key)"""
+    base_dir = get_base_dir(project_name)
+    file_path = os.path.join(base_dir, "CPID_EDC_Metrics.xlsx")
     
-    return dataframes
+    book = open_workbook(file_path)
+    df = pd.read_excel(book, sheet_name=sheet_name, header=0, usecols=consumed_columns(sheet_name, book, sheet_name))
+    return prepare_cpid_sheet(df, project_name, sheet_name)
+
+def convert_cell(cell):
+    """Value of a read-only openpyxl cell as read_excel parses it"""
+    if cell.value is None:
+        return ""
+    if cell.data_type == TYPE_ERROR:
+        return np.nan
+    if cell.data_type == TYPE_NUMERIC:
+        value = int(cell.value)
+        return value if value == cell.value else float(cell.value)
+    return cell.value
+
+def iter_sheet_chunks(file_path, sheet_name, chunk_rows, usecols=None):
+    """
+    DataFrames of up to chunk_rows rows of a sheet whose header is its first non-empty row,
+    parsed like read_excel(header=0, usecols=usecols) without loading the whole sheet.
+    Types are inferred per chunk; columns wider than the header are ignored. A sheet without
+    data rows yields one empty chunk with the columns.
+    """
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = workbook[sheet_name]
+        sheet.reset_dimensions()
+        header = None
+        rows = []
+        chunks = 0
+        for row in sheet.rows:
+            values = [convert_cell(cell) for cell in row]
+            while values and values[-1] == "":
+                values.pop()
+            if header is None:
+                header = values or None
+                continue
+            if not values:
+                continue
+            values = values[:len(header)]
+            rows.append(values + [""] * (len(header) - len(values)))
+            if len(rows) == chunk_rows:
+                yield TextParser([header] + rows, header=0, usecols=usecols).read()
+                rows = []
+                chunks += 1
+        if header is None:
+            raise ValueError(f"Worksheet '{sheet_name}' has no header row")
+        if rows or not chunks:
+            yield TextParser([header] + rows, header=0, usecols=usecols).read()
+    finally:
+        workbook.close()
+
+class StreamedSheet:
+    """
+    A sheet extracted chunk by chunk (stream_cpid_sheet) into a spool file instead of memory.
+    Stands in for its dataframe: len() is its row count and columns its columns, chunks()
+    reads the prepared chunks back one at a time, and subject_forms holds what the per-subject
+    counts need, the set of forms (form_column) each SUBJECT_KEY has rows for. The spool file is
+    removed with the sheet unless release() hands it over.
+    """
+    
+    def __init__(self, path, columns, rows, form_column, subject_forms):
+        self.path = path
+        self.columns = columns
+        self.rows = rows
+        self.form_column = form_column
+        self.subject_forms = subject_forms
+        self._finalizer = weakref.finalize(self, os.remove, path)
+    
+    def __len__(self):
+        return self.rows
+    
+    def chunks(self):
+        """The prepared chunks, in sheet order"""
+        with open(self.path, "rb") as f:
+            while True:
+                try:
+                    yield pickle.load(f)
+                except EOFError:
+                    return
+    
+    def copy(self):
+        # The spool is never modified, copies can share it
+        return self
+    
+    def release(self):
+        """Hand the spool file over to the caller, it is no longer removed with this sheet. Returns its path"""
+        if self._finalizer is not None:
+            self._finalizer.detach()
+            self._finalizer = None
+        return self.path
+    
+    def __getstate__(self):
+        # Sent back from an extraction worker process, the copy unpickled by the parent owns the
+        # spool. Other copies (the ingest queue's spilled cache) leave it to its current owner.
+        handoff = _extraction_process and self._finalizer is not None
+        if handoff:
+            self.release()
+        state = self.__dict__.copy()
+        state['_finalizer'] = handoff
+        return state
+    
+    def __setstate__(self, state):
+        owns_spool = state.pop('_finalizer')
+        self.__dict__.update(state)
+        self._finalizer = weakref.finalize(self, os.remove, self.path) if owns_spool else None
+
+@instrument
+def stream_cpid_sheet(project_name, sheet_name, chunk_rows=None):
+    """
+    Extract a sheet of CPID_EDC_Metrics.xlsx like extract_cpid_sheet, but chunk_rows (default:
+    STREAM_CHUNK_ROWS) rows at a time: each chunk is prepared, spooled to disk and folded into the
+    per-subject form sets, so memory holds one chunk instead of the sheet. Returns a StreamedSheet.
+    """
+    file_path = os.path.join(get_base_dir(project_name), "CPID_EDC_Metrics.xlsx")
+    fd, path = tempfile.mkstemp(prefix="extract-", suffix=".spool")
+    try:
+        rows, subject_forms = 0, {}
+        with os.fdopen(fd, "wb") as spool:
+            chunks = iter_sheet_chunks(file_path, sheet_name, chunk_rows or STREAM_CHUNK_ROWS,
+                                       usecols=consumed_columns(sheet_name, file_path, sheet_name))
+            for chunk in chunks:
+                chunk = prepare_cpid_sheet(chunk, project_name, sheet_name)
+                # Same form column as the per-subject counts of a whole dataframe
+                form_column = 'Form Name' if 'Form Name' in chunk.columns else 'Log #'
+                for key, forms in chunk.groupby(SUBJECT_KEY)[form_column]:
+                    subject_forms.setdefault(key, set()).update(forms.dropna().unique())
+                pickle.dump(chunk, spool, protocol=pickle.HIGHEST_PROTOCOL)
+                rows += len(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return StreamedSheet(path, list(chunk.columns), rows, form_column, subject_forms)
 
+@instrument
 def extract_compiled_edrr(project_name):
     """Extract Compiled_EDRR.xlsx"""
     base_dir = get_base_dir(project_name)
     file_path = os.path.join(base_dir, "Compiled_EDRR.xlsx")
     
-    df = pd.read_excel(file_path, sheet_name=0, header=0)
-    df = standardize_columns(df)
+    book = open_workbook(file_path)
+    df = pd.read_excel(book, sheet_name=0, header=0, usecols=consumed_columns('Compiled_EDRR', book))
+    df = standardize_columns(df, dataframe_name='Compiled_EDRR')
     
     # Rename specific columns
-    if 'Total Open issue Count per subject' in df.columns:
-        df = df.rename(columns={'Total Open issue Count per subject': 'Total Open Issue Count'})
+    df = df.rename(columns=COLUMN_RENAMES['Compiled_EDRR'])
     
     # Remove rows where 'Subject ID' is missing or NA
     if 'Subject ID' in df.columns:
@@ -244,45 +639,42 @@ def extract_compiled_edrr(project_name):
     
     return df
 
-def extract_esae_dashboard(project_name):
-    """Extract eSAE_Dashboard_Standard_DM_Safety_Report.xlsx"""
+@instrument
+def extract_esae_sheet(project_name, sheet_name):
+    """Extract one sheet (SAE Dashboard_DM or SAE Dashboard_Safety) of eSAE_Dashboard_Standard_DM_Safety_Report.xlsx"""
     base_dir = get_base_dir(project_name)
     file_path = os.path.join(base_dir, "eSAE_Dashboard_Standard_DM_Safety_Report.xlsx")
     
-    dataframes = {}
-    
-    # SAE Dashboard_DM sheet
-    df_dm = pd.read_excel(file_path, sheet_name='SAE Dashboard_DM', header=0)
-    df_dm = standardize_columns(df_dm)
+    book = open_workbook(file_path)
+    df = pd.read_excel(book, sheet_name=sheet_name, header=0, usecols=consumed_columns(sheet_name, book, sheet_name))
+    df = standardize_columns(df, dataframe_name=sheet_name)
     
     # Add Site ID column if not present (will be filled from subject metrics later)
-    if 'Site ID' not in df_dm.columns:
-        df_dm['Site ID'] = None
-    
-    dataframes['SAE Dashboard_DM'] = df_dm
+    if 'Site ID' not in df.columns:
+        df['Site ID'] = None
     
-    # SAE Dashboard_Safety sheet
-    df_safety = pd.read_excel(file_path, sheet_name='SAE Dashboard_Safety', header=0)
-    df_safety = standardize_columns(df_safety)
-    
-    # Add Site ID column if not present (will be filled from subject metrics later)
-    if 'Site ID' not in df_safety.columns:
-        df_safety['Site ID'] = None
-    
-    dataframes['SAE Dashboard_Safety'] = df_safety
-    
-    return dataframes
+    return df
+
+def extract_esae_dashboard(project_name):
+    """Extract eSAE_Dashboard_Standard_DM_Safety_Report.xlsx"""
+    return {
+        sheet_name: extract_esae_sheet(project_name, sheet_name)
+        for sheet_name in ('SAE Dashboard_DM', 'SAE Dashboard_Safety')
+    }
 
+@instrument
 def extract_global_coding_report(dictionary_type, project_name):
     """Extract GlobalCodingReport_MedDRA.xlsx or GlobalCodingReport_WHODD.xlsx"""
     base_dir = get_base_dir(project_name)
     file_name = f"GlobalCodingReport_{dictionary_type}.xlsx"
     file_path = os.path.join(base_dir, file_name)
     
-    df = pd.read_excel(file_path, sheet_name=0, header=0)
-    df = standardize_columns(df)
+    book = open_workbook(file_path)
+    df = pd.read_excel(book, sheet_name=0, header=0,
+                       usecols=consumed_columns(f"GlobalCoding_{dictionary_type}", book))
+    df = standardize_columns(df, dataframe_name=f"GlobalCoding_{dictionary_type}")
     
-    # Remove the first column if it's a report title
+    # Remove the first column if it's a report title (only read when pruning is off)
     if df.columns[0] in ['MedDRA Coding Report', 'WHODrug Coding Report']:
         df = df.iloc[:, 1:]
     
@@ -292,22 +684,18 @@ def extract_global_coding_report(dictionary_type, project_name):
     
     return df
 
+@instrument
 def extract_inactivated_forms(project_name):
     """Extract Inactivated_Forms_Folders_Records_Report.xlsx"""
     base_dir = get_base_dir(project_name)
     file_path = os.path.join(base_dir, "Inactivated_Forms_Folders_Records_Report.xlsx")
     
-    df = pd.read_excel(file_path, sheet_name=0, header=0)
-    df = standardize_columns(df)
+    book = open_workbook(file_path)
+    df = pd.read_excel(book, sheet_name=0, header=0, usecols=consumed_columns('Inactivated_Forms', book))
+    df = standardize_columns(df, dataframe_name='Inactivated_Forms')
     
     # Rename specific columns
-    column_renames = {
-        'Folder': 'Visit Name',
-        'Form': 'Form Name',
-        'Data on Form/Record': 'Data on Form/Record',
-        'RecordPosition': 'Record Position'
-    }
-    df = df.rename(columns=column_renames)
+    df = df.rename(columns=COLUMN_RENAMES['Inactivated_Forms'])
     
     # Remove rows where 'Subject ID' is missing, NA, or empty
     if 'Subject ID' in df.columns:
@@ -319,20 +707,18 @@ def extract_inactivated_forms(project_name):
     
     return df
 
+@instrument
 def extract_missing_lab(project_name):
     """Extract Missing_Lab_Name_and_Missing_Ranges.xlsx"""
     base_dir = get_base_dir(project_name)
     file_path = os.path.join(base_dir, "Missing_Lab_Name_and_Missing_Ranges.xlsx")
     
-    df = pd.read_excel(file_path, sheet_name=0, header=0)
-    df = standardize_columns(df)
+    book = open_workbook(file_path)
+    df = pd.read_excel(book, sheet_name=0, header=0, usecols=consumed_columns('Missing_Lab', book))
+    df = standardize_columns(df, dataframe_name='Missing_Lab')
     
     # Rename specific columns
-    column_renames = {
-        'Site number': 'Site ID',
-        'Visit': 'Visit Name'
-    }
-    df = df.rename(columns=column_renames)
+    df = df.rename(columns=COLUMN_RENAMES['Missing_Lab'])
     
     # Convert Lab Date to date only
     df = convert_to_date(df, 'Lab Date')
@@ -343,6 +729,7 @@ def extract_missing_lab(project_name):
     
     return df
 
+@instrument
 def extract_missing_pages(project_name):
     """Extract Missing_Pages_Report.xlsx - only first sheet (All Pages Missing)"""
     base_dir = get_base_dir(project_name)
@@ -350,56 +737,17 @@ def extract_missing_pages(project_name):
 
     # Helper: Standardize columns for all studies
     def _standardize_missing_pages_columns(df):
-        # Mapping for all possible column names to standard names
-        col_map = {
-            # Study/Project
-            'Study': 'Project Name',
-            'Study Name': 'Project Name',
-            # Country/Site
-            'Country': 'Country',
-            'SiteGroupName(CountryName)': 'Country',
-            'Site Number': 'Site ID',
-            'SiteNumber': 'Site ID',
-            # Subject
-            'Subject Name': 'Subject ID',
-            'SubjectName': 'Subject ID',
-            'Subject': 'Subject ID',
-            # Visit/Folder
-            'Visit': 'Visit Name',
-            'Visit Name': 'Visit Name',
-            'Folder Name': 'Visit Name',
-            'FolderName': 'Visit Name',
-            # Page/Form
-            'Page Name': 'Form Name',
-            'FormName': 'Form Name',
-            'Form': 'Form Name',
-            # Visit Date
-            'Visit date': 'Visit Date',
-            'Visit Date': 'Visit Date',
-            # Status
-            'Subject Status': 'Subject Status',
-            'Overall Subject Status': 'Subject Status',
-            'Visit Level Subject Status': 'Visit Level Subject Status',
-            # Form Details -> Form Type
-            'Form Details': 'Form Type',
-            # Form Type
-            'Form Type (Summary or Visit)': 'Form Type',
-            # Days missing
-            '# of Days Missing': 'Days Missing',
-            'No. #Days Page Missing': 'Days Missing',
-            '#Days Page Missing': 'Days Missing',
-            'No. #Days Page Missing ': 'Days Missing',
-            # Screening Visit Date
-            'Screening Visit Date': 'Screening Visit Date'
-        }
+        df.columns = resolve_columns('All Pages Missing', df.columns)
         # Remove leading/trailing spaces in column names
         df.columns = [c.strip() for c in df.columns]
         # Map columns
-        df = df.rename(columns=lambda c: col_map.get(c, c))
+        df = df.rename(columns=lambda c: MISSING_PAGES_COLUMN_MAPPING.get(c, c))
         return df
 
     # Read only the first sheet
-    df = pd.read_excel(file_path, sheet_name=0, header=0)
+    book = open_workbook(file_path)
+    df = pd.read_excel(book, sheet_name=0, header=0,
+                       usecols=consumed_columns('All Pages Missing', book))
     # Drop 'Form 1 Subject Status' column if present
     if 'Form 1 Subject Status' in df.columns:
         df = df.drop(columns=['Form 1 Subject Status'])
@@ -414,41 +762,29 @@ def extract_missing_pages(project_name):
     
     return {'All Pages Missing': df}
 
+@instrument
 def extract_visit_projection(project_name):
     """Extract Visit_Projection_Tracker.xlsx"""
     base_dir = get_base_dir(project_name)
     file_path = os.path.join(base_dir, "Visit_Projection_Tracker.xlsx")
     
-    # Read the sheet without assuming header to handle variable header rows
-    df = pd.read_excel(file_path, sheet_name='Missing Visits', header=None)
-    df = df.dropna()
-    
-    # Find the row index where 'Country' appears in the first column
-    header_row: int | None = None
-    for i in range(len(df)):
-        if df.iloc[i, 0] == 'Country':
-            header_row = i
-            break
+    # The header row varies ('Country' in the first column), locate it from the first rows only
+    header_row = find_header_row(file_path, 'Missing Visits', VISIT_PROJECTION_HEADER, HEADER_SEARCH_ROWS)
     
+    book = open_workbook(file_path)
     if header_row is not None:
-        # Set the header and drop the rows before it
-        df.columns = df.iloc[header_row]
-        df = df.iloc[header_row + 1:].reset_index(drop=True)
+        # Parse once from the header row, keeping only complete rows
+        df = pd.read_excel(book, sheet_name='Missing Visits', header=0, skiprows=header_row)
+        df = df.dropna().reset_index(drop=True)
     else:
         # Fallback: assume standard header if 'Country' not found
         print("Warning: 'Country' column not found in first column. Using default header row.")
-        df = pd.read_excel(file_path, sheet_name='Missing Visits', header=0)
+        df = pd.read_excel(book, sheet_name='Missing Visits', header=0)
     
-    df = standardize_columns(df)
+    df = standardize_columns(df, dataframe_name='Visit_Projection_Tracker')
     
     # Rename specific columns
-    column_renames = {
-        'Visit': 'Visit Name',
-        '# Days Outstanding': 'Days Outstanding',
-        "# Days Outstanding (TODAY - PROJECTEDDATE)": 'Days Outstanding',
-        "# Days Outstanding (TODAY - PROJECTED\nDATE)": 'Days Outstanding'
-    }
-    df = df.rename(columns=column_renames)
+    df = df.rename(columns=COLUMN_RENAMES['Visit_Projection_Tracker'])
     
     # Convert Projected Date to date only
     df = convert_to_date(df, 'Projected Date')
@@ -463,61 +799,230 @@ def extract_visit_projection(project_name):
 
     return df
 
-def extract_all_data_parallel(project_name="Study 1"):
-    """Main function to extract all data with parallel processing"""
-    all_dataframes = {}
-    base_dir = get_base_dir(project_name)
-    
-    # Define extraction tasks
-    extraction_tasks = {
-        'Subject_Level_Metrics': lambda: extract_cpid_edc_metrics(project_name),
-        'Compiled_EDRR': lambda: extract_compiled_edrr(project_name),
-        'GlobalCoding_MedDRA': lambda: extract_global_coding_report('MedDRA', project_name),
-        'GlobalCoding_WHODD': lambda: extract_global_coding_report('WHODD', project_name),
-        'Inactivated_Forms': lambda: extract_inactivated_forms(project_name),
-        'Missing_Lab': lambda: extract_missing_lab(project_name),
-        'Visit_Projection_Tracker': lambda: extract_visit_projection(project_name),
-    }
+# Dataframes read from each workbook of a study folder
+WORKBOOK_DATAFRAMES = {
+    'CPID_EDC_Metrics.xlsx': (
+        'Subject_Level_Metrics', 'Query Report - Cumulative', 'Non conformant', 'PI Signature Report',
+        'SDV', 'Protocol Deviation', 'CRF Freeze', 'CRF UnFreeze', 'CRF Locked', 'CRF UnLocked', 'SV'
+    ),
+    'Compiled_EDRR.xlsx': ('Compiled_EDRR',),
+    'eSAE_Dashboard_Standard_DM_Safety_Report.xlsx': ('SAE Dashboard_DM', 'SAE Dashboard_Safety'),
+    'GlobalCodingReport_MedDRA.xlsx': ('GlobalCoding_MedDRA',),
+    'GlobalCodingReport_WHODD.xlsx': ('GlobalCoding_WHODD',),
+    'Inactivated_Forms_Folders_Records_Report.xlsx': ('Inactivated_Forms',),
+    'Missing_Lab_Name_and_Missing_Ranges.xlsx': ('Missing_Lab',),
+    'Missing_Pages_Report.xlsx': ('All Pages Missing',),
+    'Visit_Projection_Tracker.xlsx': ('Visit_Projection_Tracker',),
+}
+
+# Dataframes whose missing Site IDs are looked up from Subject Level Metrics
+SITE_ID_DATAFRAMES = ['Inactivated_Forms', 'Missing_Lab']
+
+# Set in the extraction pool's worker processes, whose StreamedSheets hand their spool to the parent
+_extraction_process = False
+
+def _mark_extraction_process():
+    global _extraction_process
+    _extraction_process = True
+
+class ExtractionPool:
+    """
+    Bounded pool of workers shared by every study extracted in this process. Pending tasks
+    (see extract_sheet_batch) wait in a heap and the most expensive one starts first, whichever
+    study it belongs to, so a study's largest workbook starts right away instead of queueing
+    behind small ones. With processes each worker thread hands its task to a process pool of
+    the same size.
+    """
     
-    # Execute extractions in parallel
-    with ThreadPoolExecutor(max_workers=4) as executor:
-        future_to_name = {
-            executor.submit(task): name 
-            for name, task in extraction_tasks.items()
-        }
-        
-        for future in as_completed(future_to_name):
-            name = future_to_name[future]
+    def __init__(self, workers, processes=False):
+        self.workers = workers
+        self._processes = ProcessPoolExecutor(max_workers=workers, initializer=_mark_extraction_process) if processes else None
+        self._pending = []
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        self._threads = []
+    
+    def submit(self, cost, fn, *args):
+        """Queue fn(*args) with its estimated cost, returning a Future"""
+        future = Future()
+        if self._processes is None:
+            # The pool's threads outlive the profile() block of the study that started them
+            fn = profiled_task(fn)
+        with self._condition:
+            # Ties (and unknown costs) run in submission order
+            heapq.heappush(self._pending, (-cost, next(self._order), future, fn, args))
+            if len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, name=f"extract-{len(self._threads)}", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+            self._condition.notify()
+        return future
+    
+    def _work(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                _, _, future, fn, args = heapq.heappop(self._pending)
+            if not future.set_running_or_notify_cancel():
+                continue
             try:
-                result = future.result()
-                if isinstance(result, dict):
-                    all_dataframes.update(result)
+                if self._processes is not None:
+                    future.set_result(self._processes.submit(fn, *args).result())
                 else:
-                    all_dataframes[name] = result
-            except Exception as e:
-                print(f"Error extracting {name}: {e}")
-    
-    # Extract sheets that depend on each other sequentially
+                    future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+def extract_sheet_batch(file_path, tasks):
+    """
+    Run sheet tasks [(dataframe name, function, args)] of one workbook with the workbook parsed
+    once (workbook XML, shared strings and styles) instead of once per sheet. Returns
+    [(dataframe name, result, error)], one failed sheet not stopping the others.
+    """
     try:
-        cpid_sheets = extract_cpid_other_sheets(project_name)
-        all_dataframes.update(cpid_sheets)
+        book = pd.ExcelFile(file_path)
     except Exception as e:
-        print(f"Error extracting CPID sheets: {e}")
+        # Missing or unreadable workbook: every sheet fails with the same error
+        return [(name, None, e) for name, _, _ in tasks]
     
+    books = _open_workbooks.__dict__.setdefault('books', {})
+    books[file_path] = book
+    results = []
     try:
-        esae_sheets = extract_esae_dashboard(project_name)
-        all_dataframes.update(esae_sheets)
-    except Exception as e:
-        print(f"Error extracting eSAE sheets: {e}")
+        for name, fn, args in tasks:
+            try:
+                results.append((name, fn(*args), None))
+            except Exception as e:
+                results.append((name, None, e))
+    finally:
+        books.pop(file_path, None)
+        book.close()
+    return results
+
+def batch_tasks(tasks, costs, batches_per_workbook):
+    """
+    Group a study's sheet tasks by workbook into up to batches_per_workbook batches each,
+    spreading the sheets so the batches cost about the same (largest sheet first onto the
+    cheapest batch). Returns [(cost, workbook, [(dataframe name, function, args)])].
+    """
+    by_workbook = {}
+    for (name, workbook, _, fn, args), cost in zip(tasks, costs):
+        by_workbook.setdefault(workbook, []).append((cost, name, fn, args))
+    
+    batches = []
+    for workbook, sheets in by_workbook.items():
+        workbook_batches = [[0, workbook, []] for _ in range(min(batches_per_workbook, len(sheets)))]
+        for cost, name, fn, args in sorted(sheets, key=lambda sheet: -sheet[0]):
+            batch = min(workbook_batches, key=lambda b: b[0])
+            batch[0] += cost
+            batch[2].append((name, fn, args))
+        batches.extend(tuple(batch) for batch in workbook_batches)
+    return batches
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_extraction_pool():
+    """The process-wide ExtractionPool, created on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ExtractionPool(EXTRACT_POOL_WORKERS, processes=EXTRACT_POOL_PROCESSES)
+        return _pool
+
+def extraction_tasks(project_name, workbooks=None):
+    """
+    One task per sheet read from the given workbooks (default: all) of a study:
+    (dataframe name, workbook, sheet name or 0 for the first sheet, function, args)
+    """
+    tasks = []
+    for workbook in workbooks or WORKBOOK_DATAFRAMES:
+        if workbook == 'CPID_EDC_Metrics.xlsx':
+            tasks.append(('Subject_Level_Metrics', workbook, 0, extract_cpid_edc_metrics, (project_name,)))
+            tasks.extend((sheet_name, workbook, sheet_name,
+                          stream_cpid_sheet if STREAM_CHUNK_ROWS and sheet_name in STREAMED_SHEETS else extract_cpid_sheet,
+                          (project_name, sheet_name))
+                         for sheet_name in CPID_SHEET_DATE_COLUMNS)
+        elif workbook == 'Compiled_EDRR.xlsx':
+            tasks.append(('Compiled_EDRR', workbook, 0, extract_compiled_edrr, (project_name,)))
+        elif workbook == 'eSAE_Dashboard_Standard_DM_Safety_Report.xlsx':
+            tasks.extend((sheet_name, workbook, sheet_name, extract_esae_sheet, (project_name, sheet_name))
+                         for sheet_name in ('SAE Dashboard_DM', 'SAE Dashboard_Safety'))
+        elif workbook == 'GlobalCodingReport_MedDRA.xlsx':
+            tasks.append(('GlobalCoding_MedDRA', workbook, 0, extract_global_coding_report, ('MedDRA', project_name)))
+        elif workbook == 'GlobalCodingReport_WHODD.xlsx':
+            tasks.append(('GlobalCoding_WHODD', workbook, 0, extract_global_coding_report, ('WHODD', project_name)))
+        elif workbook == 'Inactivated_Forms_Folders_Records_Report.xlsx':
+            tasks.append(('Inactivated_Forms', workbook, 0, extract_inactivated_forms, (project_name,)))
+        elif workbook == 'Missing_Lab_Name_and_Missing_Ranges.xlsx':
+            tasks.append(('Missing_Lab', workbook, 0, extract_missing_lab, (project_name,)))
+        elif workbook == 'Missing_Pages_Report.xlsx':
+            tasks.append(('All Pages Missing', workbook, 0, extract_missing_pages, (project_name,)))
+        elif workbook == 'Visit_Projection_Tracker.xlsx':
+            tasks.append(('Visit_Projection_Tracker', workbook, 'Missing Visits', extract_visit_projection, (project_name,)))
+        else:
+            raise ValueError(f"Unknown workbook '{workbook}', expected one of {list(WORKBOOK_DATAFRAMES)}")
+    return tasks
+
+def estimate_task_costs(project_name, tasks):
+    """Estimated cost (cells, from the sheet dimension records) of each task; 0 when unknown"""
+    costs = {}
+    for workbook in dict.fromkeys(task[1] for task in tasks):
+        try:
+            costs[workbook] = sheet_costs(os.path.join(get_base_dir(project_name), workbook))
+        except Exception:
+            # Missing or unreadable workbooks fail in their own task
+            costs[workbook] = []
+    
+    estimates = []
+    for _, workbook, sheet, _, _ in tasks:
+        sheets = costs[workbook]
+        if sheet == 0:
+            estimates.append(sheets[0][1] if sheets else 0)
+        else:
+            estimates.append(dict(sheets).get(sheet, 0))
+    return estimates
+
+def extract_workbooks(project_name, workbooks=None, raise_errors=False):
+    """
+    Extract the dataframes of the given workbooks (default: all) of a study, without Site ID
+    population. Each workbook is parsed once per task on the shared ExtractionPool, largest
+    first: one task per workbook with threads (which share one interpreter lock), its sheets
+    split over up to EXTRACT_POOL_WORKERS tasks with processes. Failed sheets are reported and
+    left out, or with raise_errors the first failure is raised once the other sheets have finished.
+    """
+    tasks = extraction_tasks(project_name, workbooks)
+    pool = get_extraction_pool()
+    batches = batch_tasks(tasks, estimate_task_costs(project_name, tasks),
+                          pool.workers if EXTRACT_POOL_PROCESSES else 1)
+    base_dir = get_base_dir(project_name)
+    futures = [
+        pool.submit(cost, extract_sheet_batch, os.path.join(base_dir, workbook), batch)
+        for cost, workbook, batch in batches
+    ]
     
-    try:
-        missing_pages_sheets = extract_missing_pages(project_name)
-        all_dataframes.update(missing_pages_sheets)
-    except Exception as e:
-        print(f"Error extracting missing pages: {e}")
+    dataframes = {}
+    errors = []
+    for future in as_completed(futures):
+        for name, result, error in future.result():
+            if error is not None:
+                errors.append(error)
+                print(f"Error extracting {name}: {error}")
+            elif isinstance(result, dict):
+                dataframes.update(result)
+            else:
+                dataframes[name] = result
     
-    return all_dataframes
+    if errors and raise_errors:
+        raise errors[0]
+    return dataframes
 
+def extract_all_data_parallel(project_name="Study 1"):
+    """Main function to extract all data with parallel processing (sheets on the shared pool, largest first)"""
+    return extract_workbooks(project_name)
+
+@instrument
 def populate_site_id_in_dataframes(all_dataframes):
     """
     Populate missing Site IDs in various dataframes using Subject Level Metrics as reference
@@ -533,14 +1038,9 @@ def populate_site_id_in_dataframes(all_dataframes):
     # Create lookup dictionary: (Project Name, Subject ID) -> Site ID
     site_lookup = subject_metrics.set_index(['Project Name', 'Subject ID'])['Site ID'].to_dict()
     
-    # List of dataframes that require Site ID based on database schema
+    # Only the dataframes that require Site ID based on database schema (SITE_ID_DATAFRAMES)
     # Excluded: GlobalCoding_MedDRA, GlobalCoding_WHODD, Compiled_EDRR (no site_id in their tables)
-    dataframes_to_check = [
-        'Inactivated_Forms',
-        'Missing_Lab'
-    ]
-    
-    for df_name in dataframes_to_check:
+    for df_name in SITE_ID_DATAFRAMES:
         if df_name not in all_dataframes:
             continue
         
@@ -578,13 +1078,63 @@ def populate_site_id_in_dataframes(all_dataframes):
     
     return all_dataframes
 
-def extract_all_data(project_name="Study 1"):
-    """Main function to extract all data - now uses parallel processing and populates Site IDs"""
+def is_string_column(series):
+    """Whether a column holds only strings (and missing values)"""
+    if pd.api.types.is_string_dtype(series.dtype) and series.dtype != object:
+        return True
+    if series.dtype != object:
+        return False
+    return series.dropna().map(type).eq(str).all()
+
+@instrument
+def compact_dataframes(all_dataframes):
+    """
+    Shrink a study's dataframes in place: low-cardinality string columns become categoricals
+    with one category dictionary per column name across all dataframes (so merges and
+    groupbys between them compare integer codes), and integer columns are downcast to the
+    smallest type that holds their values
+    """
+    # Pool each string column's values across the dataframes that have it
+    pooled = {}
+    frames = [df for df in all_dataframes.values() if isinstance(df, pd.DataFrame)]
+    for df in frames:
+        for column in df.columns:
+            if column in COMPACT_EXCLUDED_COLUMNS or isinstance(df[column].dtype, pd.CategoricalDtype):
+                continue
+            if pd.api.types.is_integer_dtype(df[column].dtype):
+                df[column] = pd.to_numeric(df[column], downcast='integer')
+            # None marks a column that is not text in every dataframe (e.g. numbers or dates in
+            # one sheet), which cannot share a dictionary and is left as it is
+            pooled.setdefault(column, []).append(df[column] if is_string_column(df[column]) else None)
+    
+    for column, series_list in pooled.items():
+        if any(series is None for series in series_list):
+            continue
+        rows = sum(len(series) for series in series_list)
+        values = pd.unique(pd.concat([series.dropna().astype(object) for series in series_list]))
+        if rows == 0 or len(values) > rows * COMPACT_MAX_CARDINALITY:
+            continue
+        dtype = pd.CategoricalDtype(sorted(values))
+        for df in frames:
+            if column in df.columns:
+                df[column] = df[column].astype(object).astype(dtype)
+    
+    return all_dataframes
+
+@instrument
+def extract_all_data(project_name="Study 1", compact=None):
+    """
+    Main function to extract all data - now uses parallel processing and populates Site IDs.
+    With compact (default: EXTRACT_COMPACT_DTYPES) the dataframes use compact dtypes.
+    """
     all_dataframes = extract_all_data_parallel(project_name)
     
     # Populate missing Site IDs after all data is extracted
     all_dataframes = populate_site_id_in_dataframes(all_dataframes)
     
+    if COMPACT_DTYPES if compact is None else compact:
+        all_dataframes = compact_dataframes(all_dataframes)
+    
     return all_dataframes
 
 if __name__ == "__main__":
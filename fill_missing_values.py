@@ -1,7 +1,10 @@
 import pandas as pd
 import numpy as np
 import os
+from instrumentation import instrument
+from extract_data import StreamedSheet
 
+@instrument
 def fill_latest_visit_and_status(subject_metrics, sv_data, missing_pages):
     """
     Fill Latest Visit (SV) from SV tab, only if missing
@@ -11,7 +14,7 @@ def fill_latest_visit_and_status(subject_metrics, sv_data, missing_pages):
     # Pre-process SV data: get latest visit for each subject in one operation
     sv_latest = (sv_data
                  .sort_values('Visit Date', ascending=False)
-                 .groupby(['Project Name', 'Site ID', 'Subject ID'], as_index=False)
+                 .groupby(['Project Name', 'Site ID', 'Subject ID'], as_index=False, observed=True)
                  .first()
                  [['Project Name', 'Site ID', 'Subject ID', 'Visit Name']])
     
@@ -33,13 +36,14 @@ def fill_latest_visit_and_status(subject_metrics, sv_data, missing_pages):
     
     return df
 
+@instrument
 def fill_missing_visits(subject_metrics, visit_projection):
     """Fill Missing Visits count - optimized with merge"""
     df = subject_metrics.copy()
     
     # Group and count missing visits per subject
     missing_visits_count = (visit_projection
-                           .groupby(['Project Name', 'Site ID', 'Subject ID'])
+                           .groupby(['Project Name', 'Site ID', 'Subject ID'], observed=True)
                            .size()
                            .reset_index(name='Missing Visits'))
     
@@ -60,13 +64,14 @@ def fill_missing_visits(subject_metrics, visit_projection):
     
     return df
 
+@instrument
 def fill_missing_pages(subject_metrics, missing_pages):
     """Fill Missing Page count - optimized with merge"""
     df = subject_metrics.copy()
     
     # Group and count missing pages per subject
     missing_pages_count = (missing_pages
-                          .groupby(['Project Name', 'Site ID', 'Subject ID'])
+                          .groupby(['Project Name', 'Site ID', 'Subject ID'], observed=True)
                           .size()
                           .reset_index(name='Missing Page'))
     
@@ -87,6 +92,7 @@ def fill_missing_pages(subject_metrics, missing_pages):
     
     return df
 
+@instrument
 def fill_coded_uncoded_terms(subject_metrics, global_meddra, global_whodd):
     """
     Fill Coded Terms and Uncoded Terms from GlobalCodingReport_MedDRA and GlobalCodingReport_WHODD
@@ -106,12 +112,12 @@ def fill_coded_uncoded_terms(subject_metrics, global_meddra, global_whodd):
     
     # Group by Project Name and Subject ID to get counts (no Site ID)
     coded_counts = (combined_coding[coded_mask]
-                    .groupby(['Project Name', 'Subject ID'])
+                    .groupby(['Project Name', 'Subject ID'], observed=True)
                     .size()
                     .reset_index(name='coded_count'))
     
     uncoded_counts = (combined_coding[uncoded_mask]
-                      .groupby(['Project Name', 'Subject ID'])
+                      .groupby(['Project Name', 'Subject ID'], observed=True)
                       .size()
                       .reset_index(name='uncoded_count'))
     
@@ -135,13 +141,14 @@ def fill_coded_uncoded_terms(subject_metrics, global_meddra, global_whodd):
     
     return df
 
+@instrument
 def fill_open_issues_lnr(subject_metrics, missing_lab):
     """Fill Open issues in LNR - optimized with merge"""
     df = subject_metrics.copy()
     
     # Count issues per subject
     issues_count = (missing_lab
-                   .groupby(['Project Name', 'Site ID', 'Subject ID'])
+                   .groupby(['Project Name', 'Site ID', 'Subject ID'], observed=True)
                    .size()
                    .reset_index(name='Open issues in LNR'))
     
@@ -162,6 +169,7 @@ def fill_open_issues_lnr(subject_metrics, missing_lab):
     
     return df
 
+@instrument
 def fill_open_issues_edrr(subject_metrics, compiled_edrr):
     """
     Fill Open Issues EDRR - optimized with merge
@@ -184,6 +192,7 @@ def fill_open_issues_edrr(subject_metrics, compiled_edrr):
     
     return df
 
+@instrument
 def fill_inactivated_forms(subject_metrics, inactivated_forms):
     """Fill Inactivated forms - optimized with merge"""
     df = subject_metrics.copy()
@@ -191,7 +200,7 @@ def fill_inactivated_forms(subject_metrics, inactivated_forms):
     # Count inactivated items per subject
     # Site ID should already be populated by extract_data.populate_site_id_in_dataframes()
     inactivated_count = (inactivated_forms
-                        .groupby(['Project Name', 'Site ID', 'Subject ID'])
+                        .groupby(['Project Name', 'Site ID', 'Subject ID'], observed=True)
                         .size()
                         .reset_index(name='Inactivated forms and folders'))
     
@@ -212,19 +221,20 @@ def fill_inactivated_forms(subject_metrics, inactivated_forms):
     
     return df
 
+@instrument
 def fill_esae_dashboard(subject_metrics, esae_dm, esae_safety):
     """Fill eSAE dashboard - optimized with merge"""
     df = subject_metrics.copy()
     
     # Count DM issues per subject
     dm_counts = (esae_dm
-                .groupby(['Project Name', 'Site ID', 'Subject ID'])
+                .groupby(['Project Name', 'Site ID', 'Subject ID'], observed=True)
                 .size()
                 .reset_index(name='eSAE dashboard review for DM'))
     
     # Count Safety issues per subject
     safety_counts = (esae_safety
-                    .groupby(['Project Name', 'Site ID', 'Subject ID'])
+                    .groupby(['Project Name', 'Site ID', 'Subject ID'], observed=True)
                     .size()
                     .reset_index(name='eSAE dashboard review for safety'))
     
@@ -252,25 +262,38 @@ def fill_esae_dashboard(subject_metrics, esae_dm, esae_safety):
     
     return df
 
+def query_report_forms(query_report):
+    """
+    Unique forms per subject of the Query Report ('qr_forms'). A streamed Query Report
+    (extract_data.StreamedSheet) brings them counted chunk by chunk during extraction.
+    """
+    if isinstance(query_report, StreamedSheet):
+        return pd.DataFrame(
+            [(*key, forms) for key, forms in query_report.subject_forms.items()],
+            columns=['Project Name', 'Site ID', 'Subject ID', 'qr_forms']
+        )
+    qr_form_col = 'Form Name' if 'Form Name' in query_report.columns else 'Log #'
+    return (query_report
+            .groupby(['Project Name', 'Site ID', 'Subject ID'], observed=True)[qr_form_col]
+            .apply(lambda x: set(x.dropna().unique()))
+            .reset_index(name='qr_forms'))
+
+@instrument
 def fill_crfs_with_queries_and_nonconformant(subject_metrics, non_conformant, query_report):
     """Fill Total CRFs with queries & Non-Conformant - optimized"""
     df = subject_metrics.copy()
     
     # Determine form column name
     nc_form_col = 'Form Name' if 'Form Name' in non_conformant.columns else 'Log #'
-    qr_form_col = 'Form Name' if 'Form Name' in query_report.columns else 'Log #'
     
     # Get unique forms per subject for NC
     nc_forms = (non_conformant
-               .groupby(['Project Name', 'Site ID', 'Subject ID'])[nc_form_col]
+               .groupby(['Project Name', 'Site ID', 'Subject ID'], observed=True)[nc_form_col]
                .apply(lambda x: set(x.dropna().unique()))
                .reset_index(name='nc_forms'))
     
     # Get unique forms per subject for Query Report
-    qr_forms = (query_report
-               .groupby(['Project Name', 'Site ID', 'Subject ID'])[qr_form_col]
-               .apply(lambda x: set(x.dropna().unique()))
-               .reset_index(name='qr_forms'))
+    qr_forms = query_report_forms(query_report)
     
     # Merge both
     df = df.merge(nc_forms, on=['Project Name', 'Site ID', 'Subject ID'], how='left')
@@ -288,25 +311,22 @@ def fill_crfs_with_queries_and_nonconformant(subject_metrics, non_conformant, qu
     
     return df
 
+@instrument
 def fill_crfs_without_queries(subject_metrics, non_conformant, query_report):
     """Fill Total CRFs without queries - optimized"""
     df = subject_metrics.copy()
     
     # Determine form column name
     nc_form_col = 'Form Name' if 'Form Name' in non_conformant.columns else 'Log #'
-    qr_form_col = 'Form Name' if 'Form Name' in query_report.columns else 'Log #'
     
     # Get unique forms per subject for NC
     nc_forms = (non_conformant
-               .groupby(['Project Name', 'Site ID', 'Subject ID'])[nc_form_col]
+               .groupby(['Project Name', 'Site ID', 'Subject ID'], observed=True)[nc_form_col]
                .apply(lambda x: set(x.dropna().unique()))
                .reset_index(name='nc_forms'))
     
     # Get unique forms per subject for Query Report
-    qr_forms = (query_report
-               .groupby(['Project Name', 'Site ID', 'Subject ID'])[qr_form_col]
-               .apply(lambda x: set(x.dropna().unique()))
-               .reset_index(name='qr_forms'))
+    qr_forms = query_report_forms(query_report)
     
     # Merge both
     df = df.merge(nc_forms, on=['Project Name', 'Site ID', 'Subject ID'], how='left')
@@ -324,13 +344,14 @@ def fill_crfs_without_queries(subject_metrics, non_conformant, query_report):
     
     return df
 
+@instrument
 def calculate_percentage_clean_crf(subject_metrics):
     """Calculate % Clean Entered CRF - vectorized"""
     df = subject_metrics.copy()
     
-    # Vectorized calculation
-    pages_entered = df['Pages Entered'].fillna(0)
-    pages_nc = df['Pages with Non-Conformant data'].fillna(0)
+    # Vectorized calculation (in float, compact mode stores the counts in small integer types)
+    pages_entered = df['Pages Entered'].fillna(0).astype(float)
+    pages_nc = df['Pages with Non-Conformant data'].fillna(0).astype(float)
     
     # Avoid division by zero
     df['Percentage Clean Entered CRF'] = np.where(
@@ -341,6 +362,7 @@ def calculate_percentage_clean_crf(subject_metrics):
     
     return df
 
+@instrument
 def populate_site_id_in_esae(subject_metrics, esae_dm, esae_safety):
     """
     Populate Site ID in eSAE Dashboard dataframes from Subject Level Metrics if missing
@@ -367,6 +389,7 @@ def populate_site_id_in_esae(subject_metrics, esae_dm, esae_safety):
     
     return esae_dm, esae_safety
 
+@instrument
 def fill_all_missing_data(dataframes):
     """
     Main function to orchestrate all filling operations
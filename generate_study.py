@@ -0,0 +1,568 @@
+import os
+import sys
+import time
+import math
+import random
+import argparse
+from datetime import datetime, timedelta
+from openpyxl import Workbook
+
+# Study folders are read from here by extract_data.get_base_dir()
+STUDY_FILES_DIR = os.path.join(os.getcwd(), "Study Files")
+
+# Excel's hard limit, including the header rows
+EXCEL_MAX_ROWS = 1048576
+
+# Row densities of the bundled Study 1 export (110 subjects over 30 sites); --scale multiplies
+# subjects and sites, so a 10x study keeps the same rows per subject. Visits are per subject
+# past screening, screen failures only have the screening visit
+DEFAULT_PROFILE = {
+    'subjects': 110,
+    'sites': 30,
+    'visits_per_subject': 10.5,
+    'pages_per_visit': 9,
+    'queries_per_subject': 5.2,
+    'signatures_per_subject': 10.6,
+    'coding_terms_per_subject': 28,
+    'inactivated_per_subject': 51,
+    'sae_per_subject': 11.6,
+    'missing_pages_per_subject': 1.8,
+    'lab_issues_per_subject': 1.2,
+    'missing_visits_per_subject': 0.15,
+    'nonconformant_per_subject': 0.12,
+    'deviations_per_subject': 0.15,
+    'freeze_per_subject': 0.04,
+    'edrr_subject_share': 0.25,
+    'clean_subject_share': 0.25,
+}
+
+REGIONS = {
+    'EMEA': ['ESP', 'FRA', 'DEU', 'AUT', 'GBR', 'ISR', 'CZE', 'BEL'],
+    'AMERICA': ['USA', 'CAN', 'BRA'],
+    'ASIA': ['CHN', 'SGP', 'KOR', 'JPN'],
+}
+
+VISIT_SCHEDULE = [
+    'Screening', 'W1D1', 'W1D3', 'W1D4', 'W2D7', 'W4D1', 'W5D7', 'W7D3', 'W8D3',
+    'W16D1', 'W19D1', 'W22D1', 'End of Treatment', 'Follow-up', 'Follow-up_Week 8',
+    'Follow-up_Week 48', 'Follow-up_Week 104',
+]
+EVENT_FOLDERS = ['Adverse Event', 'SAE/ADR', 'Unplanned Visit', 'Prior or Concomitant Medication']
+SUBJECT_STATUSES = [('Screen Failure', 0.4), ('On Trial', 0.4), ('Discontinued', 0.2)]
+
+# (Action Owner, Marking Group Name, Subject Level Metrics query column, weight)
+QUERY_OWNERS = [
+    ('Site Review', 'Site from Clinical Review', 'Site Queries', 0.66),
+    ('DM Review', 'Site from Data Manager', 'DM Queries', 0.14),
+    ('Clinical Review', 'Site from Clinical Review', 'Clinical Queries', 0.09),
+    ('Field Monitor Review', 'Site from Field Monitor', 'Field Monitor Queries', 0.05),
+    ('Medical Review', 'Site from Medical Review', 'Medical Queries', 0.02),
+    ('DM from System', 'DM from System', 'DM Queries', 0.02),
+    ('FM from System', 'FM from System', 'Field Monitor Queries', 0.02),
+]
+CODING_FORMS = {
+    'MedDRA': [('AEG002', 'AETERM', 0.67), ('MHG001', 'MHTERM', 0.26), ('PRG001', 'PRTRT', 0.07)],
+    'WHODD': [('CMG001', 'CMTRT', 0.93), ('CMO005_TR', 'CMTRT', 0.05), ('CMO006', 'CMTRT', 0.02)],
+}
+CODING_DICTIONARIES = {
+    'MedDRA': ('MedDRA Coding Report', 'MedDRA', 28.1),
+    'WHODD': ('WHODrug Coding Report', 'WHODrug-Global-B3', 202509),
+}
+INACTIVATION_ACTIONS = [
+    'Record Inactivated.',
+    'Record inactivated with code reason code Not Applicable.',
+    'Record inactivated with code reason code Not Done.',
+    'DataPage inactivated with code reason code Not Applicable.',
+    'DataPage inactivated with code reason code Not Done.',
+]
+LAB_TESTS = [
+    ('CHEMISTRY', 'ALB', 'Albumin'), ('CHEMISTRY', 'ALP', 'Alkaline\nphosphatase'),
+    ('CHEMISTRY', 'ALT', 'Alanine\naminotransferase'), ('CHEMISTRY', 'BUN', 'Blood urea nitrogen'),
+    ('HEMATOLOGY', 'HGB', 'Hemoglobin'), ('HEMATOLOGY', 'PLAT', 'Platelets'),
+    ('HEMATOLOGY', 'WBC', 'Leukocytes'), ('URINALYSIS', 'PH', 'pH'),
+]
+
+# CPID_EDC_Metrics.xlsx first sheet: four header rows, read positionally by extract_cpid_edc_metrics()
+CPID_METRIC_HEADER = [
+    ['Project Name', 'Region', 'Country', 'Site ID', 'Subject ID',
+     'Latest Visit (SV) (Source: Rave EDC: BO4)', 'Subject Status (Source: PRIMARY Form)', 'Input files']
+    + [None] * 8 + ['CPMD'] + [None] * 21 + ['SSM'] + [None] * 5,
+    [None] * 7 + ['Missing Visits', 'Missing Page', '# Coded terms', '# Uncoded Terms', '# Open issues in LNR',
+                  '# Open Issues reported for 3rd party reconciliation in EDRR', 'Inactivated forms and folders',
+                  '# eSAE dashboard review for DM', '# eSAE dashboard review for safety', 'Visit status',
+                  'Page status (Source: (Rave EDC : BO4))', None, None, None, None,
+                  'Queries status (Source:(Rave EDC : BO4))'] + [None] * 7
+    + ['Page Action Status (Source: (Rave EDC : BO4))'] + [None] * 5
+    + ['Protocol Deviations (Source:(Rave EDC : BO4))', None, 'PI Signatures (Source: (Rave EDC : BO4))'] + [None] * 5,
+    [None] * 16 + ['# Expected Visits (Rave EDC : BO4)', '# Pages Entered', '# Pages with Non-Conformant data',
+                   '# Total CRFs with queries & Non-Conformant data',
+                   '# Total CRFs without queries & Non-Conformant data', '% Clean Entered CRF', '# DM Queries',
+                   '# Clinical Queries', '# Medical Queries', '# Site Queries', '# Field Monitor Queries',
+                   '# Coding Queries', '# Safety Queries', '#Total Queries', '# CRFs Require Verification (SDV)',
+                   '# Forms Verified', '# CRFs Frozen', '# CRFs Not Frozen', '# CRFs Locked', '# CRFs Unlocked',
+                   '# PDs Confirmed', '# PDs Proposed', '# CRFs Signed',
+                   'CRFs overdue for signs within 45 days of Data entry',
+                   'CRFs overdue for signs between 45 to 90 days of Data entry',
+                   'CRFs overdue for signs beyond 90 days of Data entry', 'Broken Signatures', 'CRFs Never Signed'],
+    ['Responsible LF for action'] + [None] * 17 + ['Site/CRA', None, None, None, 'DM', 'CSE/CDD',
+                                                    'CDMD/Medical Lead', 'Site/CRA', 'CRA', 'Coder', 'Safety Team',
+                                                    None, 'CRA', None, None, 'DM', None, None, 'CD LF', None,
+                                                    'Investigator'] + [None] * 5,
+]
+
+QUERY_HEADER = [
+    'Study', 'Region', 'Country', 'Site Number', 'Subject Name', 'Folder Name', 'Form', 'Field OID', 'Log #',
+    'Visit Date', 'Query Status', 'Action Owner', 'Marking Group Name', 'Query Open Date',
+    'Query Response Date', '# Days Since Open', '# Days Since Response',
+]
+
+# Sheet name -> header row, per workbook, in the order of the real exports
+WORKBOOKS = {
+    'CPID_EDC_Metrics.xlsx': {
+        'Subject Level Metrics': None,
+        'Region_Country View': None,
+        'Query Report - Cumulative': QUERY_HEADER,
+        'Query Report - Site Action': QUERY_HEADER[:3] + ['Site ID'] + QUERY_HEADER[4:],
+        'Query Report - CRA Action': QUERY_HEADER[:3] + ['Site ID'] + QUERY_HEADER[4:6] + ['Form '] + QUERY_HEADER[7:],
+        'Non conformant': ['Study', 'Region', 'Country', 'Study Site', 'Subject Name', 'Folder Name', 'Page',
+                           'Log #', 'Field OID', 'Audit Time', 'Visit date'],
+        'PI Signature Report': ['Project Name', 'Region', 'Country', 'Site ID', 'Subject Name', 'Visit Name',
+                                'Data Page Name', 'Page Require Signature', 'Audit Action', 'Visit Date',
+                                'Date page entered/ Date last PI Sign', 'No. of days',
+                                'Pending since/ PI signed since'],
+        'SDV': ['Project Name', 'Region', 'Country', 'Site', 'Subject Name', 'Folder Name', 'Data Page Name',
+                'Visit Date', 'Verification Status'],
+        'Protocol Deviation': ['Study', 'Region', 'Country', 'Site ID', 'Subject Name', 'Folder Name',
+                               'Data Page Name', 'Log #', 'PD Status', 'Visit date'],
+        'CRF Freeze': ['Project Name', 'Region', 'Country', 'Site ID', 'Subject Name', 'Data Page Name', 'Freeze',
+                       'Visit date'],
+        'CRF UnFreeze': ['Project Name', 'Region', 'Country', 'Site ID', 'Subject Name', 'Data Page Name',
+                         'UnFreeze', 'Visit date'],
+        'CRF Locked': ['Project Name', 'Region', 'Country', 'Site ID', 'Subject Name', 'Data Page Name',
+                       'Lock and Unlock', 'Audit User', 'Visit date'],
+        'CRF UnLocked': ['Project Name', 'Region', 'Country', 'Site ID', 'Subject Name', 'Data Page Name',
+                         'Lock and Unlock', 'Audit User', 'Visit date'],
+        'SV': ['Project Name', 'Region', 'Country', 'Site ID', 'Subject Name', 'Folder Name', 'Visit date'],
+        'Reports info -reference': ['Report Name', 'Content'],
+    },
+    'Compiled_EDRR.xlsx': {
+        'OpenIssuesSummary': ['Study', 'Subject', 'Total Open issue Count per subject', '.'],
+    },
+    'GlobalCodingReport_MedDRA.xlsx': {
+        'GlobalCodingReport_MedDRA': ['MedDRA Coding Report', 'Study', 'Dictionary', 'Dictionary Version number',
+                                      'Subject', 'Form OID', 'Logline', 'Field OID', 'Coding Status',
+                                      'Require Coding'],
+    },
+    'GlobalCodingReport_WHODD.xlsx': {
+        'GlobalCodingReport_WHODD': ['WHODrug Coding Report', 'Study', 'Dictionary', 'Dictionary Version number',
+                                     'Subject', 'Form OID', 'Logline', 'Field OID', 'Coding Status',
+                                     'Require Coding'],
+    },
+    'Inactivated_Forms_Folders_Records_Report.xlsx': {
+        'Sheet1': ['Country', 'Study Site Number', 'Subject', 'Folder', 'Form ', 'Data on Form/\nRecord    ',
+                   'RecordPosition', 'Audit Action'],
+    },
+    'Missing_Lab_Name_and_Missing_Ranges.xlsx': {
+        'Missing_Lab_Name_and_Missing': ['Country', 'Site number', 'Subject', 'Visit', 'Form Name', 'Lab category',
+                                         'Lab Date', 'Test Name', 'Test description', 'Issue'],
+    },
+    'Missing_Pages_Report.xlsx': {
+        'All Pages Missing': ['Form Details', 'Country', 'Site Number', 'Subject Name', 'Visit Name', 'Page Name',
+                              'Visit date', 'Subject Status', '# of Days Missing'],
+        'Visit Level Pages Missing': ['Form Details', 'Country', 'Site Number', 'Subject Name', 'Visit Name',
+                                      'Page Name', 'Visit date', 'Subject Status', '# of Days Missing'],
+    },
+    'Visit_Projection_Tracker.xlsx': {
+        'Missing Visits': ['Country', 'Site', 'Subject', 'Visit', 'Projected Date', '# Days Outstanding'],
+    },
+    'eSAE_Dashboard_Standard_DM_Safety_Report.xlsx': {
+        'SAE Dashboard_DM': ['Discrepancy ID', 'Study ID', 'Country', 'Site', 'Patient ID', 'Form Name',
+                             'Discrepancy Created Timestamp in Dashboard', 'Review Status', 'Action Status',
+                             None, None],
+        'SAE Dashboard_Safety': ['Discrepancy ID', 'Study ID', 'Site', 'Patient ID', 'Case Status',
+                                 'Discrepancy Created Timestamp in Dashboard', 'Review Status', 'Action Status'],
+    },
+}
+
+REPORTS_INFO = [
+    ('Missing Visit', 'Details of Missing visits with days pending and Aging visualization'),
+    ('Missing Pages', 'Details of Missing Pages with days pending'),
+    ('Query Report', 'Cumulative query details with action owner and aging'),
+    ('SDV', 'Forms requiring source data verification'),
+]
+
+def count(rng, mean):
+    """Poisson-distributed count with the given mean (normal approximation above 30)"""
+    if mean <= 0:
+        return 0
+    if mean > 30:
+        return max(0, int(round(rng.gauss(mean, math.sqrt(mean)))))
+    limit = math.exp(-mean)
+    k = 0
+    p = rng.random()
+    while p > limit:
+        k += 1
+        p *= rng.random()
+    return k
+
+def weighted(rng, choices):
+    """Pick from (value, ..., weight) tuples, weight last"""
+    return rng.choices(choices, weights=[c[-1] for c in choices])[0]
+
+def open_workbooks(study_dir, preamble):
+    """Create every write-only workbook and sheet of a study, with preamble and header rows written"""
+    workbooks = {}
+    sheets = {}
+    for file_name, sheet_headers in WORKBOOKS.items():
+        wb = Workbook(write_only=True)
+        for sheet_name, header in sheet_headers.items():
+            ws = wb.create_sheet(sheet_name)
+            sheets[sheet_name] = {'ws': ws, 'rows': 0, 'dropped': 0}
+            for row in preamble.get(sheet_name, []):
+                ws.append(row)
+                sheets[sheet_name]['rows'] += 1
+            if header is not None:
+                ws.append(header)
+                sheets[sheet_name]['rows'] += 1
+        workbooks[os.path.join(study_dir, file_name)] = wb
+    return workbooks, sheets
+
+def append(sheets, sheet_name, row):
+    """Append a row, dropping it once the sheet reaches Excel's row limit"""
+    sheet = sheets[sheet_name]
+    if sheet['rows'] >= EXCEL_MAX_ROWS:
+        sheet['dropped'] += 1
+        return
+    sheet['ws'].append(row)
+    sheet['rows'] += 1
+
+def build_sites(rng, n_sites):
+    """Assign each site a region and country"""
+    sites = []
+    for i in range(1, n_sites + 1):
+        region = rng.choices(list(REGIONS), weights=[0.6, 0.3, 0.1])[0]
+        sites.append((f"Site {i}", region, rng.choice(REGIONS[region])))
+    return sites
+
+def write_subject(rng, sheets, project_name, site, subject_id, profile, as_of, ids):
+    """Write one subject's rows to every detail sheet and return its Subject Level Metrics row"""
+    site_id, region, country = site
+    location = [region, country, site_id, subject_id]
+    status = weighted(rng, SUBJECT_STATUSES)[0]
+
+    # Issues are concentrated: clean subjects get none, the rest carry the study's issue volume
+    clean = rng.random() < profile['clean_subject_share']
+    load = 0 if clean else 1 / (1 - profile['clean_subject_share'])
+
+    # Visit schedule: screen failures never get past screening
+    n_visits = 1
+    if status != 'Screen Failure':
+        n_visits = max(2, min(len(VISIT_SCHEDULE), count(rng, profile['visits_per_subject'])))
+    start = as_of - timedelta(days=rng.randint(30, 1200))
+    visits = []
+    for i, visit_name in enumerate(VISIT_SCHEDULE[:n_visits]):
+        visit_date = start + timedelta(days=i * rng.randint(5, 40))
+        if visit_date >= as_of:
+            break
+        visits.append((visit_name, visit_date))
+    if not visits:
+        visits = [(VISIT_SCHEDULE[0], as_of - timedelta(days=1))]
+    folders = [v for v, _ in visits] + EVENT_FOLDERS
+
+    for visit_name, visit_date in visits:
+        append(sheets, 'SV', [project_name] + location + [visit_name, visit_date.strftime('%d %b %Y').upper()])
+
+    # Pages entered, split into verified / requiring verification
+    pages = []
+    for visit_name, visit_date in visits:
+        for _ in range(count(rng, profile['pages_per_visit'])):
+            pages.append((visit_name, visit_date, f"Form {rng.randint(1, 150)}"))
+    for _ in range(count(rng, profile['pages_per_visit'] / 2)):
+        pages.append((rng.choice(EVENT_FOLDERS), None, f"Form {rng.randint(1, 150)}"))
+    require_verification = 0
+    for visit_name, visit_date, form in pages:
+        verification = 'Require Verification' if not clean and rng.random() < 0.18 else 'Verifed'
+        require_verification += verification == 'Require Verification'
+        append(sheets, 'SDV', [project_name] + location + [visit_name, form, visit_date, verification])
+
+    metrics = {
+        'Expected Visits': len(visits) + rng.randint(0, 2),
+        'Pages Entered': len(pages),
+        'CRFs Require Verification (SDV)': require_verification,
+        'Forms Verified': len(pages) - require_verification,
+    }
+
+    # Queries, counted per owner for the metrics sheet
+    for column in ('DM Queries', 'Clinical Queries', 'Medical Queries', 'Site Queries', 'Field Monitor Queries'):
+        metrics[column] = 0
+    for _ in range(count(rng, profile['queries_per_subject'] * load)):
+        owner, marking_group, column, _weight = weighted(rng, QUERY_OWNERS)
+        folder = rng.choice(folders)
+        visit_date = dict(visits).get(folder)
+        opened = as_of - timedelta(days=rng.randint(1, 400), seconds=rng.randint(0, 86399))
+        answered = rng.random() < 0.3
+        responded = opened + timedelta(days=rng.randint(0, (as_of - opened).days)) if answered else None
+        row = [project_name] + location + [
+            folder, f"Form {rng.randint(1, 150)}", f"FLD{rng.randint(1, 80)}", rng.randint(0, 20), visit_date,
+            'Answered' if answered else 'Open', owner, marking_group, opened, responded,
+            (as_of - opened).days, (as_of - responded).days if responded else None,
+        ]
+        append(sheets, 'Query Report - Cumulative', row)
+        if owner == 'Site Review':
+            append(sheets, 'Query Report - Site Action', row)
+        elif owner == 'Field Monitor Review':
+            append(sheets, 'Query Report - CRA Action', row)
+        if not answered:
+            metrics[column] += 1
+    metrics['Total Queries'] = sum(metrics[c] for c in ('DM Queries', 'Clinical Queries', 'Medical Queries',
+                                                        'Site Queries', 'Field Monitor Queries'))
+
+    nonconformant = count(rng, profile['nonconformant_per_subject'] * load)
+    for _ in range(nonconformant):
+        audit_time = as_of - timedelta(days=rng.randint(1, 200), seconds=rng.randint(0, 86399))
+        append(sheets, 'Non conformant', [project_name] + location + [
+            rng.choice(folders), f"Form {rng.randint(1, 150)}", rng.randint(0, 20), f"FLD{rng.randint(1, 80)}",
+            audit_time.strftime('%d %b %Y %H:%M:%S'), None,
+        ])
+    metrics['Pages with Non-Conformant data'] = nonconformant
+
+    # PI signatures pending or broken
+    signatures = {'within_45': 0, '45_to_90': 0, 'beyond_90': 0, 'broken': 0, 'never': 0}
+    for _ in range(count(rng, profile['signatures_per_subject'] * load)):
+        visit_name, visit_date = rng.choice(visits)
+        broken = rng.random() < 0.14
+        days = rng.randint(0, 120)
+        bucket = '0-25 days' if days <= 25 else '26-45 days' if days <= 45 else '>45 days'
+        signatures['broken' if broken else 'never'] += 1
+        signatures['within_45' if days < 45 else '45_to_90' if days < 90 else 'beyond_90'] += 1
+        append(sheets, 'PI Signature Report', [project_name] + location + [
+            visit_name, f"Form {rng.randint(1, 150)}",
+            'Yes - Broken Signature' if broken else 'Yes - Never Signed',
+            'Signature has been broken.' if broken else None, visit_date,
+            (as_of - timedelta(days=days)).strftime('%d %b %Y'), days, bucket,
+        ])
+
+    pd_counts = {'PD Confirmed': 0, 'PD proposed': 0}
+    for _ in range(count(rng, profile['deviations_per_subject'] * load)):
+        visit_name, visit_date = rng.choice(visits)
+        pd_status = 'PD Confirmed' if rng.random() < 0.67 else 'PD proposed'
+        pd_counts[pd_status] += 1
+        append(sheets, 'Protocol Deviation', [project_name] + location + [
+            visit_name, f"Form {rng.randint(1, 150)}", rng.randint(0, 10), pd_status, visit_date,
+        ])
+
+    frozen = count(rng, profile['freeze_per_subject'])
+    for sheet_name, action in (('CRF Freeze', 'Freeze'), ('CRF UnFreeze', 'UnFreeze')):
+        for _ in range(frozen if sheet_name == 'CRF Freeze' else count(rng, profile['freeze_per_subject'])):
+            append(sheets, sheet_name, [project_name] + location + [f"Form {rng.randint(1, 150)}", action, None])
+    locked = count(rng, profile['freeze_per_subject'])
+    for sheet_name in ('CRF Locked', 'CRF UnLocked'):
+        for _ in range(locked if sheet_name == 'CRF Locked' else count(rng, profile['freeze_per_subject'])):
+            append(sheets, sheet_name, [project_name] + location + [
+                f"Form {rng.randint(1, 150)}", 'Lock' if sheet_name == 'CRF Locked' else 'Unlock', 'DM User', None,
+            ])
+
+    # Coding terms, half MedDRA and half WHODrug
+    for dictionary in ('MedDRA', 'WHODD'):
+        title, dictionary_name, version = CODING_DICTIONARIES[dictionary]
+        for logline in range(1, count(rng, profile['coding_terms_per_subject'] / 2) + 1):
+            form_oid, field_oid, _weight = weighted(rng, CODING_FORMS[dictionary])
+            uncoded = not clean and rng.random() < 0.01
+            append(sheets, f"GlobalCodingReport_{dictionary}", [
+                title, project_name, dictionary_name, version, subject_id, form_oid, logline, field_oid,
+                'UnCoded Term' if uncoded else 'Coded Term', 'Yes' if uncoded else 'No',
+            ])
+
+    for position in range(1, count(rng, profile['inactivated_per_subject']) + 1):
+        append(sheets, 'Sheet1', [
+            country, site_id, subject_id, rng.choice(folders), f"Form {rng.randint(1, 150)}",
+            'Y' if rng.random() < 0.69 else 'N', position, rng.choice(INACTIVATION_ACTIONS),
+        ])
+
+    # eSAE discrepancies, Site ID is back-filled from Subject Level Metrics by the pipeline
+    for _ in range(count(rng, profile['sae_per_subject'] * 0.55 * load)):
+        ids['sae'] += rng.randint(1, 50)
+        created = as_of - timedelta(days=rng.randint(1, 500), seconds=rng.randint(0, 86399))
+        append(sheets, 'SAE Dashboard_DM', [
+            ids['sae'], project_name, country, site_id, subject_id, f"Form {rng.randint(1, 9)}", created,
+            'Review Completed' if rng.random() < 0.93 else 'Pending for Review', None, None, None,
+        ])
+    for _ in range(count(rng, profile['sae_per_subject'] * 0.45 * load)):
+        ids['sae'] += rng.randint(1, 50)
+        created = as_of - timedelta(days=rng.randint(1, 500), seconds=rng.randint(0, 86399))
+        append(sheets, 'SAE Dashboard_Safety', [
+            ids['sae'], project_name, site_id, subject_id, rng.choice(['-', 'Closed', 'Locked']), created,
+            'Review Completed' if rng.random() < 0.88 else 'Review in Progress', None,
+        ])
+
+    for _ in range(count(rng, profile['missing_pages_per_subject'] * load)):
+        visit_name, visit_date = rng.choice(visits)
+        row = ['Visit Level' if rng.random() < 0.99 else 'Summary Page', country, site_id, subject_id, visit_name,
+               f"Form {rng.randint(1, 150)}", visit_date.strftime('%d %b %Y').upper(), status,
+               str((as_of - visit_date).days)]
+        append(sheets, 'All Pages Missing', row)
+        if row[0] == 'Visit Level':
+            append(sheets, 'Visit Level Pages Missing', row)
+
+    for _ in range(count(rng, profile['lab_issues_per_subject'] * load)):
+        visit_name, visit_date = rng.choice(visits)
+        category, test, description = rng.choice(LAB_TESTS)
+        append(sheets, 'Missing_Lab_Name_and_Missing', [
+            country, site_id, subject_id, visit_name, f"Form {rng.randint(1, 150)}", category,
+            visit_date.strftime('%d-%b-%Y').upper(), test, description,
+            'Missing Lab name' if rng.random() < 0.87 else 'Ranges/ Units not entered',
+        ])
+
+    # Projected visits past due; every cell filled, extract_visit_projection() drops rows with blanks
+    for week in range(count(rng, profile['missing_visits_per_subject'] * load)):
+        projected = as_of - timedelta(days=rng.randint(1, 60))
+        append(sheets, 'Missing Visits', [
+            country, site_id, subject_id, f"W{week + 2}D{rng.randint(1, 7)}",
+            projected.strftime('%d%b%Y').upper(), (as_of - projected).days,
+        ])
+
+    if rng.random() < profile['edrr_subject_share'] * load:
+        append(sheets, 'OpenIssuesSummary', [project_name, subject_id, rng.randint(1, 6), None])
+
+    # Columns the pipeline fills from the detail reports are left blank, like the real export
+    latest_visit = f"{visits[-1][0]} (1)" if visits[-1][0] != 'Screening' else 'Screening'
+    row = [project_name] + location + [latest_visit, status] + [None] * 9 + [
+        metrics['Expected Visits'], metrics['Pages Entered'], metrics['Pages with Non-Conformant data'],
+        None, None, None,
+        metrics['DM Queries'], metrics['Clinical Queries'], metrics['Medical Queries'], metrics['Site Queries'],
+        metrics['Field Monitor Queries'], 0, 0, metrics['Total Queries'],
+        metrics['CRFs Require Verification (SDV)'], metrics['Forms Verified'],
+        frozen, max(len(pages) - frozen, 0), locked, 0,
+        pd_counts['PD Confirmed'], pd_counts['PD proposed'],
+        max(len(pages) - signatures['broken'] - signatures['never'], 0),
+        signatures['within_45'], signatures['45_to_90'], signatures['beyond_90'],
+        signatures['broken'], signatures['never'],
+    ]
+    append(sheets, 'Subject Level Metrics', row)
+    append(sheets, 'Region_Country View', [project_name] + location + [
+        0, 0, metrics['Site Queries'], metrics['Field Monitor Queries'], signatures['broken'], signatures['never'],
+        metrics['CRFs Require Verification (SDV)'], nonconformant, 0, 0, 0,
+    ])
+    return row
+
+def generate_study(project_name, output_dir=STUDY_FILES_DIR, profile=None, seed=42, as_of=None, banner=True):
+    """Write the nine workbooks of one synthetic study folder and return rows written per sheet"""
+    profile = profile or DEFAULT_PROFILE
+    as_of = as_of or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    rng = random.Random(seed)
+
+    study_dir = os.path.join(output_dir, project_name)
+    os.makedirs(study_dir, exist_ok=True)
+    # Vendor banner above the Visit Projection header, skipped by the 'Country' search on extract
+    preamble = {}
+    if banner:
+        preamble['Missing Visits'] = [['Restricted'] + [None] * 5, [f"Study: {project_name}"] + [None] * 5]
+    workbooks, sheets = open_workbooks(study_dir, preamble)
+
+    for header_row in CPID_METRIC_HEADER:
+        append(sheets, 'Subject Level Metrics', header_row)
+    append(sheets, 'Region_Country View', CPID_METRIC_HEADER[0][:5] + [
+        'Visit Status (Source: J-review)', 'Page Status (Source: (Rave EDC : BO4))',
+        'Queries status (Source:(Rave EDC : BO4))', None, 'PI Signatures (Source: (Rave EDC : BO4))', None,
+        'Page Action Status (Source: (Rave EDC : BO4))', None, None, 'Missing LNRs (Source: (J-review))', None,
+    ])
+    append(sheets, 'Region_Country View', [None] * 5 + [
+        '# Missing Visits', '# Missing Pages', '# Site Queries', '# Field Monitor Queries', 'Broken Signatures',
+        'CRFs Never Signed', '# CRFs Require Verification (SDV)', '# Pages with Non-Conformant data',
+        'Inactivated forms and folders', '# Missing Lab Ranges/Units in Lab Module', '# Missing Lab name  on CRFs',
+    ])
+    for report_row in REPORTS_INFO:
+        append(sheets, 'Reports info -reference', list(report_row))
+
+    sites = build_sites(rng, profile['sites'])
+    ids = {'sae': rng.randint(1, 1000)}
+    site_totals = set()
+    metric_rows = 0
+    totals = [0] * 44
+    for i in range(1, profile['subjects'] + 1):
+        site = sites[0] if i == 1 else rng.choice(sites)
+        site_totals.add(site[0])
+        row = write_subject(rng, sheets, project_name, site, f"Subject {i}", profile, as_of, ids)
+        metric_rows += 1
+        for col in range(16, 44):
+            if isinstance(row[col], int):
+                totals[col] += row[col]
+
+    # Totals footer, dropped by the df[4:-1] slice in extract_cpid_edc_metrics()
+    footer = [None, None, None, len(site_totals), metric_rows, 'Total:'] + [None] * 10 + [
+        total if col not in (19, 20, 21) else None for col, total in enumerate(totals[16:], start=16)
+    ]
+    append(sheets, 'Subject Level Metrics', footer)
+
+    for path, wb in workbooks.items():
+        wb.save(path)
+
+    return {name: {'rows': sheet['rows'], 'dropped': sheet['dropped']} for name, sheet in sheets.items()}
+
+def scaled_profile(scale, overrides):
+    """Default profile with subjects and sites multiplied by scale, then explicit overrides applied"""
+    profile = dict(DEFAULT_PROFILE)
+    profile['subjects'] = max(1, int(round(DEFAULT_PROFILE['subjects'] * scale)))
+    profile['sites'] = max(1, int(round(DEFAULT_PROFILE['sites'] * scale)))
+    profile.update({key: value for key, value in overrides.items() if value is not None})
+    return profile
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic study folder with all nine EDC workbooks for scale testing"
+    )
+    parser.add_argument("--name", help="Study folder name (default: 'Synthetic x<scale>')")
+    parser.add_argument("--output-dir", default=STUDY_FILES_DIR,
+                        help="Directory the study folder is written to (default: Study Files)")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="Multiplier on the subjects and sites of the Study 1 profile (e.g. 10, 100, 1000)")
+    parser.add_argument("--subjects", type=int, help="Number of subjects (overrides --scale)")
+    parser.add_argument("--sites", type=int, help="Number of sites (overrides --scale)")
+    parser.add_argument("--visits-per-subject", type=float, help="Mean completed visits per subject past screening")
+    parser.add_argument("--pages-per-visit", type=float, help="Mean pages entered per visit (SDV rows)")
+    parser.add_argument("--queries-per-subject", type=float, help="Mean Query Report rows per subject")
+    parser.add_argument("--signatures-per-subject", type=float, help="Mean PI Signature Report rows per subject")
+    parser.add_argument("--coding-terms-per-subject", type=float, help="Mean MedDRA + WHODrug rows per subject")
+    parser.add_argument("--inactivated-per-subject", type=float, help="Mean inactivated records per subject")
+    parser.add_argument("--sae-per-subject", type=float, help="Mean eSAE discrepancies per subject")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--as-of", help="Report date as YYYY-MM-DD, ages are computed from it (default: today)")
+    parser.add_argument("--no-banner", action="store_true",
+                        help="Put the Visit Projection header on the first row instead of below a banner")
+    args = parser.parse_args()
+
+    profile = scaled_profile(args.scale, {
+        'subjects': args.subjects,
+        'sites': args.sites,
+        'visits_per_subject': args.visits_per_subject,
+        'pages_per_visit': args.pages_per_visit,
+        'queries_per_subject': args.queries_per_subject,
+        'signatures_per_subject': args.signatures_per_subject,
+        'coding_terms_per_subject': args.coding_terms_per_subject,
+        'inactivated_per_subject': args.inactivated_per_subject,
+        'sae_per_subject': args.sae_per_subject,
+    })
+    if profile['sites'] > profile['subjects']:
+        print("Error: more sites than subjects")
+        sys.exit(1)
+    project_name = args.name or f"Synthetic x{args.scale:g}"
+    as_of = datetime.strptime(args.as_of, '%Y-%m-%d') if args.as_of else None
+
+    print("="*70)
+    print(f"GENERATING STUDY: {project_name}")
+    print("="*70)
+    print(f"Subjects: {profile['subjects']}, sites: {profile['sites']}")
+
+    start_time = time.time()
+    rows = generate_study(project_name, args.output_dir, profile, args.seed, as_of, not args.no_banner)
+
+    print(f"\n  {'sheet':<32}{'rows':>12}")
+    for sheet_name, counts in rows.items():
+        print(f"  {sheet_name:<32}{counts['rows']:>12}")
+        if counts['dropped']:
+            print(f"  ⚠ {sheet_name}: {counts['dropped']} rows dropped at Excel's {EXCEL_MAX_ROWS} row limit")
+
+    study_dir = os.path.join(args.output_dir, project_name)
+    size_mb = sum(os.path.getsize(os.path.join(study_dir, f)) for f in WORKBOOKS) / (1024 * 1024)
+    print(f"\n✓ Study written to {study_dir} ({size_mb:.2f} MB)")
+    print(f"Total generation time: {time.time() - start_time:.2f} seconds")
@@ -0,0 +1,300 @@
+import sqlite3
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import tempfile
+from statistics import median
+from dotenv import load_dotenv
+from create_database import TABLE_INDEXES, get_table_columns, get_storage_mode
+from dashboard_queries import DASHBOARD_QUERIES, build_query, sample_filter_sets, get_table_aliases, find_full_scans
+
+load_dotenv()
+
+# Database file path
+DB_PATH = os.getcwd() + os.getenv("DB_PATH", "/database/edc_metrics.db")
+
+# Key column order for the sidebar filters, so (region) and (region, country) share a prefix
+HIERARCHY = ('project_name', 'region', 'country', 'site_id', 'subject_id')
+
+# Wider indexes than this are only proposed with their key columns
+MAX_COVERING_COLUMNS = 10
+
+# A candidate is rejected when the other statements on its table get slower than this
+REGRESSION_TOLERANCE = 1.10
+
+def collect_workload(conn, filter_sets):
+    """Render every catalog query for every applicable filter set: list of workload items"""
+    workload = []
+    for query in DASHBOARD_QUERIES:
+        for level, filters in filter_sets:
+            built = build_query(query, filters)
+            if built is None:
+                continue
+            sql, params = built
+            try:
+                conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            except sqlite3.Error as e:
+                print(f"  ⚠ Skipping {query['name']} ({level}): {e}")
+                continue
+            workload.append({'query': query, 'level': level, 'filters': filters, 'sql': sql, 'params': params})
+    return workload
+
+def time_statement(conn, sql, params, repeat):
+    """Median wall time in milliseconds over repeat runs, after one warm-up run"""
+    conn.execute(sql, params).fetchall()
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        timings.append((time.perf_counter() - start_time) * 1000)
+    return median(timings)
+
+def predicate_text(query):
+    """The WHERE text of a catalog entry: each clause base plus what follows its placeholder"""
+    parts = []
+    for clause, (base, _) in query['clauses'].items():
+        tail = query['sql'].split("{" + clause + "}", 1)[1]
+        tail = re.split(r"\b(?:GROUP BY|ORDER BY|LIMIT|HAVING)\b|\)", tail, maxsplit=1)[0]
+        parts.append(base + " " + tail)
+    return " ".join(parts)
+
+def columns_on_table(text, table, aliases, pattern):
+    """Columns of a table matched by a regex (group 1: optional qualifier, group 2: column)"""
+    table_columns = {name for name, _, _, _ in get_table_columns(table)}
+    found = []
+    for qualifier, column in re.findall(pattern, text):
+        if column not in table_columns:
+            continue
+        if qualifier and aliases.get(qualifier) != table:
+            continue
+        if not qualifier and len(set(aliases.values())) > 1:
+            continue
+        if column not in found:
+            found.append(column)
+    return found
+
+def propose_candidates(item, table):
+    """Key-only and covering index candidates removing a full scan of a table for one workload item"""
+    query = item['query']
+    aliases = get_table_aliases(item['sql'])
+    predicates = predicate_text(query)
+
+    # Equality columns: bound sidebar filters, then literal comparisons such as pd_status = '...'
+    bound = []
+    for base, columns in query['clauses'].values():
+        for filter_name, column in columns:
+            value = item['filters'].get(filter_name)
+            if value and value != 'ALL' and re.fullmatch(r"(?:\w+\.)?\w+", column):
+                bound.append(column)
+    equality = columns_on_table(" ".join(f"{c} = ?" for c in bound), table, aliases, r"(?:(\w+)\.)?(\w+) = \?")
+    equality = sorted(equality, key=lambda c: HIERARCHY.index(c) if c in HIERARCHY else len(HIERARCHY))
+    for column in columns_on_table(predicates, table, aliases, r"(?:(\w+)\.)?(\w+)\s*=\s*'"):
+        if column not in equality:
+            equality.append(column)
+
+    # One range column can follow the equality columns
+    ranges = [
+        column for column in columns_on_table(predicates, table, aliases, r"(?:(\w+)\.)?(\w+)\s*(?:>=|<=|>|<)\s*\d")
+        if column not in equality
+    ]
+    key_columns = equality + ranges[:1]
+
+    # Covering: every other column of the table the statement references
+    referenced = columns_on_table(item['sql'], table, aliases, r"(?:\b(\w+)\.)?\b(\w+)\b")
+    covering = key_columns + [column for column in referenced if column not in key_columns]
+
+    # (table, columns, number of key columns)
+    candidates = []
+    if key_columns:
+        candidates.append((table, tuple(key_columns), len(key_columns)))
+    if covering != key_columns and len(covering) <= MAX_COVERING_COLUMNS:
+        candidates.append((table, tuple(covering), len(key_columns)))
+    return candidates
+
+def index_name(table, columns, key_count):
+    """Name in the create_database.TABLE_INDEXES style (idx_<table prefix>_<key columns>)"""
+    prefixes = {t: name.split('_')[1] for name, t, _ in TABLE_INDEXES}
+    prefix = prefixes.get(table, "".join(word[0] for word in table.split('_')))
+    name = f"idx_{prefix}_{'_'.join(columns[:key_count or 1])}"
+    return name + "_covering" if len(columns) > key_count else name
+
+def evaluate(conn, workload, baseline, table, columns, repeat):
+    """Create a candidate index, time every workload item touching its table, then drop it"""
+    conn.execute(f"CREATE INDEX advisor_candidate ON {table}({', '.join(columns)})")
+    try:
+        results = []
+        for i, item in enumerate(workload):
+            if table not in get_table_aliases(item['sql']).values():
+                continue
+            after = time_statement(conn, item['sql'], item['params'], repeat)
+            results.append((i, baseline[i], after))
+        return results
+    finally:
+        conn.execute("DROP INDEX advisor_candidate")
+
+def run_advisor(db_path, per_level, repeat, min_speedup, seed):
+    """Replay the dashboard workload, evaluate index candidates and recommend the useful ones"""
+    source = sqlite3.connect(db_path)
+    if get_storage_mode(source) in ('normalized', 'epoch'):
+        source.close()
+        raise RuntimeError("The index advisor works on standard or clustered databases, not normalized or epoch ones")
+
+    # Candidates are created on a scratch copy, never on the dashboard database
+    scratch_path = os.path.join(tempfile.mkdtemp(prefix="index_advisor_"), "advisor.db")
+    conn = sqlite3.connect(scratch_path)
+    source.backup(conn)
+    source.close()
+
+    try:
+        filter_sets = sample_filter_sets(conn, per_level, seed)
+        workload = collect_workload(conn, filter_sets)
+        print(f"Workload: {len(workload)} statements from {len(DASHBOARD_QUERIES)} catalog queries "
+              f"over {len(filter_sets)} filter sets")
+
+        # Baseline timings and full scans
+        print("\n→ Measuring baseline...")
+        baseline = [time_statement(conn, item['sql'], item['params'], repeat) for item in workload]
+        candidates = {}
+        scanned_items = 0
+        for i, item in enumerate(workload):
+            scans = find_full_scans(conn, item['sql'], item['params'])
+            scanned_items += bool(scans)
+            for table, _ in scans:
+                for table_name, columns, key_count in propose_candidates(item, table):
+                    candidate = candidates.setdefault((table_name, columns), {'key_count': key_count, 'targets': set()})
+                    candidate['targets'].add(i)
+        print(f"  {scanned_items} statements do full table scans, {len(candidates)} candidate indexes")
+
+        # Evaluate each candidate on its own: speedup on the statements it was proposed for,
+        # and no regression on the other statements reading the same table
+        print("\n→ Evaluating candidates...")
+        evaluated = []
+        for (table, columns), candidate in sorted(candidates.items()):
+            results = evaluate(conn, workload, baseline, table, columns, repeat)
+            before = sum(b for i, b, _ in results if i in candidate['targets'])
+            after = sum(a for i, _, a in results if i in candidate['targets'])
+            others_before = sum(b for i, b, _ in results if i not in candidate['targets'])
+            others_after = sum(a for i, _, a in results if i not in candidate['targets'])
+            speedup = before / after if after else 0
+            regressed = others_after > others_before * REGRESSION_TOLERANCE + 1.0
+            print(f"  {table}({', '.join(columns)}): {before:.2f} ms → {after:.2f} ms ({speedup:.2f}x)"
+                  f" on {len(candidate['targets'])} statements"
+                  + (f", others {others_before:.2f} ms → {others_after:.2f} ms" if regressed else ""))
+            if speedup >= min_speedup and not regressed:
+                evaluated.append({'table': table, 'columns': columns, 'key_count': candidate['key_count'],
+                                  'before_ms': before, 'after_ms': after, 'speedup': speedup})
+
+        # Greedy by time saved. A candidate is redundant when a kept index starts with its key;
+        # a candidate starting with all columns of a kept index replaces it.
+        evaluated.sort(key=lambda c: c['before_ms'] - c['after_ms'], reverse=True)
+        selected = []
+        for candidate in evaluated:
+            key = candidate['columns'][:candidate['key_count']]
+            same_table = [kept for kept in selected if kept['table'] == candidate['table']]
+            if any(kept['columns'][:len(key)] == key for kept in same_table):
+                continue
+            extended = [kept for kept in same_table
+                        if candidate['columns'][:len(kept['columns'])] == kept['columns']]
+            selected = [kept for kept in selected if kept not in extended]
+            selected.append(candidate)
+
+        # Re-measure the whole workload with all recommendations in place
+        print("\n→ Measuring workload with the recommended indexes...")
+        recommendations = []
+        for candidate in selected:
+            name = index_name(candidate['table'], candidate['columns'], candidate['key_count'])
+            conn.execute(f"CREATE INDEX {name} ON {candidate['table']}({', '.join(candidate['columns'])})")
+            recommendations.append({
+                'index': name,
+                'table': candidate['table'],
+                'columns': ", ".join(candidate['columns']),
+                'isolated_speedup': round(candidate['speedup'], 2),
+                'saved_ms': round(candidate['before_ms'] - candidate['after_ms'], 2),
+            })
+
+        statements = []
+        for i, item in enumerate(workload):
+            after = time_statement(conn, item['sql'], item['params'], repeat)
+            statements.append({
+                'query': item['query']['name'],
+                'level': item['level'],
+                'before_ms': round(baseline[i], 4),
+                'after_ms': round(after, 4),
+                'full_scans_after': [t for t, _ in find_full_scans(conn, item['sql'], item['params'])],
+            })
+    finally:
+        conn.close()
+        os.remove(scratch_path)
+        os.rmdir(os.path.dirname(scratch_path))
+
+    return {
+        'database': db_path,
+        'statements': len(workload),
+        'baseline_ms': round(sum(baseline), 2),
+        'recommended_ms': round(sum(s['after_ms'] for s in statements), 2),
+        'recommendations': recommendations,
+        'per_statement': statements,
+    }
+
+def print_report(report):
+    """Print the recommendations, per-query speedups and TABLE_INDEXES entries"""
+    print("\n" + "="*70)
+    print("INDEX ADVISOR REPORT")
+    print("="*70)
+    print(f"Workload total: {report['baseline_ms']:.2f} ms → {report['recommended_ms']:.2f} ms "
+          f"({report['baseline_ms'] / max(report['recommended_ms'], 1e-9):.2f}x)")
+
+    if not report['recommendations']:
+        print("\nNo index removes a full scan with a worthwhile speedup.")
+        return
+
+    print("\nRecommended indexes:")
+    for rec in report['recommendations']:
+        print(f"  ✓ {rec['index']} ON {rec['table']}({rec['columns']})"
+              f"  {rec['isolated_speedup']}x, saves {rec['saved_ms']} ms per workload pass")
+
+    # Per catalog query, summed over its filter sets
+    per_query = {}
+    for statement in report['per_statement']:
+        totals = per_query.setdefault(statement['query'], [0.0, 0.0])
+        totals[0] += statement['before_ms']
+        totals[1] += statement['after_ms']
+    print(f"\n  {'query':<42}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    for name, (before, after) in sorted(per_query.items(), key=lambda kv: kv[1][1] - kv[1][0]):
+        print(f"  {name:<42}{before:>12.3f}{after:>12.3f}{before / max(after, 1e-9):>9.2f}x")
+
+    print("\nTABLE_INDEXES entries for create_database.py:")
+    for rec in report['recommendations']:
+        print(f"    ('{rec['index']}', '{rec['table']}', '{rec['columns']}'),")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Replay the dashboard SQL and recommend indexes that remove full table scans"
+    )
+    parser.add_argument("--db", default=DB_PATH, help="Database to analyse (defaults to DB_PATH)")
+    parser.add_argument("--per-level", type=int, default=3,
+                        help="Filter values sampled per level (study, region, country, site, subject)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per statement")
+    parser.add_argument("--min-speedup", type=float, default=1.5,
+                        help="Minimum speedup on the statements a candidate targets (default: 1.5)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for filter sampling")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"Error: database not found: {args.db}")
+        sys.exit(1)
+
+    start_time = time.time()
+    report = run_advisor(args.db, args.per_level, args.repeat, args.min_speedup, args.seed)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+    print(f"\nTotal analysis time: {time.time() - start_time:.2f} seconds")
@@ -0,0 +1,551 @@
+import os
+import sys
+import json
+import time
+import atexit
+import pickle
+import sqlite3
+import argparse
+import tempfile
+import threading
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+from dotenv import load_dotenv
+import data_insertion
+from extract_data import (WORKBOOK_DATAFRAMES, SITE_ID_DATAFRAMES, COMPACT_DTYPES, StreamedSheet, extract_all_data,
+                          extract_workbooks, populate_site_id_in_dataframes, compact_dataframes)
+from preflight_check import check_study
+from fill_missing_values import fill_all_missing_data, populate_site_id_in_esae
+from dqi_clean_status_cal import calculate_all_dqi_and_clean_status
+from instrumentation import set_context
+from db_maintenance import optimize_database
+
+load_dotenv()
+
+# Studies submitted here are written by one runner at a time, so queued jobs never compete for
+# the database. Dashboard uploads (ingest_worker.py) and the Study Files watcher submit here and
+# drain the queue themselves when no runner is active. Full rebuilds (main.py) and
+# process_single_study.py still write directly.
+
+# Queue database, kept apart from the metrics database so submitting never waits on ingest writes
+INGEST_QUEUE_PATH = os.getcwd() + os.getenv("INGEST_QUEUE_PATH", "/database/ingest_queue.db")
+
+# Studies extracted at the same time by the runner (inserts always go through its one writer)
+EXTRACT_WORKERS = int(os.getenv("INGEST_EXTRACT_WORKERS", "2"))
+
+# Seconds between queue polls when idle, and the longest inserted studies wait for the
+# coalesced DQI pass while more uploads keep arriving
+POLL_SECONDS = 1.0
+DQI_MAX_DELAY_SECONDS = 60
+
+# Job lifecycle: queued -> extracting -> inserted -> done, or failed / superseded (a newer upload
+# of the same study arrived before this one was written)
+JOB_STATUSES = ('queued', 'extracting', 'inserted', 'done', 'failed', 'superseded')
+FINISHED_STATUSES = ('done', 'failed', 'superseded')
+
+# Dataframes that take their missing Site IDs from Subject Level Metrics, re-inserted whenever
+# CPID_EDC_Metrics.xlsx changes even if their own workbook did not
+SITE_ID_DEPENDENTS = SITE_ID_DATAFRAMES + ['SAE Dashboard_DM', 'SAE Dashboard_Safety']
+
+# Studies whose extracted sheets stay in memory for the next workbook job; less recently used
+# studies are spilled to a pickle file on disk (0 spills every study)
+EXTRACTED_CACHE_STUDIES = int(os.getenv("INGEST_EXTRACTED_CACHE_STUDIES", "2"))
+
+class ExtractedCache:
+    """
+    Raw (pre Site ID population) dataframes of each study's last workbook job in this process,
+    so a job for changed workbooks only reads those sheets again. Keeps the most recently used
+    studies in memory and pickles the rest to spool files; get() returns None when a study is
+    missing or its spool cannot be read, and the job reads the whole study instead. The cache
+    owns the spool files of the StreamedSheets it holds, removed when their study is discarded,
+    so a copy returned by get() and then dropped never takes them along.
+    """
+    def __init__(self, max_studies):
+        self.max_studies = max_studies
+        self._memory = OrderedDict()
+        self._spooled = {}
+        self._sheet_spools = {}
+        # Extraction threads read while the writer thread stores
+        self._lock = threading.Lock()
+        atexit.register(self.clear)
+
+    def get(self, study_name):
+        with self._lock:
+            if study_name in self._memory:
+                self._memory.move_to_end(study_name)
+                return self._memory[study_name]
+            path = self._spooled.get(study_name)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            print(f"⚠ Cached sheets of {study_name} unreadable, reading the whole study: {e}")
+            self.discard(study_name)
+            return None
+
+    def put(self, study_name, dataframes):
+        sheet_spools = {df.release() for df in dataframes.values() if isinstance(df, StreamedSheet)}
+        # Sheets of workbooks the job did not read again are kept from the previous entry
+        self.discard(study_name, keep=sheet_spools)
+        with self._lock:
+            self._memory[study_name] = dataframes
+            self._sheet_spools[study_name] = sheet_spools
+            while len(self._memory) > self.max_studies:
+                spilled_name, spilled = self._memory.popitem(last=False)
+                self._spooled[spilled_name] = self._spill(spilled)
+
+    def discard(self, study_name, keep=()):
+        with self._lock:
+            self._memory.pop(study_name, None)
+            paths = [self._spooled.pop(study_name, None)]
+            paths.extend(self._sheet_spools.pop(study_name, set()) - set(keep))
+        for path in paths:
+            if path is not None and os.path.exists(path):
+                os.remove(path)
+
+    def clear(self):
+        for study_name in list(self._memory) + list(self._spooled):
+            self.discard(study_name)
+
+    @staticmethod
+    def _spill(dataframes):
+        fd, path = tempfile.mkstemp(prefix="ingest-", suffix=".spool")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(dataframes, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return path
+
+_extracted = ExtractedCache(EXTRACTED_CACHE_STUDIES)
+
+QUEUE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS ingest_jobs (
+        job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        study_name TEXT NOT NULL,
+        workbooks TEXT,
+        status TEXT NOT NULL DEFAULT 'queued',
+        submissions INTEGER NOT NULL DEFAULT 1,
+        submitted_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        started_at TEXT,
+        inserted_at TEXT,
+        finished_at TEXT,
+        error TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_ingest_jobs_status ON ingest_jobs(status, job_id);
+    CREATE INDEX IF NOT EXISTS idx_ingest_jobs_study ON ingest_jobs(study_name, status);
+"""
+
+def get_queue_connection():
+    """Connection to the queue database, created on first use"""
+    os.makedirs(os.path.dirname(INGEST_QUEUE_PATH), exist_ok=True)
+    # Autocommit, transactions are opened explicitly with BEGIN IMMEDIATE
+    conn = sqlite3.connect(INGEST_QUEUE_PATH, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.executescript(QUEUE_SCHEMA)
+    # Queues created before jobs could name workbooks
+    if 'workbooks' not in [row[1] for row in conn.execute("PRAGMA table_info(ingest_jobs)")]:
+        conn.execute("ALTER TABLE ingest_jobs ADD COLUMN workbooks TEXT")
+    return conn
+
+def merge_workbooks(queued, submitted):
+    """Workbooks of a queued job after another submission (None means the whole study)"""
+    if queued is None or submitted is None:
+        return None
+    return sorted(set(json.loads(queued)) | set(submitted))
+
+def submit(study_names, workbooks=None):
+    """
+    Queue studies for ingest and return their job ids. workbooks maps a study to the workbooks
+    that changed, to replace only the tables built from them; other studies are ingested whole.
+    A study that is already queued and not yet started is not queued twice: the existing job is
+    returned (it will read the new files).
+    """
+    workbooks = workbooks or {}
+    conn = get_queue_connection()
+    job_ids = []
+    try:
+        for study_name in study_names:
+            study_workbooks = workbooks.get(study_name)
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT job_id, workbooks FROM ingest_jobs WHERE study_name = ? AND status = 'queued'", (study_name,)
+            ).fetchone()
+            if row:
+                merged = merge_workbooks(row[1], study_workbooks)
+                conn.execute(
+                    "UPDATE ingest_jobs SET submissions = submissions + 1, workbooks = ? WHERE job_id = ?",
+                    (None if merged is None else json.dumps(merged), row[0])
+                )
+                job_ids.append(row[0])
+            else:
+                cursor = conn.execute(
+                    "INSERT INTO ingest_jobs (study_name, workbooks) VALUES (?, ?)",
+                    (study_name, None if study_workbooks is None else json.dumps(sorted(study_workbooks)))
+                )
+                job_ids.append(cursor.lastrowid)
+            conn.execute("COMMIT")
+    finally:
+        conn.close()
+    return job_ids
+
+def job_rows(job_ids):
+    """(job_id, study_name, status, error) of the given jobs"""
+    conn = get_queue_connection()
+    placeholders = ", ".join("?" for _ in job_ids)
+    try:
+        return conn.execute(
+            f"SELECT job_id, study_name, status, error FROM ingest_jobs WHERE job_id IN ({placeholders}) ORDER BY job_id",
+            job_ids
+        ).fetchall()
+    finally:
+        conn.close()
+
+def wait_for_jobs(job_ids, timeout=None):
+    """Wait until the jobs are finished (done, failed or superseded) and return their rows"""
+    deadline = time.time() + timeout if timeout else None
+    while True:
+        rows = job_rows(job_ids)
+        if all(status in FINISHED_STATUSES for _, _, status, _ in rows):
+            return rows
+        if deadline and time.time() > deadline:
+            raise TimeoutError(f"Ingest jobs not finished after {timeout}s")
+        time.sleep(POLL_SECONDS)
+
+def drain(job_ids, data_conn=None, workers=EXTRACT_WORKERS, timeout=None, on_status=None):
+    """
+    Process the queue in this process until the given jobs are finished, or wait for them while
+    another runner has it, and return their rows. The submitter writes only when it is the one
+    runner, so uploads, the watcher and a standalone runner never write at the same time.
+    With timeout, raises TimeoutError once it has passed; a queue run already started in this
+    process is finished first. on_status(job_id, study_name, status, error) is called once per
+    status a job reaches (see run_queue), for every job this runner processes; while another
+    runner has the queue, the given jobs' statuses are polled instead.
+    """
+    deadline = time.time() + timeout if timeout else None
+    reported = {}
+
+    def report(job_id, study_name, status, error=None):
+        if on_status and reported.get(job_id) != status:
+            reported[job_id] = status
+            on_status(job_id, study_name, status, error)
+
+    while True:
+        try:
+            run_queue(workers, once=True, data_conn=data_conn, on_status=report)
+        except RunnerBusy:
+            pass
+        rows = job_rows(job_ids)
+        for row in rows:
+            report(*row)
+        if all(status in FINISHED_STATUSES for _, _, status, _ in rows):
+            return rows
+        if deadline and time.time() > deadline:
+            raise TimeoutError(f"Ingest jobs not finished after {timeout}s")
+        time.sleep(POLL_SECONDS)
+
+def set_status(conn, job_id, status, error=None):
+    """Move a job to a new status, stamping the matching timestamp column"""
+    column = {'extracting': 'started_at', 'inserted': 'inserted_at'}.get(status, 'finished_at')
+    conn.execute(
+        f"UPDATE ingest_jobs SET status = ?, error = ?, {column} = CURRENT_TIMESTAMP WHERE job_id = ?",
+        (status, error, job_id)
+    )
+
+def claim_jobs(conn, limit, busy_studies):
+    """Mark up to limit queued jobs as extracting, skipping studies already being extracted"""
+    conn.execute("BEGIN IMMEDIATE")
+    claimed = []
+    for job_id, study_name, workbooks in conn.execute(
+        "SELECT job_id, study_name, workbooks FROM ingest_jobs WHERE status = 'queued' ORDER BY job_id"
+    ).fetchall():
+        if len(claimed) >= limit:
+            break
+        if study_name in busy_studies or study_name in [name for _, name, _ in claimed]:
+            continue
+        set_status(conn, job_id, 'extracting')
+        claimed.append((job_id, study_name, None if workbooks is None else json.loads(workbooks)))
+    conn.execute("COMMIT")
+    return claimed
+
+def extract_study(study_name, workbooks=None):
+    """
+    Extract and fill one study's data, ready for insertion. Returns the dataframes, the filled
+    subject metrics, the tables to replace (None for all) and the raw dataframes to keep for
+    the study's next workbook job (None for whole-study jobs).
+    """
+    study_dir = os.path.join(os.getcwd(), "Study Files", study_name)
+    if not os.path.isdir(study_dir):
+        raise FileNotFoundError(f"Study folder not found: Study Files/{study_name}")
+
+    if workbooks is None:
+        check_study(study_dir)
+        dataframes = extract_all_data(project_name=study_name)
+        raw = tables = None
+    else:
+        # Without the study's other dataframes (first job in this process, or an unreadable
+        # spool file) the whole study is read
+        cached = _extracted.get(study_name)
+        if cached is None:
+            workbooks = list(WORKBOOK_DATAFRAMES)
+        check_study(study_dir, workbooks=workbooks)
+        raw = dict(cached or {})
+        raw.update(extract_workbooks(study_name, workbooks, raise_errors=True))
+
+        # Site ID population and filling modify the dataframes, the cache keeps the raw ones
+        dataframes = populate_site_id_in_dataframes({name: df.copy() for name, df in raw.items()})
+        if COMPACT_DTYPES:
+            dataframes = compact_dataframes(dataframes)
+
+        tables = None
+        if cached is not None:
+            changed_dataframes = {name for workbook in workbooks for name in WORKBOOK_DATAFRAMES[workbook]}
+            if 'Subject_Level_Metrics' in changed_dataframes:
+                changed_dataframes.update(SITE_ID_DEPENDENTS)
+            # Subjects dropped from the new files must not keep a DQI row; DQI refills the rest
+            tables = data_insertion.tables_for_dataframes(changed_dataframes) + ['subject_dqi_clean_status']
+
+    dataframes['SAE Dashboard_DM'], dataframes['SAE Dashboard_Safety'] = populate_site_id_in_esae(
+        dataframes['Subject_Level_Metrics'],
+        dataframes['SAE Dashboard_DM'],
+        dataframes['SAE Dashboard_Safety']
+    )
+    filled_subject_metrics = fill_all_missing_data(dataframes)
+    return dataframes, filled_subject_metrics, tables, raw
+
+class RunnerBusy(RuntimeError):
+    """Another process holds the runner (or watcher) lock"""
+
+def acquire_runner_lock(lock_path=None, role="Ingest queue runner"):
+    """
+    Make this process the only queue runner (or other role) and return the open lock file, to
+    give back with release_runner_lock. The lock is an OS lock on the file (flock, or msvcrt on
+    Windows), released by the OS when its process dies, so a stale lock never needs clearing.
+    """
+    lock_path = lock_path or INGEST_QUEUE_PATH + ".lock"
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    lock_file = os.fdopen(os.open(lock_path, os.O_RDWR | os.O_CREAT), "r+")
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        try:
+            owner = lock_file.read().strip()
+        except OSError:
+            # The owner's locked byte cannot be read on Windows
+            owner = ""
+        lock_file.close()
+        raise RunnerBusy(f"{role} already running" + (f" (pid {owner})" if owner else ""))
+    # The pid is only for the message above, the OS lock decides who runs
+    lock_file.truncate()
+    lock_file.write(str(os.getpid()))
+    lock_file.flush()
+    return lock_file
+
+def release_runner_lock(lock_file):
+    """Give up a lock taken by acquire_runner_lock (the file stays for the next runner)"""
+    lock_file.seek(0)
+    lock_file.truncate()
+    lock_file.flush()
+    if fcntl is not None:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    else:
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+    lock_file.close()
+
+def recover_jobs(queue_conn):
+    """Requeue jobs interrupted by a previous runner; returns whether a DQI pass is owed"""
+    queue_conn.execute("UPDATE ingest_jobs SET status = 'queued', started_at = NULL WHERE status = 'extracting'")
+    return queue_conn.execute("SELECT COUNT(*) FROM ingest_jobs WHERE status = 'inserted'").fetchone()[0] > 0
+
+def run_dqi(queue_conn, data_conn, report):
+    """One DQI and Clean Status pass for every study inserted since the last one"""
+    jobs = queue_conn.execute("SELECT job_id, study_name FROM ingest_jobs WHERE status = 'inserted'").fetchall()
+    pending = list(dict.fromkeys(study_name for _, study_name in jobs))
+    print(f"\n→ Calculating DQI and Clean Status once for {len(pending)} inserted studies...")
+    for job_id, study_name in jobs:
+        report(job_id, study_name, 'dqi')
+    start_time = time.time()
+    set_context(study=None)
+    calculate_all_dqi_and_clean_status(data_conn)
+    generation = data_insertion.publish_generation(pending, conn=data_conn)
+    queue_conn.execute(
+        "UPDATE ingest_jobs SET status = 'done', finished_at = CURRENT_TIMESTAMP WHERE status = 'inserted'"
+    )
+    for job_id, study_name in jobs:
+        report(job_id, study_name, 'done')
+    print(f"✓ DQI calculation completed, data generation {generation} published ({time.time() - start_time:.2f}s)")
+    # The runner's connection may stay open (dashboard worker), so no compaction here (db_maintenance.py)
+    if not optimize_database(data_conn):
+        print("⚠ WAL partly checkpointed (a reader is still using it)")
+
+def write_job(queue_conn, data_conn, job_id, study_name, future, report):
+    """Insert an extracted study, unless it failed or a newer upload of it is waiting"""
+    try:
+        dataframes, filled_subject_metrics, tables, raw = future.result()
+    except Exception as e:
+        traceback.print_exc()
+        set_status(queue_conn, job_id, 'failed', str(e))
+        report(job_id, study_name, 'failed', str(e))
+        print(f"✗ Job {job_id} ({study_name}) failed: {e}")
+        return False
+
+    newer = queue_conn.execute(
+        "SELECT job_id FROM ingest_jobs WHERE study_name = ? AND status = 'queued' AND job_id > ?",
+        (study_name, job_id)
+    ).fetchone()
+    if newer:
+        set_status(queue_conn, job_id, 'superseded')
+        report(job_id, study_name, 'superseded')
+        print(f"→ Job {job_id} ({study_name}) superseded by job {newer[0]}, not written")
+        return False
+
+    start_time = time.time()
+    set_context(study=study_name)
+    try:
+        data_insertion.insert_all_data(dataframes, filled_subject_metrics, conn=data_conn,
+                                       replace_study=study_name, tables=tables)
+    except Exception as e:
+        traceback.print_exc()
+        set_status(queue_conn, job_id, 'failed', str(e))
+        report(job_id, study_name, 'failed', str(e))
+        print(f"✗ Job {job_id} ({study_name}) failed to insert: {e}")
+        return False
+    if raw is None:
+        _extracted.discard(study_name)
+    else:
+        _extracted.put(study_name, raw)
+    set_status(queue_conn, job_id, 'inserted')
+    report(job_id, study_name, 'inserted')
+    scope = "all tables" if tables is None else f"{len(tables)} tables"
+    print(f"✓ Job {job_id} ({study_name}) inserted, {scope} replaced ({time.time() - start_time:.2f}s)")
+    return True
+
+def run_queue(workers=EXTRACT_WORKERS, once=False, data_conn=None, on_status=None):
+    """
+    Process the queue: extract up to `workers` studies at a time, write them one by one
+    from this thread (the only writer), and run DQI once whenever the queue drains
+    (or after DQI_MAX_DELAY_SECONDS while uploads keep coming). With once, return
+    when the queue is empty. Writes through data_conn when given (left open), otherwise
+    through its own connection. Raises RunnerBusy while another runner is active.
+    on_status(job_id, study_name, status, error) is called from this thread as each job
+    moves to extracting, inserted, dqi (the DQI pass started) and done, or failed / superseded.
+    """
+    report = on_status or (lambda job_id, study_name, status, error=None: None)
+    runner_lock = acquire_runner_lock()
+    own_connection = data_conn is None
+    try:
+        queue_conn = get_queue_connection()
+        if own_connection:
+            data_conn = data_insertion.get_db_connection()
+    except Exception:
+        release_runner_lock(runner_lock)
+        raise
+    dqi_pending_since = time.time() if recover_jobs(queue_conn) else None
+    in_flight = {}
+    print(f"Ingest queue runner started (pid {os.getpid()}, {workers} extract workers)")
+    print(f"Queue: {INGEST_QUEUE_PATH}")
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while True:
+                busy_studies = {study_name for _, study_name in in_flight.values()}
+                for job_id, study_name, workbooks in claim_jobs(queue_conn, workers - len(in_flight), busy_studies):
+                    scope = study_name if workbooks is None else f"{study_name} ({', '.join(workbooks)})"
+                    print(f"→ Job {job_id}: extracting {scope}")
+                    report(job_id, study_name, 'extracting')
+                    in_flight[executor.submit(extract_study, study_name, workbooks)] = (job_id, study_name)
+
+                dqi_overdue = dqi_pending_since and time.time() - dqi_pending_since > DQI_MAX_DELAY_SECONDS
+                if dqi_pending_since and (not in_flight or dqi_overdue):
+                    run_dqi(queue_conn, data_conn, report)
+                    dqi_pending_since = None
+                    continue
+
+                if not in_flight:
+                    if once:
+                        break
+                    time.sleep(POLL_SECONDS)
+                    continue
+
+                finished, _ = wait(in_flight, timeout=POLL_SECONDS, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    job_id, study_name = in_flight.pop(future)
+                    if write_job(queue_conn, data_conn, job_id, study_name, future, report) and not dqi_pending_since:
+                        dqi_pending_since = time.time()
+    finally:
+        if own_connection:
+            data_conn.close()
+        queue_conn.close()
+        release_runner_lock(runner_lock)
+
+def print_status(limit=20):
+    """Print job counts per status and the most recent jobs"""
+    conn = get_queue_connection()
+    counts = dict(conn.execute("SELECT status, COUNT(*) FROM ingest_jobs GROUP BY status").fetchall())
+    print("\n" + "="*70)
+    print("INGEST QUEUE")
+    print("="*70)
+    print("  " + ", ".join(f"{status}: {counts.get(status, 0)}" for status in JOB_STATUSES))
+    print(f"\n  {'job':>5}  {'study':<24}{'status':<12}{'uploads':>8}  {'submitted':<20}{'finished':<20}")
+    for job_id, study_name, status, submissions, submitted_at, finished_at, error in conn.execute(
+        """SELECT job_id, study_name, status, submissions, submitted_at, finished_at, error
+           FROM ingest_jobs ORDER BY job_id DESC LIMIT ?""", (limit,)
+    ):
+        print(f"  {job_id:>5}  {study_name:<24}{status:<12}{submissions:>8}  {submitted_at:<20}{finished_at or '-':<20}")
+        if error:
+            print(f"         ⚠ {error}")
+    conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Queue study ingests and write them from a single runner")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit_parser = commands.add_parser("submit", help="Queue studies for ingest")
+    submit_parser.add_argument("study_names", nargs="+", metavar="study_name", help="Study folders under 'Study Files'")
+    submit_parser.add_argument("--wait", action="store_true", help="Wait until the jobs are finished")
+    submit_parser.add_argument("--run", action="store_true",
+                               help="Process the queue in this process while no runner is active, until the jobs are finished")
+    submit_parser.add_argument("--timeout", type=float, help="Give up waiting after this many seconds")
+
+    run_parser = commands.add_parser("run", help="Process queued jobs (one runner at a time)")
+    run_parser.add_argument("--workers", type=int, default=EXTRACT_WORKERS,
+                            help=f"Studies extracted concurrently (default: {EXTRACT_WORKERS})")
+    run_parser.add_argument("--once", action="store_true", help="Exit when the queue is empty")
+
+    status_parser = commands.add_parser("status", help="Show queued and recent jobs")
+    status_parser.add_argument("--limit", type=int, default=20, help="Number of recent jobs to list")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    if args.command == "submit":
+        job_ids = submit(args.study_names)
+        for study_name, job_id in zip(args.study_names, job_ids):
+            print(f"✓ {study_name}: job {job_id}")
+        if args.run or args.wait:
+            try:
+                rows = drain(job_ids, timeout=args.timeout) if args.run else wait_for_jobs(job_ids, args.timeout)
+            except TimeoutError as e:
+                print(f"✗ {e}")
+                sys.exit(1)
+            for job_id, study_name, status, error in rows:
+                print(f"  {job_id} {study_name}: {status}" + (f" ({error})" if error else ""))
+            if any(status == 'failed' for _, _, status, _ in rows):
+                sys.exit(1)
+    elif args.command == "run":
+        try:
+            run_queue(args.workers, args.once)
+        except RuntimeError as e:
+            print(f"✗ {e}")
+            sys.exit(1)
+        print(f"\nTotal queue run time: {time.time() - start_time:.2f} seconds")
+    else:
+        print_status(args.limit)
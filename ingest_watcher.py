@@ -0,0 +1,168 @@
+import os
+import sys
+import time
+import hashlib
+import argparse
+from dotenv import load_dotenv
+import create_database
+import data_insertion
+import ingest_queue
+from extract_data import WORKBOOK_DATAFRAMES
+
+load_dotenv()
+
+STUDY_FILES_DIR = os.path.join(os.getcwd(), "Study Files")
+
+# Seconds between scans of Study Files, and how long a workbook must stay unchanged before it
+# is read (sponsor drops copy large files in over several seconds)
+WATCH_POLL_SECONDS = float(os.getenv("INGEST_WATCH_POLL_SECONDS", "10"))
+WATCH_SETTLE_SECONDS = float(os.getenv("INGEST_WATCH_SETTLE_SECONDS", "5"))
+
+# Stat of workbooks that failed to extract, not retried until the file changes again
+_failed = {}
+
+def file_sha256(path):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_fingerprints(conn):
+    """Fingerprints of the workbooks as last ingested: (study, workbook) -> (size, mtime_ns, sha256)"""
+    return {
+        (project_name, workbook): (size, mtime_ns, sha256)
+        for project_name, workbook, size, mtime_ns, sha256 in conn.execute(
+            "SELECT project_name, workbook, size, mtime_ns, sha256 FROM workbook_fingerprints"
+        )
+    }
+
+def scan_study(study_name, fingerprints, settle_seconds):
+    """
+    Compare a study folder with the fingerprints. Returns the new fingerprints of the changed
+    workbooks and of those only touched (same contents), or None when the study cannot be
+    ingested yet (a workbook is missing or still being written).
+    """
+    base_dir = os.path.join(STUDY_FILES_DIR, study_name)
+    changed, touched = {}, {}
+    for workbook in WORKBOOK_DATAFRAMES:
+        path = os.path.join(base_dir, workbook)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        known = fingerprints.get((study_name, workbook))
+        if known and known[:2] == (stat.st_size, stat.st_mtime_ns):
+            continue
+        if time.time() - stat.st_mtime < settle_seconds:
+            return None
+        if _failed.get((study_name, workbook)) == (stat.st_size, stat.st_mtime_ns):
+            return None
+        fingerprint = (stat.st_size, stat.st_mtime_ns, file_sha256(path))
+        if known and known[2] == fingerprint[2]:
+            touched[workbook] = fingerprint
+        else:
+            changed[workbook] = fingerprint
+    return changed, touched
+
+def save_fingerprints(conn, study_name, fingerprints):
+    """Record the fingerprints of the workbooks just ingested (or found unchanged)"""
+    conn.executemany(
+        """INSERT INTO workbook_fingerprints (project_name, workbook, size, mtime_ns, sha256, ingested_at)
+           VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+           ON CONFLICT(project_name, workbook) DO UPDATE SET
+               size = excluded.size, mtime_ns = excluded.mtime_ns, sha256 = excluded.sha256,
+               ingested_at = excluded.ingested_at""",
+        [(study_name, workbook, *fingerprint) for workbook, fingerprint in fingerprints.items()]
+    )
+    conn.commit()
+
+def watch_once(settle_seconds=WATCH_SETTLE_SECONDS):
+    """
+    Scan Study Files once and queue the changed workbooks of each study (ingest_queue.py),
+    then drain the queue: the runner replaces only the tables built from those workbooks,
+    runs DQI once and publishes. Returns the studies ingested.
+    """
+    if not os.path.isdir(STUDY_FILES_DIR):
+        return []
+    conn = data_insertion.get_db_connection()
+    try:
+        create_database.create_metadata_tables(conn.cursor())
+        fingerprints = load_fingerprints(conn)
+        pending = {}
+        for study_name in sorted(os.listdir(STUDY_FILES_DIR)):
+            if not os.path.isdir(os.path.join(STUDY_FILES_DIR, study_name)):
+                continue
+            scan = scan_study(study_name, fingerprints, settle_seconds)
+            if scan is None:
+                continue
+            changed, touched = scan
+            if touched:
+                save_fingerprints(conn, study_name, touched)
+            if changed:
+                print(f"\n→ {study_name}: {', '.join(changed)} changed")
+                pending[study_name] = changed
+        if not pending:
+            return []
+
+        study_names = list(pending)
+        job_ids = ingest_queue.submit(study_names, {name: list(changed) for name, changed in pending.items()})
+        rows = ingest_queue.drain(job_ids, data_conn=conn)
+
+        ingested = []
+        for _, study_name, status, error in rows:
+            changed = pending[study_name]
+            if status == 'failed':
+                for workbook, fingerprint in changed.items():
+                    _failed[(study_name, workbook)] = fingerprint[:2]
+                print(f"✗ {study_name}: ingest failed, waiting for the files to change again: {error}")
+                continue
+            # A superseded job's files were read by the newer job of the same study
+            save_fingerprints(conn, study_name, changed)
+            for workbook in changed:
+                _failed.pop((study_name, workbook), None)
+            ingested.append(study_name)
+        if ingested:
+            print(f"✓ {', '.join(ingested)} ingested and published")
+        return ingested
+    finally:
+        conn.close()
+
+def watch(interval=WATCH_POLL_SECONDS, settle_seconds=WATCH_SETTLE_SECONDS, once=False):
+    """Ingest changed workbooks every interval seconds until interrupted (one watcher at a time)"""
+    db_dir = os.path.dirname(data_insertion.DB_PATH)
+    if not os.path.exists(db_dir):
+        os.makedirs(db_dir)
+    if not os.path.exists(data_insertion.DB_PATH):
+        create_database.create_database()
+
+    watcher_lock = ingest_queue.acquire_runner_lock(data_insertion.DB_PATH + ".watch.lock", role="Study Files watcher")
+    print(f"Watching {STUDY_FILES_DIR} every {interval:g}s (pid {os.getpid()})")
+    try:
+        while True:
+            watch_once(settle_seconds)
+            if once:
+                break
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\nWatcher stopped")
+    finally:
+        ingest_queue.release_runner_lock(watcher_lock)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Watch Study Files and ingest new or modified workbooks")
+    parser.add_argument("--interval", type=float, default=WATCH_POLL_SECONDS,
+                        help=f"Seconds between scans (default: {WATCH_POLL_SECONDS:g})")
+    parser.add_argument("--settle", type=float, default=WATCH_SETTLE_SECONDS,
+                        help=f"Seconds a workbook must be unchanged before it is read (default: {WATCH_SETTLE_SECONDS:g})")
+    parser.add_argument("--once", action="store_true", help="Scan once and exit")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    try:
+        watch(args.interval, args.settle, args.once)
+    except RuntimeError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+    print(f"\nTotal watch time: {time.time() - start_time:.2f} seconds")
@@ -0,0 +1,182 @@
+import os
+import sys
+import json
+import time
+import signal
+import platform
+import traceback
+import contextlib
+from dotenv import load_dotenv
+import create_database
+import data_insertion
+import ingest_queue
+
+load_dotenv()
+
+# Line-delimited JSON over stdin/stdout. Requests:
+#   {"id": "1", "command": "ingest", "study": "Study 1"}
+#   {"id": "1", "command": "ingest", "studies": ["Study 1", "Study 2"]}   (one DQI pass at the end)
+# Ingests go through the ingest queue (ingest_queue.py): while a standalone runner or the
+# watcher holds the runner lock, the worker waits for it to write the queued studies.
+#   {"id": "2", "command": "create_database"}
+#   {"id": "3", "command": "ping"}
+#   {"id": "4", "command": "shutdown"}
+# Every request gets "progress" events followed by one "done" event with the same id; ingest
+# progress is one event per study and queue job status (step: queued, extracting, inserted, dqi,
+# done, failed or superseded, see STEP_MESSAGES). The worker announces itself with a "ready" event. Pipeline output goes to stderr. The worker
+# stops after "shutdown" or at the end of its input, once the server is gone.
+COMMANDS = ('ingest', 'create_database', 'ping', 'shutdown')
+
+STEP_MESSAGES = {
+    'queued': "waiting for the ingest queue",
+    'extracting': "extracting",
+    'inserted': "inserted, waiting for DQI",
+    'dqi': "calculating DQI and Clean Status",
+    'done': "done",
+    'failed': "failed",
+    'superseded': "superseded by a newer upload",
+}
+
+_protocol = sys.stdout
+_state = {'conn': None, 'db_id': None}
+
+def send(event, request_id=None, **fields):
+    """Write one protocol event to stdout"""
+    message = {'id': request_id, 'event': event, **fields}
+    _protocol.write(json.dumps(message, default=str) + "\n")
+    _protocol.flush()
+
+def database_id():
+    """Device and inode of the database file, None when it does not exist"""
+    try:
+        stat = os.stat(data_insertion.DB_PATH)
+    except FileNotFoundError:
+        return None
+    return (stat.st_dev, stat.st_ino)
+
+def get_connection():
+    """The worker's warm connection, reopened when the database file was replaced or removed"""
+    current_id = database_id()
+    if _state['conn'] is not None and _state['db_id'] == current_id and current_id is not None:
+        return _state['conn']
+    close_connection()
+    _state['conn'] = data_insertion.get_db_connection()
+    _state['db_id'] = database_id()
+    return _state['conn']
+
+def close_connection():
+    """Close the warm connection, if open"""
+    if _state['conn'] is not None:
+        _state['conn'].close()
+        _state['conn'] = None
+        _state['db_id'] = None
+
+def ingest_studies(request_id, study_names):
+    """
+    Queue the studies and drain the queue on the warm connection (ingest_queue.py), so
+    dashboard uploads never write alongside the watcher or a standalone runner. The runner
+    replaces each study's rows, then calculates DQI and Clean Status once and publishes.
+    """
+    for study_name in study_names:
+        if not os.path.isdir(os.path.join(os.getcwd(), "Study Files", study_name)):
+            raise FileNotFoundError(f"Study folder not found: Study Files/{study_name}")
+
+    job_ids = ingest_queue.submit(study_names)
+
+    def on_status(job_id, study_name, status, error=None):
+        # The runner reports every job it processes, including other submitters' ones
+        if job_id in job_ids:
+            message = f"{study_name}: {STEP_MESSAGES[status]}" + (f" ({error})" if error else "")
+            send('progress', request_id, step=status, study=study_name, job=job_id, message=message)
+
+    conn = get_connection()
+    rows = ingest_queue.drain(job_ids, data_conn=conn, on_status=on_status)
+
+    results = []
+    failed = []
+    for job_id, study_name, status, error in rows:
+        if status == 'failed':
+            failed.append({'study': study_name, 'job': job_id, 'error': error})
+            continue
+        # Superseded jobs were written by the newer job of the same study
+        subjects = conn.execute(
+            "SELECT COUNT(*) FROM subject_level_metrics WHERE project_name = ?", (study_name,)
+        ).fetchone()[0]
+        results.append({'study': study_name, 'job': job_id, 'status': status, 'subjects': subjects})
+
+    if not results:
+        raise RuntimeError("; ".join(f"{f['study']}: {f['error']}" for f in failed))
+
+    generation = conn.execute(
+        "SELECT MAX(generation) FROM data_generation WHERE project_name IN ({})".format(
+            ", ".join("?" for _ in results)),
+        [result['study'] for result in results]
+    ).fetchone()[0]
+    return {
+        'studies': results,
+        'failed': failed,
+        'subjects': sum(result['subjects'] for result in results),
+        'generation': generation,
+        'database': data_insertion.DB_PATH,
+    }
+
+def handle(request):
+    """Run one request and report its outcome; returns False when the worker should stop"""
+    request_id = request.get('id')
+    command = request.get('command')
+    if command not in COMMANDS:
+        send('done', request_id, success=False, error=f"Unknown command {command!r}, expected one of {COMMANDS}")
+        return True
+
+    start_time = time.time()
+    try:
+        if command == 'ingest':
+            study_names = request.get('studies') or ([request['study']] if request.get('study') else [])
+            if not study_names:
+                raise ValueError("ingest needs a 'study' or 'studies'")
+            result = ingest_studies(request_id, list(dict.fromkeys(study_names)))
+        elif command == 'create_database':
+            send('progress', request_id, step='create_database', message="Creating database schema")
+            db_dir = os.path.dirname(create_database.DB_PATH)
+            if not os.path.exists(db_dir):
+                os.makedirs(db_dir)
+            create_database.create_database()
+            result = {'database': create_database.DB_PATH}
+        else:
+            result = {}
+    except Exception as e:
+        traceback.print_exc()
+        # A failed transaction can leave the connection unusable, start over on the next job
+        close_connection()
+        send('done', request_id, success=False, error=str(e), elapsed_s=round(time.time() - start_time, 3))
+        return True
+
+    # A batch with some failed studies still inserted (and scored) the others
+    success = not result.get('failed')
+    error = "; ".join(f"{f['study']}: {f['error']}" for f in result.get('failed', [])) or None
+    send('done', request_id, success=success, error=error, elapsed_s=round(time.time() - start_time, 3), **result)
+    return command != 'shutdown'
+
+def serve():
+    """Read requests from stdin until shutdown or end of input"""
+    send('ready', pid=os.getpid(), python=platform.python_version(), database=data_insertion.DB_PATH)
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            send('done', None, success=False, error=f"Invalid JSON: {e}")
+            continue
+        if not handle(request):
+            break
+    close_connection()
+
+if __name__ == "__main__":
+    # Ctrl+C in the server's terminal reaches the worker too; the server stops it with
+    # "shutdown" instead, so an ingest is never interrupted mid-transaction
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Pipeline prints would corrupt the protocol stream, send them to stderr
+    with contextlib.redirect_stdout(sys.stderr):
+        serve()
@@ -0,0 +1,208 @@
+import os
+import json
+import time
+import atexit
+import sqlite3
+import threading
+import functools
+import contextlib
+from datetime import datetime
+import psutil
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Span output, both off unless set: one JSON object per span, and a Prometheus textfile
+# (for node_exporter's textfile collector) rewritten at exit with per-span totals
+PIPELINE_METRICS_FILE = os.getenv("PIPELINE_METRICS_FILE", "")
+PIPELINE_PROMETHEUS_FILE = os.getenv("PIPELINE_PROMETHEUS_FILE", "")
+
+_config = {
+    'metrics_file': PIPELINE_METRICS_FILE,
+    'prometheus_file': PIPELINE_PROMETHEUS_FILE,
+    'enabled': bool(PIPELINE_METRICS_FILE or PIPELINE_PROMETHEUS_FILE),
+}
+_context = {}
+_local = threading.local()
+_lock = threading.Lock()
+_process = psutil.Process()
+_run_id = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+_totals = {}
+
+def configure(metrics_file=None, prometheus_file=None):
+    """Set the span outputs at runtime (overrides the environment); no outputs disables spans"""
+    _config['metrics_file'] = metrics_file or ""
+    _config['prometheus_file'] = prometheus_file or ""
+    _config['enabled'] = bool(metrics_file or prometheus_file)
+
+def is_enabled():
+    """Whether spans are being recorded"""
+    return _config['enabled']
+
+def set_context(**attributes):
+    """Attributes added to every following span (e.g. the study being processed); None removes one"""
+    for key, value in attributes.items():
+        if value is None:
+            _context.pop(key, None)
+        else:
+            _context[key] = value
+
+def collect_frames(value):
+    """DataFrames in a value, looking inside dicts, lists and tuples"""
+    if isinstance(value, pd.DataFrame):
+        return [value]
+    if isinstance(value, dict):
+        value = list(value.values())
+    if isinstance(value, (list, tuple)):
+        return [df for item in value for df in collect_frames(item)]
+    return []
+
+def count_rows(value):
+    """Total rows of the DataFrames in a value, None when it holds none"""
+    frames = collect_frames(value)
+    return sum(len(df) for df in frames) if frames else None
+
+def dataframe_bytes(value):
+    """Total deep memory usage of the DataFrames in a value, None when it holds none"""
+    frames = collect_frames(value)
+    return sum(int(df.memory_usage(deep=True).sum()) for df in frames) if frames else None
+
+def set_span_rows(rows_in=None, rows_out=None):
+    """Report row counts from inside a span whose arguments and result carry no DataFrames"""
+    stack = getattr(_local, 'stack', None)
+    if not stack:
+        return
+    if rows_in is not None:
+        stack[-1]['rows_in'] = rows_in
+    if rows_out is not None:
+        stack[-1]['rows_out'] = rows_out
+
+@contextlib.contextmanager
+def span(name, **attributes):
+    """Time a block and record wall/CPU time, rows and memory as one span"""
+    if not _config['enabled']:
+        yield {}
+        return
+
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    record = {
+        'run_id': _run_id,
+        'span': name,
+        'parent': stack[-1]['span'] if stack else None,
+        'depth': len(stack),
+        'thread': threading.current_thread().name,
+        'start': datetime.now().isoformat(timespec='milliseconds'),
+        **_context,
+        **attributes,
+        'rows_in': None,
+        'rows_out': None,
+    }
+    stack.append(record)
+    rss_start = _process.memory_info().rss
+    start_wall = time.perf_counter()
+    # Thread CPU time, extraction spans run in pool threads
+    start_cpu = time.thread_time()
+    record['status'] = 'ok'
+    try:
+        yield record
+    except Exception as e:
+        record['status'] = 'error'
+        record['error'] = str(e)
+        raise
+    finally:
+        record['wall_s'] = round(time.perf_counter() - start_wall, 6)
+        record['cpu_s'] = round(time.thread_time() - start_cpu, 6)
+        rss = _process.memory_info().rss
+        record['rss_bytes'] = rss
+        record['rss_delta_bytes'] = rss - rss_start
+        stack.pop()
+        emit(record)
+
+def instrument(func=None, *, name=None):
+    """
+    Decorator wrapping a pipeline function in a span. Rows in/out and DataFrame memory are
+    taken from DataFrame arguments and results; for functions writing through a connection
+    passed first, rows out is the number of rows the call changed.
+    """
+    if func is None:
+        return functools.partial(instrument, name=name)
+    span_name = name or func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _config['enabled']:
+            return func(*args, **kwargs)
+
+        inputs = [a for a in list(args) + list(kwargs.values()) if not isinstance(a, sqlite3.Connection)]
+        conn = args[0] if args and isinstance(args[0], sqlite3.Connection) else None
+        changes_before = conn.total_changes if conn is not None else None
+
+        with span(span_name) as record:
+            record['rows_in'] = count_rows(inputs)
+            record['df_bytes_in'] = dataframe_bytes(inputs)
+            result = func(*args, **kwargs)
+            rows_out = count_rows(result)
+            if rows_out is not None:
+                record['rows_out'] = rows_out
+                record['df_bytes_out'] = dataframe_bytes(result)
+            elif conn is not None and record['rows_out'] is None:
+                record['rows_out'] = conn.total_changes - changes_before
+        return result
+
+    return wrapper
+
+def emit(record):
+    """Append a finished span to the JSON-lines file and the Prometheus totals"""
+    with _lock:
+        if _config['metrics_file']:
+            with open(_config['metrics_file'], "a") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+
+        if _config['prometheus_file']:
+            totals = _totals.setdefault(record['span'], {
+                'seconds': 0.0, 'cpu_seconds': 0.0, 'calls': 0, 'errors': 0,
+                'rows_in': 0, 'rows_out': 0, 'rss_bytes': 0, 'df_bytes': 0,
+            })
+            totals['seconds'] += record['wall_s']
+            totals['cpu_seconds'] += record['cpu_s']
+            totals['calls'] += 1
+            totals['errors'] += record['status'] == 'error'
+            totals['rows_in'] += record['rows_in'] or 0
+            totals['rows_out'] += record['rows_out'] or 0
+            totals['rss_bytes'] = record['rss_bytes']
+            totals['df_bytes'] = max(record.get('df_bytes_out') or 0, record.get('df_bytes_in') or 0)
+
+def write_prometheus(path=None):
+    """Write per-span totals to a Prometheus textfile (atomically, via prometheus_client)"""
+    path = path or _config['prometheus_file']
+    if not path or not _totals:
+        return
+    from prometheus_client import CollectorRegistry, Gauge, write_to_textfile
+
+    registry = CollectorRegistry()
+    metrics = {
+        'seconds': Gauge('edc_pipeline_span_seconds', 'Wall time spent in the span', ['span'], registry=registry),
+        'cpu_seconds': Gauge('edc_pipeline_span_cpu_seconds', 'Thread CPU time spent in the span', ['span'],
+                             registry=registry),
+        'calls': Gauge('edc_pipeline_span_calls', 'Times the span ran', ['span'], registry=registry),
+        'errors': Gauge('edc_pipeline_span_errors', 'Times the span raised', ['span'], registry=registry),
+        'rows_in': Gauge('edc_pipeline_span_rows_in', 'Rows passed into the span', ['span'], registry=registry),
+        'rows_out': Gauge('edc_pipeline_span_rows_out', 'Rows returned or written by the span', ['span'],
+                          registry=registry),
+        'rss_bytes': Gauge('edc_pipeline_span_rss_bytes', 'Process RSS when the span last finished', ['span'],
+                           registry=registry),
+        'df_bytes': Gauge('edc_pipeline_span_dataframe_bytes', 'DataFrame memory of the last call', ['span'],
+                          registry=registry),
+    }
+    with _lock:
+        for span_name, totals in _totals.items():
+            for key, gauge in metrics.items():
+                gauge.labels(span=span_name).set(totals[key])
+    Gauge('edc_pipeline_last_run_timestamp_seconds', 'When the pipeline run finished',
+          registry=registry).set(time.time())
+    write_to_textfile(path, registry)
+
+atexit.register(write_prometheus)
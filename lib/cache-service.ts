@@ -1,28 +1,74 @@
 import { DashboardContext } from "@/types/dashboard-context";
+import { getDataGenerations, getLatestDataGeneration } from "@/database/db";
 
 interface CacheEntry {
     context: DashboardContext;
     expiresAt: Date;
     createdAt: Date;
+    generation: number | null; // Data generation the context's oldest data was read at
 }
 
 // In-memory cache (for development - use Redis in production)
 const cache = new Map<string, CacheEntry>();
 
-// Configuration
+// Configuration. Entries are invalidated as soon as an ingest publishes data for their
+// studies newer than the data they were built from.
 const CACHE_TTL_MINUTES =
     parseInt(process.env.CACHE_TTL_MINUTES || "15", 10) || 15;
 const MAX_CACHE_SIZE = 1000; // Maximum number of sessions to cache
 
 /**
- * Store dashboard context in cache
+ * Whether a context built from data read at a data generation misses newer data: an ingest
+ * published its study (any study for "ALL") since, or the database was rebuilt (the
+ * shared counter went back). False when the generations cannot be read (no database yet),
+ * in which case entries fall back to the TTL alone.
+ * @param studyId - Study filter of a dashboard context
+ * @param generation - Data generation the context's oldest data was read at
+ */
+function isOutdated(studyId: string, generation: number | null): boolean {
+    if (generation === null) {
+        return false;
+    }
+    try {
+        const generations = getDataGenerations();
+        const latest = Math.max(0, ...generations.values());
+        const scope = studyId === "ALL" ? latest : generations.get(studyId) ?? 0;
+        return scope > generation || latest < generation;
+    } catch (error) {
+        console.warn("[Cache] Could not read data generations:", error);
+        return false;
+    }
+}
+
+/**
+ * Data generation of a context's data: the oldest one its data sources reported, or the
+ * current one for contexts that do not carry it. Null when it cannot be read.
+ * @param context - Dashboard context to cache
+ */
+function getContextGeneration(context: DashboardContext): number | null {
+    if (typeof context.metadata?.dataGeneration === "number") {
+        return context.metadata.dataGeneration;
+    }
+    try {
+        return getLatestDataGeneration();
+    } catch (error) {
+        console.warn("[Cache] Could not read data generations:", error);
+        return null;
+    }
+}
+
+/**
+ * Store dashboard context in cache. A context built from data older than the current
+ * data generation of its studies is not stored (and replaces nothing): some of its data
+ * predates an ingest, and the dashboard posts it again once that data is refetched.
  * @param sessionId - Unique session identifier
  * @param context - Dashboard context to cache
+ * @returns Whether the context was stored
  */
 export function setCachedContext(
     sessionId: string,
     context: DashboardContext,
-): void {
+): boolean {
     // Clean up expired entries if cache is getting large
     if (cache.size > MAX_CACHE_SIZE) {
         cleanupExpiredEntries();
@@ -31,15 +77,25 @@ export function setCachedContext(
     const now = new Date();
     const expiresAt = new Date(now.getTime() + CACHE_TTL_MINUTES * 60 * 1000);
 
+    const generation = getContextGeneration(context);
+    if (isOutdated(context.filters.studyId, generation)) {
+        cache.delete(sessionId);
+        console.log(
+            `[Cache] Rejected context for session ${sessionId.substring(0, 8)}... (data generation ${generation} outdated)`,
+        );
+        return false;
+    }
     cache.set(sessionId, {
         context,
         expiresAt,
         createdAt: now,
+        generation,
     });
 
     console.log(
-        `[Cache] Stored context for session ${sessionId.substring(0, 8)}... (expires in ${CACHE_TTL_MINUTES}min)`,
+        `[Cache] Stored context for session ${sessionId.substring(0, 8)}... (generation ${generation ?? "unknown"}, expires in ${CACHE_TTL_MINUTES}min)`,
     );
+    return true;
 }
 
 /**
@@ -68,6 +124,15 @@ export function getCachedContext(
         return null;
     }
 
+    // Check if an ingest published newer data for the context's studies
+    if (isOutdated(entry.context.filters.studyId, entry.generation)) {
+        console.log(
+            `[Cache] Context for session ${sessionId.substring(0, 8)}... outdated (built from data generation ${entry.generation})`,
+        );
+        cache.delete(sessionId);
+        return null;
+    }
+
     console.log(
         `[Cache] Retrieved context for session ${sessionId.substring(0, 8)}...`,
     );
@@ -85,6 +150,31 @@ export function deleteCachedContext(sessionId: string): void {
     );
 }
 
+/**
+ * Delete cached contexts covering any of the given studies (including "ALL" contexts),
+ * e.g. right after they were imported
+ * @param studyNames - Studies whose data changed
+ * @returns Number of entries deleted
+ */
+export function invalidateStudies(studyNames: string[]): number {
+    let deletedCount = 0;
+
+    for (const [sessionId, entry] of cache.entries()) {
+        const studyId = entry.context.filters.studyId;
+        if (studyId === "ALL" || studyNames.includes(studyId)) {
+            cache.delete(sessionId);
+            deletedCount++;
+        }
+    }
+
+    if (deletedCount > 0) {
+        console.log(
+            `[Cache] Invalidated ${deletedCount} entries for ${studyNames.join(", ")}`,
+        );
+    }
+    return deletedCount;
+}
+
 /**
  * Get cache age in minutes
  * @param sessionId - Unique session identifier
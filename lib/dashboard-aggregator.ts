@@ -6,6 +6,8 @@ import { FilterState } from "@/types";
  * @param filters - Current filter state
  * @param data - All dashboard data from various APIs
  * @param sessionId - Session identifier
+ * @param loadingStates - Loading flag of each data source
+ * @param dataGeneration - Data generation of the oldest data (see DATA_GENERATION_HEADER)
  * @returns Complete dashboard context
  */
 export function aggregateDashboardContext(
@@ -34,6 +36,7 @@ export function aggregateDashboardContext(
         loadingSitePerformance: boolean;
         loadingSubjectOverview: boolean;
     },
+    dataGeneration: number | null = null,
 ): DashboardContext {
     // Determine data quality based on loading states
     const anyLoading = Object.values(loadingStates).some((loading) => loading);
@@ -74,6 +77,7 @@ export function aggregateDashboardContext(
             totalSites: data.sitePerformance?.length || 0,
             dataQuality,
             loadedAt: new Date().toISOString(),
+            dataGeneration,
         },
     };
 
@@ -1,13 +1,18 @@
 import os
 import sys
 import time
+import argparse
+import contextlib
 from pathlib import Path
 from dotenv import load_dotenv
 from extract_data import extract_all_data
 from fill_missing_values import fill_all_missing_data, populate_site_id_in_esae
 from create_database import create_database, verify_database
-from data_insertion import insert_all_data, verify_insertion
+from data_insertion import insert_all_data, verify_insertion, publish_generation, get_db_connection, bulk_load
 from dqi_clean_status_cal import calculate_all_dqi_and_clean_status, verify_dqi_clean_status
+from db_maintenance import run_maintenance, print_report, optimize_database
+from instrumentation import set_context
+from profiling import configure as configure_profiling, profile, print_summary
 
 load_dotenv()
 
@@ -32,6 +37,7 @@ def get_all_studies():
 def process_single_study(study_name):
     """Process a single study: extract, fill, and prepare for insertion"""
     print(f"\nProcessing study: {study_name}")
+    set_context(study=study_name)
     
     # Step 1: Extract data
     print("  → Extracting data...")
@@ -113,8 +119,14 @@ def test_single_study(project_name):
     except Exception as e:
         print(f"✗ Error testing study '{project_name}': {str(e)}")
 
-def main():
-    """Main workflow to process all studies and create consolidated database"""
+def main(bulk=False, maintenance=False):
+    """
+    Main workflow to process all studies and create consolidated database. With bulk, the
+    studies are loaded through one connection without index maintenance, rows sorted by
+    subject, and the indexes built once at the end (data_insertion.bulk_load). The WAL is
+    checkpointed and statistics refreshed after the publish; with maintenance, the file is
+    also compacted if needed.
+    """
     print("="*70)
     print("EDC METRICS DATA PROCESSING - CONSOLIDATED WORKFLOW")
     print("="*70)
@@ -152,7 +164,8 @@ def main():
     
     for study_name in studies:
         try:
-            dataframes, filled_subject_metrics = process_single_study(study_name)
+            with profile(study_name):
+                dataframes, filled_subject_metrics = process_single_study(study_name)
             all_study_data.append({
                 'study_name': study_name,
                 'dataframes': dataframes,
@@ -168,17 +181,26 @@ def main():
     print("STEP 3: Inserting Data into Database")
     print("="*70)
     
-    total_inserted = 0
-    for study_data in all_study_data:
-        study_name = study_data['study_name']
-        print(f"\nInserting data for study: {study_name}")
-        try:
-            insert_all_data(study_data['dataframes'], study_data['filled_subject_metrics'])
-            total_inserted += 1
-            print(f"✓ Study '{study_name}' data inserted successfully")
-        except Exception as e:
-            print(f"✗ Error inserting data for study '{study_name}': {str(e)}")
-            continue
+    inserted_studies = []
+    conn = get_db_connection() if bulk else None
+    try:
+        with bulk_load(conn) if bulk else contextlib.nullcontext():
+            for study_data in all_study_data:
+                study_name = study_data['study_name']
+                print(f"\nInserting data for study: {study_name}")
+                set_context(study=study_name)
+                try:
+                    with profile(study_name):
+                        insert_all_data(study_data['dataframes'], study_data['filled_subject_metrics'],
+                                        conn=conn, sort_rows=bulk)
+                    inserted_studies.append(study_name)
+                    print(f"✓ Study '{study_name}' data inserted successfully")
+                except Exception as e:
+                    print(f"✗ Error inserting data for study '{study_name}': {str(e)}")
+                    continue
+    finally:
+        if conn is not None:
+            conn.close()
     
     # Step 4: Verify database
     print("\n" + "="*70)
@@ -190,7 +212,19 @@ def main():
     print("\n" + "="*70)
     print("STEP 5: Calculating DQI and Clean Status")
     print("="*70)
-    calculate_all_dqi_and_clean_status()
+    set_context(study=None)
+    with profile("DQI"):
+        calculate_all_dqi_and_clean_status()
+    if inserted_studies:
+        generation = publish_generation(inserted_studies)
+        print(f"✓ Data generation {generation} published for {len(inserted_studies)} studies")
+        # Fresh planner statistics and a truncated WAL for the dashboard's read-only connection
+        conn = get_db_connection()
+        try:
+            if not optimize_database(conn):
+                print("⚠ WAL partly checkpointed (a reader is still using it)")
+        finally:
+            conn.close()
     
     # Step 6: Verify DQI and Clean Status
     print("\n" + "="*70)
@@ -198,22 +232,43 @@ def main():
     print("="*70)
     verify_dqi_clean_status()
     
+    # Step 7: Compaction (the checkpoint and ANALYZE ran after the publish)
+    if maintenance:
+        print("\n" + "="*70)
+        print("STEP 7: Database Maintenance")
+        print("="*70)
+        with profile("maintenance"):
+            print_report(run_maintenance(DB_PATH, optimize=False))
+    
     # Summary
     print("\n" + "="*70)
     print("PROCESSING SUMMARY")
     print("="*70)
     print(f"Total studies found: {len(studies)}")
     print(f"Studies processed successfully: {len(all_study_data)}")
-    print(f"Studies inserted into database: {total_inserted}")
+    print(f"Studies inserted into database: {len(inserted_studies)}")
     print(f"Database location: {DB_PATH}")
     print("="*70)
     print("\n✓ ALL OPERATIONS COMPLETED SUCCESSFULLY!")
     print("="*70)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process every study in Study Files into the consolidated database")
+    parser.add_argument("--profile", nargs="?", const="profiles", metavar="DIR",
+                        help="Profile each study (cProfile and sampled stacks) and write the results to DIR "
+                             "(default: profiles)")
+    parser.add_argument("--bulk-load", action="store_true",
+                        help="Full rebuild: defer index builds to the end and insert rows sorted by subject")
+    parser.add_argument("--maintenance", action="store_true",
+                        help="Compact the database after the ingest if needed")
+    args = parser.parse_args()
+    configure_profiling(bool(args.profile))
+
     start_time = time.time()
-    main()
+    main(bulk=args.bulk_load, maintenance=args.maintenance)
     end_time = time.time()
+    if args.profile:
+        print_summary(args.profile)
     print(f"Completed data extraction and insertion in {end_time - start_time} secs!")
 
     # test_single_study(project_name="Study 6")
@@ -0,0 +1,153 @@
+import os
+import sys
+import json
+import time
+import zipfile
+import argparse
+from xml.etree.ElementTree import ParseError
+from extract_data import (WORKBOOK_DATAFRAMES, REQUIRED_COLUMNS, SUBJECT_LEVEL_METRICS_COLUMNS,
+                          HEADER_SEARCH_ROWS, METRICS_HEADER_END, METRICS_HEADER_ROWS, VISIT_PROJECTION_HEADER,
+                          standard_column_name, resolve_columns)
+from xlsx_metadata import read_sheet_paths, read_head_rows, read_shared_strings, cell_text, match_header_row
+
+STUDY_FILES_DIR = os.path.join(os.getcwd(), "Study Files")
+
+# Sheet each dataframe is read from by its extractor (0 = first sheet of the workbook)
+DATAFRAME_SHEETS = {
+    'Subject_Level_Metrics': 0,
+    'Compiled_EDRR': 0,
+    'GlobalCoding_MedDRA': 0,
+    'GlobalCoding_WHODD': 0,
+    'Inactivated_Forms': 0,
+    'Missing_Lab': 0,
+    'All Pages Missing': 0,
+    'Visit_Projection_Tracker': 'Missing Visits',
+}
+
+def check_columns(dataframe_name, headers):
+    """Required columns of a dataframe that none of the headers resolve to"""
+    headers = resolve_columns(dataframe_name, [header for header in headers if header is not None])
+    columns = {standard_column_name(dataframe_name, header) for header in headers}
+    missing = []
+    for required in REQUIRED_COLUMNS.get(dataframe_name, []):
+        alternatives = required if isinstance(required, tuple) else (required,)
+        if not columns.intersection(alternatives):
+            missing.append(" or ".join(f"'{name}'" for name in alternatives))
+    return missing
+
+def check_sheet(dataframe_name, rows, strings):
+    """Problems with the head rows of the sheet a dataframe is read from"""
+    if dataframe_name == 'Subject_Level_Metrics':
+        # Read by position, the header block must span every column
+        header_end = match_header_row(rows, strings, METRICS_HEADER_END)
+        header_rows = rows[:METRICS_HEADER_ROWS if header_end is None else header_end + 1]
+        width = max((max(cells) + 1 for cells in header_rows if cells), default=0)
+        if width != len(SUBJECT_LEVEL_METRICS_COLUMNS):
+            return [f"has {width} columns, expected {len(SUBJECT_LEVEL_METRICS_COLUMNS)}"]
+        return []
+
+    header_row = None
+    if dataframe_name == 'Visit_Projection_Tracker':
+        header_row = match_header_row(rows, strings, VISIT_PROJECTION_HEADER)
+    if header_row is None:
+        # Like read_excel, the header is the first non-empty row
+        header_row = next((index for index, cells in enumerate(rows) if cells), None)
+    if header_row is None:
+        return ["no header row found"]
+    header = [cell_text(cell, strings) for cell in rows[header_row].values()]
+    return [f"missing column {name}" for name in check_columns(dataframe_name, header)]
+
+def preflight_workbook(path, workbook):
+    """Problems found in one workbook (a WORKBOOK_DATAFRAMES key) from its sheet list and head rows"""
+    if not os.path.exists(path):
+        return [f"{workbook}: file not found"]
+    try:
+        with zipfile.ZipFile(path) as zf:
+            sheets = read_sheet_paths(zf)
+            sheet_paths = dict(sheets)
+            names = set(zf.namelist())
+            issues = []
+            heads = {}
+            for dataframe_name in WORKBOOK_DATAFRAMES[workbook]:
+                sheet = DATAFRAME_SHEETS.get(dataframe_name, dataframe_name)
+                if sheet == 0:
+                    sheet, sheet_path = sheets[0] if sheets else (None, None)
+                else:
+                    sheet_path = sheet_paths.get(sheet)
+                if sheet_path not in names:
+                    issues.append(f"{workbook}: sheet '{sheet}' not found" if sheet else f"{workbook}: no sheets")
+                    continue
+                heads[dataframe_name] = (sheet, read_head_rows(zf, sheet_path, HEADER_SEARCH_ROWS))
+            
+            # One pass over the string table for the headers of every sheet
+            strings = read_shared_strings(zf, {
+                int(value) for _, rows in heads.values() for cells in rows
+                for cell_type, value in cells.values() if cell_type == "s"
+            })
+            for dataframe_name, (sheet, rows) in heads.items():
+                issues.extend(f"{workbook} [{sheet}]: {issue}" for issue in check_sheet(dataframe_name, rows, strings))
+            return issues
+    except (zipfile.BadZipFile, KeyError, ParseError) as e:
+        return [f"{workbook}: not a readable .xlsx workbook ({e})"]
+
+def preflight_study(study_dir, files=None, workbooks=None):
+    """
+    Check that a study folder holds every workbook with the sheets and columns extraction needs,
+    reading only workbook metadata and header rows. files maps expected workbook names to the
+    file names actually present (uploads not renamed yet); workbooks limits the check.
+    Returns the problems found (empty when the study can be ingested).
+    """
+    files = files or {}
+    issues = []
+    for workbook in workbooks or WORKBOOK_DATAFRAMES:
+        issues.extend(preflight_workbook(os.path.join(study_dir, files.get(workbook, workbook)), workbook))
+    return issues
+
+def check_study(study_dir, workbooks=None):
+    """Raise ValueError listing the problems preflight_study finds, before any workbook is parsed"""
+    issues = preflight_study(study_dir, workbooks=workbooks)
+    if issues:
+        raise ValueError("Preflight failed: " + "; ".join(issues))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check study folders before extraction (sheet names and header rows only)")
+    parser.add_argument("folders", nargs="*", help="Study folders to check (default: every folder in Study Files)")
+    parser.add_argument("--file", action="append", default=[], metavar="EXPECTED=ACTUAL",
+                        help="Workbook present under another file name, e.g. Compiled_EDRR.xlsx=\"Study 1_EDRR.xlsx\"")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    args = parser.parse_args()
+
+    files = dict(pair.split("=", 1) for pair in args.file)
+    folders = args.folders or [
+        os.path.join(STUDY_FILES_DIR, name) for name in sorted(os.listdir(STUDY_FILES_DIR))
+        if os.path.isdir(os.path.join(STUDY_FILES_DIR, name))
+    ]
+
+    results = []
+    start_time = time.time()
+    for folder in folders:
+        folder_start = time.time()
+        issues = preflight_study(folder, files=files)
+        results.append({
+            "folder": folder,
+            "issues": issues,
+            "elapsed_ms": round((time.time() - folder_start) * 1000, 1),
+        })
+    ok = all(not result["issues"] for result in results)
+
+    if args.json:
+        print(json.dumps({"ok": ok, "studies": results}))
+    else:
+        print("=" * 70)
+        print("PREFLIGHT CHECK")
+        print("=" * 70)
+        for result in results:
+            name = os.path.basename(os.path.normpath(result["folder"]))
+            if result["issues"]:
+                print(f"✗ {name} ({result['elapsed_ms']:.1f} ms)")
+                for issue in result["issues"]:
+                    print(f"    → {issue}")
+            else:
+                print(f"✓ {name} ({result['elapsed_ms']:.1f} ms)")
+        print(f"\nTotal preflight time: {time.time() - start_time:.2f} seconds")
+    sys.exit(0 if ok else 1)
@@ -1,24 +1,50 @@
 import os
 import sys
 import time
+import argparse
 from dotenv import load_dotenv
 from extract_data import extract_all_data
+from preflight_check import check_study
 from fill_missing_values import fill_all_missing_data, populate_site_id_in_esae
-from data_insertion import insert_all_data
+from data_insertion import insert_all_data, get_db_connection, publish_generation
 from dqi_clean_status_cal import calculate_all_dqi_and_clean_status
+from db_maintenance import run_maintenance, print_report, optimize_database
+from instrumentation import set_context
+from profiling import configure as configure_profiling, profile, print_summary
 
 load_dotenv()
 
 # Configuration
 DB_PATH = os.getcwd() + os.getenv("DB_PATH", "/database/edc_metrics.db")
 
-def process_single_study(study_name):
-    """Process a single study: extract, fill, insert data, and calculate DQI"""
+def refresh_statistics(conn=None):
+    """Checkpoint the WAL and refresh the planner statistics after a publish"""
+    own_connection = conn is None
+    if own_connection:
+        conn = get_db_connection()
+    try:
+        if optimize_database(conn):
+            print("  -> WAL checkpointed, planner statistics refreshed")
+        else:
+            print("  -> Planner statistics refreshed, WAL partly checkpointed (a reader is still using it)")
+    finally:
+        if own_connection:
+            conn.close()
+
+def process_single_study(study_name, calculate_dqi=True, conn=None):
+    """
+    Process a single study: extract, fill, insert data, and calculate DQI.
+    Batch runs pass calculate_dqi=False and a shared connection, and calculate DQI once at the end.
+    """
     print("="*70)
     print(f"PROCESSING STUDY: {study_name}")
     print("="*70)
+    set_context(study=study_name)
     
     try:
+        # Missing workbooks, sheets or columns fail here instead of after a full parse
+        check_study(os.path.join(os.getcwd(), "Study Files", study_name))
+        
         # Step 1: Extract data
         print(f"\nStep 1: Extracting data from {study_name}...")
         start_time = time.time()
@@ -42,14 +68,21 @@ def process_single_study(study_name):
         # Step 4: Insert data into database
         print(f"\nStep 4: Inserting data into database...")
         start_time = time.time()
-        insert_all_data(dataframes, filled_subject_metrics)
+        # Replacing the study's rows keeps reruns of a study, batch or manifest from duplicating them
+        insert_all_data(dataframes, filled_subject_metrics, conn=conn, replace_study=study_name)
         print(f"  -> Data inserted successfully ({time.time() - start_time:.2f}s)")
         
         # Step 5: Calculate DQI and Clean Status (for all subjects)
-        print(f"\nStep 5: Calculating DQI and Clean Status...")
-        start_time = time.time()
-        calculate_all_dqi_and_clean_status()
-        print(f"  -> DQI calculation completed ({time.time() - start_time:.2f}s)")
+        if calculate_dqi:
+            print(f"\nStep 5: Calculating DQI and Clean Status...")
+            start_time = time.time()
+            calculate_all_dqi_and_clean_status(conn)
+            print(f"  -> DQI calculation completed ({time.time() - start_time:.2f}s)")
+            generation = publish_generation([study_name], conn=conn)
+            print(f"  -> Data generation {generation} published")
+            refresh_statistics(conn)
+        else:
+            print("\nStep 5: DQI and Clean Status deferred until all studies are inserted")
         
         print("\n" + "="*70)
         print(f"SUCCESS: Study '{study_name}' processed successfully!")
@@ -69,19 +102,88 @@ def process_single_study(study_name):
         traceback.print_exc()
         return False
 
+def process_studies(study_names):
+    """
+    Process several studies in one run. Each study is inserted in its own transaction;
+    DQI and Clean Status are calculated once, after the last study.
+    Returns the names of the studies that failed.
+    """
+    conn = get_db_connection()
+    failed = []
+    try:
+        for i, study_name in enumerate(study_names, 1):
+            print(f"\n[{i}/{len(study_names)}]")
+            with profile(study_name):
+                if not process_single_study(study_name, calculate_dqi=False, conn=conn):
+                    failed.append(study_name)
+        
+        if len(failed) < len(study_names):
+            print("\n" + "="*70)
+            print(f"Calculating DQI and Clean Status for {len(study_names) - len(failed)} new studies...")
+            print("="*70)
+            start_time = time.time()
+            set_context(study=None)
+            with profile("DQI"):
+                calculate_all_dqi_and_clean_status(conn)
+            print(f"  -> DQI calculation completed ({time.time() - start_time:.2f}s)")
+            generation = publish_generation([name for name in study_names if name not in failed], conn=conn)
+            print(f"  -> Data generation {generation} published")
+            refresh_statistics(conn)
+    finally:
+        conn.close()
+    
+    print("\n" + "="*70)
+    print(f"BATCH SUMMARY: {len(study_names) - len(failed)} of {len(study_names)} studies processed")
+    for study_name in study_names:
+        print(f"  {'✗' if study_name in failed else '✓'} {study_name}")
+    print("="*70)
+    return failed
+
+def read_manifest(path):
+    """Study names from a manifest file: one per line, blank lines and # comments ignored"""
+    with open(path, encoding="utf-8") as f:
+        lines = [line.strip() for line in f]
+    return [line for line in lines if line and not line.startswith("#")]
+
 if __name__ == "__main__":
-    # Get study name from command line argument
-    if len(sys.argv) < 2:
-        print("Usage: python process_single_study.py <study_name>")
-        print("Example: python process_single_study.py 'Study 1'")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Process one or more studies: extract, fill, insert data, and calculate DQI")
+    parser.add_argument("study_names", nargs="*", metavar="study_name",
+                        help="Study folders under 'Study Files', e.g. 'Study 1'")
+    parser.add_argument("--manifest", help="File listing study names, one per line")
+    parser.add_argument("--profile", nargs="?", const="profiles", metavar="DIR",
+                        help="Profile the run (cProfile and sampled stacks) and write the results to DIR "
+                             "(default: profiles)")
+    parser.add_argument("--maintenance", action="store_true",
+                        help="Compact the database after the ingest if needed")
+    args = parser.parse_args()
+    configure_profiling(bool(args.profile))
     
-    study_name = sys.argv[1]
+    study_names = list(args.study_names)
+    if args.manifest:
+        study_names += read_manifest(args.manifest)
+    # Keep the first occurrence of each study, a study listed twice would be inserted twice
+    study_names = list(dict.fromkeys(study_names))
+    if not study_names:
+        parser.error("give at least one study name or a --manifest")
     
     start_time = time.time()
-    success = process_single_study(study_name)
+    if len(study_names) == 1:
+        with profile(study_names[0]):
+            success = process_single_study(study_names[0])
+        processed = success
+    else:
+        failed = process_studies(study_names)
+        success = not failed
+        processed = len(failed) < len(study_names)
+    
+    # The checkpoint and ANALYZE ran after the publish, compaction only on request
+    if processed and args.maintenance:
+        print()
+        print_report(run_maintenance(DB_PATH, optimize=False))
     end_time = time.time()
     
+    if args.profile:
+        print_summary(args.profile)
     print(f"\nTotal processing time: {end_time - start_time:.2f} seconds")
     
     sys.exit(0 if success else 1)
@@ -0,0 +1,179 @@
+import os
+import re
+import sys
+import cProfile
+import pstats
+import threading
+import functools
+import contextlib
+from collections import Counter
+
+# Interval of the stack sampler behind the collapsed-stack output
+PROFILE_SAMPLE_SECONDS = 0.01
+
+# Functions listed per label in the summary printed after a profiled run
+SUMMARY_TOP = 5
+
+# Blocking waits left out of the summary, where pool workers and the thread waiting on them
+# spend their idle time (they stay in the pstats and collapsed-stack files)
+IDLE_FUNCTIONS = {
+    "<method 'acquire' of '_thread.lock' objects>",
+    "<method 'get' of '_queue.SimpleQueue' objects>",
+}
+
+# Before 3.12 a cProfile.Profile only sees the thread that enabled it, so every thread started
+# inside a profiled block gets its own; from 3.12 one profiler (on sys.monitoring) sees them all
+# and a second one cannot be enabled
+PER_THREAD_PROFILERS = sys.version_info < (3, 12)
+
+_config = {'enabled': False}
+_lock = threading.Lock()
+_profiles = {}
+
+# The profile() block running now: its per-thread profilers and the threads it started
+_active = {'block': None}
+
+def configure(enabled=True):
+    """Turn profiling of the profile() blocks on or off"""
+    _config['enabled'] = enabled
+
+def is_enabled():
+    """Whether profile() blocks are being profiled"""
+    return _config['enabled']
+
+def frame_label(code):
+    """Function name with its module and line, as it appears in collapsed stacks"""
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f"{name} ({module}:{code.co_firstlineno})".replace(";", ",")
+
+def thread_group(thread_name):
+    """Thread name without its counter, so the workers of a pool share one root frame"""
+    return re.sub(r"[-_]?\d+(_\d+)?$", "", thread_name) or "thread"
+
+def sample_stacks(stacks, stop):
+    """Count the current stack of every other thread until stop is set"""
+    own_ident = threading.get_ident()
+    while not stop.wait(PROFILE_SAMPLE_SECONDS):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            frames = []
+            while frame is not None:
+                frames.append(frame_label(frame.f_code))
+                frame = frame.f_back
+            frames.append(thread_group(names.get(ident, "thread")))
+            stacks[";".join(reversed(frames))] += 1
+
+@contextlib.contextmanager
+def profile(label):
+    """
+    Profile a block, including the threads it starts and the extraction pool tasks it submits
+    (profiled_task), with cProfile and a stack sampler. Blocks with the same label (e.g. one study's extract and insert
+    steps) accumulate into one profile.
+    """
+    if not _config['enabled']:
+        yield
+        return
+
+    stacks = Counter()
+    stop = threading.Event()
+    sampler = threading.Thread(target=sample_stacks, args=(stacks, stop), name="profile-sampler", daemon=True)
+    sampler.start()
+
+    thread_profilers = []
+    block = {'profilers': thread_profilers, 'threads': set()}
+
+    def start_thread_profiler(frame, event, arg):
+        # Called on the first event of a new thread, replaced by the thread's own profiler
+        sys.setprofile(None)
+        profiler = cProfile.Profile()
+        with _lock:
+            thread_profilers.append(profiler)
+            block['threads'].add(threading.get_ident())
+        profiler.enable()
+
+    if PER_THREAD_PROFILERS:
+        threading.setprofile(start_thread_profiler)
+    previous_block, _active['block'] = _active['block'], block
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        _active['block'] = previous_block
+        if PER_THREAD_PROFILERS:
+            threading.setprofile(None)
+        stop.set()
+        sampler.join()
+
+        stats = pstats.Stats(profiler)
+        with _lock:
+            for thread_profiler in thread_profilers:
+                stats.add(thread_profiler)
+            existing = _profiles.get(label)
+            if existing is None:
+                _profiles[label] = {'stats': stats, 'stacks': stacks}
+            else:
+                existing['stats'].add(stats)
+                existing['stacks'].update(stacks)
+
+def profiled_task(fn):
+    """
+    fn, profiled under the profile() block active now wherever it runs. For pools whose threads
+    outlive a block (ExtractionPool): only threads started inside a block get its profilers.
+    Returns fn itself outside a profiled block.
+    """
+    block = _active['block']
+    if block is None or not PER_THREAD_PROFILERS:
+        return fn
+
+    @functools.wraps(fn)
+    def run(*args):
+        if threading.get_ident() in block['threads']:
+            return fn(*args)
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return fn(*args)
+        finally:
+            profiler.disable()
+            with _lock:
+                block['profilers'].append(profiler)
+    return run
+
+def write_profiles(output_dir):
+    """Write a pstats dump and collapsed stacks per label, and return the files written"""
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+    with _lock:
+        for label, result in _profiles.items():
+            base = os.path.join(output_dir, re.sub(r"[^\w.-]+", "_", label))
+            result['stats'].dump_stats(base + ".pstats")
+            with open(base + ".collapsed.txt", "w") as f:
+                for stack, samples in sorted(result['stacks'].items()):
+                    f.write(f"{stack} {samples}\n")
+            written.extend([base + ".pstats", base + ".collapsed.txt"])
+    return written
+
+def print_summary(output_dir):
+    """Write the profiles and print the functions with the most own time per label"""
+    written = write_profiles(output_dir)
+
+    print("\n" + "="*70)
+    print("PROFILE")
+    print("="*70)
+    for label, result in _profiles.items():
+        entries = {key: entry for key, entry in result['stats'].stats.items() if key[2] not in IDLE_FUNCTIONS}
+        total = sum(entry[2] for entry in entries.values())
+        print(f"\n{label}: {total:.2f}s busy across threads, {sum(result['stacks'].values())} stack samples")
+        top = sorted(entries.items(), key=lambda item: item[1][2], reverse=True)[:SUMMARY_TOP]
+        for (filename, line, function), entry in top:
+            share = entry[2] / total * 100 if total else 0
+            print(f"  {share:>5.1f}%  {entry[2]:>8.3f}s  {function} ({os.path.basename(filename)}:{line})")
+
+    print(f"\n✓ {len(written)} profile files written to {output_dir}")
+    print("  → pstats: python -m pstats <file>, or snakeviz")
+    print("  → collapsed stacks: flamegraph.pl <file> > flame.svg, or speedscope")
@@ -0,0 +1,216 @@
+import sqlite3
+import os
+import sys
+import time
+import argparse
+from datetime import date
+from dotenv import load_dotenv
+from create_database import get_physical_table, get_physical_julianday, create_metadata_tables
+from dqi_clean_status_cal import calculate_all_dqi_and_clean_status
+from data_insertion import publish_generation
+
+load_dotenv()
+
+# Database file path
+DB_PATH = os.getcwd() + os.getenv("DB_PATH", "/database/edc_metrics.db")
+
+# Time-relative columns: (table, day count column, reference date column, shift rows without a date)
+# Day counts are "today - reference date"; rows that have no reference date are aged by the
+# number of days elapsed since the previous refresh of their study's table instead.
+TIME_RELATIVE_COLUMNS = [
+    ('query_report', 'days_since_open', 'query_open_date', True),
+    ('query_report', 'days_since_response', 'query_response_date', False),
+    ('missing_visits', 'days_outstanding', 'projected_date', True),
+    ('missing_pages', 'days_missing', 'visit_date', True),
+    ('pi_signature_report', 'no_of_days', 'date_page_entered', True),
+]
+
+def get_db_connection():
+    """Create and return a database connection"""
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    return conn
+
+def load_previous_as_of(cursor):
+    """
+    As-of date of the previous refresh of each study's table: {(project_name, table): as_of}.
+    Tables ingested since (or never refreshed) have none, their counts are as exported.
+    """
+    create_metadata_tables(cursor)
+    cursor.execute("SELECT project_name, table_name, as_of FROM time_relative_as_of")
+    return {(project_name, table): as_of for project_name, table, as_of in cursor.fetchall()}
+
+def record_as_of(cursor, as_of, project_names):
+    """Store as_of as the date the studies' day counts were computed against"""
+    tables = sorted({table for table, _, _, _ in TIME_RELATIVE_COLUMNS})
+    cursor.executemany(
+        """INSERT INTO time_relative_as_of (project_name, table_name, as_of, refreshed_at)
+           VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+           ON CONFLICT(project_name, table_name) DO UPDATE SET
+               as_of = excluded.as_of, refreshed_at = excluded.refreshed_at""",
+        [(project_name, table, as_of) for project_name in project_names for table in tables]
+    )
+
+def refresh_day_counts(cursor, as_of, previous_as_of):
+    """Recompute day counts from stored dates and age undated rows by the elapsed days"""
+    for table, days_col, date_col, shift_undated in TIME_RELATIVE_COLUMNS:
+        # Normalized, clustered and epoch databases store the rows on a table behind the view
+        physical_table, project_filter = get_physical_table(cursor.connection, table)
+        date_julianday = get_physical_julianday(cursor.connection, table, date_col)
+        cursor.execute(f"""
+            UPDATE {physical_table}
+            SET {days_col} = CAST(julianday(?) - {date_julianday} AS INTEGER)
+            WHERE {date_col} IS NOT NULL AND {date_julianday} IS NOT NULL
+        """, (as_of,))
+        dated = cursor.rowcount
+
+        undated = 0
+        if shift_undated:
+            shifts = [
+                (as_of, previous, project_name)
+                for (project_name, previous_table), previous in previous_as_of.items()
+                if previous_table == table and previous != as_of
+            ]
+            cursor.executemany(f"""
+                UPDATE {physical_table}
+                SET {days_col} = COALESCE({days_col}, 0) + CAST(julianday(?) - julianday(?) AS INTEGER)
+                WHERE {date_col} IS NULL AND {project_filter}
+            """, shifts)
+            undated = cursor.rowcount
+
+        print(f"  {table}.{days_col}: {dated} rows recomputed, {max(undated, 0)} undated rows aged")
+
+def refresh_pending_since(cursor):
+    """Re-bucket the PI signature 'Pending since' label from the refreshed day counts"""
+    physical_table, _ = get_physical_table(cursor.connection, 'pi_signature_report')
+    cursor.execute(f"""
+        UPDATE {physical_table}
+        SET pending_since = CASE
+            WHEN pending_since IN ('0-7 days', '>7 days') THEN
+                CASE WHEN no_of_days <= 7 THEN '0-7 days' ELSE '>7 days' END
+            WHEN pending_since IN ('0-25 days', '26-45 days', '>45 days') THEN
+                CASE
+                    WHEN no_of_days <= 25 THEN '0-25 days'
+                    WHEN no_of_days <= 45 THEN '26-45 days'
+                    ELSE '>45 days'
+                END
+            ELSE pending_since
+        END
+        WHERE no_of_days IS NOT NULL
+    """)
+
+def refresh_signature_overdue_buckets(cursor):
+    """Recount the per-subject PI signature overdue buckets from pi_signature_report"""
+    cursor.execute("DROP TABLE IF EXISTS temp.pi_signature_buckets")
+    cursor.execute("""
+        CREATE TEMP TABLE pi_signature_buckets (
+            project_name TEXT,
+            site_id TEXT,
+            subject_id TEXT,
+            within_45_days INTEGER,
+            between_45_and_90_days INTEGER,
+            beyond_90_days INTEGER,
+            PRIMARY KEY (project_name, site_id, subject_id)
+        )
+    """)
+    cursor.execute("""
+        INSERT INTO pi_signature_buckets
+        SELECT project_name, site_id, subject_id,
+            SUM(CASE WHEN no_of_days < 45 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN no_of_days >= 45 AND no_of_days < 90 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN no_of_days >= 90 THEN 1 ELSE 0 END)
+        FROM pi_signature_report
+        GROUP BY project_name, site_id, subject_id
+    """)
+
+    # Only studies that shipped a PI Signature Report are recounted, the others keep CPID values
+    cursor.execute("""
+        UPDATE subject_level_metrics
+        SET crfs_overdue_within_45_days = COALESCE((
+                SELECT b.within_45_days FROM pi_signature_buckets b
+                WHERE b.project_name = subject_level_metrics.project_name
+                  AND b.site_id = subject_level_metrics.site_id
+                  AND b.subject_id = subject_level_metrics.subject_id), 0),
+            crfs_overdue_45_to_90_days = COALESCE((
+                SELECT b.between_45_and_90_days FROM pi_signature_buckets b
+                WHERE b.project_name = subject_level_metrics.project_name
+                  AND b.site_id = subject_level_metrics.site_id
+                  AND b.subject_id = subject_level_metrics.subject_id), 0),
+            crfs_overdue_beyond_90_days = COALESCE((
+                SELECT b.beyond_90_days FROM pi_signature_buckets b
+                WHERE b.project_name = subject_level_metrics.project_name
+                  AND b.site_id = subject_level_metrics.site_id
+                  AND b.subject_id = subject_level_metrics.subject_id), 0),
+            updated_at = CURRENT_TIMESTAMP
+        WHERE project_name IN (SELECT DISTINCT project_name FROM pi_signature_buckets)
+    """)
+    print(f"  subject_level_metrics: overdue signature buckets recounted for {cursor.rowcount} subjects")
+
+    cursor.execute("DROP TABLE temp.pi_signature_buckets")
+
+def refresh_time_relative_metrics(as_of=None):
+    """
+    Recompute all "today"-relative columns inside SQLite without re-reading Excel:
+    day counts, PI signature buckets, then DQI and Clean Status, and publish a new data
+    generation for every refreshed study so cached dashboard contexts are dropped
+    """
+    as_of = as_of or date.today().isoformat()
+
+    print("="*70)
+    print(f"TIME-RELATIVE REFRESH (as of {as_of})")
+    print("="*70)
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        conn.execute("BEGIN TRANSACTION")
+
+        previous_as_of = load_previous_as_of(cursor)
+        previous_by_study = {}
+        for (project_name, _), previous in previous_as_of.items():
+            previous_by_study.setdefault(project_name, set()).add(previous)
+        for project_name, previous in sorted(previous_by_study.items()):
+            print(f"  {project_name}: previous as-of {', '.join(sorted(previous))}")
+
+        refresh_day_counts(cursor, as_of, previous_as_of)
+        refresh_pending_since(cursor)
+        refresh_signature_overdue_buckets(cursor)
+        refreshed = [row[0] for row in cursor.execute(
+            "SELECT DISTINCT project_name FROM subject_level_metrics ORDER BY project_name"
+        )]
+        record_as_of(cursor, as_of, refreshed)
+
+        conn.execute("COMMIT")
+
+        # Subject metrics changed, so DQI and Clean Status follow
+        calculate_all_dqi_and_clean_status(conn)
+        if refreshed:
+            generation = publish_generation(refreshed, conn=conn)
+            print(f"✓ Data generation {generation} published for {len(refreshed)} studies")
+    except Exception:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Refresh time-relative columns, subject metrics and DQI from stored dates"
+    )
+    parser.add_argument("--as-of", help="Reference date (YYYY-MM-DD), defaults to today")
+    args = parser.parse_args()
+
+    if args.as_of:
+        try:
+            date.fromisoformat(args.as_of)
+        except ValueError:
+            print(f"Error: invalid --as-of date '{args.as_of}', expected YYYY-MM-DD")
+            sys.exit(1)
+
+    start_time = time.time()
+    refresh_time_relative_metrics(args.as_of)
+    print(f"\nTotal refresh time: {time.time() - start_time:.2f} seconds")
@@ -0,0 +1,252 @@
+import os
+import re
+import sys
+import json
+import time
+import atexit
+import sqlite3
+import argparse
+import threading
+from datetime import datetime
+from functools import lru_cache
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# SQL profiling, off unless one is set: a JSON report of every statement shape written at exit,
+# and the number of most expensive shapes printed at exit
+SQL_PROFILE_FILE = os.getenv("SQL_PROFILE_FILE", "")
+SQL_PROFILE_TOP = int(os.getenv("SQL_PROFILE_TOP", "0") or 0)
+
+# Default number of shapes printed when only the JSON report is requested
+DEFAULT_TOP = 15
+
+# Characters of a shape shown in the printed report (the JSON report keeps the full text)
+SHAPE_WIDTH = 90
+
+_config = {
+    'output_file': SQL_PROFILE_FILE,
+    'top': SQL_PROFILE_TOP,
+    'enabled': bool(SQL_PROFILE_FILE or SQL_PROFILE_TOP),
+}
+_lock = threading.Lock()
+_stats = {}
+_started = datetime.now()
+
+_STRING_LITERAL = re.compile(r"[xX]?'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b")
+_IN_LIST = re.compile(r"\bIN \(\?(?:, \?)+\)", re.IGNORECASE)
+_VALUES_ROWS = re.compile(r"(\([^()]*\))(?:, \1)+")
+_WHITESPACE = re.compile(r"\s+")
+
+def configure(output_file=None, top=None):
+    """Set the report outputs at runtime (overrides the environment); no outputs disables profiling"""
+    _config['output_file'] = output_file or ""
+    _config['top'] = top or 0
+    _config['enabled'] = bool(output_file or top)
+
+def is_enabled():
+    """Whether new connections are profiled"""
+    return _config['enabled']
+
+@lru_cache(maxsize=4096)
+def statement_shape(sql):
+    """
+    Statement text with literals replaced by ? and whitespace collapsed, so the same statement
+    run with different values (or written out by the trace callback with its bound values)
+    aggregates under one key. IN lists and multi-row VALUES collapse to a single item.
+    """
+    shape = _WHITESPACE.sub(" ", sql).strip().rstrip(";")
+    shape = _STRING_LITERAL.sub("?", shape)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _WHITESPACE.sub(" ", shape.replace("( ", "(").replace(" )", ")").replace(" ,", ","))
+    shape = re.sub(r",(?=\S)", ", ", shape)
+    shape = _IN_LIST.sub("IN (?, ...)", shape)
+    return _VALUES_ROWS.sub(r"\1, ...", shape)
+
+def record(shape, seconds=0.0, calls=0, executions=0, rows=0):
+    """Add one observation to a statement shape's totals"""
+    with _lock:
+        stats = _stats.get(shape)
+        if stats is None:
+            stats = _stats[shape] = {'calls': 0, 'executions': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'rows': 0}
+        stats['calls'] += calls
+        stats['executions'] += executions
+        stats['seconds'] += seconds
+        stats['rows'] += rows
+        if calls:
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+
+class ProfiledCursor(sqlite3.Cursor):
+    """Cursor timing every statement and fetch against the statement's shape"""
+
+    _shape = None
+
+    def _timed(self, method, sql, *args):
+        shape = statement_shape(sql)
+        self._shape = shape
+        connection = self.connection
+        connection._active_shape = shape
+        changes_before = connection.total_changes
+        start = time.perf_counter()
+        try:
+            return method(sql, *args)
+        finally:
+            elapsed = time.perf_counter() - start
+            connection._active_shape = None
+            # Rows changed, including writes by triggers (rowcount misses those behind views)
+            record(shape, elapsed, calls=1, rows=connection.total_changes - changes_before)
+
+    def _fetched(self, method, *args):
+        start = time.perf_counter()
+        result = method(*args)
+        if self._shape is not None:
+            rows = len(result) if isinstance(result, list) else int(result is not None)
+            record(self._shape, time.perf_counter() - start, rows=rows)
+        return result
+
+    def execute(self, sql, parameters=()):
+        return self._timed(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._timed(super().executemany, sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self._timed(super().executescript, sql_script)
+
+    def fetchone(self):
+        return self._fetched(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._fetched(super().fetchmany, size or self.arraysize)
+
+    def fetchall(self):
+        return self._fetched(super().fetchall)
+
+    def __next__(self):
+        start = time.perf_counter()
+        row = super().__next__()
+        if self._shape is not None:
+            record(self._shape, time.perf_counter() - start, rows=1)
+        return row
+
+class ProfiledConnection(sqlite3.Connection):
+    """
+    Connection whose statements are timed by ProfiledCursor. The trace callback counts what
+    SQLite actually executes: one execution per executemany row (plus trigger sub-statements,
+    which SQLite reports under the outer statement), and the implicit BEGINs.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._active_shape = None
+        self.set_trace_callback(self._trace)
+
+    def _trace(self, statement):
+        shape = self._active_shape
+        if shape is None or statement[:5].upper() == "BEGIN":
+            shape = statement_shape(statement)
+        record(shape, executions=1)
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or ProfiledCursor)
+
+    # Connection's own shortcuts create a plain cursor, bypassing cursor()
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+    def commit(self):
+        start = time.perf_counter()
+        self._active_shape = "COMMIT"
+        try:
+            super().commit()
+        finally:
+            self._active_shape = None
+            record("COMMIT", time.perf_counter() - start, calls=1)
+
+def connect(database, **kwargs):
+    """sqlite3.connect, returning a profiled connection while profiling is enabled"""
+    if _config['enabled']:
+        kwargs.setdefault('factory', ProfiledConnection)
+    return sqlite3.connect(database, **kwargs)
+
+def build_report():
+    """Totals of every statement shape, most expensive first"""
+    with _lock:
+        snapshot = {shape: dict(stats) for shape, stats in _stats.items()}
+    total_seconds = sum(stats['seconds'] for stats in snapshot.values())
+
+    statements = []
+    for shape, stats in sorted(snapshot.items(), key=lambda item: item[1]['seconds'], reverse=True):
+        statements.append({
+            'shape': shape,
+            'calls': stats['calls'],
+            'executions': stats['executions'],
+            'rows': stats['rows'],
+            'total_s': round(stats['seconds'], 6),
+            'mean_ms': round(stats['seconds'] / stats['calls'] * 1000, 4) if stats['calls'] else None,
+            'max_ms': round(stats['max_seconds'] * 1000, 4),
+            'share_pct': round(stats['seconds'] / total_seconds * 100, 2) if total_seconds else 0.0,
+        })
+
+    return {
+        'profile': 'sql',
+        'started': _started.isoformat(timespec='seconds'),
+        'finished': datetime.now().isoformat(timespec='seconds'),
+        'pid': os.getpid(),
+        'sqlite_version': sqlite3.sqlite_version,
+        'total_s': round(total_seconds, 6),
+        'statements': statements,
+    }
+
+def print_report(report, top=DEFAULT_TOP):
+    """Print the statement shapes that took the most time"""
+    statements = report['statements']
+    print("\n" + "="*70)
+    print("SQL PROFILE")
+    print("="*70)
+    print(f"{len(statements)} statement shapes, {report['total_s']:.3f}s in SQLite calls")
+    print(f"\nTop {min(top, len(statements))} by total time:")
+    print(f"  {'total s':>9}{'share':>8}{'calls':>8}{'execs':>9}{'rows':>10}{'mean ms':>10}  statement")
+    for statement in statements[:top]:
+        shape = statement['shape']
+        if len(shape) > SHAPE_WIDTH:
+            shape = shape[:SHAPE_WIDTH - 3] + "..."
+        mean_ms = f"{statement['mean_ms']:.3f}" if statement['mean_ms'] is not None else "-"
+        print(f"  {statement['total_s']:>9.3f}{statement['share_pct']:>7.1f}%{statement['calls']:>8}"
+              f"{statement['executions']:>9}{statement['rows']:>10}{mean_ms:>10}  {shape}")
+
+def write_report(path=None):
+    """Write the JSON report and print the top statements, as configured"""
+    if not _stats:
+        return
+    report = build_report()
+    path = path or _config['output_file']
+    if path:
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+    if _config['top']:
+        print_report(report, _config['top'])
+        if path:
+            print(f"\nSQL profile written to {path}")
+
+atexit.register(write_report)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print a SQL profile report written by an earlier run")
+    parser.add_argument("report", help="JSON report (SQL_PROFILE_FILE of the profiled run)")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP,
+                        help=f"Number of statement shapes to print (default: {DEFAULT_TOP})")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.report):
+        print(f"Error: report not found: {args.report}")
+        sys.exit(1)
+    with open(args.report) as f:
+        print_report(json.load(f), args.top)
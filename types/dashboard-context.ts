@@ -32,6 +32,7 @@ export interface DashboardContext {
         totalSites: number;
         dataQuality: "complete" | "partial" | "loading";
         loadedAt: string;
+        dataGeneration?: number | null; // Oldest X-Data-Generation of the data above, null when unknown
     };
 }
 
@@ -0,0 +1,166 @@
+import zipfile
+import posixpath
+from xml.etree.ElementTree import iterparse
+
+# Workbook metadata read straight from the xlsx zip (sheet list, dimensions, header rows), without
+# loading a sheet
+
+SHEET_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PACKAGE_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+# Average size of a cell in sheet XML (for sheets without a dimension record), and the smallest
+# a cell can take (a dimension over formatted but empty ranges can claim more cells than that)
+XML_BYTES_PER_CELL = 40
+MIN_XML_BYTES_PER_CELL = 16
+
+def column_index(cell_ref):
+    """Zero-based column of a cell reference such as 'AB12'"""
+    index = 0
+    for char in cell_ref:
+        if not char.isalpha():
+            break
+        index = index * 26 + ord(char.upper()) - 64
+    return index - 1
+
+def read_sheet_paths(zf):
+    """Sheets of a workbook in order: [(sheet name, path of its part in the zip)]"""
+    with zf.open("xl/_rels/workbook.xml.rels") as f:
+        targets = {
+            rel.get("Id"): rel.get("Target")
+            for _, rel in iterparse(f) if rel.tag == PACKAGE_REL_NS + "Relationship"
+        }
+    sheets = []
+    with zf.open("xl/workbook.xml") as f:
+        for _, elem in iterparse(f):
+            if elem.tag == SHEET_NS + "sheet":
+                target = targets.get(elem.get(REL_NS + "id"), "")
+                path = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+                sheets.append((elem.get("name"), path))
+    return sheets
+
+def read_head_rows(zf, sheet_path, max_rows):
+    """
+    First max_rows rows of a sheet as {column index: (cell type, raw value)}, streamed from the
+    zip so the rest of the sheet is never decompressed
+    """
+    rows = []
+    with zf.open(sheet_path) as f:
+        for _, elem in iterparse(f):
+            if elem.tag != SHEET_NS + "row":
+                continue
+            row_number = int(elem.get("r", len(rows) + 1))
+            if row_number > max_rows:
+                break
+            cells = {}
+            for position, cell in enumerate(elem.iter(SHEET_NS + "c")):
+                ref = cell.get("r")
+                cell_type = cell.get("t", "n")
+                if cell_type == "inlineStr":
+                    value = "".join(t.text or "" for t in cell.iter(SHEET_NS + "t"))
+                else:
+                    value = cell.findtext(SHEET_NS + "v")
+                if value is not None:
+                    cells[column_index(ref) if ref else position] = (cell_type, value)
+            rows.extend({} for _ in range(row_number - len(rows) - 1))
+            rows.append(cells)
+            elem.clear()
+    return rows
+
+def string_item_text(item):
+    """Displayed text of a shared string item, plain or rich text (phonetic runs left out)"""
+    text = item.findtext(SHEET_NS + "t")
+    if text is not None:
+        return text
+    return "".join(run.findtext(SHEET_NS + "t") or "" for run in item.findall(SHEET_NS + "r"))
+
+def read_shared_strings(zf, indices):
+    """Text of the given shared strings, reading the string table only as far as the last one"""
+    strings = {}
+    if not indices or "xl/sharedStrings.xml" not in zf.namelist():
+        return strings
+    last = max(indices)
+    with zf.open("xl/sharedStrings.xml") as f:
+        index = 0
+        for _, elem in iterparse(f):
+            if elem.tag != SHEET_NS + "si":
+                continue
+            if index in indices:
+                strings[index] = string_item_text(elem)
+            elem.clear()
+            index += 1
+            if index > last:
+                break
+    return strings
+
+def cell_text(cell, strings):
+    """Text of a head row cell (cell type, raw value), resolving shared strings; None for no cell"""
+    if cell is None:
+        return None
+    cell_type, value = cell
+    return strings.get(int(value)) if cell_type == "s" else value
+
+def match_header_row(rows, strings, signature):
+    """
+    Index of the first of the head rows whose cells hold the texts of a header signature
+    ({column index: text}), None when none does
+    """
+    for index, cells in enumerate(rows):
+        if all(cell_text(cells.get(column), strings) == text for column, text in signature.items()):
+            return index
+    return None
+
+def find_header_row(path, sheet, signature, max_rows):
+    """
+    Zero-based row of a sheet (a name, or 0 for the first sheet) matching a header signature,
+    searching only its first max_rows rows and the shared strings they use; None when not found
+    """
+    with zipfile.ZipFile(path) as zf:
+        sheets = read_sheet_paths(zf)
+        sheet_path = (sheets[0][1] if sheets else None) if sheet == 0 else dict(sheets).get(sheet)
+        if sheet_path not in zf.namelist():
+            return None
+        rows = read_head_rows(zf, sheet_path, max_rows)
+        strings = read_shared_strings(zf, {
+            int(value) for cells in rows for cell_type, value in cells.values() if cell_type == "s"
+        })
+    return match_header_row(rows, strings, signature)
+
+def range_cells(ref):
+    """Cells in a range reference such as 'A1:AR111', None for a single cell or no range"""
+    if ":" not in (ref or ""):
+        return None
+    start, end = ref.split(":", 1)
+    rows = int("".join(filter(str.isdigit, end)) or 0) - int("".join(filter(str.isdigit, start)) or 0) + 1
+    columns = column_index(end) - column_index(start) + 1
+    return max(rows, 0) * max(columns, 0)
+
+def sheet_dimension(zf, sheet_path):
+    """Cells in a sheet's <dimension> record, read from the start of its part; None without one"""
+    with zf.open(sheet_path) as f:
+        for _, elem in iterparse(f, events=("start",)):
+            if elem.tag == SHEET_NS + "dimension":
+                return range_cells(elem.get("ref"))
+            if elem.tag == SHEET_NS + "sheetData":
+                return None
+    return None
+
+def sheet_costs(path):
+    """
+    Estimated parse cost of each sheet of a workbook, in sheet order: [(sheet name, cells)].
+    The dimension record gives the cells, bounded by what the size of the sheet XML can hold;
+    sheets without a usable one (some writers only store 'A1') are estimated from that size.
+    """
+    costs = []
+    with zipfile.ZipFile(path) as zf:
+        names = set(zf.namelist())
+        for sheet_name, sheet_path in read_sheet_paths(zf):
+            if sheet_path not in names:
+                costs.append((sheet_name, 0))
+                continue
+            size = zf.getinfo(sheet_path).file_size
+            cells = sheet_dimension(zf, sheet_path)
+            if cells is None:
+                cells = size // XML_BYTES_PER_CELL
+            costs.append((sheet_name, min(cells, size // MIN_XML_BYTES_PER_CELL)))
+    return costs